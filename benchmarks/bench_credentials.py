@@ -0,0 +1,81 @@
+"""Benchmark CredentialManager.get_credential latency: cached vs re-read/decrypt-all
+
+Usage:
+    python benchmarks/bench_credentials.py [--keys 12] [--lookups 5000]
+
+"uncached" replays the previous lookup path (read the JSON file and
+Fernet-decrypt every value per call); "cold" is the first lookup after another
+process replaced the file (one read, one decrypt); "cached" is every lookup after that.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from loguru import logger
+
+from src.utils.credentials import CredentialManager
+
+
+def uncached_get(manager: CredentialManager, key: str):
+    with open(manager.creds_file, "r") as f:
+        encrypted = json.load(f)
+    return {name: manager.decrypt(token) for name, token in encrypted.items()}.get(key)
+
+
+def rewrite_externally(manager: CredentialManager) -> None:
+    """Replace the file the way another process would, so this process's cache is stale"""
+    contents = manager.creds_file.read_text()
+    replacement = manager.creds_file.with_name("replacement.json")
+    replacement.write_text(contents)
+    replacement.replace(manager.creds_file)
+
+
+def timed(fn, runs: int):
+    """Per-call latencies in microseconds"""
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def report(label: str, latencies) -> None:
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if len(latencies) >= 100 else latencies[-1]
+    print(f"  {label:<10} median {statistics.median(latencies):>9.2f} µs   p99 {p99:>9.2f} µs")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=12)
+    parser.add_argument("--lookups", type=int, default=5000)
+    args = parser.parse_args()
+    logger.remove()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = CredentialManager(CredentialManager.generate_key())
+        manager.creds_file = Path(tmp) / "encrypted_creds.json"
+        manager.save_credentials({f"portal{n}_password": f"secret-{n}" for n in range(args.keys)})
+
+        print(f"🔑 {args.keys} credentials, {args.lookups:,} lookups")
+        report("uncached", timed(lambda: uncached_get(manager, "portal3_password"), args.lookups))
+
+        cold_latencies = []
+        for _ in range(min(args.lookups, 200)):
+            rewrite_externally(manager)
+            cold_latencies.append(timed(lambda: manager.get_credential("portal3_password"), 1)[0])
+        report("cold", cold_latencies)
+        report("cached", timed(lambda: manager.get_credential("portal3_password"), args.lookups))
+
+
+if __name__ == "__main__":
+    main()
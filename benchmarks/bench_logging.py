@@ -0,0 +1,107 @@
+"""Benchmark log throughput: per-file loguru sinks vs the routed queue sink
+
+Usage:
+    python benchmarks/bench_logging.py [--records 100000] [--threads 4] [--queue-size 10000]
+
+Each mode logs the same mix of scraper, database and application records
+from several threads into a temporary logs directory and reports records
+per second as seen by the logging threads ("caller") and until every record
+is on disk ("drained").
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from loguru import logger
+
+from src.utils.log_sink import LogRoute, RoutedLogSink
+
+FILE_FORMAT = (
+    "<level>{level: <8}</level> | "
+    "{time:YYYY-MM-DD HH:mm:ss} | "
+    "<cyan>{name}:{function}:{line}</cyan> | "
+    "<level>{message}</level>"
+)
+MODULES = ("scraper.sites.linkedin", "database.engine", "applier.form_filler", "scraper.sites.indeed")
+
+
+def add_legacy_sinks(logs_dir: Path) -> None:
+    """The previous configuration: one synchronous loguru file sink per log file"""
+    common = {"format": FILE_FORMAT, "rotation": "100 MB", "compression": "zip"}
+    logger.add(logs_dir / "app.log", level="INFO", retention="7 days", **common)
+    logger.add(logs_dir / "scraper.log", level="INFO", retention="7 days",
+               filter=lambda record: "scraper" in record.get("name", "").lower(), **common)
+    logger.add(logs_dir / "database.log", level="INFO", retention="7 days",
+               filter=lambda record: "database" in record.get("name", "").lower(), **common)
+    logger.add(logs_dir / "errors.log", level="ERROR", retention="30 days", **common)
+
+
+def add_routed_sink(logs_dir: Path, asynchronous: bool, queue_size: int, policy: str, fmt: str) -> RoutedLogSink:
+    sink = RoutedLogSink([
+        LogRoute(str(logs_dir / "app.log"), level=20),
+        LogRoute(str(logs_dir / "scraper.log"), level=20, name_contains="scraper"),
+        LogRoute(str(logs_dir / "database.log"), level=20, name_contains="database"),
+        LogRoute(str(logs_dir / "errors.log"), level=40, retention_days=30),
+    ], fmt=fmt, asynchronous=asynchronous, queue_size=queue_size, policy=policy)
+    logger.add(sink, format="{message}", level=sink.min_level)
+    return sink
+
+
+def produce(records: int, threads: int) -> float:
+    """Log ``records`` records from ``threads`` threads; returns elapsed seconds"""
+    loggers = [logger.patch(lambda record, name=name: record.update(name=name)) for name in MODULES]
+
+    def work(offset: int) -> None:
+        for n in range(offset, records, threads):
+            log = loggers[n % len(loggers)]
+            if n % 100 == 0:
+                log.error("Application {} failed: timeout after {} ms", n, 30000)
+            else:
+                log.info("Scraped job {} from page {} ({} fields)", n, n // 25, 12)
+
+    workers = [threading.Thread(target=work, args=(offset,)) for offset in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def run_mode(label: str, args, setup) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        logger.remove()
+        sink = setup(Path(tmp))
+        start = time.perf_counter()
+        caller = produce(args.records, args.threads)
+        logger.remove()  # Stops sinks: drains the queue and closes files
+        drained = time.perf_counter() - start
+        dropped = f"  dropped {sink.dropped:,}" if sink is not None and sink.policy == "drop" else ""
+        print(f"{label:<26} caller {args.records / caller:>10,.0f} rec/s   "
+              f"drained {args.records / drained:>10,.0f} rec/s{dropped}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"📝 {args.records:,} records from {args.threads} threads")
+    run_mode("loguru per-file sinks", args, lambda logs: add_legacy_sinks(logs))
+    run_mode("routed, inline", args, lambda logs: add_routed_sink(logs, False, args.queue_size, "block", "text"))
+    run_mode("routed, queue (block)", args, lambda logs: add_routed_sink(logs, True, args.queue_size, "block", "text"))
+    run_mode("routed, queue (drop)", args, lambda logs: add_routed_sink(logs, True, args.queue_size, "drop", "text"))
+    run_mode("routed, queue, JSON lines", args, lambda logs: add_routed_sink(logs, True, args.queue_size, "block", "json"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark DatabaseManager.search_jobs over synthetic postings
+
+Usage:
+    python benchmarks/bench_search.py [--rows 200000] [--queries 50]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine
+
+from src.database.engine import DatabaseManager
+from src.database.models import Base
+
+TECH_TERMS = (
+    "spark hadoop airflow kafka python sql warehouse dbt snowflake foundry palantir ontology react "
+    "typescript node kubernetes terraform aws azure gcp scala java golang rust django flask fastapi "
+    "postgres mongodb redis elasticsearch tableau looker powerbi pytorch tensorflow sklearn mlflow "
+    "databricks bigquery redshift glue lambda docker jenkins gitlab graphql grpc"
+).split()
+QUERIES = ["Palantir Foundry and Spark", "kafka airflow", "react typescript", "databricks mlflow pytorch",
+           "terraform OR kubernetes", "snowflake dbt warehouse"]
+
+
+def make_rows(count: int, seed: int = 7):
+    """Postings with ~100 filler words from a 5,000-word Zipf-like vocabulary plus 6 tech terms"""
+    rng = random.Random(seed)
+    filler = [f"w{n}" for n in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(filler))]
+    for n in range(count):
+        words = rng.choices(filler, weights=weights, k=100) + rng.sample(TECH_TERMS, 6)
+        rng.shuffle(words)
+        yield {
+            "url": f"https://www.indeed.com/viewjob?jk={n:012x}",
+            "company": f"Company {n % 20000}",
+            "title": f"{rng.choice(['Data', 'Platform', 'Software', 'ML'])} Engineer {n}",
+            "location": rng.choice(["Remote", "Singapore", "New York", "San Francisco"]),
+            "description": " ".join(words),
+            "source": rng.choice(["linkedin", "indeed", "jobstreet"]),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        manager = DatabaseManager(bind=engine)
+
+        start = time.perf_counter()
+        manager.bulk_upsert_jobs(make_rows(args.rows))
+        print(f"🔎 Indexed {args.rows:,} postings in {time.perf_counter() - start:.1f}s")
+
+        for query in QUERIES:
+            timings = []
+            for _ in range(args.queries):
+                start = time.perf_counter()
+                results = manager.search_jobs(query, limit=20)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{query:<30} median {statistics.median(timings):7.2f} ms   "
+                  f"max {max(timings):7.2f} ms   ({len(results)} results)")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Benchmark concurrent SQLite reads/writes: default profile vs production profile
+
+The default profile shares one StaticPool connection and commits every write
+on the calling thread. The production profile uses WAL, a read connection
+pool and DatabaseManager.write_queue (one writer thread, group commits).
+
+Usage:
+    python benchmarks/bench_sqlite_concurrency.py [--readers 4] [--writers 4] [--seconds 3]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import func, insert, select
+
+from src.database.engine import DatabaseManager, create_db_engine
+from src.database.models import Application, ApplicationLog, Base, Job
+
+SEED_APPLICATIONS = 200
+
+
+def seed(manager: DatabaseManager) -> None:
+    """Create jobs with one application each"""
+    manager.bulk_upsert_jobs(
+        {
+            "url": f"https://example.com/job/{n}",
+            "company": f"Company {n}",
+            "title": "Data Engineer",
+            "location": "Remote",
+            "source": "linkedin",
+        }
+        for n in range(SEED_APPLICATIONS)
+    )
+    with manager.engine.begin() as connection:
+        job_ids = connection.execute(select(Job.id)).scalars().all()
+        connection.execute(insert(Application), [{"job_id": job_id, "status": "applying"} for job_id in job_ids])
+
+
+def log_insert(n: int):
+    statement = insert(ApplicationLog).values(
+        application_id=n % SEED_APPLICATIONS + 1,
+        event_type="field_filled",
+        message=f"Field {n} filled",
+    )
+    return lambda connection: connection.execute(statement)
+
+
+def run(profile: str, readers: int, writers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(bind=create_db_engine(f"sqlite:///{tmp}/bench.db", profile))
+        Base.metadata.create_all(bind=manager.engine)
+        seed(manager)
+
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def count(key: str) -> None:
+            with lock:
+                counts[key] += 1
+
+        def reader(worker: int) -> None:
+            n = worker
+            while not stop.is_set():
+                n += 1
+                try:
+                    with manager.engine.connect() as connection:
+                        connection.execute(
+                            select(func.count()).select_from(ApplicationLog).where(
+                                ApplicationLog.application_id == n % SEED_APPLICATIONS + 1
+                            )
+                        ).scalar()
+                    count("reads")
+                except Exception:
+                    count("errors")
+
+        def writer(worker: int) -> None:
+            n = worker * 10_000_000
+            while not stop.is_set():
+                n += 1
+                try:
+                    if profile == "production":
+                        manager.write_queue.execute(log_insert(n))
+                    else:
+                        with manager.engine.begin() as connection:
+                            log_insert(n)(connection)
+                    count("writes")
+                except Exception:
+                    count("errors")
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        manager.close()
+
+    return {key: value / seconds if key != "errors" else value for key, value in counts.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--profile", choices=["default", "production"], help="Run one profile in-process")
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run(args.profile, args.readers, args.writers, args.seconds)))
+        return
+
+    print(f"🔀 SQLite concurrency: {args.readers} readers, {args.writers} writers, {args.seconds}s per profile")
+    for profile in ("default", "production"):
+        # Each profile runs in its own interpreter: threads sharing the default
+        # profile's single connection can crash the process outright
+        completed = subprocess.run(
+            [sys.executable, __file__, "--profile", profile, "--readers", str(args.readers),
+             "--writers", str(args.writers), "--seconds", str(args.seconds)],
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            print(f"{profile:<12} ✗ crashed (exit code {completed.returncode})")
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(
+            f"{profile:<12} reads {result['reads']:>9,.0f}/s   "
+            f"writes {result['writes']:>8,.0f}/s   errors {result['errors']:,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
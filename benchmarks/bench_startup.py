@@ -0,0 +1,69 @@
+"""Measure CLI startup: wall time per command and the slowest imports
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 15]
+
+Runs ``src/main.py --help`` and ``src/main.py status`` (against a fresh
+SQLite database in a temporary directory) and parses ``python -X importtime``
+output for the modules with the largest cumulative import time.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+project_root = Path(__file__).parent.parent
+MAIN = project_root / "src" / "main.py"
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds per module from -X importtime output"""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        cumulative[name] = int(cumulative_us)
+    return cumulative
+
+
+def run(args: List[str], cwd: str, env: Dict[str, str]) -> Tuple[float, str]:
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True, text=True)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{result.stderr[-2000:]}")
+    return elapsed_ms, result.stderr
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "DATABASE_URL": "sqlite:///database/jobs.db"}
+        run([str(MAIN), "init-db"], tmp, env)
+
+        baseline = statistics.median(run(["-c", "pass"], tmp, env)[0] for _ in range(args.runs))
+        print(f"🚀 Interpreter startup: {baseline:.0f} ms")
+        for command in ("--help", "status"):
+            timings = [run([str(MAIN), command], tmp, env)[0] for _ in range(args.runs)]
+            print(f"  main.py {command:<8} median {statistics.median(timings):>6.0f} ms  "
+                  f"min {min(timings):>6.0f} ms")
+
+            _, stderr = run(["-X", "importtime", str(MAIN), command], tmp, env)
+            slowest = sorted(parse_importtime(stderr).items(), key=lambda item: item[1], reverse=True)
+            for name, micros in slowest[:args.top]:
+                print(f"    {micros / 1000:>8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
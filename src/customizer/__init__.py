@@ -1,12 +1,38 @@
 """Customizer module - Resume customization and PDF generation"""
 
-from .template_manager import TemplateManager, ResumeTemplate, template_manager
-from .resume_customizer import ResumeCustomizer, customizer
+from .template_manager import TemplateManager, ResumeTemplate, get_template_manager
+from .keyword_matcher import KeywordMatcher, TemplateMatch
+from .template_cache import ParsedTemplate, TemplateCache, TemplateSection
+from .llm_cache import LLMResponseCache, cache_key
+from .llm_client import LLMClient
+from .pdf_renderer import PDFCache, PDFRenderer
+from .resume_customizer import ResumeCustomizer, get_customizer
 
 __all__ = [
     "TemplateManager",
     "ResumeTemplate",
     "template_manager",
+    "get_template_manager",
+    "KeywordMatcher",
+    "TemplateMatch",
+    "ParsedTemplate",
+    "TemplateCache",
+    "TemplateSection",
+    "LLMResponseCache",
+    "LLMClient",
+    "cache_key",
+    "PDFCache",
+    "PDFRenderer",
     "ResumeCustomizer",
     "customizer",
+    "get_customizer",
 ]
+
+
+def __getattr__(name: str):
+    # template_manager / customizer instances are created on first access
+    if name == "template_manager":
+        return get_template_manager()
+    if name == "customizer":
+        return get_customizer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
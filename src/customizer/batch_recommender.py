@@ -0,0 +1,281 @@
+"""Batch template recommendation: score many jobs against every template at once
+
+Each job's title + description is reduced to counts of the registry's
+keywords (a sparse job x term matrix), and template scores for the whole
+batch come from one matrix product with the term x template matrix, plus
+the role-match and priority bonuses of ``KeywordMatcher``:
+
+    score = KEYWORD_SCORE * weight(job, keyword) @ keywords(template)
+            + ROLE_MATCH_SCORE * role_match + priority
+
+With ``weighting="none"`` the weight is 1 for every keyword present, which
+reproduces ``KeywordMatcher.match`` exactly. ``"tfidf"`` uses
+(1 + ln tf) * idf and ``"bm25"`` Okapi BM25, both with document
+frequencies taken from the batch, so keywords that appear in every posting
+count less than distinctive ones.
+
+Keywords are counted without a regex scan: the text is split into maximal
+word-character runs (``str.translate`` + ``split``), single-word keywords
+are found with a set intersection and multi-word keywords ("big data",
+"full-stack") are only searched for when all of their words are present.
+The counts equal ``KeywordMatcher.keyword_hits``.
+
+NumPy and SciPy are optional: without NumPy the same scores are computed
+per job in Python; without SciPy the job x term matrix is dense.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .keyword_matcher import KEYWORD_SCORE, ROLE_MATCH_SCORE, KeywordMatcher
+
+try:
+    import numpy as np
+except ImportError:  # Optional: per-job scoring in Python
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError:  # Optional: dense job x term matrix
+    sparse = None
+
+WEIGHTINGS = ("none", "tfidf", "bm25")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+WORD_RUN = re.compile(r"\w+")
+# ASCII characters that are neither word characters nor whitespace -> space
+_ASCII_SEPARATORS = str.maketrans({
+    chr(code): " " for code in range(128)
+    if not (chr(code).isalnum() or chr(code) == "_" or chr(code).isspace())
+})
+
+
+def job_text(job: Any) -> Tuple[str, str]:
+    """(title, description) of a (title, description) pair, a job dict or a Job"""
+    if isinstance(job, (tuple, list)):
+        title, description = job
+    elif isinstance(job, dict):
+        title, description = job.get("title"), job.get("description")
+    else:
+        title, description = getattr(job, "title", None), getattr(job, "description", None)
+    return title or "", description or ""
+
+
+def is_word_char(char: str) -> bool:
+    """Same test as the regex class ``\\w``"""
+    return char.isalnum() or char == "_"
+
+
+def count_phrase(text: str, phrase: str) -> int:
+    """Occurrences of ``phrase`` in ``text`` not preceded or followed by a word character (overlaps count)"""
+    count = 0
+    size = len(phrase)
+    pos = text.find(phrase)
+    while pos != -1:
+        end = pos + size
+        if (pos == 0 or not is_word_char(text[pos - 1])) and (end == len(text) or not is_word_char(text[end])):
+            count += 1
+        pos = text.find(phrase, pos + 1)
+    return count
+
+
+class TermCounter:
+    """Counts occurrences of fixed terms with KeywordMatcher's word-boundary rules"""
+
+    def __init__(self, terms: Sequence[str]):
+        self.terms = list(terms)
+        self.index = {term: i for i, term in enumerate(self.terms)}
+        self._single = frozenset(term for term in self.terms if WORD_RUN.fullmatch(term))
+        # Multi-word terms, checked only when every word run of the term is in the text
+        self._phrases = [(term, frozenset(WORD_RUN.findall(term))) for term in self.terms if term not in self._single]
+        # Every word run a term needs: intersecting tokens with this beats building a set of all tokens
+        self._vocabulary = self._single.union(*(runs for _, runs in self._phrases))
+
+    def tokens(self, text: str) -> List[str]:
+        """Maximal word-character runs of ``text`` (what ``\\w+`` would find), in no particular order"""
+        tokens = text.translate(_ASCII_SEPARATORS).split()
+        if text.isascii():
+            return tokens
+        # Non-ASCII punctuation (bullets, curly quotes, dashes) still joins runs; split those tokens
+        odd = [token for token in tokens if not token.isalnum()]
+        if not odd:
+            return tokens
+        return [token for token in tokens if token.isalnum()] + [run for token in odd for run in WORD_RUN.findall(token)]
+
+    def count(self, text: str) -> Tuple[Dict[int, int], int]:
+        """Term index -> occurrences in lowercased ``text``, and its length in word runs"""
+        tokens = self.tokens(text)
+        present = self._vocabulary.intersection(tokens)
+        counts = {self.index[term]: tokens.count(term) for term in present.intersection(self._single)}
+        for term, runs in self._phrases:
+            if runs <= present:
+                hits = count_phrase(text, term)
+                if hits:
+                    counts[self.index[term]] = hits
+        return counts, len(tokens)
+
+
+@dataclass
+class BatchScores:
+    """Template scores for a batch of jobs"""
+    filenames: List[str]  # Template order of the score columns
+    terms: List[str]  # Keyword order of the term counts
+    scores: Any  # (jobs x templates) ndarray, or list of lists without NumPy
+    term_counts: List[Dict[int, int]]  # Per job: term index -> occurrences
+
+    def __len__(self) -> int:
+        return len(self.term_counts)
+
+    def ranked(self, job_index: int, top_n: Optional[int] = None) -> List[Tuple[str, float]]:
+        """(filename, score) pairs with a positive score for one job, best first (ties keep registry order)"""
+        row = [float(score) for score in self.scores[job_index]]
+        ranked = sorted(((name, score) for name, score in zip(self.filenames, row) if score > 0),
+                        key=lambda item: item[1], reverse=True)
+        return ranked if top_n is None else ranked[:top_n]
+
+    def top(self, top_n: int = 3) -> List[List[str]]:
+        """Best ``top_n`` template filenames per job (only positive scores)"""
+        if np is None or not isinstance(self.scores, np.ndarray):
+            return [[name for name, _ in self.ranked(i, top_n)] for i in range(len(self))]
+        order = np.argsort(-self.scores, axis=1, kind="stable")[:, :top_n]
+        best = np.take_along_axis(self.scores, order, axis=1)
+        return [[self.filenames[j] for j, score in zip(row, row_scores) if score > 0]
+                for row, row_scores in zip(order.tolist(), best.tolist())]
+
+    def keywords_match(self, job_index: int) -> Dict[str, int]:
+        """Matched keywords -> hit counts for one job, most frequent first (for Job.keywords_match)"""
+        counts = self.term_counts[job_index]
+        return {self.terms[i]: count for i, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))}
+
+
+class BatchRecommender:
+    """Scores batches of jobs against a fixed set of resume templates"""
+
+    def __init__(self, templates: Iterable):
+        """Compile the term and template matrices
+
+        Args:
+            templates: ResumeTemplate objects (filename, target_roles, keywords, priority)
+        """
+        self.templates = list(templates)
+        self.matcher = KeywordMatcher(self.templates)
+        self.filenames = [template.filename for template in self.templates]
+        self.terms = sorted({keyword.lower() for template in self.templates for keyword in template.keywords})
+        self.counter = TermCounter(self.terms)
+        self.priorities = [template.priority for template in self.templates]
+        # term index -> [(template index, times the template lists the keyword)]
+        self.term_templates: List[List[Tuple[int, int]]] = [[] for _ in self.terms]
+        for j, template in enumerate(self.templates):
+            listed: Dict[int, int] = {}
+            for keyword in template.keywords:
+                i = self.counter.index[keyword.lower()]
+                listed[i] = listed.get(i, 0) + 1
+            for i, times in listed.items():
+                self.term_templates[i].append((j, times))
+        self._role_templates: Dict[str, List[int]] = {}
+        for j, template in enumerate(self.templates):
+            for role in template.target_roles:
+                self._role_templates.setdefault(role.lower(), []).append(j)
+
+    def score(self, jobs: Iterable, weighting: str = "none") -> BatchScores:
+        """Score every job against every template
+
+        Args:
+            jobs: (title, description) pairs, job dicts or Job objects
+            weighting: "none" (KeywordMatcher scores), "tfidf" or "bm25"
+
+        Returns:
+            BatchScores with a (jobs x templates) score matrix
+        """
+        if weighting not in WEIGHTINGS:
+            raise ValueError(f"Unknown weighting '{weighting}'. Expected one of: {', '.join(WEIGHTINGS)}")
+
+        term_counts: List[Dict[int, int]] = []
+        lengths: List[int] = []
+        role_matches: List[List[int]] = []
+        roles_by_title: Dict[str, List[int]] = {}  # Titles repeat a lot within a day's postings
+        for job in jobs:
+            title, description = job_text(job)
+            title = title.lower()
+            counts, length = self.counter.count(f"{title} {description.lower()}")
+            term_counts.append(counts)
+            lengths.append(length)
+            matched = roles_by_title.get(title)
+            if matched is None:
+                matched = roles_by_title[title] = sorted(
+                    {j for role in self.matcher.role_hits(title) for j in self._role_templates[role]}
+                )
+            role_matches.append(matched)
+
+        if np is None:
+            scores = self._score_python(term_counts, lengths, role_matches, weighting)
+        else:
+            scores = self._score_numpy(term_counts, lengths, role_matches, weighting)
+        return BatchScores(self.filenames, self.terms, scores, term_counts)
+
+    def _score_numpy(self, term_counts, lengths, role_matches, weighting):
+        jobs, terms, templates = len(term_counts), len(self.terms), len(self.templates)
+        indptr = np.zeros(jobs + 1, dtype=np.int64)
+        np.cumsum([len(counts) for counts in term_counts], out=indptr[1:])
+        indices = np.fromiter((i for counts in term_counts for i in counts), dtype=np.int64, count=int(indptr[-1]))
+        tf = np.fromiter((n for counts in term_counts for n in counts.values()), dtype=np.float64, count=int(indptr[-1]))
+        rows = np.repeat(np.arange(jobs), np.diff(indptr))
+
+        if weighting == "none":
+            weights = np.ones_like(tf)
+        else:
+            df = np.bincount(indices, minlength=terms)
+            if weighting == "tfidf":
+                idf = np.log((1 + jobs) / (1 + df)) + 1
+                weights = (1 + np.log(tf)) * idf[indices]
+            else:
+                idf = np.log(1 + (jobs - df + 0.5) / (df + 0.5))
+                doc_length = np.asarray(lengths, dtype=np.float64)
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_length / max(doc_length.mean(), 1.0))
+                weights = idf[indices] * tf * (BM25_K1 + 1) / (tf + norm[rows])
+
+        template_terms = np.zeros((terms, templates), dtype=np.float64)
+        for i, listed in enumerate(self.term_templates):
+            for j, times in listed:
+                template_terms[i, j] = times
+        if sparse is not None:
+            matrix = sparse.csr_matrix((weights, indices, indptr), shape=(jobs, terms))
+        else:
+            matrix = np.zeros((jobs, terms), dtype=np.float64)
+            matrix[rows, indices] = weights
+        scores = np.asarray(matrix @ template_terms) * KEYWORD_SCORE
+
+        role_rows = [i for i, matched in enumerate(role_matches) for _ in matched]
+        role_cols = [j for matched in role_matches for j in matched]
+        scores[role_rows, role_cols] += ROLE_MATCH_SCORE
+        scores += np.asarray(self.priorities, dtype=np.float64)
+        return scores.round().astype(np.int64) if weighting == "none" else scores
+
+    def _score_python(self, term_counts, lengths, role_matches, weighting):
+        jobs = len(term_counts)
+        df: Dict[int, int] = {}
+        for counts in term_counts:
+            for i in counts:
+                df[i] = df.get(i, 0) + 1
+        average_length = max(sum(lengths) / jobs, 1.0) if jobs else 1.0
+
+        def weight(i: int, tf: int, length: int) -> float:
+            if weighting == "tfidf":
+                return (1 + math.log(tf)) * (math.log((1 + jobs) / (1 + df[i])) + 1)
+            idf = math.log(1 + (jobs - df[i] + 0.5) / (df[i] + 0.5))
+            return idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length))
+
+        all_scores = []
+        for counts, length, matched in zip(term_counts, lengths, role_matches):
+            scores = list(self.priorities)
+            for j in matched:
+                scores[j] += ROLE_MATCH_SCORE
+            for i, tf in counts.items():
+                w = 1 if weighting == "none" else weight(i, tf, length)
+                for j, times in self.term_templates[i]:
+                    scores[j] += KEYWORD_SCORE * w * times
+            all_scores.append(scores)
+        return all_scores
@@ -0,0 +1,286 @@
+"""Concurrent resume customization for queued applications
+
+``CustomizationRunner`` runs ``max_concurrency`` asyncio workers. Each one
+leases the next ``queued`` application (``AsyncDatabaseManager.claim_next``,
+so several runner processes can share the queue), selects a template, asks
+the LLM to tailor it and writes the result to
+``ResumeCustomizer.generate_output_path``. The prompt gets the compacted
+job description (see jd_compactor.py), computed once per job and stored in
+job_compactions. The application then moves to
+``ready`` with ``resume_template`` and ``tailored_resume_path`` set, or to
+``failed`` with the error.
+
+Requests go through two token buckets taken from ``config.yaml`` ``llm``:
+``requests_per_minute`` (one unit per request) and ``tokens_per_minute``
+(estimated prompt tokens + ``max_tokens`` per request, which is what
+providers count), each holding ``burst_seconds`` worth so a run does not
+open with a full minute's burst (providers enforce limits over shorter
+windows too). Rate limits (429), server errors (5xx) and connection
+errors are retried with jittered exponential backoff (tenacity) up to
+``max_attempts``, and every retry waits for the buckets again. Cached
+responses (see llm_cache.py) skip the buckets entirely.
+
+Per-request latency, rate-limit wait, attempts and token usage are kept as
+``RequestMetrics``; ``run()`` returns a summary of them.
+"""
+
+import asyncio
+import os
+import socket
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+from .jd_compactor import compact_description, compaction_row, stored_compaction
+from .llm_client import LLMClient, LLMRequest, is_retryable
+from .rate_limit import TokenBucket
+from .resume_customizer import ResumeCustomizer
+from .template_manager import get_template_manager
+
+CONFIG_PATH = os.getenv("CONFIG_PATH", "config/config.yaml")
+DEFAULT_LEASE_SECONDS = 600
+
+
+@dataclass
+class LLMLimits:
+    """Provider limits and retry policy for batch customization"""
+    requests_per_minute: float = 500
+    tokens_per_minute: float = 30000
+    max_concurrency: int = 8
+    max_attempts: int = 6
+    burst_seconds: float = 10.0  # Bucket capacity: this many seconds' worth of the per-minute limits
+    retry_initial_wait: float = 1.0  # Seconds before the first retry (doubled per attempt, plus jitter)
+    retry_max_wait: float = 60.0
+
+
+def load_llm_limits(config_path: str = CONFIG_PATH) -> LLMLimits:
+    """Read the llm rate limits from config.yaml (defaults for anything unset)"""
+    limits = LLMLimits()
+    try:
+        from ruamel.yaml import YAML
+
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = (YAML(typ="safe").load(f) or {}).get("llm") or {}
+    except (ImportError, OSError) as e:
+        logger.warning(f"Could not read LLM limits from {config_path}, using defaults: {str(e)}")
+        return limits
+    for name in ("requests_per_minute", "tokens_per_minute", "max_concurrency", "max_attempts", "burst_seconds"):
+        if config.get(name) is not None:
+            setattr(limits, name, type(getattr(limits, name))(config[name]))
+    return limits
+
+
+@dataclass
+class RequestMetrics:
+    """Outcome of customizing one application"""
+    application_id: int
+    job_id: str
+    template: Optional[str] = None
+    status: str = "failed"  # ready or failed
+    cached: bool = False
+    attempts: int = 0  # LLM requests sent (0 for cache hits)
+    latency_ms: float = 0.0  # Latency of the successful request
+    wait_ms: float = 0.0  # Time spent waiting for the rate limiters
+    total_ms: float = 0.0  # Wall time including retries and backoff
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    description_tokens: int = 0  # Job description before compaction
+    compacted_tokens: int = 0  # ... and after (what the prompt carries)
+    error: Optional[str] = None
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize_metrics(metrics: List[RequestMetrics], elapsed_seconds: float) -> Dict[str, Any]:
+    """Counts, latency percentiles, token totals and achieved throughput of a run"""
+    sent = [m for m in metrics if m.status == "ready" and not m.cached]
+    prompt_tokens = sum(m.prompt_tokens for m in metrics)
+    completion_tokens = sum(m.completion_tokens for m in metrics)
+    minutes = max(elapsed_seconds, 1e-9) / 60
+    return {
+        "processed": len(metrics),
+        "ready": sum(m.status == "ready" for m in metrics),
+        "failed": sum(m.status == "failed" for m in metrics),
+        "cached": sum(m.cached for m in metrics),
+        "requests": sum(m.attempts for m in metrics),
+        "retried": sum(m.attempts > 1 for m in metrics),
+        "latency_p50_ms": percentile([m.latency_ms for m in sent], 0.5),
+        "latency_p95_ms": percentile([m.latency_ms for m in sent], 0.95),
+        "wait_ms": sum(m.wait_ms for m in metrics),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "description_tokens": sum(m.description_tokens for m in metrics),
+        "compacted_tokens": sum(m.compacted_tokens for m in metrics),
+        "elapsed_seconds": elapsed_seconds,
+        "requests_per_minute": sum(m.attempts for m in metrics) / minutes,
+        "tokens_per_minute": (prompt_tokens + completion_tokens) / minutes,
+    }
+
+
+class CustomizationRunner:
+    """Customizes queued applications with concurrent, rate-limited LLM requests"""
+
+    def __init__(
+        self,
+        db,
+        llm: LLMClient,
+        customizer: ResumeCustomizer,
+        limits: Optional[LLMLimits] = None,
+        concurrency: Optional[int] = None,
+        use_cache: bool = True,
+        compact: bool = True,
+        lease_seconds: int = DEFAULT_LEASE_SECONDS,
+    ):
+        """Initialize runner
+
+        Args:
+            db: AsyncDatabaseManager holding the application queue
+            llm: LLM client (create it with max_retries=0: retries happen here)
+            customizer: Provides template selection and output paths
+            limits: Rate limits and retry policy (default: load_llm_limits())
+            concurrency: Concurrent workers (default: limits.max_concurrency)
+            use_cache: If False, bypass the LLM response cache lookup
+            compact: If False, send full job descriptions instead of compacted ones
+            lease_seconds: Lease on each claimed application
+        """
+        self.db = db
+        self.llm = llm
+        self.customizer = customizer
+        self.limits = limits or load_llm_limits()
+        self.concurrency = concurrency or self.limits.max_concurrency
+        self.use_cache = use_cache
+        self.compact = compact
+        self.lease_seconds = lease_seconds
+        burst = self.limits.burst_seconds / 60
+        self.requests = TokenBucket(self.limits.requests_per_minute,
+                                    max(1.0, self.limits.requests_per_minute * burst))
+        self.tokens = TokenBucket(self.limits.tokens_per_minute, self.limits.tokens_per_minute * burst)
+        self.metrics: List[RequestMetrics] = []
+        self._remaining: Optional[int] = None
+
+    async def run(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Customize queued applications until the queue is empty or ``limit`` were claimed
+
+        Returns:
+            Summary of the run (see summarize_metrics)
+        """
+        self.metrics = []
+        self._remaining = limit
+        start = time.perf_counter()
+        await asyncio.gather(*(self._worker(n) for n in range(self.concurrency)))
+        return summarize_metrics(self.metrics, time.perf_counter() - start)
+
+    def _take(self) -> bool:
+        if self._remaining is None:
+            return True
+        if self._remaining <= 0:
+            return False
+        self._remaining -= 1
+        return True
+
+    async def _worker(self, n: int) -> None:
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:customize-{n}"
+        while self._take():
+            application = await self.db.claim_next("queued", "customizing", worker_id, self.lease_seconds)
+            if application is None:
+                return
+            self.metrics.append(await self._process(application, worker_id))
+
+    async def _process(self, application, worker_id: str) -> RequestMetrics:
+        metrics = RequestMetrics(application.id, application.job_id)
+        start = time.perf_counter()
+        try:
+            job = await self.db.get_job(application.job_id)
+            if job is None:
+                raise LookupError(f"Job not found: {application.job_id}")
+            description = job.description or ""
+            metrics.template = self.customizer.select_template_for_job(job.title, description)
+            template = get_template_manager().get_template(metrics.template)
+            if self.compact:
+                description = await self._compacted(job.id, description, metrics)
+            request = self.llm.prepare(template, job.title, description, job.company)
+
+            response = self.llm.cached(request) if self.use_cache else None
+            if response is None:
+                response = await self._complete(request, metrics)
+                if response["finish_reason"] != "stop":
+                    raise ValueError(f"Incomplete LLM response (finish_reason={response['finish_reason']})")
+            else:
+                metrics.cached = True
+
+            output_path = self.customizer.generate_output_path(job.company, job.title, metrics.template)
+            output_path.write_text(response["content"], encoding="utf-8")
+            metrics.status = "ready"
+            metrics.total_ms = (time.perf_counter() - start) * 1000
+            released = await self.db.release_application(
+                application.id, worker_id, "ready",
+                resume_template=metrics.template, tailored_resume_path=str(output_path),
+            )
+            logger.info(
+                f"✓ Application {application.id}: {metrics.template} → {output_path} "
+                + ("(cached)" if metrics.cached else
+                   f"({metrics.latency_ms:.0f} ms, {metrics.prompt_tokens}+{metrics.completion_tokens} tokens, "
+                   f"{metrics.attempts} attempts, waited {metrics.wait_ms:.0f} ms)")
+            )
+        except Exception as e:
+            metrics.status = "failed"
+            metrics.error = str(e)
+            metrics.total_ms = (time.perf_counter() - start) * 1000
+            logger.error(f"✗ Application {application.id} failed after {metrics.attempts} attempts: {str(e)}")
+            released = await self.db.release_application(application.id, worker_id, "failed", error_message=str(e))
+        if not released:
+            logger.warning(f"Lease on application {application.id} was lost; its status was not updated")
+        return metrics
+
+    async def _compacted(self, job_id: str, description: str, metrics: RequestMetrics) -> str:
+        """Compacted description of a job, computed and stored on first use"""
+        compacted = stored_compaction(await self.db.get_compaction(job_id), description)
+        if compacted is None:
+            compacted = compact_description(description)
+            await self.db.save_compactions([compaction_row(job_id, description, compacted)])
+        metrics.description_tokens = compacted.tokens_before
+        metrics.compacted_tokens = compacted.tokens_after
+        return compacted.text
+
+    async def _complete(self, request: LLMRequest, metrics: RequestMetrics) -> Dict[str, Any]:
+        """Send a request through the rate limiters, retrying transient failures"""
+
+        def log_retry(retry_state) -> None:
+            logger.warning(
+                f"Application {metrics.application_id}: attempt {retry_state.attempt_number} failed "
+                f"({retry_state.outcome.exception()}), retrying in {retry_state.next_action.sleep:.1f} s"
+            )
+
+        retrying = AsyncRetrying(
+            retry=retry_if_exception(is_retryable),
+            wait=wait_exponential_jitter(
+                initial=self.limits.retry_initial_wait,
+                max=self.limits.retry_max_wait,
+                jitter=self.limits.retry_initial_wait,
+            ),
+            stop=stop_after_attempt(self.limits.max_attempts),
+            before_sleep=log_retry,
+            reraise=True,
+        )
+        async for attempt in retrying:
+            with attempt:
+                wait_start = time.perf_counter()
+                await self.requests.acquire(1)
+                await self.tokens.acquire(request.estimated_tokens)
+                metrics.wait_ms += (time.perf_counter() - wait_start) * 1000
+                metrics.attempts += 1
+                response = await self.llm.acomplete(request)
+
+        usage = response["usage"]
+        metrics.latency_ms = response["latency_ms"]
+        metrics.prompt_tokens = usage.get("prompt_tokens") or 0
+        metrics.completion_tokens = usage.get("completion_tokens") or 0
+        return response
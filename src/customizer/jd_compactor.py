@@ -0,0 +1,275 @@
+"""Deterministic job description compaction before LLM calls
+
+Scraped descriptions carry a lot the model does not need to tailor a
+resume: the company pitch, benefits, equal-opportunity statements,
+application instructions and bullet lists repeated by the portal. The
+compactor splits a description into sections at its headings ("What
+you'll do:", "## Requirements", "**Benefits**", "ABOUT US"), classifies
+each heading with ``SECTION_RULES`` and:
+
+- keeps responsibilities, requirements and nice-to-have sections (and
+  sections with unrecognized headings); when any of those is found, the
+  untitled intro before the first heading (usually the company pitch) is
+  dropped too,
+- drops company, benefits, EEO and application sections,
+- drops boilerplate sentences anywhere (``BOILERPLATE``),
+- removes repeated sentences and bullets (compared case- and
+  punctuation-insensitively), keeping the first.
+
+Only marked lines are headings: unbulleted requirement lists ("Strong SQL
+skills") contain the same keywords as headings. A heading with nothing
+under it is kept as a line of content.
+
+Descriptions without recognizable structure keep everything except
+boilerplate and repeats. The output is plain text: each kept section's
+heading followed by its bullets ("- ...") and paragraphs.
+
+The same input always gives the same output, so compacted text can be
+stored per job (see ``compaction_row``) and reused as long as the
+description hash and ``COMPACTOR_VERSION`` match.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+COMPACTOR_VERSION = 2  # Bump when the rules change so stored compactions are recomputed
+MAX_HEADING_WORDS = 8
+
+KEEP_KINDS = ("responsibilities", "requirements", "preferred")
+
+# (kind, heading phrases) checked in order: the first kind with a phrase in the heading wins
+SECTION_RULES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("responsibilities", (
+        "responsibilit", "what you'll do", "what you will do", "what you'll be doing", "duties",
+        "about the role", "the role", "your role", "day to day", "day-to-day", "accountabilit",
+        "your mission", "the job", "job description", "role overview", "position summary", "key tasks",
+    )),
+    ("requirements", (
+        "requirement", "qualification", "what you'll bring", "what you will bring", "what you bring",
+        "what we're looking for", "what we are looking for", "who you are", "about you", "must have",
+        "must-have", "skills", "experience", "you have", "you'll have", "competenc", "tech stack",
+        "technolog", "tools",
+    )),
+    ("preferred", ("nice to have", "nice-to-have", "preferred", "bonus", "desirable", "a plus")),
+    ("benefits", (
+        "benefit", "perks", "what we offer", "we offer", "why join", "why work", "why you'll love",
+        "compensation", "salary", "pay range", "what's in it for you", "rewards",
+    )),
+    ("company", (
+        "about us", "about the company", "about company", "about the team", "who we are", "our company",
+        "our mission", "our story", "our values", "our culture", "life at", "company overview",
+        "company description",
+    )),
+    ("eeo", (
+        "equal opportunit", "equal employment", "eeo", "diversity", "inclusion", "accommodation",
+        "affirmative action",
+    )),
+    ("application", (
+        "how to apply", "application process", "to apply", "next steps", "hiring process",
+        "interview process", "privacy", "disclaimer",
+    )),
+]
+
+# Sentences dropped wherever they appear (matched against the lowercased sentence)
+BOILERPLATE = re.compile("|".join([
+    r"equal (?:employment )?opportunit(?:y|ies)(?: and affirmative action)? employer",
+    r"\beeo\b",
+    r"(?:without regard|regardless) (?:to|of) (?:race|age|sex|gender|religion|colou?r|national origin|disability)",
+    r"reasonable accommodation",
+    r"protected (?:veteran|characteristic|class|status)",
+    r"\be-?verify\b",
+    r"(?:recruitment|staffing|search) agenc",
+    r"unsolicited (?:resume|cv|application)",
+    r"click (?:on )?(?:the )?(?:\"?apply|here)",
+    r"\bapply (?:now|today)\b",
+    r"privacy (?:policy|notice|statement)",
+    r"(?:thank|appreciate) (?:all|every|you for your interest)",
+    r"only (?:shortlisted|successful|selected) (?:candidates|applicants)",
+    r"follow us on",
+    r"visit (?:our|us at) ",
+    r"we are an? (?:proud )?(?:equal|inclusive|diverse)",
+    r"(?:committed|dedicated) to (?:building )?(?:a )?(?:diversity|diverse|inclusive|creating an inclusive)",
+    r"background check",
+]))
+
+BULLET = re.compile(r"^(?:[-*•·▪◦●‣–]|\d{1,2}[.)])\s+")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'“(\[]?[A-Z0-9])")
+_MARKUP = re.compile(r"^#{1,6}\s*|[*_]{2}")
+_KEY_CHARS = re.compile(r"[^\w]+")
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count (~4 characters per token)"""
+    return (len(text) + 3) // 4
+
+
+def description_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def section_kind(heading: str) -> Optional[str]:
+    """Kind of a section heading (see SECTION_RULES), or None if unrecognized"""
+    lowered = heading.lower().replace("’", "'")
+    for kind, phrases in SECTION_RULES:
+        if any(phrase in lowered for phrase in phrases):
+            return kind
+    return None
+
+
+def parse_heading(line: str) -> Optional[str]:
+    """Heading text if ``line`` (stripped) is a section heading, else None
+
+    Markdown headings always count. Otherwise the line must be short, not a
+    bullet or a sentence, and end with a colon or be bold or upper case;
+    a plain line naming a known section ("Requirements") is not enough.
+    """
+    if line.startswith("#"):
+        return _MARKUP.sub("", line).strip(" :") or None
+    if BULLET.match(line):
+        return None
+    text = _MARKUP.sub("", line).strip()
+    bare = text.rstrip(":").strip()
+    if not bare or len(bare.split()) > MAX_HEADING_WORDS or bare[-1] in ".!?,;":
+        return None
+    bold = line.startswith(("**", "__")) and line.rstrip(":").endswith(("**", "__"))
+    if text.endswith(":") or bold or (bare.isupper() and len(bare) > 3):
+        return bare
+    return None
+
+
+def sentence_key(text: str) -> str:
+    """Case- and punctuation-insensitive form used to find repeated sentences"""
+    return _KEY_CHARS.sub(" ", text.lower()).strip()
+
+
+@dataclass
+class _Section:
+    heading: Optional[str]
+    kind: Optional[str]
+    blocks: List[Tuple[bool, List[str]]] = field(default_factory=list)  # (is bullet, sentences)
+
+
+@dataclass
+class CompactedDescription:
+    """A compacted job description and what was removed"""
+    text: str
+    tokens_before: int
+    tokens_after: int
+    kept: List[str] = field(default_factory=list)  # Kinds of the kept sections ("other" if unrecognized)
+    dropped: List[str] = field(default_factory=list)  # Kinds of the dropped sections ("intro" for the untitled start)
+    boilerplate: int = 0  # Boilerplate sentences removed
+    duplicates: int = 0  # Repeated sentences and bullets removed
+
+    @property
+    def reduction(self) -> float:
+        """Fraction of tokens removed"""
+        return 1 - self.tokens_after / self.tokens_before if self.tokens_before else 0.0
+
+
+def _parse(text: str) -> List[_Section]:
+    sections = [_Section(None, None)]
+    paragraph: List[str] = []
+
+    def flush() -> None:
+        if paragraph:
+            sections[-1].blocks.append((False, SENTENCE_END.split(" ".join(paragraph))))
+            paragraph.clear()
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            flush()
+            continue
+        heading = parse_heading(line)
+        if heading is not None:
+            flush()
+            sections.append(_Section(heading, section_kind(heading)))
+        elif BULLET.match(line):
+            flush()
+            sections[-1].blocks.append((True, [BULLET.sub("", line)]))
+        else:
+            if paragraph and paragraph[-1][-1] not in ".!?,;:" and line[0].isupper():
+                flush()  # Unbulleted list item rather than a wrapped sentence
+            paragraph.append(line)
+    flush()
+    return sections
+
+
+def compact_description(text: str) -> CompactedDescription:
+    """Compact a job description (see the module docstring for the rules)
+
+    Args:
+        text: Description as scraped (plain text or markdown)
+
+    Returns:
+        CompactedDescription with the compacted text and token counts
+    """
+    text = text or ""
+    sections = _parse(text)
+    structured = any(section.kind in KEEP_KINDS for section in sections)
+    result = CompactedDescription("", count_tokens(text), 0)
+
+    seen = set()
+    parts = []
+    for section in sections:
+        if not section.blocks and section.heading is None:
+            continue
+        if section.kind is None:
+            kept = section.heading is not None or not structured
+        else:
+            kept = section.kind in KEEP_KINDS
+        label = section.kind or ("other" if section.heading is not None else "intro")
+        if not kept:
+            result.dropped.append(label)
+            continue
+
+        lines = []
+        for is_bullet, sentences in section.blocks:
+            kept_sentences = []
+            for sentence in sentences:
+                sentence = " ".join(sentence.split())
+                if not sentence:
+                    continue
+                if BOILERPLATE.search(sentence.lower()):
+                    result.boilerplate += 1
+                    continue
+                key = sentence_key(sentence)
+                if key in seen:
+                    result.duplicates += 1
+                    continue
+                seen.add(key)
+                kept_sentences.append(sentence)
+            if kept_sentences:
+                lines.append(("- " if is_bullet else "") + " ".join(kept_sentences))
+        if not section.blocks:
+            result.kept.append(label)
+            parts.append(section.heading)  # A heading with nothing under it is content
+        elif lines:
+            result.kept.append(label)
+            parts.append("\n".join(([f"{section.heading}:"] if section.heading else []) + lines))
+
+    result.text = "\n\n".join(parts) if parts else text.strip()
+    result.tokens_after = count_tokens(result.text)
+    return result
+
+
+def stored_compaction(stored: Optional[Mapping[str, Any]], description: str) -> Optional[CompactedDescription]:
+    """A stored compaction if it was made from ``description`` by this COMPACTOR_VERSION, else None"""
+    if (stored is None or stored["version"] != COMPACTOR_VERSION
+            or stored["description_hash"] != description_hash(description)):
+        return None
+    return CompactedDescription(stored["text"], stored["tokens_before"], stored["tokens_after"])
+
+
+def compaction_row(job_id: str, description: str, compacted: CompactedDescription) -> Dict[str, Any]:
+    """Row for the job_compactions table"""
+    return {
+        "job_id": job_id,
+        "description_hash": description_hash(description),
+        "version": COMPACTOR_VERSION,
+        "text": compacted.text,
+        "tokens_before": compacted.tokens_before,
+        "tokens_after": compacted.tokens_after,
+    }
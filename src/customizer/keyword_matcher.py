@@ -0,0 +1,153 @@
+"""Single-pass keyword matching for template recommendations
+
+The template registry is compiled once into two regexes: one over every
+keyword of every template (scanned over title + description) and one over
+the target roles (scanned over the title). Each is a character trie of the
+terms ("data (?:engineer|warehouse)") wrapped in a lookahead, so one
+``findall`` pass visits every word start once, tries only the branches
+that share its first letters, reports overlapping matches ("big data
+engineer" hits both "big data" and "data engineer") and respects word
+boundaries ("node" matches "Node.js" but not "nodes"). Keywords that are
+word-prefixes of a longer keyword ("data" of "data engineer") are credited
+whenever the longer one matches, since the regex reports the longest term
+per start.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Pattern, Tuple
+
+ROLE_MATCH_SCORE = 10  # Added once per template whose target role appears in the title
+KEYWORD_SCORE = 2  # Per distinct keyword found in title + description
+
+
+def trie_pattern(terms: Iterable[str]) -> str:
+    """Regex alternation of ``terms`` factored into a character trie (longest match first)"""
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def compile_terms(terms: Iterable[str]) -> Pattern:
+    """Regex matching any term at a word start and ending at a word boundary (lowercase input)"""
+    return re.compile(rf"(?<!\w)(?=({trie_pattern(set(terms))})(?!\w))")
+
+
+def word_prefixes(terms: Iterable[str]) -> Dict[str, Tuple[str, ...]]:
+    """term -> shorter terms that match wherever it matches ('data engineer' -> ('data',))
+
+    Only terms that have such prefixes are included.
+    """
+    terms = set(terms)
+    prefixes = {}
+    for term in terms:
+        shorter = tuple(other for other in terms
+                        if len(other) < len(term) and term.startswith(other)
+                        and not (term[len(other)].isalnum() or term[len(other)] == "_"))
+        if shorter:
+            prefixes[term] = shorter
+    return prefixes
+
+
+@dataclass
+class TemplateMatch:
+    """Scores and hits for one job against every template"""
+    scores: Dict[str, int]  # Template filename -> score
+    keyword_hits: Counter = field(default_factory=Counter)  # Keyword -> occurrences
+    role_hits: Counter = field(default_factory=Counter)  # Target role -> occurrences in the title
+
+    def ranked(self, top_n: int = None) -> List[Tuple[str, int]]:
+        """(filename, score) pairs with a positive score, best first (ties keep registry order)"""
+        ranked = sorted(((name, score) for name, score in self.scores.items() if score > 0),
+                        key=lambda item: item[1], reverse=True)
+        return ranked if top_n is None else ranked[:top_n]
+
+    @property
+    def keywords_match(self) -> Dict[str, int]:
+        """Matched keywords -> hit counts, most frequent first (for Job.keywords_match)"""
+        return dict(self.keyword_hits.most_common())
+
+
+class KeywordMatcher:
+    """Compiled keyword and role matcher over a set of resume templates"""
+
+    def __init__(self, templates: Iterable):
+        """Compile the matcher
+
+        Args:
+            templates: ResumeTemplate objects (filename, target_roles, keywords, priority)
+        """
+        self.templates = list(templates)
+        self._keyword_templates: Dict[str, List[int]] = {}
+        self._role_templates: Dict[str, List[int]] = {}
+        for index, template in enumerate(self.templates):
+            for keyword in template.keywords:
+                self._keyword_templates.setdefault(keyword.lower(), []).append(index)
+            for role in template.target_roles:
+                self._role_templates.setdefault(role.lower(), []).append(index)
+        self._keywords = compile_terms(self._keyword_templates)
+        self._roles = compile_terms(self._role_templates)
+        self._keyword_prefixes = word_prefixes(self._keyword_templates)
+        self._role_prefixes = word_prefixes(self._role_templates)
+
+    @staticmethod
+    def _scan(pattern: Pattern, prefixes: Dict[str, Tuple[str, ...]], text: str) -> Counter:
+        hits = Counter(pattern.findall(text))
+        if prefixes:
+            for term, count in [(term, count) for term, count in hits.items() if term in prefixes]:
+                for shorter in prefixes[term]:
+                    hits[shorter] += count
+        return hits
+
+    def keyword_hits(self, text: str) -> Counter:
+        """Keyword -> occurrences in ``text``"""
+        return self._scan(self._keywords, self._keyword_prefixes, text.lower())
+
+    def role_hits(self, title: str) -> Counter:
+        """Target role -> occurrences in a job title"""
+        return self._scan(self._roles, self._role_prefixes, title.lower())
+
+    def match(self, job_title: str, job_description: str = "") -> TemplateMatch:
+        """Score every template against a job in one pass over its text
+
+        Args:
+            job_title: Job title (role matches and keywords)
+            job_description: Job description (keywords)
+
+        Returns:
+            TemplateMatch with per-template scores and per-keyword hit counts
+        """
+        title = job_title.lower()
+        keyword_hits = self._scan(self._keywords, self._keyword_prefixes, f"{title} {job_description.lower()}")
+        role_hits = self.role_hits(title)
+
+        scores = [template.priority for template in self.templates]
+        role_matched = [False] * len(self.templates)
+        for role in role_hits:
+            for index in self._role_templates[role]:
+                role_matched[index] = True
+        for index, matched in enumerate(role_matched):
+            if matched:
+                scores[index] += ROLE_MATCH_SCORE
+        for keyword in keyword_hits:
+            for index in self._keyword_templates[keyword]:
+                scores[index] += KEYWORD_SCORE
+
+        return TemplateMatch(
+            scores={template.filename: score for template, score in zip(self.templates, scores)},
+            keyword_hits=keyword_hits,
+            role_hits=role_hits,
+        )
@@ -0,0 +1,210 @@
+"""Content-addressed cache of LLM responses
+
+Tailoring a resume sends the template and the job posting to the model;
+re-runs, retries after a crash and identical reposts would pay the same
+latency and tokens again. Responses are stored under a SHA-256 of
+everything that determines them: the template's content hash, the
+normalized job text, model, temperature and prompt version. A changed
+template, prompt or model therefore misses naturally and nothing has to be
+invalidated by hand.
+
+Entries live in a small SQLite file (``LLM_CACHE_PATH``) shared by every
+process. Each hit refreshes the entry's ``last_used_at``, and when the
+stored responses outgrow ``LLM_CACHE_MAX_MB`` the least recently used are
+evicted down to 90% of the limit. Hit, miss, store and eviction counts are
+persisted alongside the entries, so ``llm-cache`` reports them across runs.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "database/llm_cache.db")
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+EVICT_TO = 0.9  # Evict down to this fraction of max_bytes once it is exceeded
+
+METRICS = ("hits", "misses", "stores", "evictions")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_llm_responses_last_used_at ON llm_responses (last_used_at);
+CREATE TABLE IF NOT EXISTS llm_cache_metrics (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_job_description(text: str) -> str:
+    """Job text as it matters to the model: NFKC-normalized with whitespace collapsed
+
+    Reposts that differ only in spacing, line endings or full-width/compatibility
+    characters map to the same cache entry.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+def cache_key(
+    template_hash: str,
+    job_description: str,
+    model: str,
+    temperature: float,
+    prompt_version: str,
+) -> str:
+    """SHA-256 of everything that determines a response
+
+    Args:
+        template_hash: ParsedTemplate.sha256 of the resume template
+        job_description: Job text sent to the model (normalized here)
+        model: Model name
+        temperature: Sampling temperature
+        prompt_version: Version of the prompt wording (bump it when the prompt changes)
+
+    Returns:
+        Hex digest
+    """
+    payload = json.dumps(
+        {
+            "template": template_hash,
+            "job": normalize_job_description(job_description),
+            "model": model,
+            "temperature": round(float(temperature), 4),
+            "prompt_version": prompt_version,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed LRU cache of LLM responses with persisted hit/miss metrics"""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_mb: float = LLM_CACHE_MAX_MB):
+        """Initialize cache (the file is created on first use)
+
+        Args:
+            path: SQLite file (":memory:" for a per-process cache)
+            max_mb: Total size of stored responses before LRU eviction
+        """
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def _bump(self, connection: sqlite3.Connection, name: str, amount: int = 1) -> None:
+        connection.execute(
+            "INSERT INTO llm_cache_metrics (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached response for ``key`` (refreshing its LRU position), or None"""
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                row = connection.execute("SELECT response FROM llm_responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self._bump(connection, "misses")
+                    return None
+                connection.execute(
+                    "UPDATE llm_responses SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+                )
+                self._bump(connection, "hits")
+        return json.loads(row[0])
+
+    def put(self, key: str, model: str, response: Dict[str, Any]) -> None:
+        """Store (or replace) a response, then evict least recently used entries if over the limit"""
+        payload = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, model, response, size, created_at, last_used_at, hits) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (key, model, payload, len(payload.encode("utf-8")), now, now),
+                )
+                self._bump(connection, "stores")
+                self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection) -> int:
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        target = total - int(self.max_bytes * EVICT_TO)
+        freed, victims = 0, []
+        for key, size in connection.execute("SELECT key, size FROM llm_responses ORDER BY last_used_at"):
+            victims.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        connection.executemany("DELETE FROM llm_responses WHERE key = ?", victims)
+        self._bump(connection, "evictions", len(victims))
+        logger.info(f"LLM cache: evicted {len(victims)} least recently used responses ({freed / 1024:.0f} KiB)")
+        return len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        """Entries, stored bytes and cumulative hit/miss/store/eviction counts"""
+        with self._lock:
+            connection = self._connect()
+            entries, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+            metrics = dict(connection.execute("SELECT name, value FROM llm_cache_metrics"))
+        stats = {"entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+        stats.update({name: metrics.get(name, 0) for name in METRICS})
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self) -> int:
+        """Delete every entry and reset the metrics; returns the number of entries removed"""
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                removed = connection.execute("DELETE FROM llm_responses").rowcount
+                connection.execute("DELETE FROM llm_cache_metrics")
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __enter__(self) -> "LLMResponseCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
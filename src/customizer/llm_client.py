@@ -0,0 +1,202 @@
+"""OpenAI-compatible client for tailoring resume templates, with a response cache
+
+Every request is looked up in the LLMResponseCache first (see llm_cache.py);
+only complete responses (``finish_reason == "stop"``) are stored. Requests
+are built with ``prepare`` and sent with ``complete`` (or ``acomplete`` on
+an AsyncOpenAI client), so callers such as the batch runner can add rate
+limiting and retries around the network call. The ``openai`` package is
+imported on first use, and ``OPENAI_BASE_URL`` points the client at any
+OpenAI-compatible server (a local model, a proxy or a test fake).
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from .jd_compactor import count_tokens
+from .llm_cache import LLMResponseCache, cache_key
+from .template_cache import ParsedTemplate
+
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.2"))
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "4096"))
+
+# Bump when SYSTEM_PROMPT or USER_PROMPT change so cached responses are not reused
+PROMPT_VERSION = "1"
+
+SYSTEM_PROMPT = (
+    "You tailor resumes to job postings. Rewrite the markdown resume you are given so it "
+    "targets the posting: reorder and rephrase the summary, experience bullets and skills to "
+    "emphasize what the posting asks for. Never invent employers, titles, dates, degrees or "
+    "skills the candidate does not have. Keep the markdown structure and headings. Reply with "
+    "the tailored resume only."
+)
+USER_PROMPT = "Job posting\n===========\n{job}\n\nResume\n======\n{resume}"
+
+
+@dataclass
+class LLMRequest:
+    """A prepared chat-completion request"""
+    key: str  # Response cache key
+    messages: List[Dict[str, str]]
+    estimated_tokens: int  # Prompt estimate + max_tokens (what providers count against TPM limits)
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """Rough prompt size in tokens (~4 characters per token, plus per-message overhead)"""
+    return sum(count_tokens(message["content"]) + 4 for message in messages)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits (429), server errors (5xx), timeouts and connection errors are worth retrying"""
+    from openai import APIConnectionError, APIStatusError
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, APIConnectionError)
+
+
+def job_posting_text(job_title: str, job_description: str, company: str = "") -> str:
+    """The job part of the prompt (and of the cache key)"""
+    header = f"{job_title} at {company}" if company else job_title
+    return f"{header}\n\n{job_description}"
+
+
+class LLMClient:
+    """Chat-completion client for resume tailoring"""
+
+    def __init__(
+        self,
+        model: str = LLM_MODEL,
+        temperature: float = LLM_TEMPERATURE,
+        max_tokens: int = LLM_MAX_TOKENS,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        cache: Optional[LLMResponseCache] = None,
+        timeout: float = 120.0,
+        max_retries: int = 2,
+    ):
+        """Initialize client (the OpenAI client is created on first request)
+
+        Args:
+            model: Model name
+            temperature: Sampling temperature
+            max_tokens: Maximum completion tokens
+            api_key: API key (default: OPENAI_API_KEY)
+            base_url: OpenAI-compatible endpoint (default: OPENAI_BASE_URL or api.openai.com)
+            cache: Response cache (None disables caching)
+            timeout: Request timeout in seconds
+            max_retries: Retries done by the openai client itself (0 when the caller retries)
+        """
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL") or None
+        self.cache = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._client = None
+        self._async_client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout,
+                                  max_retries=self.max_retries)
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+            self._async_client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout,
+                                             max_retries=self.max_retries)
+        return self._async_client
+
+    def prepare(self, template: ParsedTemplate, job_title: str, job_description: str, company: str = "") -> LLMRequest:
+        """Messages and cache key for tailoring ``template`` to a job posting"""
+        job = job_posting_text(job_title, job_description, company)
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": USER_PROMPT.format(job=job, resume=template.text)},
+        ]
+        key = cache_key(template.sha256, job, self.model, self.temperature, PROMPT_VERSION)
+        return LLMRequest(key, messages, estimate_tokens(messages) + self.max_tokens)
+
+    def cached(self, request: LLMRequest) -> Optional[Dict[str, Any]]:
+        """Cached response for a prepared request, or None"""
+        if self.cache is None:
+            return None
+        response = self.cache.get(request.key)
+        if response is None:
+            return None
+        return {**response, "latency_ms": 0.0, "cached": True, "cache_key": request.key}
+
+    def complete(self, request: LLMRequest) -> Dict[str, Any]:
+        """Send a prepared request and cache the response if it is complete"""
+        start = time.perf_counter()
+        completion = self.client.chat.completions.create(**self._create_kwargs(request))
+        return self._finish(request, completion, start)
+
+    async def acomplete(self, request: LLMRequest) -> Dict[str, Any]:
+        """Async counterpart of complete (one attempt: retries are the caller's)"""
+        start = time.perf_counter()
+        completion = await self.async_client.chat.completions.create(**self._create_kwargs(request))
+        return self._finish(request, completion, start)
+
+    def _create_kwargs(self, request: LLMRequest) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "messages": request.messages,
+        }
+
+    def _finish(self, request: LLMRequest, completion, start: float) -> Dict[str, Any]:
+        latency_ms = (time.perf_counter() - start) * 1000
+        choice = completion.choices[0]
+        response = {
+            "content": choice.message.content or "",
+            "model": completion.model,
+            "usage": completion.usage.model_dump() if completion.usage else {},
+            "finish_reason": choice.finish_reason,
+        }
+        if self.cache is not None and choice.finish_reason == "stop":
+            self.cache.put(request.key, self.model, response)
+        return {**response, "latency_ms": latency_ms, "cached": False, "cache_key": request.key}
+
+    def tailor_resume(
+        self,
+        template: ParsedTemplate,
+        job_title: str,
+        job_description: str,
+        company: str = "",
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """Tailor a resume template to a job posting
+
+        Args:
+            template: Parsed resume template
+            job_title: Target job title
+            job_description: Job description
+            company: Company name
+            use_cache: If False, skip the cache lookup (the fresh response is still stored)
+
+        Returns:
+            Dictionary with content, model, usage, finish_reason, latency_ms,
+            cached (served from the cache) and cache_key
+        """
+        request = self.prepare(template, job_title, job_description, company)
+        response = self.cached(request) if use_cache else None
+        if response is not None:
+            logger.info(f"✓ LLM cache hit for {template.name} / '{job_title}'")
+            return response
+
+        response = self.complete(request)
+        logger.info(f"LLM response for {template.name} / '{job_title}' in {response['latency_ms']:.0f} ms "
+                    f"({response['usage'].get('total_tokens', '?')} tokens)")
+        return response
@@ -0,0 +1,312 @@
+"""Markdown → PDF rendering in a pool of warm WeasyPrint worker processes
+
+WeasyPrint is CPU-bound and slow to start: the first document in a process
+pays for loading Pango/fontconfig and parsing the stylesheet. ``PDFRenderer``
+therefore keeps a ``ProcessPoolExecutor`` whose workers do that once, in
+their initializer (the ``pdf_style`` stylesheet from ``PDF_STYLES`` is
+parsed and a warm-up page is rendered), and then render documents from
+batches submitted by the parent. The pool lives as long as the renderer, so
+later batches skip the start-up cost entirely.
+
+Output is content-addressed: a document's key is a SHA-256 of its markdown,
+the stylesheet and ``RENDERER_VERSION`` (the PDF title comes from the
+markdown's first ``#`` heading, not the output file name), and rendered PDFs are kept under
+``PDF_CACHE_DIR``. Identical documents in a batch are rendered once, and a
+document rendered before (by any run) is copied from the cache instead of
+rendered again. ``render_batch`` reports pages rendered per second.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from loguru import logger
+
+CONFIG_PATH = os.getenv("CONFIG_PATH", "config/config.yaml")
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "output/pdf_cache")
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "0"))  # 0: one per CPU
+
+# Bump when markdown_to_html or the rendering options change so cached PDFs are not reused
+RENDERER_VERSION = 2
+
+_BASE_CSS = """
+@page { size: A4; margin: 16mm 18mm; }
+body { font-size: 10pt; line-height: 1.35; color: #222; }
+h1 { font-size: 20pt; margin: 0 0 4pt; }
+h2 { font-size: 12pt; margin: 12pt 0 4pt; }
+h3 { font-size: 10.5pt; margin: 8pt 0 2pt; }
+p { margin: 0 0 5pt; }
+ul { margin: 0 0 5pt; padding-left: 14pt; }
+li { margin-bottom: 2pt; }
+a { color: inherit; text-decoration: none; }
+table { border-collapse: collapse; width: 100%; }
+td, th { padding: 2pt 4pt; text-align: left; vertical-align: top; }
+h2, h3 { page-break-after: avoid; }
+li, tr { page-break-inside: avoid; }
+"""
+
+# Stylesheets selectable with customization.pdf_style in config.yaml
+PDF_STYLES: Dict[str, str] = {
+    "simple": _BASE_CSS + """
+body { font-family: "DejaVu Sans", "Helvetica", "Arial", sans-serif; }
+h2 { border-bottom: 0.5pt solid #999; padding-bottom: 1pt; }
+""",
+    "professional": _BASE_CSS + """
+body { font-family: "Georgia", "DejaVu Serif", "Times New Roman", serif; }
+h1 { color: #1f3a5f; letter-spacing: 0.5pt; }
+h2 { color: #1f3a5f; text-transform: uppercase; font-size: 10.5pt; letter-spacing: 1pt;
+     border-bottom: 1pt solid #1f3a5f; padding-bottom: 1pt; }
+""",
+    "minimal": _BASE_CSS + """
+@page { margin: 14mm 16mm; }
+body { font-family: "DejaVu Sans", "Helvetica", "Arial", sans-serif; font-size: 9.5pt; }
+h1 { font-size: 16pt; }
+h2 { font-size: 11pt; margin-top: 9pt; }
+""",
+}
+DEFAULT_PDF_STYLE = "simple"
+
+_HTML = '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{title}</title></head>\n<body>\n{body}\n</body></html>'
+_WARM_UP = "# Warm-up\n\n## Section\n\n- **Bold**, *italic* and plain text\n"
+
+# Per-process state of a pool worker (set by _init_worker)
+_worker_css = None
+_worker_fonts = None
+_worker_error: Optional[str] = None
+
+
+def load_pdf_style(config_path: str = CONFIG_PATH) -> str:
+    """customization.pdf_style from config.yaml (DEFAULT_PDF_STYLE if unset or unknown)"""
+    try:
+        from ruamel.yaml import YAML
+
+        with open(config_path, "r", encoding="utf-8") as f:
+            style = ((YAML(typ="safe").load(f) or {}).get("customization") or {}).get("pdf_style")
+    except (ImportError, OSError) as e:
+        logger.warning(f"Could not read pdf_style from {config_path}, using {DEFAULT_PDF_STYLE}: {str(e)}")
+        return DEFAULT_PDF_STYLE
+    if style and style not in PDF_STYLES:
+        logger.warning(f"Unknown pdf_style '{style}', using {DEFAULT_PDF_STYLE}")
+        return DEFAULT_PDF_STYLE
+    return style or DEFAULT_PDF_STYLE
+
+
+def document_title(markdown_text: str) -> str:
+    """Text of the first level-1 heading (the candidate's name), or 'Resume' if there is none"""
+    for line in markdown_text.splitlines():
+        if line.startswith("# "):
+            return line[2:].strip(" #") or "Resume"
+    return "Resume"
+
+
+def markdown_to_html(markdown_text: str, title: Optional[str] = None) -> str:
+    """Standalone HTML document for a markdown resume (title: default document_title())"""
+    import html
+
+    import markdown
+
+    title = title if title is not None else document_title(markdown_text)
+    body = markdown.markdown(markdown_text, extensions=["extra", "sane_lists"])
+    return _HTML.format(title=html.escape(title), body=body)
+
+
+def render_key(markdown_text: str, css: str) -> str:
+    """SHA-256 of everything that determines a rendered PDF"""
+    payload = json.dumps({"markdown": markdown_text, "css": css, "version": RENDERER_VERSION}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PDFCache:
+    """Rendered PDFs stored as files named by their render_key"""
+
+    def __init__(self, directory: Union[str, Path] = PDF_CACHE_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.pdf"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Path of the cached PDF, or None"""
+        path = self.path(key)
+        return path if path.is_file() else None
+
+    def put(self, key: str, pdf: bytes) -> Path:
+        """Store a PDF (written to a temporary file and renamed, so readers never see a partial file)"""
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(pdf)
+        os.replace(tmp, path)
+        return path
+
+    def stats(self) -> Dict[str, int]:
+        files = list(self.directory.glob("*/*.pdf"))
+        return {"entries": len(files), "bytes": sum(f.stat().st_size for f in files)}
+
+    def clear(self) -> int:
+        """Delete every cached PDF; returns the number deleted"""
+        files = list(self.directory.glob("*/*.pdf"))
+        for f in files:
+            f.unlink(missing_ok=True)
+        return len(files)
+
+
+def _init_worker(css: str) -> None:
+    """Pool initializer: load WeasyPrint, parse the stylesheet and render a warm-up page"""
+    global _worker_css, _worker_fonts, _worker_error
+    try:
+        from weasyprint import CSS, HTML
+        from weasyprint.text.fonts import FontConfiguration
+
+        _worker_fonts = FontConfiguration()
+        _worker_css = CSS(string=css, font_config=_worker_fonts)
+        HTML(string=markdown_to_html(_WARM_UP)).render(stylesheets=[_worker_css], font_config=_worker_fonts)
+    except (ImportError, OSError) as e:  # OSError: WeasyPrint is installed but Pango is missing
+        _worker_error = f"WeasyPrint is not available: {str(e)}"
+
+
+def _ready() -> Tuple[int, Optional[str]]:
+    return os.getpid(), _worker_error
+
+
+def _render(key: str, markdown_text: str, cache_dir: str) -> Tuple[str, int, float]:
+    """Render one document into the cache (runs in a pool worker)
+
+    Returns:
+        (key, pages, seconds spent rendering)
+    """
+    if _worker_error is not None:
+        raise RuntimeError(_worker_error)
+    from weasyprint import HTML
+
+    start = time.perf_counter()
+    document = HTML(string=markdown_to_html(markdown_text)).render(
+        stylesheets=[_worker_css], font_config=_worker_fonts
+    )
+    PDFCache(cache_dir).put(key, document.write_pdf())
+    return key, len(document.pages), time.perf_counter() - start
+
+
+class PDFRenderer:
+    """Renders markdown resumes to PDF in a pool of warm worker processes, with an output cache"""
+
+    def __init__(
+        self,
+        style: Optional[str] = None,
+        workers: Optional[int] = None,
+        cache_dir: Union[str, Path] = PDF_CACHE_DIR,
+    ):
+        """Initialize renderer (worker processes start on start() or the first batch)
+
+        Args:
+            style: Key of PDF_STYLES (default: load_pdf_style())
+            workers: Worker processes (default: PDF_WORKERS, or one per CPU)
+            cache_dir: Directory of the rendered-PDF cache
+        """
+        self.style = style or load_pdf_style()
+        if self.style not in PDF_STYLES:
+            raise ValueError(f"Unknown PDF style: {self.style}")
+        self.css = PDF_STYLES[self.style]
+        self.workers = workers or PDF_WORKERS or os.cpu_count() or 1
+        self.cache = PDFCache(cache_dir)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        """Start and warm up the worker processes
+
+        Raises:
+            RuntimeError: If WeasyPrint cannot be loaded in the workers
+        """
+        if self._pool is not None:
+            return
+        start = time.perf_counter()
+        # spawn: workers load Pango/fontconfig themselves instead of inheriting a forked parent's threads
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.css,),
+        )
+        # Submitting one task per worker before any finishes makes the pool start all of them
+        results = [future.result() for future in [self._pool.submit(_ready) for _ in range(self.workers)]]
+        errors = [error for _, error in results if error]
+        if errors:
+            self.close()
+            raise RuntimeError(errors[0])
+        logger.info(f"✓ Started {self.workers} PDF workers ({self.style} style) "
+                    f"in {time.perf_counter() - start:.1f} s")
+
+    def render_batch(self, documents: Iterable[Tuple[str, Union[str, Path]]]) -> Dict[str, Any]:
+        """Render markdown documents to PDF files
+
+        Args:
+            documents: (markdown text, output PDF path) pairs
+
+        Returns:
+            Dictionary with documents, rendered (PDFs produced by the workers),
+            cached (served from the cache or a duplicate in the batch), failed,
+            pages (rendered), render_seconds (summed over workers),
+            elapsed_seconds, pages_per_second and errors (output path -> message)
+        """
+        start = time.perf_counter()
+        outputs: Dict[str, List[Path]] = {}
+        texts: Dict[str, str] = {}
+        for markdown_text, output_path in documents:
+            key = render_key(markdown_text, self.css)
+            outputs.setdefault(key, []).append(Path(output_path))
+            texts[key] = markdown_text
+
+        summary = {"documents": sum(len(paths) for paths in outputs.values()), "rendered": 0, "cached": 0,
+                   "failed": 0, "pages": 0, "render_seconds": 0.0, "errors": {}}
+        missing = [key for key in outputs if self.cache.get(key) is None]
+        failed: Dict[str, str] = {}
+        if missing:
+            self.start()
+            futures = {
+                self._pool.submit(_render, key, texts[key], str(self.cache.directory)): key
+                for key in missing
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    _, pages, seconds = future.result()
+                except Exception as e:
+                    failed[key] = str(e)
+                    logger.error(f"✗ PDF rendering failed for {outputs[key][0]}: {str(e)}")
+                    continue
+                summary["rendered"] += 1
+                summary["pages"] += pages
+                summary["render_seconds"] += seconds
+
+        for key, paths in outputs.items():
+            if key in failed:
+                summary["failed"] += len(paths)
+                summary["errors"].update({str(path): failed[key] for path in paths})
+                continue
+            summary["cached"] += len(paths) - (key in missing)
+            for path in paths:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(self.cache.path(key), path)
+
+        summary["elapsed_seconds"] = time.perf_counter() - start
+        summary["pages_per_second"] = summary["pages"] / max(summary["elapsed_seconds"], 1e-9)
+        return summary
+
+    def close(self) -> None:
+        """Shut down the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> "PDFRenderer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,67 @@
+"""Asyncio token buckets for provider rate limits
+
+A bucket holds up to ``capacity`` units and refills continuously at
+``rate_per_minute / 60`` units per second. ``acquire(n)`` takes ``n`` units,
+sleeping until they are available; waiters are served in arrival order, so
+a large request is not starved by a stream of small ones. LLM providers
+limit both requests and tokens per minute, so the runner holds one bucket
+of each and acquires from both before every request.
+"""
+
+import asyncio
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """Continuously refilling token bucket for asyncio code"""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize bucket (full)
+
+        Args:
+            rate_per_minute: Units added per minute
+            capacity: Largest burst (default: one minute's worth)
+            clock: Monotonic clock in seconds
+        """
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.rate = rate_per_minute / 60
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1) -> float:
+        """Take ``amount`` units, waiting for them if necessary
+
+        Amounts larger than the capacity wait for a full bucket and then
+        take the whole amount, leaving the balance negative: later callers
+        wait until the excess has been refilled, so the long-run rate stays
+        at ``rate_per_minute`` however large single requests are.
+
+        Returns:
+            Seconds spent waiting
+        """
+        needed = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:  # FIFO: later callers queue behind the one waiting for a refill
+            self._refill()
+            while self.tokens < needed:
+                delay = (needed - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self.tokens -= amount
+        return waited
@@ -1,20 +1,26 @@
 """Resume customization engine for tailoring templates to job descriptions"""
 
 from pathlib import Path
-from typing import Optional, Dict
+from typing import TYPE_CHECKING, Optional, Dict
 from loguru import logger
-from .template_manager import template_manager
+from .jd_compactor import CompactedDescription, compact_description
+from .template_manager import get_template_manager
+
+if TYPE_CHECKING:
+    from .llm_client import LLMClient
 
 
 class ResumeCustomizer:
     """Handle resume customization and PDF generation"""
 
-    def __init__(self, output_dir: str = "output/resumes"):
+    def __init__(self, output_dir: str = "output/resumes", llm: Optional["LLMClient"] = None):
         """Initialize resume customizer
 
         Args:
             output_dir: Directory to store customized resumes
+            llm: Client that tailors templates (None: only prepare metadata)
         """
+        self.llm = llm
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         logger.info(f"Initialized ResumeCustomizer with output directory: {self.output_dir}")
@@ -37,20 +43,20 @@ class ResumeCustomizer:
         """
         if user_preference:
             logger.info(f"Using user-preferred template: {user_preference}")
-            if template_manager.validate_template(user_preference):
+            if get_template_manager().validate_template(user_preference):
                 return user_preference
             else:
                 logger.warning(f"User template invalid, falling back to recommendations")
 
         # Get top recommendation
-        recommendations = template_manager.recommend_templates(job_title, job_description, top_n=1)
+        recommendations = get_template_manager().recommend_templates(job_title, job_description, top_n=1)
         if recommendations:
             selected = recommendations[0].filename
             logger.info(f"Selected template: {selected} for job '{job_title}'")
             return selected
 
         # Fallback to first available template
-        templates = list(template_manager.list_templates().keys())
+        templates = list(get_template_manager().list_templates().keys())
         logger.warning(f"No strong match found, using fallback template: {templates[0]}")
         return templates[0]
 
@@ -92,7 +98,7 @@ class ResumeCustomizer:
         Raises:
             FileNotFoundError: If template not found
         """
-        return template_manager.load_template(template_name)
+        return get_template_manager().load_template(template_name)
 
     def customize_resume(
         self,
@@ -101,12 +107,17 @@ class ResumeCustomizer:
         job_description: str,
         company: str,
         company_info: Optional[Dict] = None,
-        dry_run: bool = False
+        dry_run: bool = False,
+        use_cache: bool = True,
+        compact: bool = True,
+        compacted: Optional[CompactedDescription] = None
     ) -> Dict:
-        """Prepare resume for customization (Phase 2)
+        """Tailor a resume template to a job (Phase 2)
 
-        This is a placeholder for Phase 2 resume customization using AI.
-        Currently just validates inputs and prepares metadata.
+        Without an LLM client this only validates inputs and prepares metadata.
+        With one, the template is tailored to the compacted job description
+        (see jd_compactor.py; responses are cached by content hash, see
+        llm_cache.py) and written to the output path.
 
         Args:
             template_name: Resume template to use
@@ -114,22 +125,26 @@ class ResumeCustomizer:
             job_description: Job description to tailor to
             company: Company name
             company_info: Optional company metadata
-            dry_run: If True, don't write files
+            dry_run: If True, don't call the LLM or write files
+            use_cache: If False, bypass the LLM response cache lookup
+            compact: If False, send the full job description to the LLM
+            compacted: Already compacted description (e.g. stored with the job)
 
         Returns:
             Dictionary with customization metadata and paths
         """
         logger.info(f"Customizing resume for {company} - {job_title}")
 
-        # Load template
-        template_content = self.load_template_for_customization(template_name)
+        # Load template (cached; parsed once per file version)
+        template = get_template_manager().get_template(template_name)
 
         # Generate output paths
         output_path = self.generate_output_path(company, job_title, template_name)
 
         result = {
             "template_name": template_name,
-            "template_content": template_content,
+            "template_content": template.text,
+            "template_hash": template.sha256,
             "job_title": job_title,
             "job_description": job_description,
             "company": company,
@@ -140,8 +155,29 @@ class ResumeCustomizer:
         if company_info:
             result["company_info"] = company_info
 
-        if not dry_run:
+        if dry_run:
+            return result
+
+        if self.llm is None:
             logger.info(f"Customization prepared: {output_path}")
+            return result
+
+        description = job_description
+        if compact:
+            compacted = compacted or compact_description(job_description)
+            description = compacted.text
+            result.update(description_tokens=compacted.tokens_before, compacted_tokens=compacted.tokens_after)
+        response = self.llm.tailor_resume(template, job_title, description, company, use_cache=use_cache)
+        output_path.write_text(response["content"], encoding="utf-8")
+        result.update(
+            status="customized",
+            customized_content=response["content"],
+            llm_model=response["model"],
+            llm_usage=response["usage"],
+            llm_cached=response["cached"],
+            cache_key=response["cache_key"],
+        )
+        logger.info(f"✓ Customized resume written: {output_path}{' (cached)' if response['cached'] else ''}")
 
         return result
 
@@ -159,11 +195,25 @@ class ResumeCustomizer:
             return self.load_template_for_customization(template_name)
 
         # Default to latest template if not specified
-        templates = list(template_manager.list_templates().keys())
+        templates = list(get_template_manager().list_templates().keys())
         default_template = templates[0]
         logger.debug(f"Using default template for application {application_id}: {default_template}")
         return self.load_template_for_customization(default_template)
 
 
-# Global instance
-customizer = ResumeCustomizer()
+_customizer: Optional[ResumeCustomizer] = None
+
+
+def get_customizer() -> ResumeCustomizer:
+    """Shared ResumeCustomizer, created (with its output directory) on first use"""
+    global _customizer
+    if _customizer is None:
+        _customizer = ResumeCustomizer()
+    return _customizer
+
+
+def __getattr__(name: str):
+    # Global instance, created lazily so importing the module has no side effects
+    if name == "customizer":
+        return get_customizer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,181 @@
+"""Parsed, cached resume templates
+
+Templates are read and parsed once per file version: entries are keyed by
+path and validated against the file's mtime and size, so repeated loads
+(validate, select, customize) cost one ``stat`` instead of a read and a
+parse. With ``watch=False`` even the ``stat`` is skipped and edits are
+picked up only after ``reload()``.
+
+Each entry holds the raw markdown, a SHA-256 of its contents and a tree of
+its ATX (``#``) heading sections, with well-known resume sections (summary,
+experience, skills, ...) indexed by kind.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+# Section kind -> words that identify its heading (matched case-insensitively as substrings)
+SECTION_KINDS: Dict[str, Tuple[str, ...]] = {
+    "summary": ("summary", "profile", "about", "objective"),
+    "experience": ("experience", "employment", "work history", "career history"),
+    "skills": ("skill", "competenc", "expertise", "technolog"),
+    "education": ("education", "qualification"),
+    "certifications": ("certification", "licen"),
+    "projects": ("project",),
+}
+
+HEADING = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t]*#*[ \t]*$")
+FENCE = re.compile(r"^(```|~~~)")
+
+
+def section_kind(title: str) -> Optional[str]:
+    """Canonical kind of a section heading (e.g. 'Professional Summary' -> 'summary')"""
+    lowered = title.lower()
+    for kind, words in SECTION_KINDS.items():
+        if any(word in lowered for word in words):
+            return kind
+    return None
+
+
+@dataclass
+class TemplateSection:
+    """A heading and everything up to the next heading of the same or higher level"""
+    title: str
+    level: int  # Number of '#'
+    kind: Optional[str]  # See SECTION_KINDS
+    start: int  # Offset of the heading line in the template text
+    body_start: int  # Offset just after the heading line
+    end: int  # Offset where the section (including subsections) ends
+    children: List["TemplateSection"] = field(default_factory=list)
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+@dataclass
+class ParsedTemplate:
+    """A template file's contents, hash and section tree"""
+    name: str
+    path: Path
+    text: str
+    sha256: str
+    mtime_ns: int
+    size: int
+    sections: List[TemplateSection]  # Top-level sections
+    by_kind: Dict[str, TemplateSection]  # First section of each kind
+
+    def section(self, kind: str) -> Optional[TemplateSection]:
+        return self.by_kind.get(kind)
+
+    def section_text(self, kind: str, include_heading: bool = False) -> str:
+        """Text of the first section of a kind (including its subsections), or '' if absent"""
+        section = self.by_kind.get(kind)
+        if section is None:
+            return ""
+        start = section.start if include_heading else section.body_start
+        return self.text[start:section.end].strip("\n")
+
+
+def parse_sections(text: str) -> List[TemplateSection]:
+    """Build the heading tree of a markdown document (headings inside code fences are ignored)"""
+    roots: List[TemplateSection] = []
+    stack: List[TemplateSection] = []
+    offset = 0
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        line_start, offset = offset, offset + len(line)
+        stripped = line.rstrip("\r\n")
+        if FENCE.match(stripped):
+            in_fence = not in_fence
+            continue
+        match = None if in_fence else HEADING.match(stripped)
+        if match is None:
+            continue
+        level = len(match.group(1))
+        while stack and stack[-1].level >= level:
+            stack.pop().end = line_start
+        title = match.group(2).strip()
+        section = TemplateSection(title, level, section_kind(title), line_start, offset, len(text))
+        (stack[-1].children if stack else roots).append(section)
+        stack.append(section)
+    return roots
+
+
+def parse_template(name: str, path: Path, text: str, mtime_ns: int, size: int) -> ParsedTemplate:
+    sections = parse_sections(text)
+    by_kind: Dict[str, TemplateSection] = {}
+    for root in sections:
+        for section in root.walk():
+            if section.kind is not None:
+                by_kind.setdefault(section.kind, section)
+    return ParsedTemplate(
+        name=name,
+        path=path,
+        text=text,
+        sha256=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        mtime_ns=mtime_ns,
+        size=size,
+        sections=sections,
+        by_kind=by_kind,
+    )
+
+
+class TemplateCache:
+    """Thread-safe cache of parsed templates keyed by path and validated by mtime/size"""
+
+    def __init__(self, watch: bool = True):
+        """Initialize cache
+
+        Args:
+            watch: Re-stat the file on every access and reparse it when it changed.
+                If False, entries are reused until reload() is called.
+        """
+        self.watch = watch
+        self.reads = 0  # Files read and parsed (cache misses)
+        self._entries: Dict[Path, ParsedTemplate] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> ParsedTemplate:
+        """Parsed template at ``path``
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+        """
+        entry = self._entries.get(path)
+        if entry is not None and not self.watch:
+            return entry
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.discard(path)
+            raise FileNotFoundError(f"Template not found: {path}") from None
+        if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            return entry
+
+        text = path.read_text(encoding="utf-8")
+        entry = parse_template(path.name, path, text, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            self._entries[path] = entry
+            self.reads += 1
+        logger.info(f"Loaded template: {path.name} ({len(text)} bytes, {len(entry.by_kind)} known sections)")
+        return entry
+
+    def discard(self, path: Path) -> None:
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,11 +1,21 @@
 """Resume template management for multi-template support"""
 
+import os
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
 from dataclasses import dataclass
 from loguru import logger
 import re
 
+from .keyword_matcher import KeywordMatcher, TemplateMatch
+from .template_cache import ParsedTemplate, TemplateCache
+
+if TYPE_CHECKING:
+    from .batch_recommender import BatchScores
+
+# Re-stat template files on every load (false: only reload() picks up edits)
+TEMPLATE_WATCH = os.getenv("TEMPLATE_WATCH", "true").lower() == "true"
+
 
 @dataclass
 class ResumeTemplate:
@@ -57,13 +67,18 @@ class TemplateManager:
         ),
     }
 
-    def __init__(self, input_dir: str = "input"):
+    def __init__(self, input_dir: str = "input", watch: Optional[bool] = None):
         """Initialize template manager
 
         Args:
             input_dir: Path to input directory containing resume templates
+            watch: Pick up template edits on every load (default: TEMPLATE_WATCH)
         """
         self.input_dir = Path(input_dir)
+        self.cache = TemplateCache(watch=TEMPLATE_WATCH if watch is None else watch)
+        # Compiled once from the registry; every recommendation is a single scan of the job text
+        self.matcher = KeywordMatcher(self.TEMPLATE_REGISTRY.values())
+        self._batch_recommender = None  # Built on the first batch (imports NumPy)
         logger.info(f"Initializing TemplateManager with input directory: {self.input_dir}")
 
     def list_templates(self) -> Dict[str, ResumeTemplate]:
@@ -92,27 +107,67 @@ class TemplateManager:
         logger.debug(f"Template path: {template_path}")
         return template_path
 
-    def load_template(self, template_name: str) -> str:
-        """Load template content
+    def get_template(self, template_name: str) -> ParsedTemplate:
+        """Get a parsed template (raw text, content hash and sections), read once per file version
 
         Args:
             template_name: Template filename
 
         Returns:
-            Template content as string
+            ParsedTemplate from the cache
 
         Raises:
             FileNotFoundError: If template doesn't exist
         """
-        template_path = self.get_template_path(template_name)
         try:
-            content = template_path.read_text(encoding="utf-8")
-            logger.info(f"Loaded template: {template_name} ({len(content)} bytes)")
-            return content
+            return self.cache.get(self.input_dir / template_name)
         except Exception as e:
             logger.error(f"Failed to load template {template_name}: {e}")
             raise
 
+    def load_template(self, template_name: str) -> str:
+        """Load template content
+
+        Args:
+            template_name: Template filename
+
+        Returns:
+            Template content as string
+
+        Raises:
+            FileNotFoundError: If template doesn't exist
+        """
+        return self.get_template(template_name).text
+
+    def reload(self, template_name: Optional[str] = None) -> None:
+        """Drop cached templates so the next load reads them from disk
+
+        Args:
+            template_name: Template to reload (default: all)
+        """
+        if template_name is None:
+            self.cache.clear()
+        else:
+            self.cache.discard(self.input_dir / template_name)
+        logger.info(f"Template cache cleared: {template_name or 'all templates'}")
+
+    def match_job(self, job_title: str, job_description: str = "") -> TemplateMatch:
+        """Score every template against a job and count keyword hits
+
+        Role matches in the title add 10, each distinct keyword found (as a
+        whole word) in the title or description adds 2, plus the template's
+        priority.
+
+        Args:
+            job_title: Job title from posting
+            job_description: Job description text
+
+        Returns:
+            TemplateMatch with scores per template filename and hit counts per
+            keyword (``match.keywords_match`` suits Job.keywords_match)
+        """
+        return self.matcher.match(job_title, job_description)
+
     def recommend_templates(self, job_title: str, job_description: str = "", top_n: int = 3) -> List[ResumeTemplate]:
         """Recommend best matching templates based on job description
 
@@ -124,36 +179,46 @@ class TemplateManager:
         Returns:
             List of ResumeTemplate sorted by match score (best first)
         """
-        combined_text = f"{job_title} {job_description}".lower()
-        recommendations = []
+        match = self.match_job(job_title, job_description)
+        result = [self.TEMPLATE_REGISTRY[filename] for filename, _ in match.ranked(top_n)]
 
-        for template in self.TEMPLATE_REGISTRY.values():
-            score = 0
+        logger.info(
+            f"Recommended {len(result)} templates for job '{job_title}': "
+            f"{[t.name for t in result]}"
+        )
+        return result
 
-            # Check target roles (direct match in job title)
-            for role in template.target_roles:
-                if role.lower() in job_title.lower():
-                    score += 10  # High priority for role match
-                    break
+    def score_jobs(self, jobs: Iterable, weighting: str = "none") -> "BatchScores":
+        """Score many jobs against every template in one batch
 
-            # Check keywords (match in description)
-            keyword_matches = sum(1 for keyword in template.keywords if keyword in combined_text)
-            score += keyword_matches * 2
+        Args:
+            jobs: (title, description) pairs, job dicts or Job objects
+            weighting: "none" (same scores as match_job), "tfidf" or "bm25"
 
-            # Add template priority
-            score += template.priority
+        Returns:
+            BatchScores with a (jobs x templates) score matrix and keyword counts per job
+        """
+        if self._batch_recommender is None:
+            from .batch_recommender import BatchRecommender
+            self._batch_recommender = BatchRecommender(self.TEMPLATE_REGISTRY.values())
+        return self._batch_recommender.score(jobs, weighting)
 
-            if score > 0:
-                recommendations.append((template, score))
+    def recommend_templates_batch(
+        self, jobs: Iterable, top_n: int = 3, weighting: str = "none"
+    ) -> List[List[ResumeTemplate]]:
+        """Recommend templates for many jobs at once
 
-        # Sort by score descending and return top N
-        recommendations.sort(key=lambda x: x[1], reverse=True)
-        result = [template for template, _ in recommendations[:top_n]]
+        Args:
+            jobs: (title, description) pairs, job dicts or Job objects
+            top_n: Number of recommendations per job
+            weighting: "none" (same ranking as recommend_templates), "tfidf" or "bm25"
 
-        logger.info(
-            f"Recommended {len(result)} templates for job '{job_title}': "
-            f"{[t.name for t in result]}"
-        )
+        Returns:
+            Per job, a list of ResumeTemplate sorted by match score (best first)
+        """
+        batch = self.score_jobs(jobs, weighting)
+        result = [[self.TEMPLATE_REGISTRY[filename] for filename in filenames] for filenames in batch.top(top_n)]
+        logger.info(f"Recommended templates for {len(result)} jobs ({weighting} weighting)")
         return result
 
     def get_template_choice_prompt(self, job_title: str, job_description: str = "") -> str:
@@ -183,7 +248,7 @@ class TemplateManager:
         return prompt
 
     def validate_template(self, template_name: str) -> bool:
-        """Validate that a template exists and is readable
+        """Validate that a template exists and is readable (loading it into the cache)
 
         Args:
             template_name: Template filename
@@ -192,8 +257,7 @@ class TemplateManager:
             True if valid and readable, False otherwise
         """
         try:
-            self.get_template_path(template_name)
-            _ = self.load_template(template_name)
+            self.get_template(template_name)
             return True
         except Exception as e:
             logger.warning(f"Template validation failed for {template_name}: {e}")
@@ -221,5 +285,19 @@ class TemplateManager:
         return info
 
 
-# Global instance
-template_manager = TemplateManager()
+_template_manager: Optional[TemplateManager] = None
+
+
+def get_template_manager() -> TemplateManager:
+    """Shared TemplateManager, created on first use"""
+    global _template_manager
+    if _template_manager is None:
+        _template_manager = TemplateManager()
+    return _template_manager
+
+
+def __getattr__(name: str):
+    # Global instance, created lazily so importing the module has no side effects
+    if name == "template_manager":
+        return get_template_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,15 @@
-"""Database module - SQLAlchemy ORM and models"""
+"""Database module - SQLAlchemy ORM and models
 
-from .models import Base, Job, Application, ApplicationLog
+Models are loaded on first attribute access, so lightweight submodules
+(``database.fast_stats``) can be imported without SQLAlchemy.
+"""
 
-__all__ = ["Base", "Job", "Application", "ApplicationLog"]
+__all__ = ["Base", "Job", "Application", "ApplicationLog", "StatCounter", "JobSignature", "JobLSHBucket",
+           "JobCompaction"]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        from . import models
+        return getattr(models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,401 @@
+"""Move old jobs and application logs out of the hot database
+
+Rows older than ``application.archive_threshold_days`` are streamed (keyset
+pagination, constant memory) into compressed monthly partitions::
+
+    <archive_dir>/<table>/month=YYYY-MM/part-<run>.parquet      (pyarrow installed)
+    <archive_dir>/<table>/month=YYYY-MM/part-<run>.jsonl.zst    (otherwise; .gz without zstandard)
+
+then deleted from the database in batches, by the ids that were written
+out (spooled to a temporary file rather than held in memory), and the
+freed pages are returned with an incremental VACUUM. If writing fails,
+the run's partition files are removed and nothing is deleted.
+``read_archive`` queries the partitions again.
+
+Jobs that still have applications are never archived, so foreign keys and
+application history stay intact.
+"""
+
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import Boolean, DateTime, Engine, Integer, JSON, Table, and_, delete, exists, select, text
+from .compression import database_size
+from .models import Application, ApplicationLog, Job
+from .pagination import keyset_after
+from .search import rebuild_search_index
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional dependency - JSONL partitions are written instead
+    pyarrow = None
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency - gzip is used instead
+    zstandard = None
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "database/archive")
+CONFIG_PATH = os.getenv("CONFIG_PATH", "config/config.yaml")
+DEFAULT_THRESHOLD_DAYS = 90
+
+# Archived table -> timestamp column the threshold and partitions are based on
+ARCHIVED_TABLES = {
+    "jobs": "scraped_at",
+    "application_logs": "timestamp",
+}
+
+PARQUET_SUFFIX = ".parquet"
+JSONL_SUFFIXES = (".jsonl.zst", ".jsonl.gz")
+
+
+def load_threshold_days(config_path: str = CONFIG_PATH) -> int:
+    """Read application.archive_threshold_days from config.yaml (90 if unset)"""
+    try:
+        from ruamel.yaml import YAML
+
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = YAML(typ="safe").load(f) or {}
+        return int(config.get("application", {}).get("archive_threshold_days", DEFAULT_THRESHOLD_DAYS))
+    except (ImportError, OSError) as e:
+        logger.warning(f"Could not read archive threshold from {config_path}, using {DEFAULT_THRESHOLD_DAYS} days: {str(e)}")
+        return DEFAULT_THRESHOLD_DAYS
+
+
+def _table(name: str) -> Table:
+    return {"jobs": Job.__table__, "application_logs": ApplicationLog.__table__}[name]
+
+
+def _default_format() -> str:
+    return "parquet" if pyarrow is not None else "jsonl"
+
+
+class _PartitionWriter:
+    """Appends batches of rows to one partition file, renamed into place on close"""
+
+    def __init__(self, table: Table, directory: Path, run_id: str, fmt: str):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.table = table
+        self.fmt = fmt
+        if fmt == "parquet":
+            suffix = PARQUET_SUFFIX
+        else:
+            suffix = JSONL_SUFFIXES[0] if zstandard is not None else JSONL_SUFFIXES[1]
+        self.path = directory / f"part-{run_id}{suffix}"
+        # Readers only pick up finished files; a crash leaves an ignored .tmp behind
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self.rows = 0
+        self._closed = False
+
+        if fmt == "parquet":
+            self._schema = _arrow_schema(table)
+            self._writer = pyarrow.parquet.ParquetWriter(str(self._tmp_path), self._schema, compression="zstd")
+        else:
+            self._file = open(self._tmp_path, "wb")
+            if zstandard is not None:
+                self._stream = zstandard.ZstdCompressor(level=6).stream_writer(self._file)
+            else:
+                self._stream = gzip.GzipFile(fileobj=self._file, mode="wb", compresslevel=6, mtime=0)
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        if self.fmt == "parquet":
+            self._writer.write_table(pyarrow.Table.from_pylist([_encode_json(self.table, row) for row in rows],
+                                                               schema=self._schema))
+        else:
+            for row in rows:
+                self._stream.write(json.dumps(row, default=_json_default).encode("utf-8") + b"\n")
+        self.rows += len(rows)
+
+    def _close_file(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self.fmt == "parquet":
+            self._writer.close()
+        else:
+            self._stream.close()  # Also closes the underlying file
+
+    def close(self) -> Path:
+        """Finish the file and move it to its final name"""
+        self._close_file()
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        """Discard the partition, including a file already moved into place"""
+        try:
+            self._close_file()
+        except Exception as e:  # The file is being thrown away anyway
+            logger.debug(f"Closing aborted partition {self._tmp_path} failed: {str(e)}")
+        self._tmp_path.unlink(missing_ok=True)
+        self.path.unlink(missing_ok=True)
+
+
+def _arrow_schema(table: Table):
+    fields = []
+    for column in table.columns:
+        if isinstance(column.type, Boolean):
+            arrow_type = pyarrow.bool_()
+        elif isinstance(column.type, Integer):
+            arrow_type = pyarrow.int64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pyarrow.timestamp("us")
+        else:
+            arrow_type = pyarrow.string()  # Text, CompressedText (Parquet compresses it) and JSON-encoded columns
+        fields.append(pyarrow.field(column.name, arrow_type))
+    return pyarrow.schema(fields)
+
+
+def _json_columns(table: Table) -> List[str]:
+    return [column.name for column in table.columns if isinstance(column.type, JSON)]
+
+
+def _encode_json(table: Table, row: Dict[str, Any]) -> Dict[str, Any]:
+    for name in _json_columns(table):
+        if row[name] is not None:
+            row[name] = json.dumps(row[name])
+    return row
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot archive value of type {type(value).__name__}")
+
+
+def _stream_old_rows(engine: Engine, table_name: str, cutoff: datetime, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield batches of archivable rows ordered by (timestamp, id) using keyset pagination"""
+    table = _table(table_name)
+    ts = table.c[ARCHIVED_TABLES[table_name]]
+    condition = _archivable(table_name, cutoff)
+    last: Optional[Tuple[datetime, Any]] = None
+    while True:
+        statement = select(table).where(condition)
+        if last is not None:
+            statement = statement.where(keyset_after(ts, table.c.id, last))
+        statement = statement.order_by(ts, table.c.id).limit(batch_size)
+        with engine.connect() as connection:
+            rows = [dict(row._mapping) for row in connection.execute(statement)]
+        if not rows:
+            return
+        last = (rows[-1][ts.name], rows[-1]["id"])
+        yield rows
+
+
+def _archivable(table_name: str, cutoff: datetime):
+    table = _table(table_name)
+    condition = table.c[ARCHIVED_TABLES[table_name]] < cutoff
+    if table_name == "jobs":
+        applications = Application.__table__
+        condition = and_(condition, ~exists().where(applications.c.job_id == table.c.id))
+    return condition
+
+
+def _spooled_ids(spool: IO[str]) -> Iterator[Any]:
+    """Ids written to the spool file by archive_old_rows, one JSON value per line"""
+    spool.seek(0)
+    for line in spool:
+        yield json.loads(line)
+
+
+def _delete_archived(engine: Engine, table_name: str, cutoff: datetime, ids: Iterator[Any], batch_size: int) -> int:
+    """Delete archived rows in batches
+
+    Only the ids that were written out are deleted, so rows added while the
+    archive was written are kept. A row that stopped being archivable in
+    the meantime (e.g. a job that got an application) is kept as well.
+    """
+    table = _table(table_name)
+    condition = _archivable(table_name, cutoff)
+    deleted = 0
+    while True:
+        batch = list(islice(ids, batch_size))
+        if not batch:
+            return deleted
+        with engine.begin() as connection:
+            deleted += connection.execute(delete(table).where(table.c.id.in_(batch), condition)).rowcount
+
+
+def _reclaim_space(engine: Engine) -> None:
+    """Return freed pages to the filesystem without rewriting the whole database each run"""
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("VACUUM (ANALYZE) jobs, application_logs"))
+        return
+    if engine.dialect.name != "sqlite":
+        return
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if connection.execute(text("PRAGMA auto_vacuum")).scalar() == 2:  # INCREMENTAL
+            connection.execute(text("PRAGMA incremental_vacuum"))
+            return
+        # auto_vacuum only takes effect after one full VACUUM; later runs are incremental
+        logger.info("Enabling incremental auto-vacuum (one-time full VACUUM)")
+        connection.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+        connection.execute(text("VACUUM"))
+    # VACUUM may renumber rowids, which the FTS5 index is keyed on
+    with engine.begin() as connection:
+        rebuild_search_index(connection)
+
+
+def archive_old_rows(
+    engine: Engine,
+    threshold_days: Optional[int] = None,
+    archive_dir: str = ARCHIVE_DIR,
+    fmt: Optional[str] = None,
+    batch_size: int = 1000,
+    vacuum: bool = True,
+) -> Dict[str, Any]:
+    """Archive jobs and application logs older than the threshold
+
+    Args:
+        engine: Engine bound to the jobs database
+        threshold_days: Age in days (defaults to application.archive_threshold_days)
+        archive_dir: Root directory of the partitioned archive
+        fmt: "parquet" or "jsonl" (defaults to parquet when pyarrow is installed)
+        batch_size: Rows read, written and deleted per batch
+        vacuum: Reclaim freed pages afterwards
+
+    Returns:
+        Dictionary with jobs_archived, logs_archived, files (written paths),
+        size_before and size_after (bytes)
+    """
+    fmt = fmt or _default_format()
+    if fmt not in ("parquet", "jsonl"):
+        raise ValueError(f"Unknown archive format '{fmt}'. Expected parquet or jsonl")
+    if fmt == "parquet" and pyarrow is None:
+        raise RuntimeError("Parquet archives need the 'pyarrow' package; use fmt='jsonl' instead")
+
+    if threshold_days is None:
+        threshold_days = load_threshold_days()
+    cutoff = datetime.utcnow() - timedelta(days=threshold_days)
+    run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    size_before = database_size(engine)
+    counts: Dict[str, int] = {}
+    files: List[str] = []
+
+    for table_name, ts_column in ARCHIVED_TABLES.items():
+        writers: Dict[str, _PartitionWriter] = {}
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:  # Archived ids, one per line
+            try:
+                for rows in _stream_old_rows(engine, table_name, cutoff, batch_size):
+                    by_month: Dict[str, List[Dict[str, Any]]] = {}
+                    for row in rows:
+                        by_month.setdefault(row[ts_column].strftime("%Y-%m"), []).append(row)
+                    for month, month_rows in by_month.items():
+                        if month not in writers:
+                            directory = Path(archive_dir) / table_name / f"month={month}"
+                            writers[month] = _PartitionWriter(_table(table_name), directory, run_id, fmt)
+                        writers[month].write(month_rows)
+                    spool.writelines(f"{json.dumps(row['id'])}\n" for row in rows)
+                table_files = [str(writer.close()) for writer in writers.values()]
+            except BaseException:
+                # Nothing was deleted yet: drop this run's partitions so the rows are not archived twice
+                for writer in writers.values():
+                    writer.abort()
+                raise
+            files.extend(table_files)
+
+            # Only delete once every partition file is safely on disk
+            counts[table_name] = 0
+            if writers:
+                counts[table_name] = _delete_archived(engine, table_name, cutoff, _spooled_ids(spool), batch_size)
+                logger.info(f"✓ Archived {counts[table_name]} rows from {table_name} into {len(writers)} partition(s)")
+
+    if vacuum and any(counts.values()):
+        _reclaim_space(engine)
+
+    return {
+        "jobs_archived": counts["jobs"],
+        "logs_archived": counts["application_logs"],
+        "files": files,
+        "size_before": size_before,
+        "size_after": database_size(engine),
+    }
+
+
+def _read_partition(path: Path, table: Table) -> Iterator[Dict[str, Any]]:
+    if path.name.endswith(PARQUET_SUFFIX):
+        if pyarrow is None:
+            raise RuntimeError(f"{path} is a Parquet partition but the 'pyarrow' package is not installed")
+        json_columns = _json_columns(table)
+        for batch in pyarrow.parquet.ParquetFile(str(path)).iter_batches():
+            for row in batch.to_pylist():
+                for name in json_columns:
+                    if row[name] is not None:
+                        row[name] = json.loads(row[name])
+                yield row
+        return
+
+    if path.name.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed but the 'zstandard' package is not installed")
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    else:
+        raw = gzip.open(path, "rb")
+    datetime_columns = [column.name for column in table.columns if isinstance(column.type, DateTime)]
+    with io.TextIOWrapper(raw, encoding="utf-8") as lines:
+        for line in lines:
+            row = json.loads(line)
+            for name in datetime_columns:
+                if row[name] is not None:
+                    row[name] = datetime.fromisoformat(row[name])
+            yield row
+
+
+def read_archive(
+    table_name: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    where: Optional[Dict[str, Any]] = None,
+    archive_dir: str = ARCHIVE_DIR,
+) -> Iterator[Dict[str, Any]]:
+    """Stream archived rows back, oldest partition first
+
+    Only the monthly partitions overlapping [since, until) are opened.
+
+    Args:
+        table_name: "jobs" or "application_logs"
+        since: Include rows at or after this time
+        until: Include rows before this time
+        where: Column equality filters, e.g. {"source": "linkedin"}
+        archive_dir: Root directory of the partitioned archive
+
+    Yields:
+        Row dicts with the same keys and Python types as the database columns
+    """
+    if table_name not in ARCHIVED_TABLES:
+        raise ValueError(f"Unknown archived table '{table_name}'. Expected one of: {', '.join(ARCHIVED_TABLES)}")
+    table = _table(table_name)
+    ts_column = ARCHIVED_TABLES[table_name]
+    where = where or {}
+    root = Path(archive_dir) / table_name
+    if not root.is_dir():
+        return
+
+    for directory in sorted(root.glob("month=*")):
+        month = directory.name.split("=", 1)[1]
+        if since is not None and month < since.strftime("%Y-%m"):
+            continue
+        if until is not None and month > until.strftime("%Y-%m"):
+            continue
+        for path in sorted(directory.iterdir()):
+            if not path.name.endswith((PARQUET_SUFFIX,) + JSONL_SUFFIXES):
+                continue
+            for row in _read_partition(path, table):
+                ts = row[ts_column]
+                if since is not None and ts < since:
+                    continue
+                if until is not None and ts >= until:
+                    continue
+                if all(row.get(column) == value for column, value in where.items()):
+                    yield row
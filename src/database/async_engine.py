@@ -0,0 +1,286 @@
+"""Async database access for asyncio pipeline stages
+
+``AsyncDatabaseManager`` mirrors the operations async code needs from
+``DatabaseManager`` (health check, stats, bulk upsert, work-queue claims) on
+an ``AsyncEngine``: aiosqlite for SQLite, asyncpg for PostgreSQL. The models,
+statements and upsert logic are the same ones the sync manager uses; code
+written against the sync ``Connection`` runs through ``run_sync``.
+
+Requires the optional ``aiosqlite`` / ``asyncpg`` drivers (and greenlet).
+"""
+
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import make_url, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import undefer
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from .compactions import load_compactions, save_compactions
+from .counters import install_triggers, read_counters, recount, summarize
+from .dedup import index_missing_batch
+from .engine import DATABASE_URL, SQLITE_PRAGMAS, SQLITE_PROFILE, SQLITE_READ_POOL_SIZE, install_sqlite_pragmas
+from .models import Application, Base, Job, StatCounter
+from .profiling import SQL_PROFILE, instrument_engine
+from .rescrape import DEFAULT_RESCRAPE_DAYS, apply_rescrape, select_stale_jobs
+from .upsert import DEFAULT_CHUNK_SIZE, JobRow, chunked, normalize_job_row, upsert_chunk
+from .work_queue import (
+    DEFAULT_LEASE_SECONDS, claim_statement, leased_update_statement, release_values, renew_values,
+)
+
+# Sync driver names mapped to their asyncio counterparts
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgresql+psycopg": "postgresql+asyncpg",
+}
+
+
+def to_async_url(database_url: str) -> str:
+    """Rewrite a sync database URL to use the asyncio driver (already-async URLs pass through)"""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.drivername)
+    if driver is None:
+        return database_url
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def create_async_db_engine(database_url: str = DATABASE_URL, profile: str = SQLITE_PROFILE) -> AsyncEngine:
+    """Create an AsyncEngine for the given (sync or async) URL
+
+    Args:
+        database_url: SQLAlchemy database URL, e.g. the same DATABASE_URL the sync engine uses
+        profile: SQLite profile name (key of SQLITE_PRAGMAS); ignored for other databases
+
+    Returns:
+        Configured AsyncEngine
+    """
+    url = to_async_url(database_url)
+    if not url.startswith("sqlite"):
+        db_engine = create_async_engine(url)
+    else:
+        if profile not in SQLITE_PRAGMAS:
+            raise ValueError(f"Unknown SQLite profile '{profile}'. Expected one of: {', '.join(SQLITE_PRAGMAS)}")
+        in_memory = make_url(url).database in (None, "", ":memory:")
+        if profile == "production" and not in_memory:
+            # WAL lets readers run beside the writer, so pool connections like the sync engine
+            db_engine = create_async_engine(
+                url,
+                poolclass=AsyncAdaptedQueuePool,
+                pool_size=SQLITE_READ_POOL_SIZE,
+                max_overflow=SQLITE_READ_POOL_SIZE,
+                connect_args={"timeout": 30},
+            )
+        elif in_memory:
+            # One shared connection, otherwise every checkout sees a new empty database
+            db_engine = create_async_engine(url, poolclass=StaticPool)
+        else:
+            # Without WAL concurrent connections only contend for the file lock, so
+            # hold a single connection; unlike StaticPool, concurrent tasks queue for
+            # it instead of interleaving their transactions on it
+            db_engine = create_async_engine(
+                url,
+                poolclass=AsyncAdaptedQueuePool,
+                pool_size=1,
+                max_overflow=0,
+                connect_args={"timeout": 30},
+            )
+        install_sqlite_pragmas(db_engine.sync_engine, SQLITE_PRAGMAS[profile])
+
+    if SQL_PROFILE:
+        instrument_engine(db_engine.sync_engine)
+    return db_engine
+
+
+async def _as_async(iterable: Iterable) -> AsyncIterator:
+    for item in iterable:
+        yield item
+
+
+async def _achunked(rows: AsyncIterable[JobRow], size: int) -> AsyncIterator[List[JobRow]]:
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class AsyncDatabaseManager:
+    """Async counterpart of DatabaseManager"""
+
+    def __init__(self, bind: Optional[AsyncEngine] = None, database_url: str = DATABASE_URL):
+        """Initialize manager
+
+        Args:
+            bind: AsyncEngine to use (e.g. for tests)
+            database_url: URL to create an engine for when ``bind`` is not given
+        """
+        self.engine = bind if bind is not None else create_async_db_engine(database_url)
+        # Objects stay readable after commit; they are detached once the session closes
+        self.SessionLocal = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+
+    def get_session(self) -> AsyncSession:
+        """Get a new async session"""
+        return self.SessionLocal()
+
+    async def close(self) -> None:
+        """Release pooled connections"""
+        await self.engine.dispose()
+
+    async def create_all_tables(self) -> None:
+        """Create all tables in database"""
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    async def health_check(self) -> bool:
+        """Check if database is accessible"""
+        try:
+            async with self.engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            print(f"✗ Database health check failed: {str(e)}")
+            return False
+
+    async def get_stats(self) -> dict:
+        """Get database statistics from the trigger-maintained counters (one query)"""
+        try:
+            async with self.engine.connect() as connection:
+                counters = await connection.run_sync(read_counters)
+        except (OperationalError, ProgrammingError):
+            counters = {}  # Database created before stat_counters existed
+        if not counters:
+            counters = await self.recount_stats()
+        return summarize(counters)
+
+    async def recount_stats(self) -> Dict[str, int]:
+        """Rebuild statistics counters with full COUNT(*) queries"""
+
+        def rebuild(connection) -> Dict[str, int]:
+            StatCounter.__table__.create(bind=connection, checkfirst=True)
+            install_triggers(connection)
+            return recount(connection)
+
+        async with self.engine.begin() as connection:
+            return await connection.run_sync(rebuild)
+
+    async def bulk_upsert_jobs(
+        self,
+        jobs: Union[Iterable[JobRow], AsyncIterable[JobRow]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        index_duplicates: bool = True,
+    ) -> Dict[str, int]:
+        """Insert or update scraped jobs in bulk (see DatabaseManager.bulk_upsert_jobs)
+
+        Args:
+            jobs: Iterable or async iterable of job dicts (or unsaved Job instances)
+            chunk_size: Rows written per upsert statement/transaction
+            index_duplicates: Index new and rewritten jobs for near-duplicate detection once they are written
+
+        Returns:
+            Dictionary with inserted, updated, unchanged and skipped counts
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+        if hasattr(jobs, "__aiter__"):
+            chunks = _achunked(jobs, chunk_size)
+        else:
+            chunks = _as_async(chunked(jobs, chunk_size))
+        async for raw_chunk in chunks:
+            chunk = [normalize_job_row(row) for row in raw_chunk]
+            async with self.engine.begin() as connection:
+                await connection.run_sync(upsert_chunk, chunk, counts)
+        if index_duplicates and (counts["inserted"] or counts["updated"]):
+            while True:
+                async with self.engine.begin() as connection:
+                    if not await connection.run_sync(index_missing_batch):
+                        break
+        return counts
+
+    async def get_job(self, job_id: str) -> Optional[Job]:
+        """Job by ID with its description loaded (detached), or None"""
+        async with self.SessionLocal() as session:
+            return await session.get(Job, job_id, options=[undefer(Job.description)])
+
+    async def get_compaction(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Stored compacted description of a job (row dict), or None"""
+        async with self.engine.connect() as connection:
+            return (await connection.run_sync(load_compactions, [job_id])).get(job_id)
+
+    async def save_compactions(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Insert or replace compacted descriptions; returns the number written"""
+        rows = list(rows)
+        async with self.engine.begin() as connection:
+            return await connection.run_sync(save_compactions, rows)
+
+    async def stale_jobs(
+        self,
+        threshold_days: int = DEFAULT_RESCRAPE_DAYS,
+        limit: int = 100,
+        sources: Optional[Sequence[str]] = None,
+        after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Jobs due for re-scraping with their stored validators (see rescrape.select_stale_jobs)"""
+        async with self.engine.connect() as connection:
+            return await connection.run_sync(select_stale_jobs, threshold_days, limit, sources, after)
+
+    async def apply_rescrape(self, results: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Record re-scrape outcomes (see rescrape.apply_rescrape)"""
+        results = list(results)
+        async with self.engine.begin() as connection:
+            return await connection.run_sync(apply_rescrape, results)
+
+    async def claim_next(
+        self,
+        status_from: str,
+        status_to: str,
+        worker_id: str,
+        lease_seconds: int = DEFAULT_LEASE_SECONDS,
+    ) -> Optional[Application]:
+        """Atomically lease the next application in ``status_from`` (see DatabaseManager.claim_next)
+
+        Returns:
+            The claimed Application (detached), or None if no work is available
+        """
+        statement = claim_statement(status_from, status_to, worker_id, lease_seconds)
+        async with self.SessionLocal() as session:
+            application = (await session.scalars(statement)).first()
+            await session.commit()
+        return application
+
+    async def renew_lease(self, application_id: int, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend a claim; returns False if the lease was lost"""
+        return await self._update_leased(application_id, worker_id, renew_values(lease_seconds))
+
+    async def release_application(
+        self,
+        application_id: int,
+        worker_id: str,
+        status: str,
+        error_message: Optional[str] = None,
+        **fields,
+    ) -> bool:
+        """Move a claimed application to its next status and clear the lease
+
+        ``fields`` sets other Application columns (e.g. tailored_resume_path).
+
+        Returns:
+            False if the lease was lost (nothing is changed)
+        """
+        values = release_values(status, error_message, **fields)
+        return await self._update_leased(application_id, worker_id, values)
+
+    async def _update_leased(self, application_id: int, worker_id: str, values: Dict[str, Any]) -> bool:
+        statement = leased_update_statement(application_id, worker_id, values)
+        async with self.SessionLocal() as session:
+            result = await session.execute(statement)
+            await session.commit()
+        return result.rowcount == 1
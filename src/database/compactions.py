@@ -0,0 +1,50 @@
+"""Storage for compacted job descriptions
+
+The compaction itself is done by ``customizer.jd_compactor``; this module
+only reads and writes its results in job_compactions (one row per job,
+replaced when the job is compacted again) and totals the token savings.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping
+
+from sqlalchemy import Connection, func, select
+from .models import JobCompaction
+from .upsert import _insert_factory
+
+COMPACTION_FIELDS = ("job_id", "description_hash", "version", "text", "tokens_before", "tokens_after")
+
+
+def load_compactions(connection: Connection, job_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Stored compactions of ``job_ids`` (job id -> row dict); jobs without one are absent"""
+    table = JobCompaction.__table__
+    ids = list(job_ids)
+    if not ids:
+        return {}
+    rows = connection.execute(select(*(table.c[name] for name in COMPACTION_FIELDS)).where(table.c.job_id.in_(ids)))
+    return {row.job_id: dict(row._mapping) for row in rows}
+
+
+def save_compactions(connection: Connection, rows: Iterable[Mapping[str, Any]]) -> int:
+    """Insert or replace compactions (see jd_compactor.compaction_row); returns the number written"""
+    values: List[Dict[str, Any]] = [{name: row[name] for name in COMPACTION_FIELDS} for row in rows]
+    if not values:
+        return 0
+    insert = _insert_factory(connection)
+    statement = insert(JobCompaction.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=["job_id"],
+        set_={name: statement.excluded[name] for name in COMPACTION_FIELDS[1:]} | {"compacted_at": datetime.utcnow()},
+    )
+    connection.execute(statement, values)
+    return len(values)
+
+
+def compaction_totals(connection: Connection) -> Dict[str, int]:
+    """Compacted jobs and their summed token counts before and after compaction"""
+    table = JobCompaction.__table__
+    jobs, before, after = connection.execute(
+        select(func.count(), func.coalesce(func.sum(table.c.tokens_before), 0),
+               func.coalesce(func.sum(table.c.tokens_after), 0))
+    ).one()
+    return {"jobs": jobs, "tokens_before": before, "tokens_after": after}
@@ -0,0 +1,153 @@
+"""Transparent compression for large text columns (Job.html_content)"""
+
+import gzip
+from typing import Dict, Optional
+
+from loguru import logger
+from sqlalchemy import Engine, LargeBinary, inspect, text
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency - gzip is used instead
+    zstandard = None
+
+# Values smaller than this are stored as plain UTF-8 bytes
+COMPRESSION_THRESHOLD = 1024
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def compress(data: bytes) -> bytes:
+    """Compress with zstd when available, otherwise gzip"""
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def decompress(data: bytes) -> bytes:
+    """Decompress a value written by compress(); plain bytes pass through
+
+    Neither magic number is a valid UTF-8 prefix (both continue with a byte in
+    0x80-0xBF after an ASCII byte), so plain text can never be mistaken for a
+    compressed frame.
+    """
+    if data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("Value is zstd-compressed but the 'zstandard' package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if data.startswith(GZIP_MAGIC):
+        return gzip.decompress(data)
+    return data
+
+
+class CompressedText(TypeDecorator):
+    """Text stored as bytes, compressed when larger than a threshold
+
+    Reads accept legacy rows written as plain TEXT, so existing databases keep
+    working before ``compress-db`` has rewritten them.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, threshold: int = COMPRESSION_THRESHOLD, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threshold = threshold
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        data = value.encode("utf-8")
+        if len(data) < self.threshold:
+            return data
+        return compress(data)
+
+    def process_result_value(self, value, dialect) -> Optional[str]:
+        if value is None or isinstance(value, str):
+            return value
+        return decompress(bytes(value)).decode("utf-8")
+
+
+def database_size(engine: Engine) -> int:
+    """Size of the database in bytes (SQLite file pages or PostgreSQL database)"""
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            page_count = connection.execute(text("PRAGMA page_count")).scalar()
+            page_size = connection.execute(text("PRAGMA page_size")).scalar()
+            return page_count * page_size
+        if engine.dialect.name == "postgresql":
+            return connection.execute(text("SELECT pg_database_size(current_database())")).scalar()
+    return 0
+
+
+def recompress_jobs(engine: Engine, batch_size: int = 500, vacuum: bool = True) -> Dict[str, int]:
+    """Rewrite Job.html_content with the current compression settings
+
+    Legacy plain-TEXT rows are compressed, rows already stored in the current
+    format are left alone. On PostgreSQL a text column is first converted to
+    bytea. SQLite is VACUUMed afterwards so the freed pages are returned.
+
+    Args:
+        engine: Engine bound to the jobs database
+        batch_size: Rows read and rewritten per transaction
+        vacuum: Reclaim free pages after rewriting (SQLite only)
+
+    Returns:
+        Dictionary with rows_scanned, rows_rewritten, size_before and size_after (bytes)
+    """
+    column_type = CompressedText()
+    size_before = database_size(engine)
+    scanned = rewritten = 0
+
+    if engine.dialect.name == "postgresql":
+        columns = {column["name"]: column for column in inspect(engine).get_columns("jobs")}
+        if not isinstance(columns["html_content"]["type"], LargeBinary):
+            logger.info("Converting jobs.html_content to bytea")
+            with engine.begin() as connection:
+                connection.execute(text(
+                    "ALTER TABLE jobs ALTER COLUMN html_content TYPE bytea "
+                    "USING convert_to(html_content, 'UTF8')"
+                ))
+
+    # Raw driver values (text() leaves the column untyped) so stored bytes can be compared
+    select_batch = text(
+        "SELECT id, html_content FROM jobs WHERE id > :last_id AND html_content IS NOT NULL "
+        "ORDER BY id LIMIT :batch_size"
+    )
+    update_row = text("UPDATE jobs SET html_content = :html_content WHERE id = :id")
+
+    last_id = ""
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(select_batch, {"last_id": last_id, "batch_size": batch_size}).all()
+            if not rows:
+                break
+            updates = []
+            for job_id, stored in rows:
+                value = column_type.process_result_value(stored, engine.dialect)
+                encoded = column_type.process_bind_param(value, engine.dialect)
+                if isinstance(stored, str) or bytes(stored) != encoded:
+                    updates.append({"id": job_id, "html_content": encoded})
+            if updates:
+                connection.execute(update_row, updates)
+            scanned += len(rows)
+            rewritten += len(updates)
+            last_id = rows[-1][0]
+
+    if vacuum and engine.dialect.name == "sqlite":
+        from .search import rebuild_search_index
+
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("VACUUM"))
+        # VACUUM may renumber rowids, which the FTS5 index is keyed on
+        with engine.begin() as connection:
+            rebuild_search_index(connection)
+
+    return {
+        "rows_scanned": scanned,
+        "rows_rewritten": rewritten,
+        "size_before": size_before,
+        "size_after": database_size(engine),
+    }
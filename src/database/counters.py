@@ -0,0 +1,167 @@
+"""Incrementally maintained row counters backing DatabaseManager.get_stats()
+
+Counting rows with COUNT(*) scans the table (or an index) every time. Instead,
+triggers on jobs, applications and application_logs keep the stat_counters
+table current on insert, delete and application status change. Triggers are
+used rather than ORM events so bulk Core statements (bulk_upsert_jobs, the
+write queue) are counted too.
+"""
+
+from typing import Dict
+
+from sqlalchemy import Connection, event, text
+from .fast_stats import STATUS_PREFIX, summarize  # noqa: F401 - re-exported
+from .models import Base, StatCounter
+
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_counter_insert AFTER INSERT ON jobs
+    BEGIN
+        INSERT INTO stat_counters (name, value) VALUES ('jobs', 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_counter_delete AFTER DELETE ON jobs
+    BEGIN
+        UPDATE stat_counters SET value = value - 1 WHERE name = 'jobs';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS applications_counter_insert AFTER INSERT ON applications
+    BEGIN
+        INSERT INTO stat_counters (name, value) VALUES ('applications', 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+        INSERT INTO stat_counters (name, value) VALUES ('applications.status.' || NEW.status, 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS applications_counter_delete AFTER DELETE ON applications
+    BEGIN
+        UPDATE stat_counters SET value = value - 1 WHERE name = 'applications';
+        UPDATE stat_counters SET value = value - 1 WHERE name = 'applications.status.' || OLD.status;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS applications_counter_status AFTER UPDATE OF status ON applications
+    WHEN OLD.status IS NOT NEW.status
+    BEGIN
+        UPDATE stat_counters SET value = value - 1 WHERE name = 'applications.status.' || OLD.status;
+        INSERT INTO stat_counters (name, value) VALUES ('applications.status.' || NEW.status, 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS application_logs_counter_insert AFTER INSERT ON application_logs
+    BEGIN
+        INSERT INTO stat_counters (name, value) VALUES ('application_logs', 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS application_logs_counter_delete AFTER DELETE ON application_logs
+    BEGIN
+        UPDATE stat_counters SET value = value - 1 WHERE name = 'application_logs';
+    END
+    """,
+]
+
+POSTGRESQL_TRIGGERS = [
+    """
+    CREATE OR REPLACE FUNCTION bump_stat_counter(counter_name TEXT, delta INTEGER) RETURNS void AS $$
+    BEGIN
+        INSERT INTO stat_counters (name, value) VALUES (counter_name, delta)
+        ON CONFLICT (name) DO UPDATE SET value = stat_counters.value + EXCLUDED.value;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION maintain_stat_counters() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM bump_stat_counter(TG_TABLE_NAME, 1);
+            IF TG_TABLE_NAME = 'applications' THEN
+                PERFORM bump_stat_counter('applications.status.' || NEW.status, 1);
+            END IF;
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM bump_stat_counter(TG_TABLE_NAME, -1);
+            IF TG_TABLE_NAME = 'applications' THEN
+                PERFORM bump_stat_counter('applications.status.' || OLD.status, -1);
+            END IF;
+        ELSIF OLD.status IS DISTINCT FROM NEW.status THEN
+            PERFORM bump_stat_counter('applications.status.' || OLD.status, -1);
+            PERFORM bump_stat_counter('applications.status.' || NEW.status, 1);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS jobs_counters ON jobs",
+    """
+    CREATE TRIGGER jobs_counters AFTER INSERT OR DELETE ON jobs
+    FOR EACH ROW EXECUTE FUNCTION maintain_stat_counters()
+    """,
+    "DROP TRIGGER IF EXISTS applications_counters ON applications",
+    """
+    CREATE TRIGGER applications_counters AFTER INSERT OR DELETE OR UPDATE OF status ON applications
+    FOR EACH ROW EXECUTE FUNCTION maintain_stat_counters()
+    """,
+    "DROP TRIGGER IF EXISTS application_logs_counters ON application_logs",
+    """
+    CREATE TRIGGER application_logs_counters AFTER INSERT OR DELETE ON application_logs
+    FOR EACH ROW EXECUTE FUNCTION maintain_stat_counters()
+    """,
+]
+
+TRIGGERS = {
+    "sqlite": SQLITE_TRIGGERS,
+    "postgresql": POSTGRESQL_TRIGGERS,
+}
+
+
+def install_triggers(connection: Connection) -> bool:
+    """Create (or replace) the counter triggers
+
+    Returns:
+        False if the dialect has no trigger definitions (counters then stay
+        empty and get_stats falls back to recounting)
+    """
+    statements = TRIGGERS.get(connection.dialect.name)
+    if statements is None:
+        return False
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+    return True
+
+
+def recount(connection: Connection) -> Dict[str, int]:
+    """Rebuild every counter from COUNT(*) queries
+
+    Returns:
+        The rebuilt counters
+    """
+    connection.execute(text("DELETE FROM stat_counters"))
+    connection.execute(text(
+        "INSERT INTO stat_counters (name, value) "
+        "SELECT 'jobs', COUNT(*) FROM jobs "
+        "UNION ALL SELECT 'applications', COUNT(*) FROM applications "
+        "UNION ALL SELECT 'application_logs', COUNT(*) FROM application_logs "
+        f"UNION ALL SELECT '{STATUS_PREFIX}' || status, COUNT(*) FROM applications GROUP BY status"
+    ))
+    return read_counters(connection)
+
+
+def read_counters(connection: Connection) -> Dict[str, int]:
+    """Read all counters in a single query"""
+    table = StatCounter.__table__
+    return {name: value for name, value in connection.execute(table.select())}
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target, connection: Connection, tables=(), **kw) -> None:
+    """Install triggers on create_all; seed counters when the table is new"""
+    if not install_triggers(connection):
+        return
+    if StatCounter.__table__ in tables:
+        recount(connection)
@@ -0,0 +1,411 @@
+"""Near-duplicate job detection with MinHash signatures and an LSH index
+
+``Job.generate_id`` only merges exact url/company/title/location matches.
+The same role reposted on several portals differs in URL and often in the
+title, but its description is nearly identical. Each posting gets a MinHash
+signature of its word shingles (one-permutation hashing: every shingle is
+hashed once and lands in one of NUM_PERM bins), stored in job_signatures.
+The signature is cut into LSH bands whose hashes go into job_lsh_buckets;
+postings sharing a band bucket are candidates, confirmed by the estimated
+Jaccard similarity of their signatures.
+
+Each job's ``cluster_id`` is the id of the first-indexed posting it
+duplicates (its own id if none), so downstream stages can process only
+representatives: ``cluster_id = id``. Jobs not indexed yet have no
+cluster_id and are not representatives until they are. When a
+representative is deleted (archived), a trigger hands the cluster to the
+member with the smallest id, so the rest of the cluster stays visible.
+
+Indexing costs several times as much as the upsert itself, so the upsert
+transactions do not do it: ``upsert.bulk_upsert_jobs`` takes rewritten
+rows out of the index (``unindex_jobs``), and ``DatabaseManager.
+bulk_upsert_jobs`` runs ``index_missing`` once the rows are written.
+"""
+
+import hashlib
+import operator
+import random
+import re
+import struct
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import Connection, Engine, delete, event, func, insert, inspect, select, update
+from .models import Base, Job, JobLSHBucket, JobSignature
+
+NUM_PERM = 128
+BANDS = 16  # 16 bands x 8 rows: candidates from roughly 0.7 Jaccard similarity
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3  # Words per shingle (_shingle_hashes zips three words)
+NEAR_DUPLICATE_THRESHOLD = 0.8
+MAX_CANDIDATES = 50  # Candidates compared per posting, most shared bands first
+LOOKUP_CHUNK = 500  # Jobs per lookup statement (BANDS bucket parameters each)
+
+_WORD = re.compile(rb"[a-z0-9]+")
+_INDEX_BITS = NUM_PERM.bit_length() - 1  # log2(NUM_PERM) low hash bits select the bin
+_INDEX_MASK = NUM_PERM - 1
+_PACK = struct.Struct(f"<{NUM_PERM}I")
+
+Signature = Tuple[int, ...]
+
+# Fixed pseudo-random donor order per bin for densifying empty bins
+_DONORS = [random.Random(i).sample(range(NUM_PERM), NUM_PERM) for i in range(NUM_PERM)]
+_BAND_BYTES = ROWS_PER_BAND * 4  # Bytes of one band in the packed signature
+
+
+def _shingle_hashes(text: str) -> set:
+    """CRC32 of each word 3-shingle ("a b c", UTF-8)
+
+    CRC32 is the cheapest stable hash available in the standard library;
+    Python's hash() is salted per process and signatures are persisted.
+    Words are matched on the encoded text so the shingles are joined and
+    hashed without a Python-level loop.
+    """
+    words = _WORD.findall(text.lower().encode("utf-8"))
+    if len(words) < SHINGLE_SIZE:
+        return set(map(zlib.crc32, words))
+    return set(map(zlib.crc32, map(b" ".join, zip(words, words[1:], words[2:]))))
+
+
+def minhash_signature(text: str) -> Optional[Signature]:
+    """One-permutation MinHash of the text's word shingles (None for empty text)
+
+    Each shingle hash picks a bin with its low bits and competes for the
+    bin's minimum with the remaining bits. Empty bins copy the value
+    of a pseudo-randomly chosen non-empty bin (optimal densification), so
+    every position is comparable between signatures and short postings do
+    not produce long runs of identical positions that collide in LSH bands.
+    """
+    hashes = _shingle_hashes(text)
+    if not hashes:
+        return None
+
+    bins = [None] * NUM_PERM
+    for h in hashes:
+        index, value = h & _INDEX_MASK, h >> _INDEX_BITS
+        current = bins[index]
+        if current is None or value < current:
+            bins[index] = value
+
+    if None in bins:
+        filled = {i for i, value in enumerate(bins) if value is not None}
+        bins = [
+            value if value is not None else bins[next(filter(filled.__contains__, _DONORS[i]))]
+            for i, value in enumerate(bins)
+        ]
+    return tuple(bins)
+
+
+def estimate_similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity: fraction of equal signature positions"""
+    return sum(map(operator.eq, a, b)) / NUM_PERM
+
+
+def band_buckets(signature: Signature) -> List[Tuple[int, int]]:
+    """(band, bucket hash) pairs; the hash is a signed-safe 63-bit integer"""
+    packed = _PACK.pack(*signature)
+    buckets = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(packed[band * _BAND_BYTES:(band + 1) * _BAND_BYTES], digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "little") & 0x7FFFFFFFFFFFFFFF))
+    return buckets
+
+
+def posting_text(job: Union[Job, Mapping[str, Any]]) -> str:
+    """Text a posting is compared on: title, company and description"""
+    get = job.get if isinstance(job, Mapping) else lambda field: getattr(job, field, None)
+    return " ".join(value for value in (get("title"), get("company"), get("description")) if value)
+
+
+def _bucket_members(connection: Connection, keys: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], List[str]]:
+    """Jobs stored under each (band, bucket) key"""
+    table = JobLSHBucket.__table__
+    wanted = set(keys)
+    buckets = list({bucket for _, bucket in wanted})
+    members: Dict[Tuple[int, int], List[str]] = {}
+    for start in range(0, len(buckets), LOOKUP_CHUNK * BANDS):
+        rows = connection.execute(
+            select(table.c.band, table.c.bucket, table.c.job_id)
+            .where(table.c.bucket.in_(buckets[start:start + LOOKUP_CHUNK * BANDS]))
+        )
+        for band, bucket, job_id in rows:
+            if (band, bucket) in wanted:
+                members.setdefault((band, bucket), []).append(job_id)
+    return members
+
+
+def _rank_candidates(keys: List[Tuple[int, int]], members: Dict[Tuple[int, int], List[str]],
+                     exclude_id: Optional[str]) -> List[str]:
+    """Candidates sharing the most bands first, at most MAX_CANDIDATES"""
+    shared = Counter(job_id for key in keys for job_id in members.get(key, ()) if job_id != exclude_id)
+    return [job_id for job_id, _ in shared.most_common(MAX_CANDIDATES)]
+
+
+def _load_signatures(connection: Connection, job_ids: Iterable[str]) -> Dict[str, Tuple[Signature, str]]:
+    """Signature and cluster id (own id if unset) of indexed jobs"""
+    signatures = JobSignature.__table__
+    jobs_table = Job.__table__
+    job_ids = list(job_ids)
+    loaded = {}
+    for start in range(0, len(job_ids), LOOKUP_CHUNK):
+        rows = connection.execute(
+            select(signatures.c.job_id, signatures.c.minhash, func.coalesce(jobs_table.c.cluster_id, jobs_table.c.id))
+            .join(jobs_table, jobs_table.c.id == signatures.c.job_id)
+            .where(signatures.c.job_id.in_(job_ids[start:start + LOOKUP_CHUNK]))
+        )
+        for job_id, minhash, cluster_id in rows:
+            loaded[job_id] = (_PACK.unpack(minhash), cluster_id)
+    return loaded
+
+
+def index_jobs(
+    connection: Connection,
+    jobs: Iterable[Union[Job, Mapping[str, Any]]],
+    threshold: float = NEAR_DUPLICATE_THRESHOLD,
+) -> Dict[str, str]:
+    """(Re)index postings and assign their cluster_id
+
+    Work is done per chunk of LOOKUP_CHUNK jobs with a handful of set-based
+    statements. Jobs are matched in order, so duplicates within the same
+    batch are found too. Call inside the transaction that wrote the jobs.
+
+    Args:
+        connection: Connection inside an open transaction
+        jobs: Job objects or mappings with id, title, company and description
+        threshold: Minimum estimated similarity to join an existing cluster
+
+    Returns:
+        Mapping of job id to assigned cluster_id
+    """
+    prepared = []
+    for job in jobs:
+        job_id = job["id"] if isinstance(job, Mapping) else job.id
+        signature = minhash_signature(posting_text(job))
+        prepared.append((job_id, signature, band_buckets(signature) if signature is not None else []))
+
+    clusters: Dict[str, str] = {}
+    for start in range(0, len(prepared), LOOKUP_CHUNK):
+        clusters.update(_index_chunk(connection, prepared[start:start + LOOKUP_CHUNK], threshold))
+    return clusters
+
+
+def _index_chunk(connection: Connection, prepared: List[Tuple[str, Optional[Signature], List[Tuple[int, int]]]],
+                 threshold: float) -> Dict[str, str]:
+    jobs_table = Job.__table__
+    signatures = JobSignature.__table__
+    buckets = JobLSHBucket.__table__
+    ids = [job_id for job_id, _, _ in prepared]
+
+    connection.execute(delete(buckets).where(buckets.c.job_id.in_(ids)))
+    connection.execute(delete(signatures).where(signatures.c.job_id.in_(ids)))
+    # A posting others already point to stays its own representative
+    representatives = set(connection.execute(
+        select(jobs_table.c.cluster_id).where(jobs_table.c.cluster_id.in_(ids), jobs_table.c.id != jobs_table.c.cluster_id)
+    ).scalars())
+
+    members = _bucket_members(connection, [key for _, _, keys in prepared for key in keys])
+    known = _load_signatures(connection, {
+        candidate for job_id, _, keys in prepared for candidate in _rank_candidates(keys, members, job_id)
+    })
+
+    clusters = {}
+    signature_rows, bucket_rows = [], []
+    for job_id, signature, keys in prepared:
+        cluster_id = job_id
+        if signature is not None:
+            if job_id not in representatives:
+                scored = [
+                    (estimate_similarity(signature, known[candidate][0]), candidate)
+                    for candidate in _rank_candidates(keys, members, job_id) if candidate in known
+                ]
+                best = min(scored, key=lambda score: (-score[0], score[1]), default=None)
+                if best is not None and best[0] >= threshold:
+                    cluster_id = known[best[1]][1]
+            known[job_id] = (signature, cluster_id)
+            for key in keys:
+                members.setdefault(key, []).append(job_id)  # Visible to later jobs in this batch
+            signature_rows.append({"job_id": job_id, "minhash": _PACK.pack(*signature)})
+            bucket_rows.extend((band, bucket, job_id) for band, bucket in keys)
+        clusters[job_id] = cluster_id
+
+    # BANDS bucket rows per job and the cluster ids go straight to the driver: building
+    # SQLAlchemy parameters for them would cost more than the inserts (cf. upsert._ids_by_posting_key)
+    from .upsert import _positional_markers  # upsert imports this module
+    markers = _positional_markers(connection.dialect, 3)
+    if signature_rows:
+        connection.execute(insert(signatures), signature_rows)
+        connection.exec_driver_sql(
+            f"INSERT INTO {buckets.name} (band, bucket, job_id) VALUES ({', '.join(markers)})", bucket_rows
+        )
+    # updated_at is left alone: a cluster change is not a content change
+    connection.exec_driver_sql(
+        f"UPDATE {jobs_table.name} SET cluster_id = {markers[0]} WHERE id = {markers[1]}",
+        [(cluster_id, job_id) for job_id, cluster_id in clusters.items()],
+    )
+    return clusters
+
+
+def unindex_jobs(connection: Connection, job_ids: Iterable[str]) -> None:
+    """Drop postings from the index so the next index_missing pass re-indexes them
+
+    Only their signatures are deleted: lookups join candidates to
+    job_signatures, so their LSH buckets are ignored until index_jobs
+    replaces them (deleting ~BANDS random bucket rows per posting would cost
+    more than the upsert). Their cluster_id is cleared, so until then they
+    count as representatives. Members pointing to one of them keep pointing
+    to it, and index_jobs makes it their representative again.
+    """
+    jobs_table = Job.__table__
+    signatures = JobSignature.__table__
+    job_ids = list(job_ids)
+    for start in range(0, len(job_ids), LOOKUP_CHUNK):
+        ids = job_ids[start:start + LOOKUP_CHUNK]
+        connection.execute(delete(signatures).where(signatures.c.job_id.in_(ids)))
+        connection.execute(
+            update(jobs_table).where(jobs_table.c.id.in_(ids))
+            .values(cluster_id=None, updated_at=jobs_table.c.updated_at)  # Not a content change
+        )
+
+
+def count_representatives(connection: Connection) -> int:
+    """Number of clusters: indexed jobs that are not a near-duplicate of another posting"""
+    jobs_table = Job.__table__
+    return connection.execute(
+        select(func.count()).select_from(jobs_table).where(jobs_table.c.cluster_id == jobs_table.c.id)
+    ).scalar()
+
+
+def index_missing_batch(connection: Connection, batch_size: int = 500,
+                        threshold: float = NEAR_DUPLICATE_THRESHOLD) -> int:
+    """Index up to ``batch_size`` jobs that have no signature yet, oldest first
+
+    Returns:
+        Number of jobs indexed (0 once none are missing)
+    """
+    jobs_table = Job.__table__
+    signatures = JobSignature.__table__
+    missing = (
+        select(jobs_table.c.id, jobs_table.c.title, jobs_table.c.company, jobs_table.c.description)
+        .outerjoin(signatures, signatures.c.job_id == jobs_table.c.id)
+        .where(signatures.c.job_id.is_(None), jobs_table.c.cluster_id.is_(None))
+        .order_by(jobs_table.c.scraped_at, jobs_table.c.id)
+        .limit(batch_size)
+    )
+    rows = [dict(row._mapping) for row in connection.execute(missing)]
+    if rows:
+        index_jobs(connection, rows, threshold)
+    return len(rows)
+
+
+def index_missing(engine: Engine, batch_size: int = 500, threshold: float = NEAR_DUPLICATE_THRESHOLD) -> int:
+    """Index jobs that have no signature yet (new, rewritten or added through the ORM), one transaction per batch
+
+    Returns:
+        Number of jobs indexed
+    """
+    indexed = 0
+    while True:
+        with engine.begin() as connection:
+            count = index_missing_batch(connection, batch_size, threshold)
+        if not count:
+            return indexed
+        indexed += count
+
+
+def find_near_duplicates(
+    engine: Engine,
+    job: Union[Job, Mapping[str, Any]],
+    threshold: float = NEAR_DUPLICATE_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """Indexed postings similar to ``job`` (which does not have to be stored)
+
+    A stored job is looked up by its saved signature, so its (deferred)
+    description does not need to be loaded. At most MAX_CANDIDATES postings
+    (those sharing the most LSH bands) are compared.
+
+    Returns:
+        Dicts with id, title, company, source, cluster_id and similarity, most similar first
+    """
+    job_id = job.get("id") if isinstance(job, Mapping) else job.id
+    jobs_table = Job.__table__
+    signatures = JobSignature.__table__
+    with engine.connect() as connection:
+        stored = None
+        if job_id is not None:
+            stored = connection.execute(
+                select(signatures.c.minhash).where(signatures.c.job_id == job_id)
+            ).scalar()
+        signature = _PACK.unpack(stored) if stored is not None else minhash_signature(posting_text(job))
+        if signature is None:
+            return []
+
+        keys = band_buckets(signature)
+        candidates = _load_signatures(connection, _rank_candidates(keys, _bucket_members(connection, keys), job_id))
+        similarity = {
+            candidate: score for candidate, score in (
+                (candidate, estimate_similarity(signature, other)) for candidate, (other, _) in candidates.items()
+            ) if score >= threshold
+        }
+        if not similarity:
+            return []
+        rows = connection.execute(
+            select(jobs_table.c.id, jobs_table.c.title, jobs_table.c.company, jobs_table.c.source,
+                   jobs_table.c.cluster_id).where(jobs_table.c.id.in_(similarity))
+        )
+        results = [dict(row._mapping, similarity=similarity[row.id]) for row in rows]
+    return sorted(results, key=lambda result: (-result["similarity"], result["id"]))
+
+
+# Deleting a representative (cluster_id = id, or NULL while not yet re-indexed) hands its
+# cluster to the remaining member with the smallest id.
+# The MIN() subquery is not correlated, so it is evaluated once per UPDATE.
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_cluster_delete AFTER DELETE ON jobs
+    WHEN OLD.cluster_id IS NULL OR OLD.cluster_id = OLD.id
+    BEGIN
+        UPDATE jobs SET cluster_id = (SELECT MIN(id) FROM jobs WHERE cluster_id = OLD.id)
+        WHERE cluster_id = OLD.id;
+    END
+    """,
+]
+
+POSTGRESQL_TRIGGERS = [
+    """
+    CREATE OR REPLACE FUNCTION reelect_cluster_representative() RETURNS trigger AS $$
+    BEGIN
+        IF OLD.cluster_id IS NULL OR OLD.cluster_id = OLD.id THEN
+            UPDATE jobs SET cluster_id = (SELECT MIN(id) FROM jobs WHERE cluster_id = OLD.id)
+            WHERE cluster_id = OLD.id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS jobs_cluster_delete ON jobs",
+    """
+    CREATE TRIGGER jobs_cluster_delete AFTER DELETE ON jobs
+    FOR EACH ROW EXECUTE FUNCTION reelect_cluster_representative()
+    """,
+]
+
+TRIGGERS = {
+    "sqlite": SQLITE_TRIGGERS,
+    "postgresql": POSTGRESQL_TRIGGERS,
+}
+
+
+def install_cluster_column(connection: Connection) -> None:
+    """Add jobs.cluster_id to a jobs table created before it, and the representative trigger"""
+    if "cluster_id" not in {column["name"] for column in inspect(connection).get_columns("jobs")}:
+        connection.exec_driver_sql("ALTER TABLE jobs ADD COLUMN cluster_id VARCHAR(16)")
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_jobs_cluster_id ON jobs (cluster_id)")
+    for statement in TRIGGERS.get(connection.dialect.name, ()):
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target, connection: Connection, **kw) -> None:
+    """Upgrade existing databases whenever tables are created"""
+    install_cluster_column(connection)
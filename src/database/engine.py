@@ -1,60 +1,164 @@
 """Database engine and session management"""
 
 import os
-from typing import Generator
-from sqlalchemy import create_engine, event, Engine, text
+import threading
+from datetime import datetime
+from typing import Any, Dict, Generator, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from sqlalchemy import bindparam, create_engine, event, Engine, text, update
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
-from .models import Base
-
-# Get database URL from environment or use default
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///database/jobs.db")
-
-# Ensure database directory exists
-if DATABASE_URL.startswith("sqlite:///"):
-    db_path = DATABASE_URL.replace("sqlite:///", "")
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
-
-# Create engine with appropriate settings for SQLite
-if "sqlite" in DATABASE_URL:
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-        echo=os.getenv("DEBUG", "false").lower() == "true"
-    )
-    
-    # Enable foreign keys for SQLite
-    @event.listens_for(Engine, "connect")
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from .models import Application, Base, Job, StatCounter
+# counters, dedup, pagination, rescrape, search and work_queue also register their after_create DDL
+from .archive import ARCHIVE_DIR, archive_old_rows, read_archive
+from .compression import database_size, recompress_jobs
+from .compactions import compaction_totals, load_compactions, save_compactions
+from .dedup import NEAR_DUPLICATE_THRESHOLD, count_representatives, find_near_duplicates, index_missing
+from .counters import install_triggers, read_counters, recount, summarize
+from .profiling import SQL_PROFILE, QueryStats, instrument_engine
+from .pagination import DEFAULT_BATCH_SIZE, iter_applications, iter_jobs
+from .rescrape import DEFAULT_RESCRAPE_DAYS, apply_rescrape, select_stale_jobs
+from .search import search_jobs
+from .upsert import DEFAULT_CHUNK_SIZE, bulk_upsert_jobs
+from .work_queue import DEFAULT_LEASE_SECONDS, claim_next, release, renew_lease
+from .writer import WriteQueue
+from .log_writer import ApplicationLogSink
+
+# Database URL from the DATABASE_URL environment variable (default: database/jobs.db)
+from .fast_stats import DATABASE_URL
+
+# SQLite profile: "default" shares one connection (StaticPool), "production"
+# enables WAL, a pool of read connections and the single-writer queue
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "default").lower()
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "5"))
+
+SQLITE_PRAGMAS = {
+    "default": [
+        "foreign_keys=ON",
+    ],
+    "production": [
+        "foreign_keys=ON",
+        "journal_mode=WAL",
+        "synchronous=NORMAL",  # Durable at checkpoints; safe with WAL
+        "busy_timeout=5000",  # Wait for the writer instead of raising "database is locked"
+        "cache_size=-65536",  # 64 MB page cache per connection
+        "mmap_size=268435456",  # 256 MB memory-mapped reads
+        "temp_store=MEMORY",
+        "auto_vacuum=INCREMENTAL",  # Applies to new databases; archive_old_rows converts existing ones
+    ],
+}
+
+
+def install_sqlite_pragmas(db_engine: Engine, pragmas: List[str]) -> None:
+    """Run PRAGMA statements on every new SQLite connection"""
+
+    # Enable foreign keys (and profile tuning) for SQLite
+    @event.listens_for(db_engine, "connect")
     def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
         cursor.close()
-else:
+
+
+def create_db_engine(database_url: str = DATABASE_URL, profile: str = SQLITE_PROFILE) -> Engine:
+    """Create an engine for the given URL
+
+    Args:
+        database_url: SQLAlchemy database URL
+        profile: SQLite profile name (key of SQLITE_PRAGMAS); ignored for other databases
+
+    Returns:
+        Configured SQLAlchemy engine
+    """
+    echo = os.getenv("DEBUG", "false").lower() == "true"
+
     # For PostgreSQL or other databases
-    engine = create_engine(
-        DATABASE_URL,
-        echo=os.getenv("DEBUG", "false").lower() == "true"
-    )
+    if "sqlite" not in database_url:
+        db_engine = create_engine(database_url, echo=echo)
+        if SQL_PROFILE:
+            instrument_engine(db_engine)
+        return db_engine
+
+    if profile not in SQLITE_PRAGMAS:
+        raise ValueError(f"Unknown SQLite profile '{profile}'. Expected one of: {', '.join(SQLITE_PRAGMAS)}")
+
+    in_memory = database_url in ("sqlite://", "sqlite:///:memory:")
+    if not in_memory and database_url.startswith("sqlite:///"):
+        # Ensure database directory exists
+        db_dir = os.path.dirname(database_url.replace("sqlite:///", ""))
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+    if profile == "production" and not in_memory:
+        db_engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False, "timeout": 30},
+            poolclass=QueuePool,
+            pool_size=SQLITE_READ_POOL_SIZE,
+            max_overflow=SQLITE_READ_POOL_SIZE,
+            echo=echo
+        )
+    else:
+        db_engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+            echo=echo
+        )
+
+    install_sqlite_pragmas(db_engine, SQLITE_PRAGMAS[profile])
+    if SQL_PROFILE:
+        instrument_engine(db_engine)
+    return db_engine
+
+
+# The default engine and session factory are created on first use (get_engine,
+# get_session_factory, or the module attributes ``engine`` / ``SessionLocal``),
+# so importing this module opens no database and creates no directories
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """Default engine for DATABASE_URL, created on first call"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_db_engine()
+        return _engine
+
 
-# Create session factory
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine
-)
+def get_session_factory() -> sessionmaker:
+    """Session factory bound to the default engine"""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=get_engine()
+        )
+    return _session_factory
+
+
+def __getattr__(name: str):
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def init_db() -> None:
     """Initialize database - create all tables"""
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     print("✓ Database initialized successfully")
 
 
 def drop_db() -> None:
     """Drop all tables - WARNING: Destructive operation"""
     if input("⚠️  WARNING: This will delete all tables. Type 'yes' to confirm: ") == "yes":
-        Base.metadata.drop_all(bind=engine)
+        Base.metadata.drop_all(bind=get_engine())
         print("✓ Database dropped")
     else:
         print("✗ Operation cancelled")
@@ -62,7 +166,7 @@ def drop_db() -> None:
 
 def get_db() -> Generator[Session, None, None]:
     """Dependency injection for database sessions"""
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
@@ -72,9 +176,72 @@ def get_db() -> Generator[Session, None, None]:
 class DatabaseManager:
     """Database connection and transaction management"""
 
-    def __init__(self):
-        self.engine = engine
-        self.SessionLocal = SessionLocal
+    def __init__(self, bind: Optional[Engine] = None):
+        """Initialize manager
+
+        Args:
+            bind: Engine to use instead of the module-level engine (e.g. for tests)
+        """
+        self._bind = bind
+        self._session_factory = None if bind is None else sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=bind
+        )
+        self._write_queue: Optional[WriteQueue] = None
+        self._write_queue_lock = threading.Lock()
+        self._log_sink: Optional[ApplicationLogSink] = None
+
+    @property
+    def engine(self) -> Engine:
+        """Bound engine (the default engine is created on first use)"""
+        return self._bind if self._bind is not None else get_engine()
+
+    @property
+    def SessionLocal(self) -> sessionmaker:
+        """Session factory for this manager's engine"""
+        return self._session_factory if self._session_factory is not None else get_session_factory()
+
+    @property
+    def write_queue(self) -> WriteQueue:
+        """Single-writer queue for batching commits from many threads (started on first use)"""
+        with self._write_queue_lock:
+            if self._write_queue is None:
+                self._write_queue = WriteQueue(self.engine).start()
+            return self._write_queue
+
+    @property
+    def log_sink(self) -> ApplicationLogSink:
+        """Buffered ApplicationLog writer (created on first use)
+
+        With the production SQLite profile, flushes go through the write queue.
+        """
+        with self._write_queue_lock:
+            if self._log_sink is None:
+                write_queue = None
+                if self.engine.dialect.name == "sqlite" and isinstance(self.engine.pool, QueuePool):
+                    write_queue = self._write_queue or WriteQueue(self.engine).start()
+                    self._write_queue = write_queue
+                self._log_sink = ApplicationLogSink(self.engine, write_queue=write_queue)
+            return self._log_sink
+
+    @property
+    def query_stats(self) -> QueryStats:
+        """Per-statement latency statistics (instruments the engine on first use)"""
+        return instrument_engine(self.engine)
+
+    def close(self) -> None:
+        """Flush the log sink and write queue, then release pooled connections"""
+        with self._write_queue_lock:
+            if self._log_sink is not None:
+                self._log_sink.close()
+                self._log_sink = None
+            if self._write_queue is not None:
+                self._write_queue.stop()
+                self._write_queue = None
+        engine = self._bind if self._bind is not None else _engine
+        if engine is not None:  # Nothing to release if the default engine was never used
+            engine.dispose()
 
     def get_session(self) -> Session:
         """Get a new database session"""
@@ -99,29 +266,297 @@ class DatabaseManager:
             return False
 
     def get_stats(self) -> dict:
-        """Get database statistics"""
-        from .models import Job, Application, ApplicationLog
-        
-        db = self.get_session()
+        """Get database statistics from the trigger-maintained counters (one query)"""
         try:
-            stats = {
-                "total_jobs": db.query(Job).count(),
-                "total_applications": db.query(Application).count(),
-                "completed_applications": db.query(Application).filter(
-                    Application.status == "completed"
-                ).count(),
-                "failed_applications": db.query(Application).filter(
-                    Application.status == "failed"
-                ).count(),
-                "pending_applications": db.query(Application).filter(
-                    Application.status.in_(["queued", "applying"])
-                ).count(),
-                "total_logs": db.query(ApplicationLog).count(),
-            }
-            return stats
-        finally:
-            db.close()
-
-
-# Global instance
+            with self.engine.connect() as connection:
+                counters = read_counters(connection)
+        except (OperationalError, ProgrammingError):
+            counters = {}  # Database created before stat_counters existed
+        if not counters:
+            counters = self.recount_stats()
+        return summarize(counters)
+
+    def recompress_jobs(self, batch_size: int = 500) -> Dict[str, int]:
+        """Recompress stored Job.html_content and report the size reduction
+
+        Args:
+            batch_size: Rows rewritten per transaction
+
+        Returns:
+            Dictionary with rows_scanned, rows_rewritten, size_before and size_after (bytes)
+        """
+        return recompress_jobs(self.engine, batch_size=batch_size)
+
+    def database_size(self) -> int:
+        """Get database size in bytes"""
+        return database_size(self.engine)
+
+    def search_jobs(self, query: str, limit: int = 20, source: Optional[str] = None) -> List[Dict]:
+        """Full-text search over job title, company, location and description
+
+        Args:
+            query: Words and "quoted phrases" that must all appear
+            limit: Maximum results
+            source: Optional portal filter
+
+        Returns:
+            Ranked list of job dicts (id, title, company, location, url, source, score, snippet)
+        """
+        return search_jobs(self.engine, query, limit=limit, source=source)
+
+    def recount_stats(self) -> Dict[str, int]:
+        """Rebuild statistics counters with full COUNT(*) queries (use when they drift)
+
+        Returns:
+            Rebuilt counters keyed by counter name
+        """
+        with self.engine.begin() as connection:
+            StatCounter.__table__.create(bind=connection, checkfirst=True)
+            install_triggers(connection)
+            return recount(connection)
+
+    def iter_jobs(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        with_description: bool = False,
+        representatives_only: bool = False,
+    ) -> Iterator[Job]:
+        """Stream jobs in scraped_at order without loading them all into memory
+
+        Args:
+            filters: Column equality filters, e.g. {"source": "linkedin"} (lists mean IN)
+            batch_size: Rows loaded per batch
+            since: Only jobs scraped at or after this time
+            until: Only jobs scraped before this time
+            with_description: Also load the deferred description column
+            representatives_only: Skip near-duplicates of another posting (one job per cluster)
+
+        Returns:
+            Iterator of detached Job objects
+        """
+        return iter_jobs(self.SessionLocal, filters=filters, batch_size=batch_size, since=since,
+                         until=until, with_description=with_description,
+                         representatives_only=representatives_only)
+
+    def iter_applications(
+        self,
+        status: Optional[Union[str, Iterable[str]]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[Application]:
+        """Stream applications in created_at order without loading them all into memory
+
+        Args:
+            status: Status or statuses to include, e.g. "queued"
+            filters: Other column equality filters
+            batch_size: Rows loaded per batch
+            since: Only applications created at or after this time
+            until: Only applications created before this time
+
+        Returns:
+            Iterator of detached Application objects
+        """
+        return iter_applications(self.SessionLocal, status=status, filters=filters, batch_size=batch_size,
+                                 since=since, until=until)
+
+    def find_near_duplicates(self, job: Any, threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[Dict]:
+        """Find indexed postings whose description is nearly identical to ``job``
+
+        Args:
+            job: Job instance or job dict (stored or not)
+            threshold: Minimum estimated Jaccard similarity of the shingled text
+
+        Returns:
+            Dicts with id, title, company, source, cluster_id and similarity, most similar first
+        """
+        return find_near_duplicates(self.engine, job, threshold=threshold)
+
+    def index_near_duplicates(self, batch_size: int = 500) -> int:
+        """Index jobs not yet in the near-duplicate index (e.g. added through a Session)
+
+        Returns:
+            Number of jobs indexed
+        """
+        return index_missing(self.engine, batch_size=batch_size)
+
+    def count_clusters(self) -> int:
+        """Number of near-duplicate clusters (jobs that do not duplicate another posting)"""
+        with self.engine.connect() as connection:
+            return count_representatives(connection)
+
+    def get_compactions(self, job_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored compacted descriptions (job id -> row dict) of the given jobs"""
+        with self.engine.connect() as connection:
+            return load_compactions(connection, job_ids)
+
+    def save_compactions(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Insert or replace compacted descriptions (see jd_compactor.compaction_row)
+
+        Returns:
+            Number of rows written
+        """
+        with self.engine.begin() as connection:
+            return save_compactions(connection, rows)
+
+    def compaction_stats(self) -> Dict[str, int]:
+        """Compacted jobs and their total tokens before and after compaction"""
+        with self.engine.connect() as connection:
+            return compaction_totals(connection)
+
+    def stale_jobs(
+        self,
+        threshold_days: int = DEFAULT_RESCRAPE_DAYS,
+        limit: int = 100,
+        sources: Optional[Sequence[str]] = None,
+        after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Jobs due for re-scraping with their stored validators (see rescrape.select_stale_jobs)"""
+        with self.engine.connect() as connection:
+            return select_stale_jobs(connection, threshold_days, limit, sources, after)
+
+    def apply_rescrape(self, results: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Record re-scrape outcomes (see rescrape.apply_rescrape)
+
+        Returns:
+            Dictionary with changed, unchanged, not_modified and skipped counts
+        """
+        with self.engine.begin() as connection:
+            return apply_rescrape(connection, results)
+
+    def claim_next(
+        self,
+        status_from: str,
+        status_to: str,
+        worker_id: str,
+        lease_seconds: int = DEFAULT_LEASE_SECONDS,
+    ) -> Optional[Application]:
+        """Atomically lease the next application in ``status_from`` to one worker
+
+        Args:
+            status_from: Status to take work from (e.g. "queued")
+            status_to: Status the claimed application moves to (e.g. "customizing")
+            worker_id: Identifier of the claiming worker
+            lease_seconds: Seconds before an unrenewed claim can be taken by another worker
+
+        Returns:
+            The claimed Application, or None if no work is available
+        """
+        return claim_next(self.SessionLocal, status_from, status_to, worker_id, lease_seconds)
+
+    def renew_lease(self, application_id: int, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend a claim; returns False if the lease was lost"""
+        return renew_lease(self.SessionLocal, application_id, worker_id, lease_seconds)
+
+    def release_application(
+        self,
+        application_id: int,
+        worker_id: str,
+        status: str,
+        error_message: Optional[str] = None,
+        **fields,
+    ) -> bool:
+        """Move a claimed application to its next status and clear the lease
+
+        Args:
+            application_id: Application returned by claim_next
+            worker_id: Worker holding the lease
+            status: Next status (e.g. "ready", "completed", "failed")
+            error_message: Optional failure reason
+            **fields: Other Application columns to set (e.g. tailored_resume_path)
+
+        Returns:
+            False if the lease was lost (nothing is changed)
+        """
+        return release(self.SessionLocal, application_id, worker_id, status, error_message, **fields)
+
+    def set_resume_paths(self, paths: Dict[int, str]) -> int:
+        """Point applications at their tailored resumes (application id -> path)
+
+        Returns:
+            Number of applications updated
+        """
+        if not paths:
+            return 0
+        statement = (
+            update(Application.__table__)
+            .where(Application.__table__.c.id == bindparam("application_id"))
+            .values(tailored_resume_path=bindparam("path"))
+        )
+        with self.engine.begin() as connection:
+            connection.execute(statement, [{"application_id": k, "path": v} for k, v in paths.items()])
+        return len(paths)
+
+    def archive_old_rows(
+        self,
+        threshold_days: Optional[int] = None,
+        archive_dir: str = ARCHIVE_DIR,
+        fmt: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> Dict:
+        """Move jobs and application logs older than the threshold into monthly archive files
+
+        Args:
+            threshold_days: Age in days (defaults to application.archive_threshold_days)
+            archive_dir: Root directory of the partitioned archive
+            fmt: "parquet" or "jsonl" (defaults to parquet when pyarrow is installed)
+            batch_size: Rows read, written and deleted per batch
+
+        Returns:
+            Dictionary with jobs_archived, logs_archived, files, size_before and size_after
+        """
+        return archive_old_rows(self.engine, threshold_days=threshold_days, archive_dir=archive_dir,
+                                fmt=fmt, batch_size=batch_size)
+
+    def read_archive(
+        self,
+        table_name: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        where: Optional[Dict] = None,
+        archive_dir: str = ARCHIVE_DIR,
+    ) -> Iterator[Dict]:
+        """Stream archived jobs or application logs back from the archive files
+
+        Args:
+            table_name: "jobs" or "application_logs"
+            since: Include rows at or after this time
+            until: Include rows before this time
+            where: Column equality filters, e.g. {"company": "Acme"}
+            archive_dir: Root directory of the partitioned archive
+
+        Returns:
+            Iterator of row dicts
+        """
+        return read_archive(table_name, since=since, until=until, where=where, archive_dir=archive_dir)
+
+    def bulk_upsert_jobs(
+        self,
+        jobs: Iterable,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        index_duplicates: bool = True,
+    ) -> Dict[str, int]:
+        """Insert or update scraped jobs in bulk, deduplicated on Job.generate_id
+
+        Args:
+            jobs: Iterable of job dicts (or unsaved Job instances)
+            chunk_size: Rows written per upsert statement/transaction
+            index_duplicates: Index new and rewritten jobs for near-duplicate
+                detection once they are written (index_near_duplicates).
+                Pass False to load several batches and index them once.
+
+        Returns:
+            Dictionary with inserted, updated, unchanged and skipped counts
+        """
+        counts = bulk_upsert_jobs(self.engine, jobs, chunk_size=chunk_size)
+        if index_duplicates and (counts["inserted"] or counts["updated"]):
+            index_missing(self.engine)
+        return counts
+
+
+# Global instance (cheap: the engine is created on first use)
 db_manager = DatabaseManager()
@@ -0,0 +1,57 @@
+"""Statistics for short-lived CLI invocations without importing SQLAlchemy
+
+``status`` runs from cron and only needs the trigger-maintained counters
+(see counters.py). For SQLite they are one ``SELECT`` away through the
+standard ``sqlite3`` module, which imports in a few milliseconds instead of
+the few hundred SQLAlchemy takes. Anything else (PostgreSQL, a missing file,
+a database without counters) returns None and the caller falls back to
+DatabaseManager.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, Optional
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///database/jobs.db")
+
+STATUS_PREFIX = "applications.status."
+
+
+def summarize(counters: Dict[str, int]) -> Dict[str, int]:
+    """Shape raw counters into the get_stats() dictionary"""
+
+    def status_count(*statuses: str) -> int:
+        return sum(counters.get(f"{STATUS_PREFIX}{status}", 0) for status in statuses)
+
+    return {
+        "total_jobs": counters.get("jobs", 0),
+        "total_applications": counters.get("applications", 0),
+        "completed_applications": status_count("completed"),
+        "failed_applications": status_count("failed"),
+        "pending_applications": status_count("queued", "applying"),
+        "total_logs": counters.get("application_logs", 0),
+    }
+
+
+def read_sqlite_stats(database_url: str = DATABASE_URL) -> Optional[Dict[str, int]]:
+    """get_stats() for a SQLite database file, read with sqlite3 directly
+
+    Returns:
+        The stats dictionary, or None if the URL is not a SQLite file or the
+        counters are not available
+    """
+    if not database_url.startswith("sqlite:///") or database_url == "sqlite:///:memory:":
+        return None
+    path = database_url[len("sqlite:///"):]
+    if not os.path.isfile(path):
+        return None
+    try:
+        connection = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True, timeout=5)
+        try:
+            counters = dict(connection.execute("SELECT name, value FROM stat_counters"))
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return None
+    return summarize(counters) if counters else None
@@ -0,0 +1,272 @@
+"""Buffered ApplicationLog sink that flushes events in bulk inserts"""
+
+import atexit
+import signal
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import Engine, insert
+from .models import ApplicationLog
+from .writer import WriteQueue
+
+
+class ApplicationLogSink:
+    """Collect ApplicationLog events in memory and insert them in batches
+
+    ``log_event`` has the same signature as ``ApplicationLog.log_event`` but
+    only appends to an in-memory buffer, so the browser automation hot path
+    never waits on the database. A background thread flushes when
+    ``max_batch`` events are buffered or ``flush_interval`` seconds have
+    passed since the oldest buffered event. Pending events are flushed on
+    ``close()``, at interpreter exit and on SIGTERM/SIGHUP.
+
+    A failed flush keeps the events buffered and the flusher waits
+    ``flush_interval`` before retrying, doubling the wait on each further
+    failure (up to ``MAX_RETRY_DELAY``). While the database is unavailable
+    the buffer holds at most ``max_buffered`` events; older ones are dropped
+    first. If the final flush in ``close()`` fails twice, the remaining events
+    are dropped too. All drops are logged and counted in ``events_dropped``.
+    """
+
+    MAX_RETRY_DELAY = 60.0  # Seconds between retries after repeated flush failures
+
+    def __init__(
+        self,
+        engine: Engine,
+        max_batch: int = 200,
+        flush_interval: float = 1.0,
+        max_buffered: int = 10000,
+        write_queue: Optional[WriteQueue] = None,
+        install_signal_handlers: bool = True,
+    ):
+        """Initialize log sink
+
+        Args:
+            engine: Engine to insert through (ignored when write_queue is given)
+            max_batch: Buffered events that trigger an immediate flush
+            flush_interval: Maximum seconds an event waits in the buffer
+            max_buffered: Events kept while flushes fail; the oldest are dropped beyond it
+            write_queue: Route inserts through the single-writer queue instead
+            install_signal_handlers: Flush on SIGTERM/SIGHUP (main thread only)
+        """
+        self.engine = engine
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_buffered = max(max_batch, max_buffered)
+        self.write_queue = write_queue
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._oldest: Optional[float] = None
+        self._retry_delay = 0.0  # Backoff after failed flushes; 0 when the last flush succeeded
+        self._retry_at: Optional[float] = None
+        self._overflowing = False  # Drops are logged once per outage
+        self._condition = threading.Condition()
+        self._flush_lock = threading.RLock()  # Reentrant: signal handlers flush on the main thread
+        self._closed = False
+        self._previous_handlers: Dict[int, tuple] = {}  # signum -> (previous handler, ours)
+
+        self.events_flushed = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.events_dropped = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self._total_flush_latency = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="application-log-sink", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        if install_signal_handlers:
+            self._install_signal_handlers()
+
+    @property
+    def queue_depth(self) -> int:
+        """Events buffered and not yet written"""
+        with self._condition:
+            return len(self._buffer)
+
+    def log_event(
+        self,
+        application_id: int,
+        event_type: str,
+        message: str,
+        event_metadata: Optional[dict] = None
+    ) -> None:
+        """Buffer a log entry (same arguments as ApplicationLog.log_event)"""
+        row = {
+            "application_id": application_id,
+            "event_type": event_type,
+            "message": message,
+            "event_metadata": event_metadata or {},
+            "timestamp": datetime.utcnow(),  # Event time, not flush time
+        }
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("ApplicationLogSink is closed")
+            self._buffer.append(row)
+            if len(self._buffer) > self.max_buffered:
+                self._drop_oldest()
+            if self._oldest is None:
+                # Wake the flusher so it starts the flush_interval timer
+                self._oldest = time.monotonic()
+                self._condition.notify()
+            elif len(self._buffer) >= self.max_batch:
+                self._condition.notify()
+
+    def add(self, log: ApplicationLog) -> None:
+        """Buffer an already-built ApplicationLog (e.g. from ApplicationLog.log_event)"""
+        self.log_event(log.application_id, log.event_type, log.message, log.event_metadata)
+
+    def flush(self) -> int:
+        """Write all buffered events now
+
+        Returns:
+            Number of events written (0 if the insert failed; they stay buffered)
+        """
+        with self._flush_lock:
+            with self._condition:
+                rows, self._buffer = self._buffer, []
+                self._oldest = None
+            if not rows:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                if self.write_queue is not None:
+                    self.write_queue.execute(lambda connection: connection.execute(insert(ApplicationLog), rows))
+                else:
+                    with self.engine.begin() as connection:
+                        connection.execute(insert(ApplicationLog), rows)
+            except Exception as e:
+                self.flush_failures += 1
+                self._retry_delay = min(max(self.flush_interval, self._retry_delay * 2), self.MAX_RETRY_DELAY)
+                logger.error(f"✗ Failed to flush {len(rows)} application log events "
+                             f"(retrying in {self._retry_delay:.1f}s): {str(e)}")
+                with self._condition:
+                    self._buffer[:0] = rows  # Keep order; retry on the next flush
+                    self._oldest = self._oldest or time.monotonic()
+                    self._retry_at = time.monotonic() + self._retry_delay
+                    if len(self._buffer) > self.max_buffered:
+                        self._drop_oldest()
+                return 0
+
+            with self._condition:
+                self._retry_delay = 0.0
+                self._retry_at = None
+                self._overflowing = False
+
+            latency = time.perf_counter() - start
+            self.flushes += 1
+            self.events_flushed += len(rows)
+            self.last_flush_latency = latency
+            self.max_flush_latency = max(self.max_flush_latency, latency)
+            self._total_flush_latency += latency
+            return len(rows)
+
+    def stats(self) -> Dict[str, float]:
+        """Queue depth and flush latency metrics"""
+        return {
+            "queue_depth": self.queue_depth,
+            "events_flushed": self.events_flushed,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "events_dropped": self.events_dropped,
+            "last_flush_ms": self.last_flush_latency * 1000,
+            "max_flush_ms": self.max_flush_latency * 1000,
+            "avg_flush_ms": (self._total_flush_latency / self.flushes * 1000) if self.flushes else 0.0,
+        }
+
+    def close(self) -> None:
+        """Stop the background thread and flush everything still buffered"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        for _ in range(2):  # Nothing flushes after close: retry a failed final flush once
+            self.flush()
+            if not self.queue_depth:
+                break
+        else:
+            with self._condition:
+                dropped, self._buffer = len(self._buffer), []
+                self._oldest = None
+            self.events_dropped += dropped
+            logger.error(f"✗ Dropped {dropped} application log events: final flush failed")
+        atexit.unregister(self.close)
+        self._restore_signal_handlers()
+
+    def __enter__(self) -> "ApplicationLogSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _drop_oldest(self) -> None:
+        """Trim the buffer to max_buffered events (called with _condition held)"""
+        dropped = len(self._buffer) - self.max_buffered
+        del self._buffer[:dropped]
+        self.events_dropped += dropped
+        if not self._overflowing:
+            self._overflowing = True
+            logger.warning(f"⚠ Application log buffer full ({self.max_buffered} events): dropping the oldest "
+                           f"until a flush succeeds")
+
+    def _due(self) -> bool:
+        now = time.monotonic()
+        if self._retry_at is not None and now < self._retry_at:
+            return False
+        return len(self._buffer) >= self.max_batch or (
+            self._oldest is not None and now - self._oldest >= self.flush_interval
+        )
+
+    def _wait_timeout(self) -> Optional[float]:
+        """Seconds until the buffer is due, or None to wait for the next event"""
+        now = time.monotonic()
+        if self._retry_at is not None and now < self._retry_at:
+            return self._retry_at - now
+        if self._oldest is not None:
+            return max(0.0, self.flush_interval - (now - self._oldest))
+        return None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and not self._due():
+                    self._condition.wait(self._wait_timeout())
+                if self._closed:
+                    return
+            self.flush()
+
+    def _install_signal_handlers(self) -> None:
+        """Flush before the process dies on SIGTERM/SIGHUP, then defer to the previous handler"""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for signum in (getattr(signal, "SIGTERM", None), getattr(signal, "SIGHUP", None)):
+            if signum is None:
+                continue
+            previous = signal.getsignal(signum)
+
+            def handler(received, frame, previous=previous):
+                self.flush()
+                if callable(previous):
+                    previous(received, frame)
+                elif previous == signal.SIG_DFL:
+                    signal.signal(received, signal.SIG_DFL)
+                    signal.raise_signal(received)
+
+            signal.signal(signum, handler)
+            self._previous_handlers[signum] = (previous, handler)
+
+    def _restore_signal_handlers(self) -> None:
+        """Put back the handlers replaced by _install_signal_handlers"""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for signum, (previous, handler) in self._previous_handlers.items():
+            if signal.getsignal(signum) is handler:  # Leave handlers installed after ours alone
+                signal.signal(signum, previous if previous is not None else signal.SIG_DFL)
+        self._previous_handlers.clear()
@@ -1,15 +1,27 @@
-"""SQLAlchemy ORM Models for Headless Job Applier"""
+"""SQLAlchemy ORM Models for Headless Job Applier
+
+Triggers, the FTS index and upgrades of existing tables are attached to
+``Base.metadata`` by the modules that own them (counters, dedup, pagination,
+rescrape, search, work_queue). ``database.engine`` imports all of them, so
+import it before calling ``Base.metadata.create_all``.
+"""
 
 from datetime import datetime, timedelta
 from typing import Optional, List
 import hashlib
-from sqlalchemy import Column, String, Text, Integer, DateTime, Boolean, ForeignKey, JSON, Index, UniqueConstraint
+from sqlalchemy import Column, String, Text, Integer, BigInteger, DateTime, Boolean, ForeignKey, JSON, Index, LargeBinary, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
+from .compression import CompressedText
 
 Base = declarative_base()
 
 
+def _checked_at_default(context) -> datetime:
+    """New jobs count as checked when they were scraped"""
+    return context.get_current_parameters().get("scraped_at") or datetime.utcnow()
+
+
 class Job(Base):
     """Job posting entity"""
     __tablename__ = "jobs"
@@ -19,12 +31,19 @@ class Job(Base):
     company = Column(String(255), nullable=False, index=True)
     title = Column(String(255), nullable=False, index=True)
     location = Column(String(255), nullable=False, index=True)
-    description = Column(Text, nullable=True)
-    html_content = Column(Text, nullable=True)  # Gzipped if large
+    # Large columns are deferred: listing and dedup queries never load them
+    description = deferred(Column(Text, nullable=True))
+    html_content = deferred(Column(CompressedText(), nullable=True))  # zstd/gzip-compressed if large
     source = Column(String(50), nullable=False, index=True)  # linkedin, indeed, jobstreet
     scraped_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    keywords_match = Column(JSON, nullable=True)  # Array of matched keywords
+    keywords_match = Column(JSON, nullable=True)  # Matched keywords (TemplateMatch.keywords_match: keyword -> hits)
+    cluster_id = Column(String(16), nullable=True, index=True)  # Near-duplicate cluster (id of its representative job)
+    # Re-scrape state (see rescrape.py)
+    etag = Column(String(255), nullable=True)  # HTTP validators of the last fetch, sent back on re-scrape
+    last_modified = Column(String(64), nullable=True)
+    content_hash = Column(String(64), nullable=True)  # upsert.content_hash of the posting text
+    checked_at = Column(DateTime, default=_checked_at_default)  # Last scrape or re-scrape, changed or not
     
     # Relationships
     applications = relationship("Application", back_populates="job", cascade="all, delete-orphan")
@@ -33,6 +52,8 @@ class Job(Base):
     __table_args__ = (
         UniqueConstraint('company', 'title', 'location', name='unique_job_posting'),
         Index('idx_job_scraped_source', 'scraped_at', 'source'),
+        Index('idx_job_scraped_id', 'scraped_at', 'id'),  # Keyset pagination (see pagination.py)
+        Index('idx_job_checked_id', 'checked_at', 'id'),  # Stale-job walk (see rescrape.py)
     )
 
     def __repr__(self) -> str:
@@ -45,9 +66,12 @@ class Job(Base):
         return hashlib.sha256(key.encode()).hexdigest()[:16]
 
     def is_stale(self, days: int = 7) -> bool:
-        """Check if job posting is older than specified days"""
+        """Check if job posting was last scraped or re-checked more than ``days`` ago
+
+        Selecting stale jobs in bulk: rescrape.select_stale_jobs
+        """
         threshold = datetime.utcnow() - timedelta(days=days)
-        return self.scraped_at < threshold
+        return (self.checked_at or self.scraped_at) < threshold
 
 
 class Application(Base):
@@ -71,6 +95,9 @@ class Application(Base):
     error_message = Column(Text, nullable=True)
     user_intervention_required = Column(Boolean, default=False)
     intervention_reason = Column(String(255), nullable=True)
+    priority = Column(Integer, nullable=False, default=0)  # Higher is claimed first (see work_queue.py)
+    lease_owner = Column(String(255), nullable=True)  # Worker currently processing the application
+    lease_expires_at = Column(DateTime, nullable=True)  # Lease is reclaimable after this time
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -78,6 +105,10 @@ class Application(Base):
     job = relationship("Job", back_populates="applications")
     logs = relationship("ApplicationLog", back_populates="application", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index('idx_application_status_lease', 'status', 'lease_expires_at'),
+    )
+
     def __repr__(self) -> str:
         return f"Application(id={self.id}, job_id={self.job_id}, status={self.status})"
 
@@ -125,3 +156,57 @@ class ApplicationLog(Base):
             event_metadata=event_metadata or {}
         )
         return log
+
+
+class JobSignature(Base):
+    """MinHash signature of a job posting for near-duplicate detection (see dedup.py)"""
+    __tablename__ = "job_signatures"
+
+    job_id = Column(String(16), ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    minhash = Column(LargeBinary, nullable=False)  # Packed unsigned 32-bit values
+    indexed_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"JobSignature(job_id={self.job_id})"
+
+
+class JobLSHBucket(Base):
+    """LSH band bucket of a job signature; jobs sharing any bucket are duplicate candidates"""
+    __tablename__ = "job_lsh_buckets"
+
+    # bucket leads the primary key so lookups by bucket hash use it
+    bucket = Column(BigInteger, primary_key=True)
+    band = Column(Integer, primary_key=True)
+    job_id = Column(String(16), ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+    def __repr__(self) -> str:
+        return f"JobLSHBucket(band={self.band}, bucket={self.bucket}, job_id={self.job_id})"
+
+
+class JobCompaction(Base):
+    """Compacted description of a job, as sent to the LLM (see customizer/jd_compactor.py)"""
+    __tablename__ = "job_compactions"
+
+    job_id = Column(String(16), ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    description_hash = Column(String(64), nullable=False)  # SHA-256 of the description it was made from
+    version = Column(Integer, nullable=False)  # Compactor rules version (COMPACTOR_VERSION)
+    text = Column(Text, nullable=False)
+    tokens_before = Column(Integer, nullable=False)
+    tokens_after = Column(Integer, nullable=False)
+    compacted_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"JobCompaction(job_id={self.job_id}, tokens={self.tokens_before}->{self.tokens_after})"
+
+
+class StatCounter(Base):
+    """Row counts maintained by database triggers (see counters.py)"""
+    __tablename__ = "stat_counters"
+
+    name = Column(String(100), primary_key=True)
+    # Names: jobs, applications, application_logs, applications.status.<status>
+    value = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"StatCounter(name={self.name}, value={self.value})"
+
@@ -0,0 +1,174 @@
+"""Streaming iterators over jobs and applications with constant memory
+
+``Query.all()`` materializes every matching ORM object at once. These
+generators walk the table in (timestamp, id) order instead:
+
+- SQLite and other databases: keyset pagination. Each batch is a fresh
+  range query that starts after the last (timestamp, id) seen. The
+  predicate (``keyset_after``) has a plain ``timestamp >= last`` bound, so
+  the (timestamp, id) index is entered at that key and page N costs the
+  same as page 1, unlike OFFSET.
+- PostgreSQL: one query over a server-side cursor (``yield_per``), fetching
+  ``batch_size`` rows per round trip.
+
+Each batch is expunged from the session before the next one is loaded, so
+yielded objects are detached. Deferred columns such as ``Job.description``
+are not loadable afterwards unless requested up front.
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from sqlalchemy import Connection, and_, event, or_, select
+from sqlalchemy.orm import Session, undefer
+from .models import Application, Base, Job
+
+DEFAULT_BATCH_SIZE = 500
+
+# Composite (timestamp, id) indexes the keyset walks seek on (also in the models' __table_args__).
+# applications and application_logs need none: their integer id is the rowid, already part of every index.
+KEYSET_INDEXES = {
+    "idx_job_scraped_id": ("jobs", "scraped_at, id"),
+}
+
+
+def keyset_after(order_column, id_column, last: Tuple[Any, Any]):
+    """WHERE clause for rows after ``last`` = (timestamp, id) in (timestamp, id) order
+
+    ``timestamp > a OR (timestamp = a AND id > b)`` alone gives SQLite no
+    range to seek to, so every page would scan from the start of the index.
+    The redundant ``timestamp >= a`` bound makes it a range scan.
+    """
+    return and_(order_column >= last[0], or_(order_column > last[0], id_column > last[1]))
+
+
+def _filter_conditions(model, filters: Optional[Dict[str, Any]]) -> List:
+    """Equality filters; list/tuple/set values become IN (...)"""
+    conditions = []
+    for name, value in (filters or {}).items():
+        column = getattr(model, name, None)
+        if column is None:
+            raise ValueError(f"{model.__name__} has no column '{name}'")
+        if isinstance(value, (list, tuple, set)):
+            conditions.append(column.in_(value))
+        else:
+            conditions.append(column == value)
+    return conditions
+
+
+def _time_conditions(column, since: Optional[datetime], until: Optional[datetime]) -> List:
+    conditions = []
+    if since is not None:
+        conditions.append(column >= since)
+    if until is not None:
+        conditions.append(column < until)
+    return conditions
+
+
+def iter_keyset(
+    session_factory: Callable[[], Session],
+    model,
+    order_column,
+    conditions: Iterable = (),
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    options: Iterable = (),
+) -> Iterator[Any]:
+    """Yield ORM objects ordered by (order_column, id) one batch at a time
+
+    Args:
+        session_factory: Callable returning a new Session
+        model: Mapped class to select
+        order_column: Indexed timestamp column leading the sort key
+        conditions: Extra WHERE clauses
+        batch_size: Rows loaded per batch
+        options: Loader options (e.g. undefer) applied to every batch
+
+    Yields:
+        Detached instances of ``model``
+    """
+    conditions = list(conditions)
+    statement = select(model).where(*conditions).options(*options)
+    session = session_factory()
+    try:
+        if session.get_bind().dialect.name == "postgresql":
+            # Server-side cursor: a single query, streamed batch_size rows at a time
+            result = session.execute(
+                statement.order_by(order_column, model.id).execution_options(yield_per=batch_size)
+            )
+            for partition in result.scalars().partitions():
+                yield from partition
+                session.expunge_all()
+            return
+
+        # Rows without a timestamp first (keyset on id alone), then the (timestamp, id) walk
+        null_rows = statement.where(order_column.is_(None)).order_by(model.id)
+        last_id = None
+        while True:
+            page = null_rows if last_id is None else null_rows.where(model.id > last_id)
+            batch = session.execute(page.limit(batch_size)).scalars().all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+            session.expunge_all()
+            yield from batch
+
+        dated_rows = statement.where(order_column.isnot(None)).order_by(order_column, model.id)
+        last = None
+        while True:
+            page = dated_rows
+            if last is not None:
+                page = page.where(keyset_after(order_column, model.id, last))
+            batch = session.execute(page.limit(batch_size)).scalars().all()
+            if not batch:
+                break
+            last = (getattr(batch[-1], order_column.key), batch[-1].id)
+            session.expunge_all()
+            yield from batch
+    finally:
+        session.close()
+
+
+def iter_jobs(
+    session_factory: Callable[[], Session],
+    filters: Optional[Dict[str, Any]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    with_description: bool = False,
+    representatives_only: bool = False,
+) -> Iterator[Job]:
+    """Stream jobs ordered by (scraped_at, id); see iter_keyset"""
+    conditions = _filter_conditions(Job, filters) + _time_conditions(Job.scraped_at, since, until)
+    if representatives_only:
+        # One posting per near-duplicate cluster (see dedup.py); jobs not indexed yet are left out
+        conditions.append(Job.cluster_id == Job.id)
+    options = [undefer(Job.description)] if with_description else []
+    return iter_keyset(session_factory, Job, Job.scraped_at, conditions, batch_size, options)
+
+
+def iter_applications(
+    session_factory: Callable[[], Session],
+    status: Optional[Union[str, Iterable[str]]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Iterator[Application]:
+    """Stream applications ordered by (created_at, id); see iter_keyset"""
+    filters = dict(filters or {})
+    if status is not None:
+        filters["status"] = status if isinstance(status, str) else list(status)
+    conditions = _filter_conditions(Application, filters) + _time_conditions(Application.created_at, since, until)
+    return iter_keyset(session_factory, Application, Application.created_at, conditions, batch_size)
+
+
+def install_keyset_indexes(connection: Connection) -> None:
+    """Create the composite keyset indexes on tables created before them"""
+    for name, (table, columns) in KEYSET_INDEXES.items():
+        connection.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target, connection: Connection, **kw) -> None:
+    """Upgrade existing databases whenever tables are created"""
+    install_keyset_indexes(connection)
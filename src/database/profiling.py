@@ -0,0 +1,246 @@
+"""SQL statement timing, slow-query log and query-plan capture
+
+``instrument_engine`` hooks ``before_cursor_execute``/``after_cursor_execute``
+on an engine and records a latency histogram per normalized statement
+("query shape": literals and IN/VALUES lists collapsed). Statements slower
+than the threshold are logged (to logs/database.log through the database
+log handler) together with their query plan, captured once per shape.
+
+Instrumentation is opt-in (``SQL_PROFILE=true``): normalizing every
+statement, including large multi-row upserts, is not free.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import Engine, event
+
+SQL_PROFILE = os.getenv("SQL_PROFILE", "false").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "100"))
+QUERY_STATS_PATH = os.getenv("QUERY_STATS_PATH", "logs/query_stats.json")
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is unbounded)
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_NAMED_PARAMETER = re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s")
+_PARAMETER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_TUPLES = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+
+_stats_by_engine: "weakref.WeakKeyDictionary[Engine, QueryStats]" = weakref.WeakKeyDictionary()
+_instrument_lock = threading.Lock()
+
+
+def normalize_sql(statement: str) -> str:
+    """Reduce a statement to its shape so different parameters share one entry
+
+    String/number literals and bound parameters become ``?``; parameter lists
+    such as ``IN (?, ?, ?)`` or multi-row ``VALUES (...), (...)`` collapse to
+    a single ``(?)`` so batch sizes do not create new shapes.
+    """
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NAMED_PARAMETER.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _WHITESPACE.sub(" ", shape).strip()
+    shape = _PARAMETER_LIST.sub("(?)", shape)
+    return _REPEATED_TUPLES.sub("(?)", shape)
+
+
+class ShapeStats:
+    """Latency histogram for one query shape"""
+
+    __slots__ = ("count", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (max_ms for the last bucket)"""
+        target = q * self.count
+        seen = 0
+        for i, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= target and bucket:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "total_ms": self.total_ms, "max_ms": self.max_ms, "buckets": self.buckets}
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        self.count += data["count"]
+        self.total_ms += data["total_ms"]
+        self.max_ms = max(self.max_ms, data["max_ms"])
+        self.buckets = [a + b for a, b in zip(self.buckets, data["buckets"])]
+
+
+class QueryStats:
+    """Per-shape latency statistics for one engine"""
+
+    def __init__(self, slow_query_ms: float = SLOW_QUERY_MS, explain: bool = True):
+        """Initialize statistics
+
+        Args:
+            slow_query_ms: Statements slower than this are logged with their plan
+            explain: Capture the query plan of slow statements (once per shape)
+        """
+        self.slow_query_ms = slow_query_ms
+        self.explain = explain
+        self.shapes: Dict[str, ShapeStats] = {}
+        self.plans: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def record(self, shape: str, elapsed_ms: float) -> None:
+        with self._lock:
+            stats = self.shapes.get(shape)
+            if stats is None:
+                stats = self.shapes[shape] = ShapeStats()
+            stats.record(elapsed_ms)
+
+    def top(self, n: int = 10, key: str = "total_ms") -> List[Tuple[str, ShapeStats]]:
+        """Most expensive query shapes, by total time by default (or count / max_ms)"""
+        with self._lock:
+            items = list(self.shapes.items())
+        return sorted(items, key=lambda item: getattr(item[1], key), reverse=True)[:n]
+
+    def reset(self) -> None:
+        with self._lock:
+            self.shapes.clear()
+            self.plans.clear()
+
+    def save(self, path: str = QUERY_STATS_PATH) -> None:
+        """Merge these statistics into a JSON file shared across runs, then reset"""
+        with self._lock:
+            if not self.shapes:
+                return
+            current = {shape: stats.to_dict() for shape, stats in self.shapes.items()}
+            self.shapes.clear()
+        target = Path(path)
+        merged = load_stats(path)
+        for shape, data in current.items():
+            merged.shapes.setdefault(shape, ShapeStats()).merge(data)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(target.name + ".tmp")
+        tmp_path.write_text(json.dumps({shape: stats.to_dict() for shape, stats in merged.shapes.items()}))
+        os.replace(tmp_path, target)
+
+
+def load_stats(path: str = QUERY_STATS_PATH) -> QueryStats:
+    """Load statistics saved by QueryStats.save (empty if the file is missing)"""
+    stats = QueryStats()
+    try:
+        data = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return stats
+    for shape, values in data.items():
+        stats.shapes.setdefault(shape, ShapeStats()).merge(values)
+    return stats
+
+
+def _explain(cursor, dialect: str, statement: str, parameters) -> Optional[str]:
+    """Run EXPLAIN (QUERY PLAN) on a second cursor of the same DBAPI connection"""
+    prefix = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}.get(dialect)
+    if prefix is None or not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return None
+    plan_cursor = cursor.connection.cursor()
+    try:
+        plan_cursor.execute(prefix + statement, parameters)
+        rows = plan_cursor.fetchall()
+    finally:
+        plan_cursor.close()
+    if dialect == "sqlite":
+        return "\n".join(str(row[-1]) for row in rows)
+    return "\n".join(str(row[0]) for row in rows)
+
+
+def instrument_engine(engine: Engine, slow_query_ms: float = SLOW_QUERY_MS, explain: bool = True) -> QueryStats:
+    """Attach timing listeners to an engine (idempotent)
+
+    Args:
+        engine: Engine to instrument
+        slow_query_ms: Log statements slower than this, with their query plan
+        explain: Capture query plans for slow statements
+
+    Returns:
+        The engine's QueryStats
+    """
+    with _instrument_lock:
+        stats = _stats_by_engine.get(engine)
+        if stats is not None:
+            return stats
+        stats = _stats_by_engine[engine] = QueryStats(slow_query_ms=slow_query_ms, explain=explain)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        shape = normalize_sql(statement)
+        stats.record(shape, elapsed_ms)
+        if elapsed_ms < stats.slow_query_ms:
+            return
+
+        message = f"Slow query ({elapsed_ms:.1f} ms): {shape}"
+        if stats.explain and not executemany:
+            with stats._lock:
+                captured = shape in stats.plans
+            if not captured:
+                try:
+                    plan = _explain(cursor, conn.dialect.name, statement, parameters) or ""
+                except Exception as e:
+                    plan = ""
+                    logger.debug(f"Could not capture query plan: {str(e)}")
+                with stats._lock:  # Another thread may have captured it meanwhile; the first plan wins
+                    plan = stats.plans.setdefault(shape, plan)
+                if plan:
+                    message += f"\nQuery plan:\n{plan}"
+        logger.warning(message)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # Keep the start-time stack balanced when a statement fails
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
+
+    return stats
+
+
+def get_query_stats(engine: Engine) -> Optional[QueryStats]:
+    """Statistics for an instrumented engine (None if not instrumented)"""
+    return _stats_by_engine.get(engine)
+
+
+def save_all_stats(path: str = QUERY_STATS_PATH) -> None:
+    """Merge the statistics of every instrumented engine into ``path``"""
+    for stats in list(_stats_by_engine.values()):
+        stats.save(path)
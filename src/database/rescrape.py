@@ -0,0 +1,181 @@
+"""Stale job selection and incremental re-scrape writes
+
+Re-scraping every posting in full would re-download every page and rewrite
+every row. Instead:
+
+- ``select_stale_jobs`` picks jobs whose ``checked_at`` is older than the
+  threshold, returning only what a conditional request needs (url,
+  stored ETag/Last-Modified, content hash). Batches are paged with
+  ``pagination.keyset_after``, so each one is a range scan of the
+  (checked_at, id) index.
+- The scraper sends those validators back, so an unchanged page usually
+  costs a 304 and no parsing.
+- ``apply_rescrape`` writes the outcome. Postings whose parsed text hashes
+  to the stored ``content_hash`` (and 304s) only get ``checked_at`` and
+  their validators refreshed, while ``updated_at`` is left alone. Postings
+  that did change go through ``upsert_chunk`` like any scraped job, which
+  leaves them for the next near-duplicate indexing pass.
+
+``checked_at`` is added (and backfilled from ``scraped_at``) on databases
+created before it.
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from loguru import logger
+from sqlalchemy import Connection, bindparam, event, func, inspect, select, update
+from .models import Base, Job
+from .pagination import keyset_after
+from .upsert import VALIDATOR_FIELDS, content_hash, normalize_job_row, upsert_chunk
+
+CONFIG_PATH = os.getenv("CONFIG_PATH", "config/config.yaml")
+DEFAULT_RESCRAPE_DAYS = 7
+
+# Columns added after the jobs table was first released
+RESCRAPE_COLUMNS = {
+    "etag": "VARCHAR(255)",
+    "last_modified": "VARCHAR(64)",
+    "content_hash": "VARCHAR(64)",
+    "checked_at": "TIMESTAMP",
+}
+
+STALE_FIELDS = ("id", "url", "source", "etag", "last_modified", "content_hash", "checked_at")
+
+
+def load_rescrape_days(config_path: str = CONFIG_PATH) -> int:
+    """Read application.rescrape_threshold_days from config.yaml (7 if unset)"""
+    try:
+        from ruamel.yaml import YAML
+
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = YAML(typ="safe").load(f) or {}
+        return int(config.get("application", {}).get("rescrape_threshold_days", DEFAULT_RESCRAPE_DAYS))
+    except (ImportError, OSError) as e:
+        logger.warning(f"Could not read re-scrape threshold from {config_path}, using {DEFAULT_RESCRAPE_DAYS} days: {str(e)}")
+        return DEFAULT_RESCRAPE_DAYS
+
+
+def select_stale_jobs(
+    connection: Connection,
+    threshold_days: int = DEFAULT_RESCRAPE_DAYS,
+    limit: int = 100,
+    sources: Optional[Sequence[str]] = None,
+    after: Optional[Tuple[datetime, str]] = None,
+) -> List[Dict[str, Any]]:
+    """Jobs last checked more than ``threshold_days`` ago, least recently checked first
+
+    Args:
+        connection: Connection to the jobs database
+        threshold_days: Staleness threshold (application.rescrape_threshold_days)
+        limit: Maximum number of jobs returned
+        sources: Only jobs from these sources
+        after: (checked_at, id) of the last job of the previous batch, so jobs
+            whose re-scrape failed (and stay stale) are not returned again
+
+    Returns:
+        Row dicts with STALE_FIELDS
+    """
+    table = Job.__table__
+    conditions = [table.c.checked_at < datetime.utcnow() - timedelta(days=threshold_days)]
+    if sources is not None:
+        conditions.append(table.c.source.in_(list(sources)))
+    if after is not None:
+        conditions.append(keyset_after(table.c.checked_at, table.c.id, after))
+    statement = (
+        select(*(table.c[name] for name in STALE_FIELDS))
+        .where(*conditions)
+        .order_by(table.c.checked_at, table.c.id)
+        .limit(limit)
+    )
+    return [dict(row._mapping) for row in connection.execute(statement)]
+
+
+def apply_rescrape(connection: Connection, results: Iterable[Mapping[str, Any]]) -> Dict[str, int]:
+    """Record re-scrape outcomes, rewriting only postings whose text changed
+
+    Args:
+        connection: Connection inside the caller's transaction
+        results: One mapping per re-checked job with ``id``, optional ``etag``
+            and ``last_modified`` from the response, and ``job``: the parsed
+            job dict, or None when there is no new content (304, gone)
+
+    Returns:
+        Dictionary with changed (rows rewritten), unchanged (same content
+        hash, or not rewritten by the upsert), not_modified (no content) and
+        skipped (parsed job missing required fields or clashing with another job)
+    """
+    table = Job.__table__
+    results = list(results)
+    counts = {"changed": 0, "unchanged": 0, "not_modified": 0, "skipped": 0}
+    stored = {}
+    ids = [result["id"] for result in results if result.get("job")]
+    if ids:
+        stored = dict(connection.execute(select(table.c.id, table.c.content_hash).where(table.c.id.in_(ids))).all())
+
+    touched = []
+    changed = []
+    for result in results:
+        new_hash = None
+        job = result.get("job")
+        if job:
+            new_hash = content_hash(job)
+            if new_hash != stored.get(result["id"]):
+                try:
+                    row = normalize_job_row({**job, "id": result["id"]})
+                except ValueError:
+                    counts["skipped"] += 1
+                    new_hash = None
+                else:
+                    row.update({name: result.get(name) for name in VALIDATOR_FIELDS if result.get(name)})
+                    changed.append(row)
+            else:
+                counts["unchanged"] += 1
+        else:
+            counts["not_modified"] += 1
+        touched.append({
+            "job_id": result["id"],
+            "new_etag": result.get("etag"),
+            "new_last_modified": result.get("last_modified"),
+            "new_hash": new_hash,
+        })
+
+    if changed:
+        upserted = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+        upsert_chunk(connection, changed, upserted)
+        counts["changed"] += upserted["updated"] + upserted["inserted"]
+        counts["unchanged"] += upserted["unchanged"]
+        counts["skipped"] += upserted["skipped"]
+    if touched:
+        # Not a content change: updated_at is kept; the hash is stored for rows that had none yet
+        connection.execute(
+            update(table).where(table.c.id == bindparam("job_id")).values(
+                checked_at=datetime.utcnow(),
+                etag=func.coalesce(bindparam("new_etag"), table.c.etag),
+                last_modified=func.coalesce(bindparam("new_last_modified"), table.c.last_modified),
+                content_hash=func.coalesce(bindparam("new_hash"), table.c.content_hash),
+                updated_at=table.c.updated_at,
+            ),
+            touched,
+        )
+    return counts
+
+
+def install_rescrape_columns(connection: Connection) -> None:
+    """Add the re-scrape columns and index to a jobs table created before them"""
+    existing = {column["name"] for column in inspect(connection).get_columns("jobs")}
+    for name, ddl in RESCRAPE_COLUMNS.items():
+        if name not in existing:
+            connection.exec_driver_sql(f"ALTER TABLE jobs ADD COLUMN {name} {ddl}")
+    if "checked_at" not in existing:
+        connection.exec_driver_sql("UPDATE jobs SET checked_at = scraped_at WHERE checked_at IS NULL")
+    # (checked_at, id) serves the stale-job walk; it replaces the single-column index of older databases
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS idx_job_checked_id ON jobs (checked_at, id)")
+    connection.exec_driver_sql("DROP INDEX IF EXISTS ix_jobs_checked_at")
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target, connection: Connection, **kw) -> None:
+    """Upgrade existing databases whenever tables are created"""
+    install_rescrape_columns(connection)
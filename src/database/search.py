@@ -0,0 +1,194 @@
+"""Full-text search over jobs (SQLite FTS5 / PostgreSQL tsvector + GIN)
+
+SQLite keeps an external-content FTS5 table ``jobs_fts`` in sync with
+``jobs`` through triggers, ranked with BM25. PostgreSQL gets a generated,
+weighted ``search_vector`` column with a GIN index, ranked with ts_rank_cd.
+Both are installed from the Base.metadata after_create hook.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import Connection, Engine, event, text
+from .models import Base
+
+# Column weights (title, company, location, description) for bm25()
+BM25_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+        title, company, location, description,
+        content='jobs', content_rowid='rowid', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs
+    BEGIN
+        INSERT INTO jobs_fts (rowid, title, company, location, description)
+        VALUES (NEW.rowid, NEW.title, NEW.company, NEW.location, NEW.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs
+    BEGIN
+        INSERT INTO jobs_fts (jobs_fts, rowid, title, company, location, description)
+        VALUES ('delete', OLD.rowid, OLD.title, OLD.company, OLD.location, OLD.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_update
+    AFTER UPDATE OF title, company, location, description ON jobs
+    BEGIN
+        INSERT INTO jobs_fts (jobs_fts, rowid, title, company, location, description)
+        VALUES ('delete', OLD.rowid, OLD.title, OLD.company, OLD.location, OLD.description);
+        INSERT INTO jobs_fts (rowid, title, company, location, description)
+        VALUES (NEW.rowid, NEW.title, NEW.company, NEW.location, NEW.description);
+    END
+    """,
+]
+
+POSTGRESQL_FTS_DDL = [
+    """
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(company, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(location, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_jobs_search_vector ON jobs USING GIN (search_vector)",
+]
+
+_TOKEN_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+_DROPPED_WORDS = {"and", "AND", "&"}
+
+
+def to_fts5_query(query: str) -> str:
+    """Translate free text into a safe FTS5 MATCH expression
+
+    Every word or "quoted phrase" becomes a quoted FTS5 string (so characters
+    like ``-``, ``.`` or ``:`` cannot break the syntax) and terms are ANDed.
+    Uppercase ``OR`` is kept as an operator; ``and`` is dropped as filler.
+    """
+    terms = []
+    for phrase, word in _TOKEN_PATTERN.findall(query):
+        term = phrase or word
+        if term == "OR" and terms and terms[-1] != "OR":
+            terms.append("OR")
+        elif term not in _DROPPED_WORDS:
+            terms.append('"' + term.replace('"', '""') + '"')
+    if terms and terms[-1] == "OR":
+        terms.pop()
+    return " ".join(terms)
+
+
+def _sqlite_fts_available(connection: Connection) -> bool:
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'")
+    ).first() is not None
+
+
+def install_search_index(connection: Connection) -> bool:
+    """Create the full-text index and its sync triggers if missing
+
+    Returns:
+        True if the index exists afterwards
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        for statement in POSTGRESQL_FTS_DDL:
+            connection.exec_driver_sql(statement)
+        return True
+    if dialect != "sqlite":
+        return False
+
+    existed = _sqlite_fts_available(connection)
+    try:
+        for statement in SQLITE_FTS_DDL:
+            connection.exec_driver_sql(statement)
+    except Exception as e:
+        logger.warning(f"SQLite FTS5 unavailable, search falls back to LIKE scans: {str(e)}")
+        return False
+    if not existed:
+        weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+        connection.exec_driver_sql(f"INSERT INTO jobs_fts (jobs_fts, rank) VALUES ('rank', 'bm25({weights})')")
+        rebuild_search_index(connection)
+    return True
+
+
+def rebuild_search_index(connection: Connection) -> None:
+    """Re-read every job into the FTS5 index (needed after VACUUM renumbers rowids)"""
+    if connection.dialect.name == "sqlite" and _sqlite_fts_available(connection):
+        connection.exec_driver_sql("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+
+
+def search_jobs(engine: Engine, query: str, limit: int = 20, source: Optional[str] = None) -> List[Dict]:
+    """Rank jobs matching a free-text query
+
+    Args:
+        engine: Engine bound to the jobs database
+        query: Words and "quoted phrases" that must all appear (``OR`` between terms allowed)
+        limit: Maximum results
+        source: Optional portal filter (linkedin, indeed, jobstreet)
+
+    Returns:
+        List of dicts with id, title, company, location, url, source, score and
+        snippet, best match first. Higher score is better.
+    """
+    params = {"limit": limit, "source": source}
+    source_filter = "AND (:source IS NULL OR jobs.source = :source)"
+
+    with engine.connect() as connection:
+        dialect = connection.dialect.name
+        if dialect == "postgresql":
+            statement = text(
+                "SELECT jobs.id, jobs.title, jobs.company, jobs.location, jobs.url, jobs.source, "
+                "ts_rank_cd(jobs.search_vector, q) AS score, "
+                "left(coalesce(jobs.description, ''), 160) AS snippet "
+                "FROM jobs, websearch_to_tsquery('english', :query) AS q "
+                f"WHERE jobs.search_vector @@ q {source_filter} "
+                "ORDER BY score DESC LIMIT :limit"
+            )
+            params["query"] = query
+        elif dialect == "sqlite" and _sqlite_fts_available(connection):
+            match = to_fts5_query(query)
+            if not match:
+                return []
+            # Rank and limit inside FTS5 first (ORDER BY rank uses the configured
+            # bm25 weights) so only the top hits are joined back to jobs. With a
+            # source filter the join has to happen before the limit.
+            ranked = "SELECT rowid, rank, snippet(jobs_fts, 3, '[', ']', '…', 16) AS snippet FROM jobs_fts " \
+                     "WHERE jobs_fts MATCH :query ORDER BY rank"
+            if source is None:
+                ranked += " LIMIT :limit"
+            statement = text(
+                "SELECT jobs.id, jobs.title, jobs.company, jobs.location, jobs.url, jobs.source, "
+                "-hits.rank AS score, hits.snippet "
+                f"FROM ({ranked}) AS hits JOIN jobs ON jobs.rowid = hits.rowid "
+                f"WHERE 1 = 1 {source_filter} ORDER BY hits.rank LIMIT :limit"
+            )
+            params["query"] = match
+        else:
+            # No full-text index: unranked scan requiring every word somewhere in the posting
+            words = [phrase or word for phrase, word in _TOKEN_PATTERN.findall(query)
+                     if (phrase or word) not in _DROPPED_WORDS]
+            if not words:
+                return []
+            haystack = "lower(jobs.title || ' ' || jobs.company || ' ' || coalesce(jobs.description, ''))"
+            conditions = " AND ".join(f"{haystack} LIKE :word{n}" for n in range(len(words)))
+            params.update({f"word{n}": f"%{word.lower()}%" for n, word in enumerate(words)})
+            statement = text(
+                "SELECT jobs.id, jobs.title, jobs.company, jobs.location, jobs.url, jobs.source, "
+                "0.0 AS score, substr(coalesce(jobs.description, ''), 1, 160) AS snippet "
+                f"FROM jobs WHERE {conditions} {source_filter} LIMIT :limit"
+            )
+
+        return [dict(row._mapping) for row in connection.execute(statement, params)]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target, connection: Connection, **kw) -> None:
+    """Install the search index whenever tables are created"""
+    install_search_index(connection)
@@ -0,0 +1,363 @@
+"""Bulk ingestion of scraped jobs using dialect-native upserts"""
+
+import hashlib
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Tuple, Union
+
+from sqlalchemy import Connection, DateTime, Engine, select, union
+from .dedup import index_jobs, unindex_jobs
+from .models import Job
+
+# HTTP validators of the fetched page (sent back as conditional headers on re-scrape)
+VALIDATOR_FIELDS = ("etag", "last_modified")
+
+# Columns a caller may supply for a job row
+JOB_FIELDS = (
+    "url", "company", "title", "location", "description",
+    "html_content", "source", "keywords_match", "scraped_at",
+) + VALIDATOR_FIELDS
+REQUIRED_FIELDS = ("url", "company", "title", "location", "source")
+
+# Columns compared to decide whether an existing row actually changed
+COMPARED_FIELDS = (
+    "url", "company", "title", "location", "description",
+    "html_content", "source", "keywords_match",
+)
+
+# Posting text hashed into jobs.content_hash (html_content changes with every page view)
+HASHED_FIELDS = ("company", "title", "location", "description")
+
+# Columns overwritten when an incoming row hits an existing id
+UPDATED_FIELDS = COMPARED_FIELDS + VALIDATOR_FIELDS + ("content_hash", "checked_at", "updated_at")
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Per-row SQLite triggers on jobs whose work upsert_chunk does once per chunk
+# instead (counters.py, search.py). Any of them firing per row roughly halves
+# the insert rate, even when its WHEN clause is false.
+BATCHED_TRIGGERS = ("jobs_counter_insert", "jobs_fts_insert", "jobs_fts_update")
+# Dropping and recreating them reloads the schema (a few ms), which only pays
+# off for chunks writing at least this many rows
+TRIGGER_BATCH_MIN_ROWS = 250
+
+JobRow = Union[Mapping[str, Any], Job]
+
+
+def chunked(rows: Iterable[JobRow], size: int) -> Iterator[List[JobRow]]:
+    """Yield lists of at most ``size`` rows"""
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def content_hash(row: Mapping[str, Any]) -> str:
+    """SHA-256 of the posting text (HASHED_FIELDS); equal hashes mean nothing worth rewriting changed"""
+    text = "\x1f".join(str(row.get(field) or "") for field in HASHED_FIELDS)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_job_row(row: JobRow) -> Dict[str, Any]:
+    """Convert an incoming mapping or Job instance into a column dict with an id"""
+    if isinstance(row, Job):
+        data = {field: getattr(row, field) for field in JOB_FIELDS if getattr(row, field) is not None}
+        if row.id:
+            data["id"] = row.id
+    else:
+        data = {key: value for key, value in row.items() if key in JOB_FIELDS or key == "id"}
+
+    missing = [field for field in REQUIRED_FIELDS if not data.get(field)]
+    if missing:
+        raise ValueError(f"Job row is missing required fields: {', '.join(missing)}")
+
+    if not data.get("id"):
+        data["id"] = Job.generate_id(data["url"], data["company"], data["title"], data["location"])
+    return data
+
+
+def _posting_key(row: Mapping[str, Any]) -> Tuple[str, str, str]:
+    return (row["company"], row["title"], row["location"])
+
+
+def _insert_factory(bind: Union[Engine, Connection]):
+    """Return the dialect-specific insert() supporting ON CONFLICT"""
+    dialect = bind.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"Bulk upsert is not supported for dialect '{dialect}'")
+    return insert
+
+
+def _positional_markers(dialect, count: int) -> List[str]:
+    """``count`` positional parameter markers in the driver's own paramstyle"""
+    paramstyle = dialect.paramstyle
+    if paramstyle == "qmark":
+        return ["?"] * count
+    if paramstyle in ("format", "pyformat"):
+        return ["%s"] * count
+    if paramstyle == "numeric_dollar":  # asyncpg
+        return [f"${n}" for n in range(1, count + 1)]
+    if paramstyle == "numeric":
+        return [f":{n}" for n in range(1, count + 1)]
+    raise NotImplementedError(f"Bulk upsert does not support the '{paramstyle}' paramstyle")
+
+
+def _posting_key_sql(dialect, count: int) -> str:
+    """Driver-level SQL selecting the ids of jobs matching ``count`` (company, title, location) keys"""
+    markers = iter(_positional_markers(dialect, count * 3))
+    row_markers = ", ".join(f"({next(markers)}, {next(markers)}, {next(markers)})" for _ in range(count))
+    return (
+        f"WITH incoming(company, title, location) AS (VALUES {row_markers}) "
+        "SELECT jobs.id FROM incoming JOIN jobs ON jobs.company = incoming.company "
+        "AND jobs.title = incoming.title AND jobs.location = incoming.location"
+    )
+
+
+def _ids_by_posting_key(connection, keys: List[Tuple[str, str, str]]) -> List[str]:
+    """Find ids of existing jobs matching any (company, title, location) key
+
+    SQLite will not drive a row-value ``IN`` list from the composite unique
+    index, so the keys are joined as a VALUES list instead, which both SQLite
+    and PostgreSQL resolve with one index probe per key. The statement goes
+    straight to the driver: compiling a few thousand bind parameters per chunk
+    would otherwise cost more than the query. It is therefore written with
+    the driver's own markers (``?``, ``%s`` or asyncpg's ``$1``).
+    """
+    params = tuple(value for key in keys for value in key)
+    return [row[0] for row in connection.exec_driver_sql(_posting_key_sql(connection.dialect, len(keys)), params)]
+
+
+def _fetch_existing(connection, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Load existing rows that collide with the chunk on id, url or posting key"""
+    table = Job.__table__
+    columns = [table.c.id, table.c.scraped_at] + [table.c[field] for field in COMPARED_FIELDS + VALIDATOR_FIELDS]
+    ids = {row["id"] for row in chunk}
+    ids.update(_ids_by_posting_key(connection, list({_posting_key(row) for row in chunk})))
+    query = union(
+        select(*columns).where(table.c.id.in_(ids)),
+        select(*columns).where(table.c.url.in_({row["url"] for row in chunk})),
+    )
+    result = connection.execute(query)
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def _upsert_sql(dialect, columns: Tuple[str, ...]) -> str:
+    """Driver-level INSERT ... ON CONFLICT (id) DO UPDATE of ``columns`` (both dialects share the syntax)"""
+    markers = ", ".join(_positional_markers(dialect, len(columns)))
+    updates = ", ".join(f"{field} = excluded.{field}" for field in UPDATED_FIELDS)
+    return (
+        f"INSERT INTO {Job.__tablename__} ({', '.join(columns)}) VALUES ({markers}) "
+        f"ON CONFLICT (id) DO UPDATE SET {updates}"
+    )
+
+
+def _memoized(process: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Cache a bind processor's results (a chunk's timestamps are mostly one ``now``)"""
+    cache: Dict[Any, Any] = {}
+
+    def memoized(value):
+        try:
+            return cache[value]
+        except KeyError:
+            result = cache[value] = process(value)
+            return result
+    return memoized
+
+
+def _driver_params(dialect, columns: Tuple[str, ...], records: Iterable[Dict[str, Any]]) -> List[tuple]:
+    """Positional parameters of ``records`` converted by each column type's bind processor"""
+    table = Job.__table__
+    processors = []
+    for column in columns:
+        column_type = table.c[column].type
+        process = column_type.dialect_impl(dialect).bind_processor(dialect)
+        if process is not None and isinstance(column_type, DateTime):
+            process = _memoized(process)
+        processors.append(process)
+    params = []
+    for record in records:
+        params.append(tuple(
+            value if process is None else process(value)
+            for process, value in zip(processors, map(record.get, columns))
+        ))
+    return params
+
+
+def _suspend_batched_triggers(connection: Connection) -> Dict[str, str]:
+    """Drop the BATCHED_TRIGGERS present on a SQLite jobs table; returns their DDL by name
+
+    DDL is transactional in SQLite: other connections never see the triggers
+    missing, and a failed chunk's rollback restores them.
+    """
+    if connection.dialect.name != "sqlite":
+        return {}
+    markers = ", ".join(_positional_markers(connection.dialect, len(BATCHED_TRIGGERS)))
+    suspended = dict(connection.exec_driver_sql(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({markers})",
+        BATCHED_TRIGGERS,
+    ).all())
+    for name in suspended:
+        connection.exec_driver_sql(f"DROP TRIGGER {name}")
+    return suspended
+
+
+def _sync_search_index(connection: Connection, ids: List[str], delete: bool = False) -> None:
+    """Add jobs' stored text to the FTS5 index (search.py), or remove it with ``delete``"""
+    markers = ", ".join(_positional_markers(connection.dialect, len(ids)))
+    command, value = ("jobs_fts, ", "'delete', ") if delete else ("", "")
+    connection.exec_driver_sql(
+        f"INSERT INTO jobs_fts ({command}rowid, title, company, location, description) "
+        f"SELECT {value}rowid, title, company, location, description FROM jobs WHERE id IN ({markers})",
+        tuple(ids),
+    )
+
+
+def bulk_upsert_jobs(
+    engine: Engine,
+    rows: Iterable[JobRow],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    index_duplicates: bool = False,
+) -> Dict[str, int]:
+    """Insert or update many jobs with one upsert statement per chunk
+
+    Each incoming row is matched against existing jobs by id (from
+    ``Job.generate_id``), then by URL, then by company/title/location, so a
+    re-scraped posting updates the row it already has instead of tripping a
+    unique constraint. Rows whose compared columns are identical to what is
+    stored are not written at all.
+
+    Near-duplicate indexing (dedup.py) is deferred by default: written rows
+    are left for ``dedup.index_missing`` (the ``dedup`` command). With
+    ``index_duplicates`` they are indexed and clustered in the same
+    transaction instead, which makes the upsert several times slower
+    (MinHash signatures dominate; see benchmarks/bench_bulk_upsert.py).
+
+    Args:
+        engine: Engine bound to the jobs database
+        rows: Mappings (or unsaved Job instances) with at least url, company,
+            title, location and source
+        chunk_size: Number of rows resolved and written per transaction
+        index_duplicates: Index written rows for near-duplicate detection inline
+
+    Returns:
+        Dictionary with inserted, updated, unchanged and skipped counts.
+        Skipped rows match two different existing jobs and cannot be merged.
+
+    Raises:
+        ValueError: If a row is missing a required field or chunk_size < 1
+        NotImplementedError: If the dialect has no ON CONFLICT support
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    _insert_factory(engine)  # Fail fast on unsupported dialects
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+    for raw_chunk in chunked(rows, chunk_size):
+        chunk = [normalize_job_row(row) for row in raw_chunk]
+        with engine.begin() as connection:
+            upsert_chunk(connection, chunk, counts, index_duplicates)
+    return counts
+
+
+def upsert_chunk(
+    connection: Connection,
+    chunk: List[Dict[str, Any]],
+    counts: Dict[str, int],
+    index_duplicates: bool = False,
+) -> None:
+    """Resolve and write one chunk of normalized rows inside the caller's transaction
+
+    Shared by bulk_upsert_jobs and the async manager (through ``run_sync``).
+    ``counts`` is updated in place. The upsert goes straight to the driver
+    (like ``_ids_by_posting_key``), and on SQLite the counter and FTS5 rows
+    of the chunk are written with one statement each instead of per-row
+    triggers (see BATCHED_TRIGGERS).
+    """
+    _insert_factory(connection)  # Fail fast on unsupported dialects
+    now = datetime.utcnow()
+
+    known: Dict[str, Dict[str, Any]] = {}
+    by_url: Dict[str, str] = {}
+    by_key: Dict[Tuple[str, str, str], str] = {}
+    for existing in _fetch_existing(connection, chunk):
+        known[existing["id"]] = existing
+        by_url[existing["url"]] = existing["id"]
+        by_key[_posting_key(existing)] = existing["id"]
+    stored_ids = set(known)
+
+    pending: Dict[str, Dict[str, Any]] = {}
+    rewritten: List[str] = []
+    for row in chunk:
+        matches = {
+            match for match in (
+                row["id"] if row["id"] in known else None,
+                by_url.get(row["url"]),
+                by_key.get(_posting_key(row)),
+            ) if match is not None
+        }
+        if len(matches) > 1:
+            counts["skipped"] += 1
+            continue
+
+        if not matches:
+            record = {field: None for field in JOB_FIELDS}
+            record.update(row)
+            record["scraped_at"] = record["scraped_at"] or now
+            record["checked_at"] = record["scraped_at"]
+            record["updated_at"] = now
+            counts["inserted"] += 1
+        else:
+            target = matches.pop()
+            current = known[target]
+            if all(current[field] == row[field] for field in COMPARED_FIELDS if field in row):
+                counts["unchanged"] += 1
+                continue
+            if by_url.get(current["url"]) == target:
+                del by_url[current["url"]]
+            if by_key.get(_posting_key(current)) == target:
+                del by_key[_posting_key(current)]
+            record = {**current, **row, "id": target, "checked_at": now, "updated_at": now}
+            rewritten.append(target)
+            counts["updated"] += 1
+
+        record["content_hash"] = content_hash(record)
+        known[record["id"]] = record
+        by_url[record["url"]] = record["id"]
+        by_key[_posting_key(record)] = record["id"]
+        pending[record["id"]] = record
+
+    if pending:
+        suspended = _suspend_batched_triggers(connection) if len(pending) >= TRIGGER_BATCH_MIN_ROWS else {}
+        stored = [job_id for job_id in pending if job_id in stored_ids]
+        if stored and "jobs_fts_update" in suspended:
+            _sync_search_index(connection, stored, delete=True)  # Needs the text still stored
+        columns = ("id",) + JOB_FIELDS + ("content_hash", "checked_at", "updated_at")
+        connection.exec_driver_sql(
+            _upsert_sql(connection.dialect, columns),
+            _driver_params(connection.dialect, columns, pending.values()),
+        )
+        inserted = len(pending) - len(stored)
+        if "jobs_fts_insert" in suspended:
+            indexed = pending.keys() if "jobs_fts_update" in suspended else pending.keys() - stored_ids
+            if indexed:
+                _sync_search_index(connection, list(indexed))
+        if inserted and "jobs_counter_insert" in suspended:
+            connection.exec_driver_sql(
+                "INSERT INTO stat_counters (name, value) VALUES ('jobs', {0}) "
+                "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value".format(
+                    _positional_markers(connection.dialect, 1)[0]),
+                (inserted,),
+            )
+        for ddl in suspended.values():
+            connection.exec_driver_sql(ddl)
+        if index_duplicates:
+            index_jobs(connection, pending.values())
+        elif rewritten:
+            unindex_jobs(connection, rewritten)  # New rows are not indexed yet either
@@ -0,0 +1,187 @@
+"""Lease-based work queue over Application.status
+
+Workers move applications through the pipeline (queued → customizing →
+ready → applying → completed/failed/paused) with ``claim_next``, which
+atomically picks the highest-priority candidate and leases it to one worker:
+
+- SQLite: a single ``UPDATE ... WHERE id = (SELECT ... LIMIT 1) RETURNING``;
+  the statement runs under SQLite's write lock, so two workers can never
+  claim the same row.
+- PostgreSQL: the same statement with ``FOR UPDATE SKIP LOCKED`` in the
+  subquery, so concurrent workers skip rows another worker is claiming
+  instead of blocking on them.
+
+A worker that dies keeps its lease only until ``lease_expires_at``; after
+that the application is claimable again. Long tasks call ``renew_lease``,
+and ``release`` moves the application on and clears the lease.
+"""
+
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import Connection, and_, event, inspect, or_, select, update
+from sqlalchemy.orm import Session
+from .models import Application, Base, Job
+
+DEFAULT_LEASE_SECONDS = 600
+
+# Columns added after the applications table was first released
+LEASE_COLUMNS = {
+    "priority": "INTEGER NOT NULL DEFAULT 0",
+    "lease_owner": "VARCHAR(255)",
+    "lease_expires_at": "TIMESTAMP",
+}
+
+
+def claim_next(
+    session_factory: Callable[[], Session],
+    status_from: str,
+    status_to: str,
+    worker_id: str,
+    lease_seconds: int = DEFAULT_LEASE_SECONDS,
+) -> Optional[Application]:
+    """Atomically lease the next application waiting in ``status_from``
+
+    Candidates are applications in ``status_from`` plus applications left in
+    ``status_to`` by a worker whose lease expired. They are ordered by
+    priority (highest first), then posting freshness (newest scraped job
+    first), then age.
+
+    Args:
+        session_factory: Callable returning a new Session
+        status_from: Status to take work from (e.g. "queued")
+        status_to: Status the claimed application moves to (e.g. "customizing")
+        worker_id: Identifier of the claiming worker (e.g. "host:pid:thread")
+        lease_seconds: How long the claim stays valid without renew_lease
+
+    Returns:
+        The claimed Application (detached), or None if there is no work
+    """
+    statement = claim_statement(status_from, status_to, worker_id, lease_seconds)
+    session = session_factory()
+    try:
+        application = session.scalars(statement).first()
+        if application is not None:
+            session.expunge(application)  # Keep loaded attributes usable after commit
+        session.commit()
+        return application
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def claim_statement(status_from: str, status_to: str, worker_id: str, lease_seconds: int):
+    """``UPDATE ... RETURNING`` that leases the best candidate (see claim_next)"""
+    now = datetime.utcnow()
+    candidate = (
+        select(Application.id)
+        .join(Job, Job.id == Application.job_id)
+        .where(or_(
+            and_(Application.status == status_from,
+                 or_(Application.lease_expires_at.is_(None), Application.lease_expires_at < now)),
+            and_(Application.status == status_to, Application.lease_expires_at < now),
+        ))
+        .order_by(Application.priority.desc(), Job.scraped_at.desc(), Application.id)
+        .limit(1)
+        .with_for_update(skip_locked=True, of=Application)  # Not rendered on SQLite
+        .scalar_subquery()
+    )
+    return (
+        update(Application)
+        .where(Application.id == candidate)
+        .values(
+            status=status_to,
+            lease_owner=worker_id,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            updated_at=now,
+        )
+        .returning(Application)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def renew_lease(
+    session_factory: Callable[[], Session],
+    application_id: int,
+    worker_id: str,
+    lease_seconds: int = DEFAULT_LEASE_SECONDS,
+) -> bool:
+    """Extend a lease held by ``worker_id``
+
+    Returns:
+        False if the lease was lost (expired and claimed by another worker)
+    """
+    return _update_leased(session_factory, application_id, worker_id, renew_values(lease_seconds))
+
+
+def release(
+    session_factory: Callable[[], Session],
+    application_id: int,
+    worker_id: str,
+    status: str,
+    error_message: Optional[str] = None,
+    **fields,
+) -> bool:
+    """Move a leased application to ``status`` and clear its lease
+
+    Args:
+        session_factory: Callable returning a new Session
+        application_id: Application claimed with claim_next
+        worker_id: Worker that holds the lease
+        status: Next status (e.g. "ready", "completed", "failed")
+        error_message: Optional failure reason
+        **fields: Other Application columns to set (e.g. tailored_resume_path)
+
+    Returns:
+        False if the lease was lost, in which case nothing is changed
+    """
+    values = release_values(status, error_message, **fields)
+    return _update_leased(session_factory, application_id, worker_id, values)
+
+
+def renew_values(lease_seconds: int) -> dict:
+    return {"lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)}
+
+
+def release_values(status: str, error_message: Optional[str] = None, **fields) -> dict:
+    values = {**fields, "status": status, "lease_owner": None, "lease_expires_at": None}
+    if error_message is not None:
+        values["error_message"] = error_message
+    return values
+
+
+def leased_update_statement(application_id: int, worker_id: str, values: dict):
+    """UPDATE of an application that only applies while ``worker_id`` holds its lease"""
+    return (
+        update(Application)
+        .where(Application.id == application_id, Application.lease_owner == worker_id)
+        .values(updated_at=datetime.utcnow(), **values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _update_leased(session_factory: Callable[[], Session], application_id: int, worker_id: str, values: dict) -> bool:
+    statement = leased_update_statement(application_id, worker_id, values)
+    with session_factory() as session:
+        updated = session.execute(statement).rowcount
+        session.commit()
+    return updated == 1
+
+
+def install_lease_columns(connection: Connection) -> None:
+    """Add the priority/lease columns and index to an applications table created before them"""
+    existing = {column["name"] for column in inspect(connection).get_columns("applications")}
+    for name, ddl in LEASE_COLUMNS.items():
+        if name not in existing:
+            connection.exec_driver_sql(f"ALTER TABLE applications ADD COLUMN {name} {ddl}")
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS idx_application_status_lease ON applications (status, lease_expires_at)"
+    )
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target, connection: Connection, **kw) -> None:
+    """Upgrade existing databases whenever tables are created"""
+    install_lease_columns(connection)
@@ -0,0 +1,167 @@
+"""Single-writer queue that batches commits from many producer threads"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import Connection, Engine
+
+WriteFn = Callable[[Connection], Any]
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Funnel database writes through one dedicated thread
+
+    SQLite allows a single writer at a time. Instead of letting every worker
+    open its own write transaction and race for the lock, producers submit
+    callables that receive a Connection; the writer thread drains the queue
+    and runs up to ``max_batch`` of them inside one transaction, each under
+    its own savepoint so one failing write does not roll back the others.
+    """
+
+    def __init__(self, engine: Engine, max_batch: int = 500, max_latency: float = 0.0):
+        """Initialize write queue
+
+        Args:
+            engine: Engine to write through
+            max_batch: Maximum writes committed in one transaction
+            max_latency: Extra seconds to wait for more writes after the first one;
+                0 commits whatever queued up while the previous batch was running
+        """
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches_committed = 0
+        self.writes_committed = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the writer thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "WriteQueue":
+        """Start the writer thread (no-op if already running)"""
+        with self._lock:
+            if not self.running:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+        return self
+
+    def submit(self, fn: WriteFn) -> Future:
+        """Queue a write; the returned Future resolves after its batch commits
+
+        Args:
+            fn: Callable receiving a Connection inside the batch transaction
+
+        Returns:
+            Future with the callable's return value (or its exception)
+        """
+        if not self.running:
+            self.start()
+        future: Future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    def execute(self, fn: WriteFn, timeout: Optional[float] = None) -> Any:
+        """Queue a write and block until it is committed"""
+        return self.submit(fn).result(timeout=timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until everything submitted so far is committed"""
+        self.execute(lambda connection: None, timeout=timeout)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Commit pending writes and stop the writer thread"""
+        with self._lock:
+            if not self.running:
+                return
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _collect(self, first: Tuple[WriteFn, Future]) -> Tuple[List[Tuple[WriteFn, Future]], bool]:
+        """Gather a batch starting with ``first``; returns (batch, stop_requested)"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _execute_batch(self, batch: List[Tuple[WriteFn, Future]], isolate: bool) -> List[Tuple[Future, Any, Optional[Exception]]]:
+        """Run a batch in one transaction, optionally with a savepoint per write"""
+        results = []
+        with self.engine.begin() as connection:
+            if connection.dialect.name == "sqlite":
+                # pysqlite only opens a transaction implicitly before DML, so
+                # the first RELEASE SAVEPOINT would commit on its own. Take
+                # the write lock up front and keep the batch in one transaction.
+                connection.exec_driver_sql("BEGIN IMMEDIATE")
+            for fn, future in batch:
+                if not isolate:
+                    results.append((future, fn(connection), None))
+                    continue
+                try:
+                    with connection.begin_nested():
+                        results.append((future, fn(connection), None))
+                except Exception as e:
+                    results.append((future, None, e))
+        return results
+
+    def _commit(self, batch: List[Tuple[WriteFn, Future]]) -> None:
+        """Commit one batch and resolve its futures
+
+        The batch first runs without savepoints (the common case costs one
+        statement per write). If any write fails, the transaction is rolled
+        back and replayed with a savepoint per write so only the failing
+        writes are rejected; write callables must therefore be safe to re-run.
+        """
+        batch = [(fn, future) for fn, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            try:
+                results = self._execute_batch(batch, isolate=False)
+            except Exception as e:
+                if len(batch) == 1:
+                    results = [(batch[0][1], None, e)]
+                else:
+                    results = self._execute_batch(batch, isolate=True)
+        except Exception as e:
+            logger.error(f"✗ Write batch of {len(batch)} failed to commit: {str(e)}")
+            for fn, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches_committed += 1
+        self.writes_committed += sum(1 for _, _, error in results if error is None)
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch, stop = self._collect(item)
+            self._commit(batch)
+            if stop:
+                return
@@ -2,26 +2,30 @@
 
 import os
 import sys
+import time
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 import click
-from database.engine import db_manager
-from utils.logging_config import logger
-from utils.credentials import CredentialManager
+from utils.logging_config import logger, setup_logging
+
+# The database layer, credentials and scraper are imported inside the commands
+# that use them, so --help and the SQLite status fast path start quickly
 
 
 @click.group()
 def cli():
     """Headless Job Applier - Automated job scraping and application"""
-    pass
+    setup_logging()
 
 
 @cli.command()
 def setup():
     """Initialize application (first-time setup)"""
+    from database.engine import db_manager
+    from utils.credentials import CredentialManager
     logger.info("🚀 Initializing Headless Job Applier...")
     
     # Step 1: Create database
@@ -56,16 +60,28 @@ def setup():
 
 
 @cli.command()
-def status():
+@click.option("--recount", is_flag=True, help="Rebuild statistics counters with full table counts")
+def status(recount):
     """Show application status and statistics"""
     logger.info("📊 Headless Job Applier Status")
     logger.info("=" * 50)
-    
-    if not db_manager.health_check():
-        logger.error("✗ Database not accessible")
-        sys.exit(1)
-    
-    stats = db_manager.get_stats()
+
+    # SQLite counters are read with sqlite3 directly; SQLAlchemy is only
+    # imported when that is not possible or a recount is requested
+    from database.fast_stats import read_sqlite_stats
+    stats = None if recount else read_sqlite_stats()
+    if stats is None:
+        from database.engine import db_manager
+        if not db_manager.health_check():
+            logger.error("✗ Database not accessible")
+            sys.exit(1)
+
+        if recount:
+            logger.info("Recounting statistics...")
+            db_manager.recount_stats()
+
+        stats = db_manager.get_stats()
+
     logger.info(f"Total Jobs Scraped: {stats['total_jobs']}")
     logger.info(f"Total Applications: {stats['total_applications']}")
     logger.info(f"  ├─ Completed: {stats['completed_applications']}")
@@ -74,6 +90,59 @@ def status():
     logger.info(f"Total Logs: {stats['total_logs']}")
 
 
+@cli.command()
+@click.argument("query")
+@click.option("--limit", default=20, show_default=True, help="Maximum number of results")
+@click.option("--source", default=None, help="Only search one portal (linkedin, indeed, jobstreet)")
+def search(query, limit, source):
+    """Full-text search over scraped jobs"""
+    from database.engine import db_manager
+    start = time.perf_counter()
+    results = db_manager.search_jobs(query, limit=limit, source=source)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    logger.info(f"🔎 {len(results)} results for '{query}' ({elapsed_ms:.1f} ms)")
+    for i, job in enumerate(results, 1):
+        logger.info(f"{i:>3}. {job['title']} @ {job['company']} ({job['location']}) [{job['source']}]")
+        logger.info(f"     {job['url']}")
+        if job["snippet"]:
+            logger.info(f"     {job['snippet']}")
+
+
+@cli.command()
+@click.option("--batch-size", default=500, show_default=True, help="Jobs indexed per transaction")
+def dedup(batch_size):
+    """Index jobs for near-duplicate detection and assign cluster IDs"""
+    from database.engine import db_manager
+    logger.info("🧬 Indexing jobs for near-duplicate detection...")
+    indexed = db_manager.index_near_duplicates(batch_size=batch_size)
+    total = db_manager.get_stats()["total_jobs"]
+    representatives = db_manager.count_clusters()
+    logger.info(f"✓ Indexed {indexed} new jobs")
+    logger.info(f"  {total} jobs in {representatives} clusters ({total - representatives} near-duplicates)")
+
+
+@cli.command()
+@click.option("--rebuild", is_flag=True, help="Rebuild the filter from jobs.url")
+def seen_urls(rebuild):
+    """Show the seen-URL Bloom filter size and false-positive rate"""
+    from scraper.seen_urls import SeenURLFilter
+    with SeenURLFilter() as seen:
+        if rebuild:
+            from database.engine import db_manager
+            logger.info("Rebuilding seen-URL filter from the database...")
+            stats = seen.rebuild_from_database(db_manager.engine)
+        else:
+            stats = seen.stats()
+    logger.info(f"🔗 Seen-URL filter: {stats['path']} ({stats['size_bytes'] / 1024:.1f} KB)")
+    logger.info(f"  URLs: {stats['count']} / capacity {stats['capacity']}")
+    logger.info(f"  Bits: {stats['num_bits']}, hashes: {stats['num_hashes']}, fill: {stats['fill_ratio']:.1%}")
+    logger.info(f"  False-positive rate: {stats['false_positive_rate']:.4%} "
+                f"(target {stats['target_false_positive_rate']:.4%})")
+    if stats["false_positive_rate"] > stats["target_false_positive_rate"]:
+        logger.warning("Filter is over capacity; run: python src/main.py seen-urls --rebuild")
+
+
 @cli.command()
 def scrape():
     """Run job scraper (not implemented in Phase 1)"""
@@ -84,11 +153,224 @@ def scrape():
 
 
 @cli.command()
-def customize():
-    """Customize resumes (not implemented in Phase 1)"""
-    logger.info("📝 Resume Customizer")
-    logger.info("(Phase 2 implementation - to be completed in Week 4)")
-    logger.warning("Customizer implementation coming soon...")
+@click.option("--days", type=int, default=None,
+              help="Re-check jobs last checked longer ago than this (default: application.rescrape_threshold_days)")
+@click.option("--limit", type=int, default=None, help="Stop after this many jobs")
+@click.option("--batch-size", default=100, show_default=True, help="Jobs fetched and written per batch")
+def rescrape(days, limit, batch_size):
+    """Re-check stale jobs with conditional requests, rewriting only changed postings"""
+    import asyncio
+    from database.async_engine import AsyncDatabaseManager
+    from database.rescrape import load_rescrape_days
+    from scraper.http_engine import HTTPEngine
+    from scraper.rescrape import Rescraper
+    from scraper.sites import SITE_ADAPTERS
+
+    if not SITE_ADAPTERS:
+        logger.warning("No HTTP site adapters are registered in src/scraper/sites; nothing to re-scrape")
+        return
+    days = days if days is not None else load_rescrape_days()
+    logger.info(f"🔄 Re-scraping jobs not checked in {days} days ({', '.join(sorted(SITE_ADAPTERS))})...")
+
+    async def run():
+        db = AsyncDatabaseManager()
+        try:
+            async with HTTPEngine() as engine:
+                return await Rescraper(db, engine, SITE_ADAPTERS, batch_size=batch_size).run(days, limit)
+        finally:
+            await db.close()
+
+    counts = asyncio.run(run())
+    logger.info(f"✓ Checked {counts['checked']} jobs in {counts['elapsed_seconds']:.1f} s: "
+                f"{counts['changed']} changed, {counts['unchanged']} unchanged, "
+                f"{counts['not_modified']} not modified (304)")
+    if counts["gone"] or counts["failed"] or counts["skipped"]:
+        logger.info(f"  Gone: {counts['gone']}, failed: {counts['failed']}, skipped: {counts['skipped']}")
+
+
+@cli.command()
+@click.option("--job-id", required=True, help="ID of the scraped job to tailor a resume for")
+@click.option("--template", "template_name", default=None, help="Resume template (default: best recommendation)")
+@click.option("--no-cache", is_flag=True, help="Call the LLM even if a cached response exists")
+@click.option("--dry-run", is_flag=True, help="Select the template without calling the LLM")
+@click.option("--no-compact", is_flag=True, help="Send the full job description instead of the compacted one")
+def customize(job_id, template_name, no_cache, dry_run, no_compact):
+    """Tailor a resume template to a scraped job with the LLM"""
+    from customizer.jd_compactor import compact_description, compaction_row, stored_compaction
+    from customizer.llm_cache import LLMResponseCache
+    from customizer.llm_client import LLMClient
+    from customizer.resume_customizer import ResumeCustomizer
+    from database.engine import db_manager
+    from database.models import Job
+
+    with db_manager.get_session() as session:
+        job = session.get(Job, job_id)
+        if job is None:
+            logger.error(f"✗ Job not found: {job_id}")
+            sys.exit(1)
+        title, company, description = job.title, job.company, job.description or ""
+
+    compacted = None
+    if not no_compact:
+        compacted = stored_compaction(db_manager.get_compactions([job_id]).get(job_id), description)
+        if compacted is None:
+            compacted = compact_description(description)
+            db_manager.save_compactions([compaction_row(job_id, description, compacted)])
+
+    logger.info(f"📝 Customizing resume for {title} @ {company}")
+    with LLMResponseCache() as cache:
+        customizer = ResumeCustomizer(llm=LLMClient(cache=cache))
+        template_name = customizer.select_template_for_job(title, description, template_name)
+        result = customizer.customize_resume(
+            template_name, title, description, company, dry_run=dry_run, use_cache=not no_cache,
+            compact=not no_compact, compacted=compacted,
+        )
+    logger.info(f"  Template: {template_name}")
+    if compacted is not None:
+        logger.info(f"  Description: {compacted.tokens_before} → {compacted.tokens_after} tokens "
+                    f"({compacted.reduction:.0%} smaller)")
+    if result["status"] == "customized":
+        source = "cache" if result["llm_cached"] else result["llm_model"]
+        logger.info(f"✓ Written to {result['output_path']} (from {source})")
+
+
+@cli.command()
+@click.option("--concurrency", type=int, default=None, help="Concurrent LLM requests (default: llm.max_concurrency)")
+@click.option("--limit", type=int, default=None, help="Stop after this many applications")
+@click.option("--no-cache", is_flag=True, help="Call the LLM even if a cached response exists")
+@click.option("--no-compact", is_flag=True, help="Send full job descriptions instead of compacted ones")
+def customize_queue(concurrency, limit, no_cache, no_compact):
+    """Tailor resumes for all queued applications concurrently"""
+    import asyncio
+    from customizer.customization_runner import CustomizationRunner, load_llm_limits
+    from customizer.llm_cache import LLMResponseCache
+    from customizer.llm_client import LLMClient
+    from customizer.resume_customizer import ResumeCustomizer
+    from database.async_engine import AsyncDatabaseManager
+
+    limits = load_llm_limits()
+    logger.info(f"📝 Customizing queued applications ({concurrency or limits.max_concurrency} concurrent, "
+                f"{limits.requests_per_minute:.0f} req/min, {limits.tokens_per_minute:.0f} tokens/min)")
+
+    async def run(cache):
+        db = AsyncDatabaseManager()
+        try:
+            runner = CustomizationRunner(db, LLMClient(cache=cache, max_retries=0), ResumeCustomizer(),
+                                         limits, concurrency=concurrency, use_cache=not no_cache,
+                                         compact=not no_compact)
+            return await runner.run(limit)
+        finally:
+            await db.close()
+
+    with LLMResponseCache() as cache:
+        summary = asyncio.run(run(cache))
+    logger.info(f"✓ {summary['ready']} ready, {summary['failed']} failed, {summary['cached']} from cache "
+                f"in {summary['elapsed_seconds']:.1f} s")
+    logger.info(f"  Requests: {summary['requests']} ({summary['retried']} applications retried), "
+                f"latency p50 {summary['latency_p50_ms']:.0f} ms, p95 {summary['latency_p95_ms']:.0f} ms")
+    logger.info(f"  Tokens: {summary['prompt_tokens']} prompt + {summary['completion_tokens']} completion "
+                f"({summary['tokens_per_minute']:.0f}/min), rate-limit wait {summary['wait_ms'] / 1000:.1f} s")
+    if summary["description_tokens"]:
+        saved = 1 - summary["compacted_tokens"] / summary["description_tokens"]
+        logger.info(f"  Job descriptions: {summary['description_tokens']} → {summary['compacted_tokens']} tokens "
+                    f"({saved:.0%} smaller)")
+
+
+@cli.command()
+@click.option("--batch-size", default=500, show_default=True, help="Jobs compacted per batch")
+@click.option("--recompute", is_flag=True, help="Recompact jobs that already have an up-to-date compaction")
+def compact_jds(batch_size, recompute):
+    """Compact job descriptions for LLM prompts and report the token savings"""
+    from customizer.jd_compactor import compact_description, compaction_row, stored_compaction
+    from database.engine import db_manager
+    logger.info("✂️  Compacting job descriptions...")
+
+    def batches():
+        batch = []
+        for job in db_manager.iter_jobs(batch_size=batch_size, with_description=True):
+            if job.description:
+                batch.append(job)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    written = 0
+    for batch in batches():
+        stored = {} if recompute else db_manager.get_compactions(job.id for job in batch)
+        rows = [
+            compaction_row(job.id, job.description, compact_description(job.description))
+            for job in batch if stored_compaction(stored.get(job.id), job.description) is None
+        ]
+        written += db_manager.save_compactions(rows)
+
+    stats = db_manager.compaction_stats()
+    saved = 1 - stats["tokens_after"] / stats["tokens_before"] if stats["tokens_before"] else 0.0
+    logger.info(f"✓ Compacted {written} job descriptions ({stats['jobs']} stored)")
+    logger.info(f"  Tokens: {stats['tokens_before']} → {stats['tokens_after']} ({saved:.0%} smaller)")
+
+
+@cli.command()
+@click.option("--style", type=click.Choice(["simple", "professional", "minimal"]), default=None,
+              help="Stylesheet (default: customization.pdf_style)")
+@click.option("--workers", type=int, default=None, help="Renderer processes (default: PDF_WORKERS or one per CPU)")
+@click.option("--batch-size", default=50, show_default=True, help="Documents submitted to the workers per batch")
+def render_pdfs(style, workers, batch_size):
+    """Render tailored markdown resumes of ready applications to PDF"""
+    from customizer.pdf_renderer import PDFRenderer
+    from database.engine import db_manager
+
+    def batches():
+        batch = []
+        for application in db_manager.iter_applications(status="ready"):
+            path = Path(application.tailored_resume_path or "")
+            if path.suffix == ".md" and path.is_file():
+                batch.append((application.id, path))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    totals = {"documents": 0, "rendered": 0, "cached": 0, "failed": 0, "pages": 0, "elapsed_seconds": 0.0}
+    with PDFRenderer(style=style, workers=workers) as renderer:
+        logger.info(f"📄 Rendering resumes to PDF ({renderer.workers} workers, {renderer.style} style)...")
+        try:
+            for batch in batches():
+                documents = [(path.read_text(encoding="utf-8"), path.with_suffix(".pdf")) for _, path in batch]
+                summary = renderer.render_batch(documents)
+                db_manager.set_resume_paths({
+                    application_id: str(path.with_suffix(".pdf")) for application_id, path in batch
+                    if str(path.with_suffix(".pdf")) not in summary["errors"]
+                })
+                for name in totals:
+                    totals[name] += summary[name]
+        except RuntimeError as e:
+            logger.error(f"✗ {str(e)}")
+            return
+    pages_per_second = totals["pages"] / max(totals["elapsed_seconds"], 1e-9)
+    logger.info(f"✓ {totals['documents']} resumes: {totals['rendered']} rendered, {totals['cached']} from cache, "
+                f"{totals['failed']} failed in {totals['elapsed_seconds']:.1f} s")
+    logger.info(f"  Pages: {totals['pages']} ({pages_per_second:.1f} pages/s)")
+
+
+@cli.command()
+@click.option("--clear", is_flag=True, help="Delete every cached response")
+def llm_cache(clear):
+    """Show LLM response cache size and hit rate"""
+    from customizer.llm_cache import LLMResponseCache
+    with LLMResponseCache() as cache:
+        if clear:
+            removed = cache.clear()
+            logger.info(f"✓ Removed {removed} cached responses")
+            return
+        stats = cache.stats()
+    logger.info(f"💾 LLM response cache: {cache.path}")
+    logger.info(f"  Entries: {stats['entries']} ({stats['bytes'] / 1024 / 1024:.2f} MB "
+                f"of {stats['max_bytes'] / 1024 / 1024:.0f} MB)")
+    logger.info(f"  Hits: {stats['hits']}, misses: {stats['misses']} (hit rate {stats['hit_rate']:.1%})")
+    logger.info(f"  Stored: {stats['stores']}, evicted: {stats['evictions']}")
 
 
 @cli.command()
@@ -102,6 +384,7 @@ def apply():
 @cli.command()
 def init_db_cmd():
     """Initialize database (create tables)"""
+    from database.engine import db_manager
     logger.info("Creating database tables...")
     db_manager.create_all_tables()
     logger.info("✓ Database initialized")
@@ -110,6 +393,7 @@ def init_db_cmd():
 @cli.command()
 def generate_key():
     """Generate encryption key for credentials"""
+    from utils.credentials import CredentialManager
     key = CredentialManager.generate_key()
     logger.info("Generated encryption key:")
     logger.info(key)
@@ -120,6 +404,7 @@ def generate_key():
 @cli.command()
 def test_db():
     """Test database connectivity"""
+    from database.engine import db_manager
     logger.info("🧪 Testing Database Connection...")
     if db_manager.health_check():
         logger.info("✓ Database connection successful")
@@ -130,10 +415,73 @@ def test_db():
         sys.exit(1)
 
 
+@cli.command()
+@click.option("--batch-size", default=500, show_default=True, help="Rows rewritten per transaction")
+def compress_db(batch_size):
+    """Recompress stored job HTML and report the size reduction"""
+    from database.engine import db_manager
+    logger.info("🗜️  Recompressing job HTML content...")
+    result = db_manager.recompress_jobs(batch_size=batch_size)
+    before_mb = result["size_before"] / 1024 / 1024
+    after_mb = result["size_after"] / 1024 / 1024
+    saved = 100 * (1 - result["size_after"] / result["size_before"]) if result["size_before"] else 0.0
+    logger.info(f"✓ Rewrote {result['rows_rewritten']} of {result['rows_scanned']} jobs")
+    logger.info(f"  Database size: {before_mb:.2f} MB → {after_mb:.2f} MB ({saved:.1f}% smaller)")
+
+
+@cli.command()
+@click.option("--days", type=int, default=None, help="Archive rows older than this (default: application.archive_threshold_days)")
+@click.option("--format", "fmt", type=click.Choice(["parquet", "jsonl"]), default=None,
+              help="Partition file format (default: parquet if pyarrow is installed)")
+@click.option("--batch-size", default=1000, show_default=True, help="Rows moved per batch")
+def archive(days, fmt, batch_size):
+    """Move old jobs and application logs into compressed monthly archive files"""
+    from database.engine import db_manager
+    logger.info("📦 Archiving old jobs and application logs...")
+    result = db_manager.archive_old_rows(threshold_days=days, fmt=fmt, batch_size=batch_size)
+    before_mb = result["size_before"] / 1024 / 1024
+    after_mb = result["size_after"] / 1024 / 1024
+    logger.info(f"✓ Archived {result['jobs_archived']} jobs and {result['logs_archived']} log entries")
+    for path in result["files"]:
+        logger.info(f"  → {path}")
+    logger.info(f"  Database size: {before_mb:.2f} MB → {after_mb:.2f} MB")
+
+
+@cli.command()
+@click.option("--top", "top_n", default=10, show_default=True, help="Number of query shapes to show")
+@click.option("--sort", "sort_key", type=click.Choice(["total", "count", "max"]), default="total",
+              show_default=True, help="Rank by total time, call count or slowest call")
+@click.option("--reset", is_flag=True, help="Clear the recorded statistics")
+def query_stats(top_n, sort_key, reset):
+    """Show the most expensive SQL query shapes recorded by previous runs"""
+    from database.profiling import QUERY_STATS_PATH, load_stats
+    if reset:
+        Path(QUERY_STATS_PATH).unlink(missing_ok=True)
+        logger.info("✓ Query statistics cleared")
+        return
+
+    stats = load_stats()
+    key = {"total": "total_ms", "count": "count", "max": "max_ms"}[sort_key]
+    shapes = stats.top(top_n, key=key)
+    if not shapes:
+        logger.info("No query statistics recorded yet (set SQL_PROFILE=true and run some commands)")
+        return
+
+    logger.info(f"⏱️  Top {len(shapes)} query shapes by {sort_key}")
+    logger.info(f"{'#':>3} {'total ms':>10} {'calls':>8} {'avg ms':>8} {'p95 ms':>8} {'max ms':>8}  query")
+    for i, (shape, shape_stats) in enumerate(shapes, 1):
+        avg_ms = shape_stats.total_ms / shape_stats.count
+        logger.info(
+            f"{i:>3} {shape_stats.total_ms:>10.1f} {shape_stats.count:>8} {avg_ms:>8.2f} "
+            f"{shape_stats.percentile(0.95):>8.1f} {shape_stats.max_ms:>8.1f}  {shape[:200]}"
+        )
+
+
 @cli.command()
 @click.option("--dry-run", is_flag=True, help="Show what would be done without making changes")
 def reset_db(dry_run):
     """Reset database (WARNING: Destructive)"""
+    from database.engine import db_manager
     if dry_run:
         logger.info("🧪 DRY RUN: Would reset database")
         logger.warning("Run without --dry-run to confirm")
@@ -155,6 +503,11 @@ def main():
     except Exception as e:
         logger.error(f"Error: {str(e)}")
         sys.exit(1)
+    finally:
+        # Accumulate statement timings across runs for the query-stats command
+        profiling = sys.modules.get("database.profiling")
+        if profiling is not None:
+            profiling.save_all_stats()
 
 
 if __name__ == "__main__":
@@ -1,3 +1,7 @@
 """Scraper module - Job portal scraping"""
 
-__all__ = []
+from .http_engine import FetchResult, HTTPEngine, HTTPLimits
+from .seen_urls import SeenURLFilter
+from .urls import canonicalize_url
+
+__all__ = ["FetchResult", "HTTPEngine", "HTTPLimits", "SeenURLFilter", "canonicalize_url"]
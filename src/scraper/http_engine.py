@@ -0,0 +1,306 @@
+"""Async HTTP fetch engine for portal pages that do not need a browser
+
+Many results and job detail pages are plain HTML, and fetching them with
+HTTP costs a fraction of a browser page load. ``HTTPEngine`` fetches them
+with ``httpx.AsyncClient``:
+
+- one client per origin (scheme + host), so each host gets its own
+  keep-alive pool of up to ``connections_per_host`` connections, negotiated
+  as HTTP/2 when the server supports it and ``h2`` is installed,
+- a per-host semaphore capping requests in flight, which also holds for
+  HTTP/2, where many requests share one connection,
+- redirects followed hop by hop through the target host's own client and
+  semaphore, so a redirect to another host counts against that host,
+- bodies streamed and cut off at ``max_response_mb``, decompressed size
+  (the first ``max_response_mb`` are kept),
+- results as ``FetchResult``s, so network errors and HTTP error statuses
+  are returned instead of raised.
+
+``crawl`` drives a ``SiteAdapter`` (see sites/base.py) through the results
+pages of a search. When ``prefetch`` is on, results page ``n + 1`` is
+requested as soon as page ``n`` arrives. It downloads while page ``n``'s
+detail pages are fetched, and is discarded if page ``n`` turns out to be
+the last.
+
+Limits are read from ``config.yaml`` ``http``.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from loguru import logger
+
+from .sites.base import SiteAdapter
+
+if TYPE_CHECKING:
+    from .seen_urls import SeenURLFilter
+
+try:
+    import h2  # noqa: F401 (httpx negotiates HTTP/2 only when h2 is installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+CONFIG_PATH = os.getenv("CONFIG_PATH", "config/config.yaml")
+MAX_REDIRECTS = 10
+USER_AGENT = os.getenv("SCRAPER_USER_AGENT") or (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+
+@dataclass
+class HTTPLimits:
+    """Connection pooling, concurrency and size limits of the HTTP engine"""
+    connections_per_host: int = 6  # Keep-alive pool size and requests in flight per host
+    keepalive_expiry: float = 30.0  # Seconds an idle connection is kept open
+    timeout_seconds: float = 20.0
+    max_response_mb: float = 5.0  # Larger bodies are cut off (FetchResult.truncated)
+    http2: bool = True
+    prefetch: bool = True  # Request the next results page while the current one is processed
+
+    @property
+    def max_response_bytes(self) -> int:
+        return int(self.max_response_mb * 1024 * 1024)
+
+
+def load_http_limits(config_path: str = CONFIG_PATH) -> HTTPLimits:
+    """Read the http limits from config.yaml (defaults for anything unset)"""
+    limits = HTTPLimits()
+    try:
+        from ruamel.yaml import YAML
+
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = (YAML(typ="safe").load(f) or {}).get("http") or {}
+    except (ImportError, OSError) as e:
+        logger.warning(f"Could not read HTTP limits from {config_path}, using defaults: {str(e)}")
+        return limits
+    for name in ("connections_per_host", "keepalive_expiry", "timeout_seconds", "max_response_mb", "http2", "prefetch"):
+        if config.get(name) is not None:
+            setattr(limits, name, type(getattr(limits, name))(config[name]))
+    return limits
+
+
+@dataclass
+class FetchResult:
+    """Outcome of one GET request"""
+    url: str  # Requested URL
+    final_url: str = ""  # After redirects
+    status_code: int = 0  # 0 if no response was received
+    headers: Dict[str, str] = field(default_factory=dict)
+    content: bytes = b""
+    http_version: str = ""
+    elapsed_ms: float = 0.0
+    truncated: bool = False  # Body exceeded max_response_mb (content holds the first max_response_mb)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status_code < 300
+
+    @property
+    def not_modified(self) -> bool:
+        """304 answer to a conditional request"""
+        return self.error is None and self.status_code == 304
+
+    @property
+    def text(self) -> str:
+        """Body decoded with the charset from Content-Type (default UTF-8)"""
+        charset = "utf-8"
+        for part in self.headers.get("content-type", "").split(";")[1:]:
+            name, _, value = part.strip().partition("=")
+            if name.lower() == "charset" and value:
+                charset = value.strip("\"'")
+        try:
+            return self.content.decode(charset, errors="replace")
+        except LookupError:
+            return self.content.decode("utf-8", errors="replace")
+
+
+def origin(url: str) -> str:
+    """scheme://host[:port] of a URL (the unit connections are pooled by)"""
+    parts = urlsplit(url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+class HTTPEngine:
+    """Pooled, per-host-limited async HTTP fetcher for portal pages"""
+
+    def __init__(self, limits: Optional[HTTPLimits] = None, headers: Optional[Dict[str, str]] = None):
+        """Initialize engine (clients are created per host on first request)
+
+        Args:
+            limits: Pool and size limits (default: load_http_limits())
+            headers: Headers sent with every request (User-Agent defaults to SCRAPER_USER_AGENT)
+        """
+        self.limits = limits or load_http_limits()
+        self.headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        self.http2 = self.limits.http2 and HTTP2_AVAILABLE
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self.stats: Dict[str, int] = {
+            "requests": 0, "errors": 0, "truncated": 0, "bytes": 0, "http2": 0,
+            "prefetched": 0, "prefetch_used": 0,
+        }
+
+    def _client(self, host: str) -> httpx.AsyncClient:
+        client = self._clients.get(host)
+        if client is None:
+            size = self.limits.connections_per_host
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(max_connections=size, max_keepalive_connections=size,
+                                    keepalive_expiry=self.limits.keepalive_expiry),
+                timeout=self.limits.timeout_seconds,
+                headers=self.headers,
+                follow_redirects=False,  # fetch follows them through the target host's client
+            )
+            self._clients[host] = client
+            self._slots[host] = asyncio.Semaphore(size)
+        return client
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """GET a URL, following redirects and streaming the body up to max_response_mb
+
+        Returns:
+            FetchResult (network errors are reported in ``error``, not raised)
+        """
+        result = FetchResult(url)
+        start = time.perf_counter()
+        target = url
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                host = origin(target)
+                client = self._client(host)
+                async with self._slots[host]:
+                    async with client.stream("GET", target, headers=headers) as response:
+                        if response.next_request is None:
+                            await self._read_body(response, result)
+                            break
+                        location = str(response.next_request.url)
+                if headers and origin(location) != host:  # Like httpx: credentials stay with their host
+                    headers = {name: value for name, value in headers.items() if name.lower() != "authorization"}
+                target = location
+            else:
+                result.final_url = target
+                result.error = f"TooManyRedirects: more than {MAX_REDIRECTS} redirects"
+        except httpx.HTTPError as e:
+            result.error = f"{type(e).__name__}: {str(e) or 'request failed'}"
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.stats["requests"] += 1
+        self.stats["bytes"] += len(result.content)
+        self.stats["errors"] += result.error is not None
+        self.stats["truncated"] += result.truncated
+        self.stats["http2"] += result.http_version == "HTTP/2"
+        if result.error:
+            logger.debug(f"✗ GET {url}: {result.error}")
+        return result
+
+    async def _read_body(self, response: httpx.Response, result: FetchResult) -> None:
+        """Fill ``result`` from a final (non-redirect) response, keeping at most max_response_bytes"""
+        cap = self.limits.max_response_bytes
+        result.final_url = str(response.url)
+        result.status_code = response.status_code
+        result.headers = dict(response.headers)
+        result.http_version = response.http_version
+        chunks: List[bytes] = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            if size + len(chunk) > cap:
+                chunks.append(chunk[:cap - size])
+                result.truncated = True
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+        result.content = b"".join(chunks)
+        if result.truncated:
+            result.error = f"Response exceeds {self.limits.max_response_mb:g} MB"
+
+    async def fetch_many(self, urls: Iterable[str], headers: Optional[Dict[str, str]] = None) -> List[FetchResult]:
+        """Fetch URLs concurrently (each host within its limit); results are in input order"""
+        return list(await asyncio.gather(*(self.fetch(url, headers) for url in urls)))
+
+    async def crawl(
+        self,
+        adapter: SiteAdapter,
+        query: str,
+        location: str = "",
+        max_pages: int = 5,
+        seen: Optional["SeenURLFilter"] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Scrape the jobs of a search, results page by results page
+
+        Args:
+            adapter: Site adapter that builds URLs and parses pages
+            query: Search keywords
+            location: Search location
+            max_pages: Results pages to walk at most
+            seen: If given, detail pages of URLs already in the filter are not fetched,
+                and the URLs of detail pages fetched and parsed are added to it
+
+        Yields:
+            Job dicts from adapter.parse_job (``source`` and ``url`` filled in if missing)
+        """
+        headers = adapter.headers or None
+
+        def fetch_page(page: int) -> "asyncio.Task[FetchResult]":
+            return asyncio.ensure_future(self.fetch(adapter.search_url(query, location, page), headers))
+
+        pending: Optional[asyncio.Task] = fetch_page(0)
+        try:
+            for page in range(max_pages):
+                result = await pending
+                pending = None
+                if self.limits.prefetch and page + 1 < max_pages:
+                    pending = fetch_page(page + 1)
+                    self.stats["prefetched"] += 1
+                if not result.ok:
+                    logger.warning(f"✗ {adapter.name} results page {page}: {result.error or result.status_code}")
+                    break
+
+                listing = adapter.parse_listing(result)
+                urls = list(dict.fromkeys(listing.job_urls))
+                if seen is not None:  # Membership only: canonical URLs may not be fetchable as-is
+                    urls = [url for url in urls if url not in seen]
+                jobs, fetched = [], []
+                for detail in await self.fetch_many(urls, headers):
+                    if not detail.ok:
+                        logger.warning(f"✗ {adapter.name} job page {detail.url}: {detail.error or detail.status_code}")
+                        continue
+                    job = adapter.parse_job(detail)
+                    if job:
+                        job.setdefault("source", adapter.name)
+                        job.setdefault("url", detail.final_url or detail.url)
+                        jobs.append(job)
+                        fetched.append(detail.url)  # The listing URL, as checked against seen above
+                if seen is not None and fetched:
+                    seen.add_many(fetched)
+                for job in jobs:
+                    yield job
+
+                if not listing.has_next or not listing.job_urls or page + 1 >= max_pages:
+                    break
+                if pending is None:
+                    pending = fetch_page(page + 1)
+                else:
+                    self.stats["prefetch_used"] += 1
+        finally:
+            if pending is not None:
+                pending.cancel()  # Speculative page past the last one
+
+    async def close(self) -> None:
+        """Close every host's connection pool"""
+        clients, self._clients = self._clients, {}
+        self._slots = {}
+        await asyncio.gather(*(client.aclose() for client in clients.values()))
+
+    async def __aenter__(self) -> "HTTPEngine":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
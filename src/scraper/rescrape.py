@@ -0,0 +1,117 @@
+"""Conditional re-scrape of stale job postings over HTTP
+
+``Rescraper`` walks the jobs due for a re-check (``stale_jobs``: last
+checked more than ``application.rescrape_threshold_days`` ago) in batches
+and fetches their pages through ``HTTPEngine``. Each request carries
+``If-None-Match`` / ``If-Modified-Since`` from the stored ETag and
+Last-Modified, so an unchanged posting usually costs one 304 and is neither
+parsed nor rewritten. Pages that do come back are parsed by the site's
+adapter, and ``apply_rescrape`` compares the parsed text's hash with the
+stored one; only postings whose text changed are rewritten (and get a new
+``updated_at``).
+
+The database manager is passed in (an ``AsyncDatabaseManager``), like the
+customization runner's, so this module does not import the database
+package.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+from loguru import logger
+
+from .http_engine import FetchResult, HTTPEngine
+from .sites.base import SiteAdapter
+
+GONE_STATUSES = (404, 410)  # Posting removed: recorded as checked, never retried early
+
+
+def conditional_headers(job: Mapping[str, Any]) -> Dict[str, str]:
+    """If-None-Match / If-Modified-Since from a job's stored validators"""
+    headers = {}
+    if job.get("etag"):
+        headers["If-None-Match"] = job["etag"]
+    if job.get("last_modified"):
+        headers["If-Modified-Since"] = job["last_modified"]
+    return headers
+
+
+class Rescraper:
+    """Re-checks stale jobs with conditional requests and writes back only real changes"""
+
+    def __init__(self, db, engine: HTTPEngine, adapters: Mapping[str, SiteAdapter], batch_size: int = 100):
+        """Initialize re-scraper
+
+        Args:
+            db: AsyncDatabaseManager holding the jobs
+            engine: HTTP engine used for the requests
+            adapters: Site adapters by job source; jobs from other sources are not selected
+            batch_size: Jobs fetched and written per batch
+        """
+        self.db = db
+        self.engine = engine
+        self.adapters = dict(adapters)
+        self.batch_size = batch_size
+
+    async def run(self, threshold_days: int, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Re-check stale jobs until none are left or ``limit`` were checked
+
+        Returns:
+            Counts (checked, not_modified, unchanged, changed, gone, failed,
+            skipped) and elapsed_seconds
+        """
+        counts = {"checked": 0, "not_modified": 0, "unchanged": 0, "changed": 0, "gone": 0, "failed": 0,
+                  "skipped": 0}
+        start = time.perf_counter()
+        after = None
+        while limit is None or counts["checked"] < limit:
+            size = self.batch_size if limit is None else min(self.batch_size, limit - counts["checked"])
+            jobs = await self.db.stale_jobs(threshold_days, size, sources=list(self.adapters), after=after)
+            if not jobs:
+                break
+            after = (jobs[-1]["checked_at"], jobs[-1]["id"])  # Failed jobs stay stale; don't select them again
+            await self._batch(jobs, counts)
+        counts["elapsed_seconds"] = time.perf_counter() - start
+        return counts
+
+    async def _batch(self, jobs: List[Dict[str, Any]], counts: Dict[str, int]) -> None:
+        fetches = [self.engine.fetch(job["url"], {**self.adapters[job["source"]].headers, **conditional_headers(job)})
+                   for job in jobs]
+        results = []
+        for job, fetched in zip(jobs, await asyncio.gather(*fetches)):
+            counts["checked"] += 1
+            outcome = self._outcome(job, fetched, counts)
+            if outcome is not None:
+                results.append(outcome)
+        if results:
+            written = await self.db.apply_rescrape(results)
+            for name in ("unchanged", "changed", "skipped"):
+                counts[name] += written[name]
+
+    def _outcome(self, job: Dict[str, Any], fetched: FetchResult, counts: Dict[str, int]) -> Optional[Dict[str, Any]]:
+        """What to record for one job (None: leave it stale and retry on a later run)"""
+        validators = {"etag": fetched.headers.get("etag"), "last_modified": fetched.headers.get("last-modified")}
+        if fetched.not_modified:
+            counts["not_modified"] += 1
+            return {"id": job["id"], **validators, "job": None}
+        if fetched.status_code in GONE_STATUSES:
+            counts["gone"] += 1
+            return {"id": job["id"], "job": None}
+        if not fetched.ok:
+            counts["failed"] += 1
+            logger.warning(f"✗ Re-scrape of {job['url']} failed: {fetched.error or fetched.status_code}")
+            return None
+        adapter = self.adapters[job["source"]]
+        try:
+            parsed = adapter.parse_job(fetched)
+        except Exception as e:
+            counts["failed"] += 1
+            logger.warning(f"✗ Could not parse {job['url']}: {str(e)}")
+            return None
+        if not parsed:
+            counts["failed"] += 1
+            return None
+        parsed.setdefault("source", job["source"])
+        parsed.setdefault("url", job["url"])
+        return {"id": job["id"], **validators, "job": parsed}
@@ -0,0 +1,284 @@
+"""Persistent Bloom filter of canonical job URLs already scraped
+
+Before fetching a detail page the scraper asks ``SeenURLFilter`` whether the
+canonical URL (see urls.py) was seen in an earlier run. The filter is a bit
+array in a memory-mapped file, so membership checks never touch the database
+or the network and the file is shared by every run.
+
+A Bloom filter never misses a URL that was added, but may report an unseen
+URL as seen with probability ``fill_ratio ** num_hashes``; ``stats()``
+reports that estimate. When it climbs past the target (the table outgrew the
+capacity), ``rebuild_from_database`` sizes a new filter from ``jobs.url``.
+
+Writers in several processes share the file: ``add_many`` sets bits and
+bumps the header count under an exclusive lock on ``<path>.lock``, reading
+the count from the file rather than from this process's copy.
+
+File layout: a 32-byte header (magic, version, num_bits, num_hashes, count,
+capacity) followed by ``ceil(num_bits / 8)`` bytes of bits.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from loguru import logger
+from sqlalchemy import Engine, column, func, select, table
+from .urls import canonicalize_url
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SEEN_URLS_PATH = os.getenv("SEEN_URLS_PATH", "database/seen_urls.bloom")
+DEFAULT_CAPACITY = 200_000
+DEFAULT_FALSE_POSITIVE_RATE = 0.001
+
+_MAGIC = b"SURL"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIQIQI")  # magic, version, num_bits, num_hashes, count, capacity
+_COUNT_OFFSET = 20
+
+# Lightweight handle on jobs.url so the scraper does not import the ORM models
+_JOBS = table("jobs", column("url"))
+
+
+def optimal_size(capacity: int, false_positive_rate: float) -> tuple:
+    """Bits and hash functions for ``capacity`` items at ``false_positive_rate``
+
+    m = -n ln p / (ln 2)^2 and k = (m / n) ln 2.
+    """
+    capacity = max(capacity, 1)
+    num_bits = math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return num_bits, num_hashes
+
+
+class SeenURLFilter:
+    """Memory-mapped Bloom filter of canonical URLs"""
+
+    def __init__(
+        self,
+        path: str = SEEN_URLS_PATH,
+        capacity: int = DEFAULT_CAPACITY,
+        false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE,
+    ):
+        """Open the filter file, creating it if missing
+
+        Args:
+            path: Filter file
+            capacity: Expected number of URLs (only used when creating the file)
+            false_positive_rate: Target rate at capacity (only used when creating the file)
+        """
+        self.path = Path(path)
+        self.false_positive_rate = false_positive_rate
+        self._lock = threading.Lock()
+        if not self.path.exists():
+            self._create(self.path, capacity, false_positive_rate)
+        self._open()
+
+    @staticmethod
+    def _create(path: Path, capacity: int, false_positive_rate: float) -> None:
+        num_bits, num_hashes = optimal_size(capacity, false_positive_rate)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, num_bits, num_hashes, 0, capacity))
+            f.truncate(_HEADER.size + (num_bits + 7) // 8)
+
+    def _open(self) -> None:
+        self._file = open(self.path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, version, num_bits, num_hashes, count, capacity = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a seen-URL filter file")
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.capacity = capacity
+        self.count = count
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """Hold the thread lock and an exclusive inter-process lock on ``<path>.lock``"""
+        lock_path = self.path.with_name(f"{self.path.name}.lock")
+        with self._lock, open(lock_path, "a+") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _read_count(self) -> int:
+        return struct.unpack_from("<Q", self._map, _COUNT_OFFSET)[0]
+
+    def _positions(self, canonical_url: str) -> List[int]:
+        # Double hashing: position_i = h1 + i * h2 (Kirsch & Mitzenmacher)
+        digest = hashlib.blake2b(canonical_url.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def _test(self, positions: List[int]) -> bool:
+        data = self._map
+        return all(data[_HEADER.size + p // 8] & (1 << (p % 8)) for p in positions)
+
+    def _set(self, positions: List[int]) -> bool:
+        """Set bits; True if any bit was new (the URL was not in the filter)"""
+        data = self._map
+        new = False
+        for p in positions:
+            offset = _HEADER.size + p // 8
+            bit = 1 << (p % 8)
+            if not data[offset] & bit:
+                data[offset] |= bit
+                new = True
+        return new
+
+    def __contains__(self, url: str) -> bool:
+        positions = self._positions(canonicalize_url(url))
+        with self._lock:
+            return self._test(positions)
+
+    def add(self, url: str) -> bool:
+        """Record a URL as seen
+
+        Returns:
+            True if the URL was not in the filter before
+        """
+        return self.add_many([url]) == 1
+
+    def add_many(self, urls: Iterable[str]) -> int:
+        """Record URLs as seen; returns how many were not in the filter before"""
+        positions = [self._positions(canonicalize_url(url)) for url in urls]
+        added = 0
+        with self._write_lock():
+            for url_positions in positions:
+                if self._set(url_positions):
+                    added += 1
+            # Other processes may have added URLs since this one last looked
+            self.count = self._read_count() + added
+            struct.pack_into("<Q", self._map, _COUNT_OFFSET, self.count)
+        return added
+
+    def filter_new_urls(self, urls: Iterable[str]) -> List[str]:
+        """Canonicalize URLs and keep only those not seen before (in input order, without repeats)
+
+        This is the check the scraper makes before fetching detail pages.
+        The returned URLs are not added; call ``add_many`` once they are scraped.
+        """
+        new_urls = []
+        pending = set()
+        with self._lock:
+            for url in urls:
+                canonical = canonicalize_url(url)
+                if canonical in pending or self._test(self._positions(canonical)):
+                    continue
+                pending.add(canonical)
+                new_urls.append(canonical)
+        return new_urls
+
+    def fill_ratio(self) -> float:
+        """Fraction of bits set"""
+        with self._lock:
+            ones = int.from_bytes(self._map[_HEADER.size:], "little").bit_count()
+            self.count = self._read_count()
+        return ones / self.num_bits
+
+    def stats(self) -> Dict[str, Any]:
+        """Size, load and false-positive rate of the filter
+
+        ``false_positive_rate`` is measured from the fraction of bits set
+        (``fill_ratio ** num_hashes``); ``expected_false_positive_rate`` is
+        the theoretical rate for ``count`` URLs.
+        """
+        fill = self.fill_ratio()
+        expected = (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+        return {
+            "path": str(self.path),
+            "count": self.count,
+            "capacity": self.capacity,
+            "num_bits": self.num_bits,
+            "num_hashes": self.num_hashes,
+            "size_bytes": _HEADER.size + (self.num_bits + 7) // 8,
+            "fill_ratio": fill,
+            "false_positive_rate": fill ** self.num_hashes,
+            "expected_false_positive_rate": expected,
+            "target_false_positive_rate": self.false_positive_rate,
+        }
+
+    def flush(self) -> None:
+        with self._lock:
+            self._map.flush()
+
+    def close(self) -> None:
+        if getattr(self, "_map", None) is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        if getattr(self, "_file", None) is not None:
+            self._file.close()
+            self._file = None
+
+    def rebuild_from_database(
+        self,
+        engine: Engine,
+        capacity: Optional[int] = None,
+        batch_size: int = 5000,
+    ) -> Dict[str, Any]:
+        """Replace the filter with one built from every ``jobs.url``
+
+        The new filter is written next to the old one and swapped in with an
+        atomic rename, so a crash mid-rebuild leaves the old filter intact.
+
+        Args:
+            engine: Database engine
+            capacity: URLs to size for (default: twice the current job count)
+            batch_size: URLs fetched per round trip
+
+        Returns:
+            stats() of the rebuilt filter
+        """
+        with engine.connect() as connection:
+            if capacity is None:
+                total = connection.execute(select(func.count()).select_from(_JOBS)).scalar_one()
+                capacity = max(2 * total, DEFAULT_CAPACITY)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            tmp_path.unlink(missing_ok=True)
+            self._create(tmp_path, capacity, self.false_positive_rate)
+            rebuilt = SeenURLFilter(str(tmp_path), false_positive_rate=self.false_positive_rate)
+            try:
+                result = connection.execution_options(yield_per=batch_size).execute(select(_JOBS.c.url))
+                for partition in result.scalars().partitions():
+                    rebuilt.add_many(partition)
+            finally:
+                rebuilt.close()
+                tmp_path.with_name(tmp_path.name + ".lock").unlink(missing_ok=True)
+
+        with self._write_lock():
+            self.close()
+            os.replace(tmp_path, self.path)
+            self._open()
+        logger.info(f"✓ Rebuilt seen-URL filter with {self.count} URLs ({self.path})")
+        return self.stats()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,3 +1,10 @@
 """Scraper sites - Portal-specific scrapers"""
 
-__all__ = []
+from typing import Dict
+
+from .base import ListingPage, SiteAdapter
+
+# HTTP adapters by job source; site modules register an instance here
+SITE_ADAPTERS: Dict[str, SiteAdapter] = {}
+
+__all__ = ["ListingPage", "SiteAdapter", "SITE_ADAPTERS"]
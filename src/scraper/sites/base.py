@@ -0,0 +1,45 @@
+"""Adapter interface between portal scrapers and the HTTP engine
+
+A site module describes a portal to ``HTTPEngine.crawl`` (see
+http_engine.py) with a ``SiteAdapter`` subclass: how to build the URL of
+results page ``n``, how to read job links out of a results page and how to
+turn a job detail page into a job dict for ``bulk_upsert_jobs``. The engine
+owns fetching, connection reuse, concurrency and prefetching; adapters only
+build URLs and parse.
+"""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from ..http_engine import FetchResult
+
+
+@dataclass
+class ListingPage:
+    """Job links found on one results page"""
+    job_urls: List[str] = field(default_factory=list)
+    has_next: bool = False  # Whether another results page follows
+
+
+class SiteAdapter:
+    """Base class of HTTP site adapters"""
+
+    name: str = ""  # Job.source of the scraped jobs, e.g. "indeed"
+    headers: Dict[str, str] = {}  # Extra request headers sent to this site
+
+    def search_url(self, query: str, location: str, page: int) -> str:
+        """URL of results page ``page`` (0-based) for a search
+
+        It must depend only on its arguments: the engine requests page
+        ``n + 1`` speculatively while page ``n`` is still being processed.
+        """
+        raise NotImplementedError
+
+    def parse_listing(self, result: "FetchResult") -> ListingPage:
+        """Job detail URLs on a results page and whether there is a next page"""
+        raise NotImplementedError
+
+    def parse_job(self, result: "FetchResult") -> Optional[Dict[str, Any]]:
+        """Job dict (url, company, title, location, description, ...) from a detail page, or None to skip it"""
+        raise NotImplementedError
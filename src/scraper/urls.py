@@ -0,0 +1,113 @@
+"""Canonical job URLs for LinkedIn, Indeed and Jobstreet
+
+The same posting is reachable through many URLs: search pages with a
+selected job, tracking redirects, mobile and country hosts, slugged titles
+and a long tail of tracking parameters. ``canonicalize_url`` maps them to
+one stable URL per posting so seen-URL checks and deduplication work.
+"""
+
+import re
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Ad-click and analytics parameters, stripped from every URL. Generic names
+# (type, source, token, ...) can identify a posting on other sites, so they
+# are only stripped on the portals that use them for tracking (PORTALS).
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "gbraid", "wbraid", "msclkid", "dclid", "yclid", "twclid", "ttclid", "li_fat_id",
+    "igshid", "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+LINKEDIN_TRACKING = {
+    "ref", "refid", "trk", "trkinfo", "trackingid", "lipi", "midtoken", "midsig", "eid", "originalsubdomain", "alid",
+}
+INDEED_TRACKING = {"from", "tk", "advn", "adid", "sjdu", "acatk", "pub", "xkcb", "vjs"}
+JOBSTREET_TRACKING = {"ref", "type", "searchrequesttoken", "sectionrank", "token", "sol_srt", "origin"}
+
+_LINKEDIN_VIEW = re.compile(r"/jobs/view/(?:[^/]*?-)?(\d+)/?$")
+_JOBSTREET_JOB = re.compile(r"/job/(?:[^/]*?-)?(\d+)/?$")
+
+
+def _is_tracking(name: str, portal_params: FrozenSet[str] = frozenset()) -> bool:
+    lowered = name.lower()
+    return lowered in TRACKING_PARAMS or lowered in portal_params or lowered.startswith(TRACKING_PREFIXES)
+
+
+def _host(netloc: str) -> str:
+    """Lowercase host without credentials, default ports or a mobile prefix"""
+    host = netloc.rsplit("@", 1)[-1].lower()
+    for default_port in (":80", ":443"):
+        if host.endswith(default_port):
+            host = host[:-len(default_port)]
+    if host.startswith("m."):
+        host = "www." + host[2:]
+    return host
+
+
+def _linkedin(host: str, path: str, query: Dict[str, str]) -> Optional[str]:
+    match = _LINKEDIN_VIEW.search(path)
+    job_id = match.group(1) if match else query.get("currentJobId")
+    if job_id and job_id.isdigit():
+        # Country subdomains (sg.linkedin.com) serve the same posting
+        return f"https://www.linkedin.com/jobs/view/{job_id}"
+    return None
+
+
+def _indeed(host: str, path: str, query: Dict[str, str]) -> Optional[str]:
+    job_key = query.get("jk") or query.get("vjk")
+    if job_key and re.fullmatch(r"[0-9a-f]{16}", job_key.lower()):
+        # Job keys are per country site, so the host is kept
+        return f"https://{host}/viewjob?jk={job_key.lower()}"
+    return None
+
+
+def _jobstreet(host: str, path: str, query: Dict[str, str]) -> Optional[str]:
+    match = _JOBSTREET_JOB.search(path)
+    job_id = match.group(1) if match else query.get("jobId")
+    if job_id and job_id.isdigit():
+        return f"https://{host}/job/{job_id}"
+    return None
+
+
+Canonicalizer = Callable[[str, str, Dict[str, str]], Optional[str]]
+
+# Portal hosts (with country subdomains or country TLD suffixes) -> canonicalizer and tracking parameters
+PORTALS = [
+    (re.compile(r"(^|\.)linkedin\.com$"), _linkedin, frozenset(LINKEDIN_TRACKING)),
+    (re.compile(r"(^|\.)indeed\.com(\.[a-z]{2})?$|(^|\.)indeed\.co\.[a-z]{2}$"), _indeed, frozenset(INDEED_TRACKING)),
+    (re.compile(r"(^|\.)jobstreet\.com(\.[a-z]{2})?$|(^|\.)jobstreet\.co\.[a-z]{2}$"), _jobstreet,
+     frozenset(JOBSTREET_TRACKING)),
+]
+
+
+def _portal(host: str) -> Tuple[Optional[Canonicalizer], FrozenSet[str]]:
+    for pattern, handler, tracking in PORTALS:
+        if pattern.search(host):
+            return handler, tracking
+    return None, frozenset()
+
+
+def canonicalize_url(url: str) -> str:
+    """Return the canonical form of a job posting URL
+
+    Portal URLs are reduced to their job id (LinkedIn ``/jobs/view/<id>``,
+    Indeed ``/viewjob?jk=<key>``, Jobstreet ``/job/<id>``). Other URLs get
+    generic cleanup: https, lowercase host, no fragment, no tracking
+    parameters (TRACKING_PARAMS, plus the portal's own on portal hosts),
+    remaining parameters sorted and no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    host = _host(parts.netloc)
+    pairs = parse_qsl(parts.query, keep_blank_values=True)
+
+    handler, portal_params = _portal(host)
+    if handler is not None:
+        canonical = handler(host, parts.path, dict(pairs))
+        if canonical is not None:
+            return canonical
+
+    query = urlencode(sorted((name, value) for name, value in pairs if not _is_tracking(name, portal_params)))
+    path = parts.path.rstrip("/") or "/"
+    scheme = "https" if parts.scheme in ("http", "https", "") else parts.scheme.lower()
+    return urlunsplit((scheme, host, path, query, ""))
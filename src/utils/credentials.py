@@ -1,12 +1,105 @@
-"""Credential encryption and decryption utilities"""
+"""Credential encryption and decryption utilities
+
+Decrypted credentials are cached per process (shared by every
+CredentialManager for the same file and key) and reloaded when the file's
+mtime, inode or size changes, so repeated lookups neither re-read the file
+nor re-decrypt it. Values are decrypted lazily, one key at a time. Writes
+take an exclusive lock on ``<file>.lock`` and replace the file atomically
+(temp file + fsync + rename), so concurrent writers in several processes
+cannot interleave or leave a truncated file behind.
+"""
 
 import os
 import json
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Optional
-from cryptography.fernet import Fernet
+from typing import Dict, Iterator, Optional, Tuple
+from cryptography.fernet import Fernet, InvalidToken
 from loguru import logger
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+FileStamp = Tuple[int, int, int]  # (st_mtime_ns, st_ino, st_size)
+
+
+class _CredentialCache:
+    """Encrypted values of one credentials file and the ones decrypted so far"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stamp: Optional[FileStamp] = None
+        self.encrypted: Dict[str, str] = {}
+        self.decrypted: Dict[str, str] = {}
+
+
+_caches: Dict[Tuple[str, bytes], _CredentialCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _cache_for(path: Path, key: bytes) -> _CredentialCache:
+    cache_key = (str(path.resolve()), key)
+    with _caches_lock:
+        cache = _caches.get(cache_key)
+        if cache is None:
+            cache = _caches[cache_key] = _CredentialCache()
+        return cache
+
+
+def file_stamp(path: Path) -> Optional[FileStamp]:
+    """Identity of a file's current contents, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive inter-process lock on ``<path>.lock``"""
+    lock_path = path.with_name(f"{path.name}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write_json(path: Path, data: Dict[str, str]) -> None:
+    """Write JSON to a temp file in the same directory, fsync it and rename it over ``path``
+
+    The temp file is created with mode 0600, so the credentials file is
+    readable by its owner only.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
 
 class CredentialManager:
     """Manages encrypted credential storage"""
@@ -28,13 +121,16 @@ class CredentialManager:
                 "print(Fernet.generate_key().decode())\""
             )
         
+        key_bytes = encryption_key.encode() if isinstance(encryption_key, str) else encryption_key
         try:
-            self.cipher_suite = Fernet(encryption_key.encode() if isinstance(encryption_key, str) else encryption_key)
+            self.cipher_suite = Fernet(key_bytes)
             self.encryption_key = encryption_key
+            self._key_bytes = key_bytes
         except Exception as e:
             raise ValueError(f"Invalid ENCRYPTION_KEY format: {str(e)}")
 
         self.creds_file = Path("config/encrypted_creds.json")
+        self._bound: Optional[Tuple[Path, _CredentialCache]] = None
 
     @staticmethod
     def generate_key() -> str:
@@ -55,21 +151,54 @@ class CredentialManager:
         decrypted = self.cipher_suite.decrypt(ciphertext)
         return decrypted.decode()
 
+    def _shared_cache(self) -> _CredentialCache:
+        """Process-wide cache entry for ``creds_file`` (looked up again only if the path changes)"""
+        if self._bound is None or self._bound[0] is not self.creds_file:
+            self._bound = (self.creds_file, _cache_for(self.creds_file, self._key_bytes))
+        return self._bound[1]
+
+    def _cache(self) -> _CredentialCache:
+        """Shared cache for ``creds_file``, reloaded if the file changed on disk
+
+        Raises:
+            OSError, ValueError: If the file cannot be read or is not valid JSON
+        """
+        cache = self._shared_cache()
+        stamp = file_stamp(self.creds_file)
+        with cache.lock:
+            if stamp != cache.stamp:
+                encrypted = {}
+                if stamp is not None:
+                    with open(self.creds_file, "r") as f:
+                        encrypted = json.load(f)
+                cache.encrypted, cache.decrypted, cache.stamp = encrypted, {}, stamp
+        return cache
+
+    def _decrypted(self, cache: _CredentialCache, key: str) -> Optional[str]:
+        """Decrypt one cached value on first use (caller holds ``cache.lock``)"""
+        value = cache.decrypted.get(key)
+        if value is None and key in cache.encrypted:
+            value = cache.decrypted[key] = self.decrypt(cache.encrypted[key])
+        return value
+
+    def _write(self, encrypted: Dict[str, str], decrypted: Dict[str, str]) -> None:
+        """Atomically replace the file and install its contents as the cache (caller holds the file lock)"""
+        atomic_write_json(self.creds_file, encrypted)
+        cache = self._shared_cache()
+        with cache.lock:
+            cache.encrypted, cache.decrypted, cache.stamp = encrypted, decrypted, file_stamp(self.creds_file)
+
     def save_credentials(self, credentials: Dict[str, str]) -> None:
-        """Save credentials to encrypted file"""
+        """Save credentials to encrypted file (replacing its contents)"""
         try:
-            # Ensure directory exists
-            self.creds_file.parent.mkdir(parents=True, exist_ok=True)
-            
             # Encrypt all credential values
             encrypted_creds = {}
             for key, value in credentials.items():
                 encrypted_creds[key] = self.encrypt(value)
-            
-            # Save to file
-            with open(self.creds_file, "w") as f:
-                json.dump(encrypted_creds, f, indent=2)
-            
+
+            with file_lock(self.creds_file):
+                self._write(encrypted_creds, dict(credentials))
+
             logger.info(f"✓ Credentials saved to {self.creds_file}")
         except Exception as e:
             logger.error(f"✗ Failed to save credentials: {str(e)}")
@@ -77,41 +206,53 @@ class CredentialManager:
 
     def load_credentials(self) -> Dict[str, str]:
         """Load and decrypt credentials from file"""
-        if not self.creds_file.exists():
-            logger.warning(f"Credentials file not found at {self.creds_file}")
-            return {}
-        
         try:
-            with open(self.creds_file, "r") as f:
-                encrypted_creds = json.load(f)
-            
-            # Decrypt all values
-            decrypted_creds = {}
-            for key, encrypted_value in encrypted_creds.items():
-                decrypted_creds[key] = self.decrypt(encrypted_value)
-            
-            return decrypted_creds
+            cache = self._cache()
+            if cache.stamp is None:
+                logger.warning(f"Credentials file not found at {self.creds_file}")
+                return {}
+            with cache.lock:
+                return {key: self._decrypted(cache, key) for key in cache.encrypted}
         except Exception as e:
             logger.error(f"✗ Failed to load credentials: {str(e)}")
             return {}
 
     def get_credential(self, key: str, default: Optional[str] = None) -> Optional[str]:
-        """Get a specific credential"""
-        creds = self.load_credentials()
-        return creds.get(key, default)
+        """Get a specific credential (decrypting only that value, once per file version)"""
+        try:
+            cache = self._cache()
+            if cache.stamp is None:
+                logger.warning(f"Credentials file not found at {self.creds_file}")
+                return default
+            with cache.lock:
+                value = self._decrypted(cache, key)
+        except (OSError, ValueError, InvalidToken) as e:
+            logger.error(f"✗ Failed to load credential '{key}': {str(e) or type(e).__name__}")
+            return default
+        return default if value is None else value
 
     def update_credential(self, key: str, value: str) -> None:
         """Update a single credential"""
-        creds = self.load_credentials()
-        creds[key] = value
-        self.save_credentials(creds)
+        token = self.encrypt(value)
+        with file_lock(self.creds_file):
+            # Re-read under the lock so a concurrent writer's changes are kept
+            cache = self._cache()
+            with cache.lock:
+                encrypted = {**cache.encrypted, key: token}
+                decrypted = {**cache.decrypted, key: value}
+            self._write(encrypted, decrypted)
 
     def delete_credential(self, key: str) -> None:
         """Delete a specific credential"""
-        creds = self.load_credentials()
-        if key in creds:
-            del creds[key]
-            self.save_credentials(creds)
+        with file_lock(self.creds_file):
+            cache = self._cache()
+            with cache.lock:
+                found = key in cache.encrypted
+                encrypted = {k: v for k, v in cache.encrypted.items() if k != key}
+                decrypted = {k: v for k, v in cache.decrypted.items() if k != key}
+            if found:
+                self._write(encrypted, decrypted)
+        if found:
             logger.info(f"✓ Credential '{key}' deleted")
         else:
             logger.warning(f"Credential '{key}' not found")
@@ -0,0 +1,294 @@
+"""Routed, queue-backed loguru sink for the log files
+
+One sink replaces the per-file loguru sinks (app, scraper, database,
+errors). On the logging thread it only looks up the record's destinations
+(cached per logger name and level, so the name filters run once per name
+rather than once per record and sink) and puts the record on a bounded
+queue. A writer thread formats each record once (text or JSON lines),
+appends it to every destination and handles rotation, zip compression and
+retention, so none of that I/O runs on scraper or applier threads.
+
+When the queue is full the ``block`` policy makes the caller wait
+(backpressure) and ``drop`` discards the record and counts it; ERROR and
+above are never dropped. Dropped counts are written to the log when space
+frees up.
+"""
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+QUEUE_POLICIES = ("block", "drop")
+LOG_FORMATS = ("text", "json")
+ERROR_LEVEL = 40
+WRITE_BATCH = 256  # Writer sleeps LINGER_SECONDS after batches smaller than this
+LINGER_SECONDS = 0.01
+_STOP = object()
+
+
+@dataclass
+class LogRoute:
+    """A log file and the records it receives"""
+    path: str
+    level: int = 0  # Minimum level number (loguru: DEBUG=10, INFO=20, ERROR=40)
+    name_contains: Optional[str] = None  # Only loggers whose name contains this (case-insensitive)
+    max_bytes: int = 100 * 1024 * 1024
+    retention_days: Optional[int] = 7
+    compress: bool = True
+
+
+class RotatingFileWriter:
+    """Append-only log file with size rotation, zip compression and retention
+
+    The file (and its directory) is created on the first write.
+    """
+
+    def __init__(self, route: LogRoute):
+        self.route = route
+        self.path = Path(route.path)
+        self._file = None
+        self._size = 0
+        # Rotations of this file only: "<stem>.<timestamp><suffix>" or the same plus ".zip"
+        self._rotated = re.compile(
+            rf"{re.escape(self.path.stem)}\.\d{{4}}-\d{{2}}-\d{{2}}_\d{{2}}-\d{{2}}-\d{{2}}_\d{{6}}"
+            rf"{re.escape(self.path.suffix)}(\.zip)?"
+        )
+
+    def write(self, text: str) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf8")
+            self._size = self._file.tell()
+        self._file.write(text)
+        self._size += len(text.encode("utf-8"))  # max_bytes is a file size, not a character count
+        if self._size >= self.route.max_bytes:
+            self.rotate()
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def rotate(self) -> None:
+        """Move the current file aside (zipped if configured) and prune old rotations"""
+        self.close()
+        stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S_%f")  # Sorts in rotation order
+        rotated = self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}")
+        os.replace(self.path, rotated)
+        if self.route.compress:
+            import zipfile  # Deferred: only needed on rotation, keeps CLI startup lean
+
+            with zipfile.ZipFile(f"{rotated}.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+                archive.write(rotated, rotated.name)
+            rotated.unlink()
+        self._prune()
+
+    def _prune(self) -> None:
+        if self.route.retention_days is None:
+            return
+        cutoff = time.time() - self.route.retention_days * 86400
+        for old in self.path.parent.glob(f"{self.path.stem}.*"):
+            if self._rotated.fullmatch(old.name) and old.stat().st_mtime < cutoff:
+                old.unlink(missing_ok=True)
+
+
+def format_text(record: dict, text: str) -> str:
+    """Plain file line: level | time | name:function:line | message (+ traceback)"""
+    return (
+        f"{record['level'].name: <8} | {record['time']:%Y-%m-%d %H:%M:%S} | "
+        f"{record['name']}:{record['function']}:{record['line']} | {text}"
+    )
+
+
+def format_json(record: dict, text: str) -> str:
+    """One JSON object per line for log shippers"""
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "name": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+        "thread": record["thread"].name,
+        "process": record["process"].id,
+    }
+    if record["extra"]:
+        entry["extra"] = {key: value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+                          for key, value in record["extra"].items()}
+    exception = record["exception"]
+    if exception is not None:
+        entry["exception"] = "".join(traceback.format_exception(exception.type, exception.value, exception.traceback))
+    return json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+
+
+class RoutedLogSink:
+    """Loguru sink that routes records to log files through a bounded queue"""
+
+    def __init__(
+        self,
+        routes: Sequence[LogRoute],
+        fmt: str = "text",
+        asynchronous: bool = True,
+        queue_size: int = 10000,
+        policy: str = "block",
+    ):
+        """Initialize sink
+
+        Args:
+            routes: Log files and the records each receives
+            fmt: "text" lines or "json" lines
+            asynchronous: Write on a background thread (False writes inline)
+            queue_size: Records buffered before the policy applies
+            policy: "block" (caller waits) or "drop" (record is counted and discarded)
+        """
+        if fmt not in LOG_FORMATS:
+            raise ValueError(f"Unknown log format '{fmt}'. Expected one of: {', '.join(LOG_FORMATS)}")
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}'. Expected one of: {', '.join(QUEUE_POLICIES)}")
+        self.routes = list(routes)
+        self.writers = [RotatingFileWriter(route) for route in self.routes]
+        self.fmt = fmt
+        self.policy = policy
+        self.dropped = 0
+        self._format = format_json if fmt == "json" else format_text
+        self._route_cache: Dict[Tuple[str, int], Tuple[int, ...]] = {}
+        self._write_lock = threading.Lock()
+        self._drop_lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        if asynchronous:
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    @property
+    def min_level(self) -> int:
+        """Lowest level any route accepts (use as the loguru handler level)"""
+        return min((route.level for route in self.routes), default=0)
+
+    def destinations(self, name: str, level: int) -> Tuple[int, ...]:
+        """Indexes of the writers that receive a record (cached per logger name and level)"""
+        key = (name, level)
+        targets = self._route_cache.get(key)
+        if targets is None:
+            lowered = (name or "").lower()
+            targets = self._route_cache[key] = tuple(
+                i for i, route in enumerate(self.routes)
+                if level >= route.level and (route.name_contains is None or route.name_contains in lowered)
+            )
+        return targets
+
+    def write(self, message) -> None:
+        """Called by loguru for every record (on the logging thread)"""
+        record = message.record
+        targets = self.destinations(record["name"], record["level"].no)
+        if not targets:
+            return
+        item = (targets, record, str(message))
+        if self._queue is None:
+            with self._write_lock:
+                self._write_item(item)
+                self._flush()
+            return
+        if self.policy == "block" or record["level"].no >= ERROR_LEVEL:
+            self._queue.put(item)
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued record is written; returns False on timeout"""
+        if self._queue is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def stop(self) -> None:
+        """Write everything queued, then close the files (called by logger.remove)"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        with self._write_lock:
+            self._report_dropped()
+            for writer in self.writers:
+                writer.close()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Take whatever else is already waiting, up to one queue's worth
+            while batch[-1] is not _STOP and len(batch) < self._queue.maxsize:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = batch[-1] is _STOP
+            with self._write_lock:
+                self._write_batch([entry for entry in batch if entry is not _STOP])
+                self._report_dropped()
+                self._flush()
+            for _ in batch:
+                self._queue.task_done()
+            if stopping:
+                return
+            if len(batch) < WRITE_BATCH:
+                # Let records accumulate instead of waking (and taking the GIL) for each one
+                time.sleep(LINGER_SECONDS)
+
+    def _write_item(self, item) -> None:
+        self._write_batch([item])
+
+    def _write_batch(self, items) -> None:
+        """Format each record once and append it to its destinations with one write per file"""
+        lines = [[] for _ in self.writers]
+        for targets, record, text in items:
+            line = self._format(record, text)
+            for index in targets:
+                lines[index].append(line)
+        for index, chunk in enumerate(lines):
+            if not chunk:
+                continue
+            try:
+                self.writers[index].write("".join(chunk))
+            except OSError as e:
+                print(f"✗ Log write to {self.routes[index].path} failed: {str(e)}")
+
+    def _report_dropped(self) -> None:
+        if not self.dropped or not self.writers:
+            return
+        with self._drop_lock:
+            count, self.dropped = self.dropped, 0
+        notice = f"WARNING  | {time.strftime('%Y-%m-%d %H:%M:%S')} | {__name__} | {count} log records dropped (queue full)\n"
+        if self.fmt == "json":
+            notice = json.dumps({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "level": "WARNING", "name": __name__,
+                                 "message": f"{count} log records dropped (queue full)"}) + "\n"
+        self.writers[0].write(notice)
+
+    def _flush(self) -> None:
+        for writer in self.writers:
+            try:
+                writer.flush()
+            except OSError:
+                pass
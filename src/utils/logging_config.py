@@ -1,20 +1,24 @@
-"""Logging configuration using loguru"""
+"""Logging configuration using loguru
+
+loguru itself is imported on first use: it pulls in asyncio and
+multiprocessing, which cost more than the rest of CLI startup together,
+and ``--help`` never logs.
+"""
 
 import os
 import sys
+import threading
 from pathlib import Path
-from loguru import logger
+from typing import TYPE_CHECKING, List
 
-# Remove default handler
-logger.remove()
+if TYPE_CHECKING:
+    from .log_sink import LogRoute
 
 # Get logging configuration from environment
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 
-# Create logs directory if it doesn't exist
 logs_dir = Path("logs")
-logs_dir.mkdir(exist_ok=True)
 
 # Console output format
 console_format = (
@@ -23,73 +27,90 @@ console_format = (
     "<level>{message}</level>"
 )
 
-# File output format
-file_format = (
-    "<level>{level: <8}</level> | "
-    "{time:YYYY-MM-DD HH:mm:ss} | "
-    "<cyan>{name}:{function}:{line}</cyan> | "
-    "<level>{message}</level>"
-)
-
-# Console handler (stdout)
-logger.add(
-    sys.stdout,
-    format=console_format,
-    level=LOG_LEVEL,
-    colorize=True,
-)
-
-# File handler - general logs
-logger.add(
-    logs_dir / "app.log",
-    format=file_format,
-    level=LOG_LEVEL,
-    rotation="100 MB",  # Rotate when file reaches 100MB
-    retention="7 days",  # Keep logs for 7 days
-    compression="zip"  # Compress old logs to ZIP
-)
-
-# File handler - scraper logs
-logger.add(
-    logs_dir / "scraper.log",
-    format=file_format,
-    level=LOG_LEVEL,
-    filter=lambda record: "scraper" in record.get("name", "").lower(),
-    rotation="100 MB",
-    retention="7 days",
-    compression="zip"
-)
-
-# File handler - database logs
-logger.add(
-    logs_dir / "database.log",
-    format=file_format,
-    level=LOG_LEVEL,
-    filter=lambda record: "database" in record.get("name", "").lower(),
-    rotation="100 MB",
-    retention="7 days",
-    compression="zip"
-)
-
-# File handler - error logs
-logger.add(
-    logs_dir / "errors.log",
-    format=file_format,
-    level="ERROR",
-    rotation="100 MB",
-    retention="30 days",
-    compression="zip"
-)
+# Log file sink settings: asynchronous writer thread with a bounded queue
+# ("block" = backpressure, "drop" = discard below ERROR when full) and
+# "text" or "json" (JSON lines) output
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() == "true"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_QUEUE_POLICY = os.getenv("LOG_QUEUE_POLICY", "block").lower()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+class _DeferredLogger:
+    """Stands in for ``loguru.logger`` until an attribute is first used"""
+
+    def __getattr__(self, name: str):
+        from loguru import logger as loguru_logger
+        return getattr(loguru_logger, name)
+
+    def __repr__(self) -> str:
+        return "<deferred loguru logger>"
+
+
+logger = _DeferredLogger()
+
+
+def log_routes() -> List["LogRoute"]:
+    """Log files and the records each one receives"""
+    from .log_sink import LogRoute
+    level = logger.level(LOG_LEVEL).no
+    suffix = ".jsonl" if LOG_FORMAT == "json" else ".log"
+    routes = [
+        # General logs: rotate at 100 MB, keep 7 days, zip rotated files
+        LogRoute(str(logs_dir / f"app{suffix}"), level=level),
+        LogRoute(str(logs_dir / f"scraper{suffix}"), level=level, name_contains="scraper"),
+        LogRoute(str(logs_dir / f"database{suffix}"), level=level, name_contains="database"),
+        LogRoute(str(logs_dir / f"errors{suffix}"), level=logger.level("ERROR").no, retention_days=30),
+    ]
+    # Debug mode - add more verbose logging
+    if DEBUG:
+        routes.append(LogRoute(str(logs_dir / f"debug{suffix}"), level=logger.level("DEBUG").no,
+                               retention_days=None, compress=False))
+    return routes
+
+
+def setup_logging() -> None:
+    """Install the console handler and the routed file sink (idempotent)
+
+    Called by the CLI before a command runs rather than at import, so
+    ``--help`` and library imports pay nothing. Log files are created on
+    their first message.
+    """
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        _configured = True
+        from .log_sink import RoutedLogSink
+
+        # Remove default handler
+        logger.remove()
+
+        # Console handler (stdout)
+        logger.add(
+            sys.stdout,
+            format=console_format,
+            level=LOG_LEVEL,
+            colorize=True,
+        )
+
+        # File handlers - one loguru sink routing to app/scraper/database/errors logs
+        file_sink = RoutedLogSink(
+            log_routes(),
+            fmt=LOG_FORMAT,
+            asynchronous=LOG_ASYNC,
+            queue_size=LOG_QUEUE_SIZE,
+            policy=LOG_QUEUE_POLICY,
+        )
+        logger.add(
+            file_sink,
+            format="{message}",  # Lines are formatted on the writer thread
+            level=file_sink.min_level,
+        )
 
-# Debug mode - add more verbose logging
-if DEBUG:
-    logger.add(
-        logs_dir / "debug.log",
-        format=file_format,
-        level="DEBUG",
-        backtrace=True,  # Include full stack traces
-        diagnose=True  # Include local variables in errors
-    )
 
 # Suppress verbose third-party loggers
 logging_config = {
@@ -106,9 +127,10 @@ logging_config = {
 
 
 def get_logger(name: str):
-    """Get a logger instance"""
+    """Get a logger instance (configures handlers on first use)"""
+    setup_logging()
     return logger.bind(name=name)
 
 
 # Export main logger
-__all__ = ["logger", "get_logger"]
+__all__ = ["logger", "get_logger", "setup_logging"]
@@ -0,0 +1,103 @@
+"""Unit tests for the encrypted credential store"""
+
+import json
+import multiprocessing
+import os
+
+import pytest
+from src.utils.credentials import CredentialManager
+
+
+@pytest.fixture
+def key():
+    return CredentialManager.generate_key()
+
+
+@pytest.fixture
+def manager(tmp_path, key):
+    manager = CredentialManager(key)
+    manager.creds_file = tmp_path / "config" / "encrypted_creds.json"
+    return manager
+
+
+def new_manager(path, key):
+    manager = CredentialManager(key)
+    manager.creds_file = path
+    return manager
+
+
+def update_many(path, key, worker, count):
+    manager = new_manager(path, key)
+    for n in range(count):
+        manager.update_credential(f"worker{worker}_{n}", f"secret {n}")
+
+
+class TestCredentialManager:
+    """Test caching, invalidation and atomic updates"""
+
+    def test_round_trip(self, manager):
+        manager.save_credentials({"linkedin_email": "me@example.com", "linkedin_password": "hunter2"})
+        manager.update_credential("indeed_password", "swordfish")
+        manager.delete_credential("linkedin_email")
+
+        assert manager.get_credential("linkedin_password") == "hunter2"
+        assert manager.get_credential("linkedin_email", "none") == "none"
+        assert manager.load_credentials() == {"linkedin_password": "hunter2", "indeed_password": "swordfish"}
+        stored = json.loads(manager.creds_file.read_text())
+        assert "hunter2" not in stored["linkedin_password"]
+        assert list(manager.creds_file.parent.glob("*.tmp")) == []
+
+    def test_lookups_hit_cache_and_decrypt_lazily(self, manager, monkeypatch):
+        manager.creds_file.parent.mkdir(parents=True)
+        manager.creds_file.write_text(json.dumps({f"key{n}": manager.encrypt(f"value{n}") for n in range(20)}))
+
+        decrypted = []
+        original = CredentialManager.decrypt
+        monkeypatch.setattr(CredentialManager, "decrypt",
+                            lambda self, token: decrypted.append(token) or original(self, token))
+        reads = []
+        monkeypatch.setattr(json, "load", lambda f, _load=json.load: reads.append(f) or _load(f))
+
+        for _ in range(100):
+            assert manager.get_credential("key3") == "value3"
+        assert new_manager(manager.creds_file, manager.encryption_key).get_credential("key3") == "value3"
+        assert len(reads) == 1
+        assert len(decrypted) == 1
+
+    def test_reloads_when_file_changes(self, manager, key):
+        manager.save_credentials({"password": "old"})
+        assert manager.get_credential("password") == "old"
+
+        # Another process rewrites the file behind this one's back
+        other = new_manager(manager.creds_file, key)
+        encrypted = {"password": other.encrypt("new")}
+        tmp = manager.creds_file.with_name("replacement.json")
+        tmp.write_text(json.dumps(encrypted))
+        os.replace(tmp, manager.creds_file)
+
+        assert manager.get_credential("password") == "new"
+
+    def test_corrupt_value_returns_default(self, manager):
+        manager.creds_file.parent.mkdir(parents=True)
+        manager.creds_file.write_text(json.dumps({"password": "not-a-fernet-token"}))
+        assert manager.get_credential("password", "fallback") == "fallback"
+        assert manager.load_credentials() == {}
+
+    def test_missing_file(self, manager):
+        assert manager.get_credential("password") is None
+        assert manager.load_credentials() == {}
+
+    def test_concurrent_writers_keep_every_update(self, manager, key):
+        manager.save_credentials({})
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=update_many, args=(manager.creds_file, key, worker, 15))
+                   for worker in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+            assert worker.exitcode == 0
+
+        creds = manager.load_credentials()
+        assert len(creds) == 60
+        assert creds["worker3_14"] == "secret 14"
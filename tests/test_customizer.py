@@ -2,6 +2,13 @@
 
 import pytest
 from pathlib import Path
+from src.customizer import batch_recommender
+from src.customizer.batch_recommender import BatchRecommender
+from src.customizer.jd_compactor import (
+    COMPACTOR_VERSION, compact_description, compaction_row, parse_heading, stored_compaction,
+)
+from src.customizer.keyword_matcher import KeywordMatcher
+from src.customizer.pdf_renderer import PDF_STYLES, PDFRenderer, markdown_to_html, render_key
 from src.customizer.template_manager import TemplateManager, ResumeTemplate, template_manager
 from src.customizer import ResumeCustomizer
 
@@ -244,5 +251,335 @@ class TestResumeCustomizer:
         assert len(content) > 0
 
 
+class TestKeywordMatcher:
+    """Test single-pass keyword and role matching"""
+
+    def test_word_boundaries(self):
+        """Test keywords match whole words only"""
+        match = template_manager.match_job("Engineer", "Manage Kubernetes nodes; Node.js and full-stack web work")
+
+        assert "node" in match.keyword_hits
+        assert match.keyword_hits["node"] == 1  # "Node.js", not "nodes"
+        assert "full-stack" in match.keyword_hits
+        assert template_manager.match_job("Engineer", "nodes and webhooks").keywords_match == {}
+
+    def test_overlapping_and_prefix_matches(self):
+        """Test overlapping keywords and roles are all counted"""
+        templates = [
+            ResumeTemplate("a.md", "A", ["Big Data Engineer"], "", ["big data", "data engineer", "data"], 0),
+            ResumeTemplate("b.md", "B", ["Data Engineer"], "", ["engineer"], 0),
+        ]
+        match = KeywordMatcher(templates).match("Big Data Engineer", "data data engineer")
+
+        assert match.keyword_hits == {"big data": 1, "data engineer": 2, "data": 3, "engineer": 2}
+        assert match.role_hits == {"big data engineer": 1, "data engineer": 1}
+        assert match.scores == {"a.md": 10 + 3 * 2, "b.md": 10 + 2}
+
+    def test_scores_match_recommendations(self):
+        """Test recommend_templates ranks by the matcher's scores"""
+        title, description = "Data Engineer", "Spark and Hadoop ETL pipeline for the data warehouse"
+        match = template_manager.match_job(title, description)
+        recommended = template_manager.recommend_templates(title, description, top_n=4)
+
+        assert [t.filename for t in recommended] == [name for name, _ in match.ranked(4)]
+        assert match.scores["resume_data_engineer.md"] == 10 + 6 * 2 + 2  # Role, 6 keywords, priority
+        assert list(match.keywords_match) == sorted(match.keywords_match, key=match.keyword_hits.get, reverse=True)
+
+
+class TestBatchRecommender:
+    """Test batch scoring against the per-job matcher"""
+
+    JOBS = [
+        ("Senior Data Engineer", "Build ETL pipelines with Spark, Hadoop & big-data tooling; data warehouse (Snowflake)."),
+        ("Solution Architect", "Enterprise architecture • system design • technical leadership • solution reviews"),
+        ("Full Stack Developer", "React/TypeScript frontend, Node.js backend; full-stack web apps. Not nodes."),
+        ("Management Consultant", "Client-facing strategy and stakeholder advisory; project management"),
+        ("Barista", "Coffee, latte art and customer_service; café hours"),
+        ("", ""),
+    ]
+
+    def test_reproduces_match_job_scores(self):
+        """Test unweighted batch scores and keyword counts equal match_job for every job"""
+        batch = template_manager.score_jobs(self.JOBS)
+
+        for i, (title, description) in enumerate(self.JOBS):
+            match = template_manager.match_job(title, description)
+            assert dict(zip(batch.filenames, batch.scores[i].tolist())) == match.scores
+            assert batch.keywords_match(i) == match.keywords_match
+
+    def test_recommendations_match_per_job(self):
+        """Test recommend_templates_batch ranks like recommend_templates"""
+        batch = template_manager.recommend_templates_batch(self.JOBS, top_n=2)
+        single = [template_manager.recommend_templates(title, description, top_n=2) for title, description in self.JOBS]
+        assert batch == single
+
+    def test_accepts_job_dicts_and_objects(self):
+        """Test jobs can be dicts or objects with title/description"""
+        class Job:
+            title, description = self.JOBS[0]
+
+        batch = template_manager.score_jobs([{"title": self.JOBS[0][0], "description": self.JOBS[0][1]}, Job()])
+        assert batch.scores[0].tolist() == batch.scores[1].tolist()
+
+    def test_weighting_favours_distinctive_keywords(self):
+        """Test TF-IDF and BM25 weigh a keyword found in every job below a rare one"""
+        templates = [
+            ResumeTemplate("common.md", "Common", ["Nobody"], "", ["python"], 0),
+            ResumeTemplate("rare.md", "Rare", ["Nobody"], "", ["kafka"], 0),
+        ]
+        jobs = [("Engineer", "python kafka")] + [("Engineer", f"python job {n}") for n in range(9)]
+        recommender = BatchRecommender(templates)
+
+        assert recommender.score(jobs).scores[0].tolist() == [2, 2]
+        for weighting in ("tfidf", "bm25"):
+            common, rare = recommender.score(jobs, weighting).scores[0]
+            assert rare > common > 0
+
+    @pytest.mark.parametrize("weighting", batch_recommender.WEIGHTINGS)
+    def test_python_fallback_matches_numpy(self, monkeypatch, weighting):
+        """Test the scores without NumPy (and without SciPy) equal the vectorized ones"""
+        recommender = BatchRecommender(template_manager.list_templates().values())
+        vectorized = recommender.score(self.JOBS, weighting)
+        expected = [score for row in vectorized.scores.tolist() for score in row]
+        expected_top = vectorized.top(2)
+
+        monkeypatch.setattr(batch_recommender, "sparse", None)
+        dense = recommender.score(self.JOBS, weighting)
+        assert [score for row in dense.scores.tolist() for score in row] == pytest.approx(expected)
+        monkeypatch.setattr(batch_recommender, "np", None)
+        fallback = recommender.score(self.JOBS, weighting)
+        assert [score for row in fallback.scores for score in row] == pytest.approx(expected)
+        assert fallback.top(2) == expected_top
+
+    def test_unknown_weighting(self):
+        """Test an unknown weighting is rejected"""
+        with pytest.raises(ValueError):
+            template_manager.score_jobs(self.JOBS, weighting="bm42")
+
+
+class TestJDCompactor:
+    """Test job description compaction"""
+
+    DESCRIPTION = (
+        "Acme is a fast-growing leader in cloud data solutions trusted by 500 customers worldwide. "
+        "Founded in 2012, we have offices in Singapore, Sydney and London.\n\n"
+        "What you'll do:\n"
+        "• Build batch and streaming pipelines on Spark and Kafka\n"
+        "• Own the dbt models and the Snowflake warehouse\n"
+        "• Build batch and streaming pipelines on Spark and Kafka.\n\n"
+        "Requirements:\n"
+        "- 5+ years of data engineering experience\n"
+        "- Strong Python and SQL\n\n"
+        "**What we offer**\n"
+        "- Competitive salary and annual bonus\n"
+        "- Flexible hours, hybrid work and 20 days annual leave\n"
+        "- Health, dental and vision insurance for you and your family\n\n"
+        "ABOUT US\n"
+        "We were named one of the best places to work in 2023. We value curiosity and ownership.\n\n"
+        "Acme is an equal opportunity employer. All applicants are considered without regard to race, "
+        "religion or disability. Only shortlisted candidates will be contacted.\n"
+    )
+
+    def test_keeps_requirements_and_responsibilities(self):
+        """Test the intro, benefits, company and EEO text are dropped and repeats removed"""
+        compacted = compact_description(self.DESCRIPTION)
+
+        assert compacted.text == (
+            "What you'll do:\n"
+            "- Build batch and streaming pipelines on Spark and Kafka\n"
+            "- Own the dbt models and the Snowflake warehouse\n\n"
+            "Requirements:\n"
+            "- 5+ years of data engineering experience\n"
+            "- Strong Python and SQL"
+        )
+        assert compacted.kept == ["responsibilities", "requirements"]
+        assert compacted.dropped == ["intro", "benefits", "company"]
+        assert compacted.duplicates == 1
+        assert 0.4 <= compacted.reduction <= 0.8
+        assert compact_description(compacted.text).text == compacted.text  # Idempotent
+
+    def test_unstructured_description(self):
+        """Test text without sections keeps everything except boilerplate and repeats"""
+        compacted = compact_description(
+            "We are hiring a backend engineer. You will build APIs in Go. You will build APIs in Go!\n"
+            "We are an equal opportunity employer. Click Apply to submit your CV.\n\nThe team ships weekly."
+        )
+        assert compacted.text == "We are hiring a backend engineer. You will build APIs in Go.\nThe team ships weekly."
+        assert (compacted.boilerplate, compacted.duplicates) == (2, 1)
+        assert compact_description("").text == ""
+
+    def test_unmarked_requirement_lines_are_kept(self):
+        """Test short unbulleted lines with section keywords are content, not empty headings"""
+        compacted = compact_description(
+            "Requirements\nStrong SQL skills\nExperience with Airflow and dbt\nPython and Spark\n"
+            "Kubernetes experience a plus"
+        )
+        lines = compacted.text.splitlines()
+        assert "Strong SQL skills" in lines
+        assert "Kubernetes experience a plus" in lines
+        assert compacted.dropped == []
+
+    def test_heading_without_content_is_kept(self):
+        """Test a marked heading directly followed by another heading stays in the text"""
+        compacted = compact_description("## Requirements\nSkills:\n- Airflow and dbt")
+        assert compacted.text == "Requirements\n\nSkills:\n- Airflow and dbt"
+
+    def test_heading_detection(self):
+        """Test which lines count as section headings"""
+        assert parse_heading("## Key Responsibilities") == "Key Responsibilities"
+        assert parse_heading("**Benefits:**") == "Benefits"
+        assert parse_heading("Who you are:") == "Who you are"
+        assert parse_heading("ABOUT US") == "ABOUT US"
+        assert parse_heading("Nice to have:") == "Nice to have"
+        assert parse_heading("Nice to have") is None  # Unmarked keyword lines are content
+        assert parse_heading("Strong SQL skills") is None
+        assert parse_heading("- Experience with Spark") is None
+        assert parse_heading("You will own our data platform and its roadmap.") is None
+
+    def test_stored_compaction_validation(self):
+        """Test stored compactions are reused only for the same description and version"""
+        compacted = compact_description(self.DESCRIPTION)
+        row = compaction_row("job1", self.DESCRIPTION, compacted)
+
+        assert stored_compaction(row, self.DESCRIPTION).text == compacted.text
+        assert stored_compaction(row, self.DESCRIPTION + " Remote.") is None
+        assert stored_compaction({**row, "version": COMPACTOR_VERSION + 1}, self.DESCRIPTION) is None
+        assert stored_compaction(None, self.DESCRIPTION) is None
+
+
+def weasyprint_available() -> bool:
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError):  # OSError: Pango is not installed
+        return False
+    return True
+
+
+class TestPDFRenderer:
+    """Test markdown → PDF rendering and the rendered-PDF cache"""
+
+    RESUME = "# Jane Doe\n\n## Skills\n\n- Python\n- Spark\n"
+
+    def test_markdown_to_html(self):
+        """Test the HTML document handed to WeasyPrint"""
+        html = markdown_to_html(self.RESUME, title="Jane <Doe>")
+
+        assert "<title>Jane &lt;Doe&gt;</title>" in html
+        assert "<h1>Jane Doe</h1>" in html
+        assert "<li>Spark</li>" in html
+
+    def test_title_comes_from_the_markdown(self):
+        """Test the PDF title depends only on the content, so one cached render fits every output path"""
+        assert "<title>Jane Doe</title>" in markdown_to_html(self.RESUME)
+        assert "<title>Resume</title>" in markdown_to_html("## Skills\n\n- Python\n")
+
+    def test_render_key(self):
+        """Test that keys change with the content and the stylesheet only"""
+        key = render_key(self.RESUME, PDF_STYLES["simple"])
+
+        assert key == render_key(self.RESUME, PDF_STYLES["simple"])
+        assert key != render_key(self.RESUME + "- SQL\n", PDF_STYLES["simple"])
+        assert key != render_key(self.RESUME, PDF_STYLES["professional"])
+
+    def test_cached_documents_skip_workers(self, tmp_path):
+        """Test that cached and duplicate documents are copied without starting the pool"""
+        renderer = PDFRenderer(style="simple", workers=1, cache_dir=tmp_path / "cache")
+        renderer.cache.put(render_key(self.RESUME, renderer.css), b"%PDF-cached")
+
+        summary = renderer.render_batch([(self.RESUME, tmp_path / "a.pdf"), (self.RESUME, tmp_path / "b/b.pdf")])
+
+        assert (summary["documents"], summary["cached"], summary["rendered"], summary["failed"]) == (2, 2, 0, 0)
+        assert (tmp_path / "a.pdf").read_bytes() == (tmp_path / "b/b.pdf").read_bytes() == b"%PDF-cached"
+        assert renderer._pool is None
+
+    def test_unknown_style(self, tmp_path):
+        with pytest.raises(ValueError):
+            PDFRenderer(style="fancy", cache_dir=tmp_path)
+
+    @pytest.mark.skipif(not weasyprint_available(), reason="WeasyPrint (or Pango) is not installed")
+    def test_renders_batch_once(self, tmp_path):
+        """Test rendering in the worker pool and that a second batch comes from the cache"""
+        documents = [(self.RESUME, tmp_path / "one.pdf"), (self.RESUME + "- SQL\n", tmp_path / "two.pdf"),
+                     (self.RESUME, tmp_path / "copy.pdf")]
+        with PDFRenderer(style="simple", workers=2, cache_dir=tmp_path / "cache") as renderer:
+            first = renderer.render_batch(documents)
+            second = renderer.render_batch(documents)
+
+        assert (first["rendered"], first["cached"], first["failed"]) == (2, 1, 0)
+        assert first["pages"] == 2 and first["pages_per_second"] > 0
+        assert (second["rendered"], second["cached"]) == (0, 3)
+        assert (tmp_path / "one.pdf").read_bytes().startswith(b"%PDF")
+
+
+class TestTemplateCache:
+    """Test cached, parsed templates"""
+
+    RESUME = (
+        "# Jane Doe\n"
+        "jane@example.com\n\n"
+        "## Professional Summary\n"
+        "Consultant with 10 years of experience.\n\n"
+        "## Work Experience\n"
+        "### Acme Corp\n"
+        "- Led strategy projects\n"
+        "```\n# not a heading\n```\n"
+        "### Globex\n"
+        "- Built data pipelines\n\n"
+        "## Technical Skills\n"
+        "Python, Spark, SQL\n"
+    )
+
+    @pytest.fixture
+    def manager(self, tmp_path):
+        (tmp_path / "resume_consultant.md").write_text(self.RESUME, encoding="utf-8")
+        return TemplateManager(input_dir=str(tmp_path))
+
+    def test_parses_sections(self, manager):
+        """Test the section tree and well-known sections"""
+        template = manager.get_template("resume_consultant.md")
+
+        assert [s.title for s in template.sections] == ["Jane Doe"]
+        assert [s.kind for s in template.sections[0].children] == ["summary", "experience", "skills"]
+        experience = template.section("experience")
+        assert [c.title for c in experience.children] == ["Acme Corp", "Globex"]
+        assert template.section_text("summary") == "Consultant with 10 years of experience."
+        assert "# not a heading" in template.section_text("experience")
+        assert template.section_text("skills", include_heading=True) == "## Technical Skills\nPython, Spark, SQL"
+        assert template.section_text("education") == ""
+        assert len(template.sha256) == 64
+
+    def test_repeated_loads_read_once(self, manager):
+        """Test validating and loading a template for many jobs reads the file once"""
+        for _ in range(100):
+            assert manager.validate_template("resume_consultant.md")
+            assert manager.load_template("resume_consultant.md") == self.RESUME
+        assert manager.cache.reads == 1
+
+    def test_picks_up_edits(self, manager):
+        """Test a changed file is reparsed, and reload() refreshes unwatched caches"""
+        path = manager.input_dir / "resume_consultant.md"
+        first = manager.get_template("resume_consultant.md")
+        path.write_text(self.RESUME + "\n## Education\nBSc\n", encoding="utf-8")
+        second = manager.get_template("resume_consultant.md")
+        assert second.sha256 != first.sha256
+        assert second.section_text("education") == "BSc"
+
+        unwatched = TemplateManager(input_dir=str(manager.input_dir), watch=False)
+        unwatched.get_template("resume_consultant.md")
+        path.write_text("# Edited\n", encoding="utf-8")
+        assert unwatched.load_template("resume_consultant.md") != "# Edited\n"
+        unwatched.reload("resume_consultant.md")
+        assert unwatched.load_template("resume_consultant.md") == "# Edited\n"
+
+    def test_missing_template(self, manager):
+        """Test a deleted template is evicted and reported as missing"""
+        manager.get_template("resume_consultant.md")
+        (manager.input_dir / "resume_consultant.md").unlink()
+        assert manager.validate_template("resume_consultant.md") is False
+        with pytest.raises(FileNotFoundError):
+            manager.load_template("resume_consultant.md")
+        assert len(manager.cache) == 0
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
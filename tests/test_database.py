@@ -1,11 +1,24 @@
 """Unit tests for database models"""
 
+import asyncio
 import pytest
 import os
+import threading
+import signal
+import time
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert, inspect, select, text
 from sqlalchemy.orm import sessionmaker
-from src.database.models import Base, Job, Application, ApplicationLog
+from src.database.models import Base, Job, Application, ApplicationLog, StatCounter
+from src.database.engine import DatabaseManager, create_db_engine
+from src.database.compression import CompressedText, decompress
+from src.database.search import to_fts5_query
+from src.database.writer import WriteQueue
+from src.database.log_writer import ApplicationLogSink
+from src.database.archive import load_threshold_days
+from src.database.pagination import keyset_after
+from src.database.dedup import estimate_similarity, minhash_signature
+from src.database.profiling import instrument_engine, load_stats, normalize_sql
 
 
 @pytest.fixture
@@ -20,6 +33,12 @@ def db_engine():
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def db_manager(db_engine):
+    """DatabaseManager bound to the in-memory test database"""
+    return DatabaseManager(bind=db_engine)
+
+
 @pytest.fixture
 def db_session(db_engine):
     """Create a new database session for tests"""
@@ -376,5 +395,1091 @@ class TestRelationships:
         assert len(retrieved_app.logs) == 3
 
 
+def make_job_row(n: int, **overrides) -> dict:
+    """Build a scraped job dict for bulk ingestion tests"""
+    row = {
+        "url": f"https://example.com/job/{n}",
+        "company": f"Company {n}",
+        "title": "Data Engineer",
+        "location": "Remote",
+        "description": f"Build pipelines #{n}",
+        "source": "linkedin",
+    }
+    row.update(overrides)
+    return row
+
+
+class TestBulkUpsert:
+    """Test DatabaseManager.bulk_upsert_jobs"""
+
+    @pytest.mark.parametrize("dialect_module, expected", [
+        ("sqlite.pysqlite", "VALUES (?, ?, ?), (?, ?, ?))"),
+        ("postgresql.psycopg2", "VALUES (%s, %s, %s), (%s, %s, %s))"),
+        ("postgresql.asyncpg", "VALUES ($1, $2, $3), ($4, $5, $6))"),
+    ])
+    def test_posting_key_lookup_uses_driver_markers(self, dialect_module, expected):
+        """Test that the raw VALUES lookup is written in each driver's paramstyle (asyncpg: $n)"""
+        import importlib
+        from src.database.upsert import _posting_key_sql
+
+        dialect = importlib.import_module(f"sqlalchemy.dialects.{dialect_module}").dialect()
+        assert expected in _posting_key_sql(dialect, 2)
+
+    @pytest.mark.parametrize("dialect_module, expected", [
+        ("sqlite.pysqlite", "VALUES (?, ?, ?)"),
+        ("postgresql.psycopg2", "VALUES (%s, %s, %s)"),
+        ("postgresql.asyncpg", "VALUES ($1, $2, $3)"),
+    ])
+    def test_upsert_uses_driver_markers(self, dialect_module, expected):
+        """Test that the driver-level upsert is written in each driver's paramstyle"""
+        import importlib
+        from src.database.upsert import _upsert_sql
+
+        dialect = importlib.import_module(f"sqlalchemy.dialects.{dialect_module}").dialect()
+        sql = _upsert_sql(dialect, ("id", "url", "title"))
+        assert expected in sql
+        assert "ON CONFLICT (id) DO UPDATE SET url = excluded.url" in sql
+
+    def test_inserts_new_jobs(self, db_manager, db_session):
+        """Test that new rows are inserted with generated IDs"""
+        result = db_manager.bulk_upsert_jobs([make_job_row(n) for n in range(25)], chunk_size=10)
+
+        assert result == {"inserted": 25, "updated": 0, "unchanged": 0, "skipped": 0}
+        assert db_session.query(Job).count() == 25
+        expected_id = Job.generate_id("https://example.com/job/3", "Company 3", "Data Engineer", "Remote")
+        assert db_session.get(Job, expected_id) is not None
+
+    def test_reports_updated_and_unchanged(self, db_manager, db_session):
+        """Test that re-ingesting rows only rewrites the ones that changed"""
+        db_manager.bulk_upsert_jobs([make_job_row(n) for n in range(3)])
+
+        result = db_manager.bulk_upsert_jobs([
+            make_job_row(0),
+            make_job_row(1, description="Updated description"),
+            make_job_row(3),
+        ])
+
+        assert result == {"inserted": 1, "updated": 1, "unchanged": 1, "skipped": 0}
+        job = db_session.query(Job).filter_by(url="https://example.com/job/1").one()
+        assert job.description == "Updated description"
+
+    def test_duplicate_url_updates_existing_row(self, db_manager, db_session):
+        """Test that a repost on the same URL updates instead of violating the unique index"""
+        db_manager.bulk_upsert_jobs([make_job_row(1)])
+        result = db_manager.bulk_upsert_jobs([make_job_row(1, title="Senior Data Engineer")])
+
+        assert result["updated"] == 1
+        assert db_session.query(Job).count() == 1
+        assert db_session.query(Job).one().title == "Senior Data Engineer"
+
+    def test_duplicates_within_batch_are_merged(self, db_manager, db_session):
+        """Test that the same posting twice in one call produces one row"""
+        result = db_manager.bulk_upsert_jobs([
+            make_job_row(1),
+            make_job_row(1, url="https://example.com/job/1?ref=feed"),
+        ])
+
+        assert result == {"inserted": 1, "updated": 1, "unchanged": 0, "skipped": 0}
+        assert db_session.query(Job).count() == 1
+
+    def test_large_chunks_batch_trigger_work(self, db_manager, db_engine):
+        """Test that chunks writing counters and FTS rows themselves leave them as the triggers would"""
+        db_manager.bulk_upsert_jobs([make_job_row(n) for n in range(600)], chunk_size=300)
+        db_manager.bulk_upsert_jobs([make_job_row(n, description=f"Spark role #{n}") for n in range(300)]
+                                    + [make_job_row(n) for n in range(600, 610)]
+                                    + [make_job_row(610), make_job_row(610, url="https://example.com/job/610?ref=feed")],
+                                    chunk_size=400)
+
+        assert db_manager.get_stats()["total_jobs"] == 611
+        assert len(db_manager.search_jobs("spark", limit=1000)) == 300
+        assert len(db_manager.search_jobs("pipelines", limit=1000)) == 311
+        with db_engine.begin() as connection:
+            triggers = {row[0] for row in connection.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))}
+            connection.execute(text("INSERT INTO jobs_fts (jobs_fts, rank) VALUES ('integrity-check', 1)"))
+        assert {"jobs_counter_insert", "jobs_fts_insert", "jobs_fts_update"} <= triggers
+
+    def test_missing_required_field(self, db_manager):
+        """Test that rows without required columns are rejected"""
+        row = make_job_row(1)
+        del row["source"]
+
+        with pytest.raises(ValueError):
+            db_manager.bulk_upsert_jobs([row])
+
+
+class TestStatCounters:
+    """Test trigger-maintained statistics counters"""
+
+    def _seed(self, db_session):
+        db_session.add(Job(id="job1", url="https://test.com", company="Corp", title="Role",
+                           location="City", source="linkedin"))
+        db_session.commit()
+        apps = [Application(job_id="job1", status=status) for status in ("queued", "queued", "applying", "failed")]
+        db_session.add_all(apps)
+        db_session.commit()
+        db_session.add(ApplicationLog(application_id=apps[0].id, event_type="started", message="Start"))
+        db_session.commit()
+        return apps
+
+    def test_counters_track_inserts(self, db_manager, db_session):
+        """Test that counters follow ORM inserts"""
+        self._seed(db_session)
+
+        assert db_manager.get_stats() == {
+            "total_jobs": 1,
+            "total_applications": 4,
+            "completed_applications": 0,
+            "failed_applications": 1,
+            "pending_applications": 3,
+            "total_logs": 1,
+        }
+
+    def test_counters_track_status_transitions_and_deletes(self, db_manager, db_session):
+        """Test that status changes and deletes move the counters"""
+        apps = self._seed(db_session)
+        apps[2].status = "completed"
+        db_session.delete(apps[3])
+        db_session.commit()
+
+        stats = db_manager.get_stats()
+        assert stats["completed_applications"] == 1
+        assert stats["failed_applications"] == 0
+        assert stats["pending_applications"] == 2
+        assert stats["total_applications"] == 3
+
+    def test_counters_track_bulk_upserts(self, db_manager):
+        """Test that Core bulk inserts are counted (ORM events would miss them)"""
+        db_manager.bulk_upsert_jobs([make_job_row(n) for n in range(10)])
+        db_manager.bulk_upsert_jobs([make_job_row(n, description="changed") for n in range(5)])
+
+        assert db_manager.get_stats()["total_jobs"] == 10
+
+    def test_recount_repairs_drift(self, db_manager, db_session):
+        """Test that recount_stats rebuilds drifted counters"""
+        self._seed(db_session)
+        db_session.query(StatCounter).filter_by(name="jobs").update({"value": 42})
+        db_session.commit()
+        assert db_manager.get_stats()["total_jobs"] == 42
+
+        counters = db_manager.recount_stats()
+
+        assert counters["jobs"] == 1
+        assert counters["applications.status.queued"] == 2
+        assert db_manager.get_stats()["total_jobs"] == 1
+
+
+class TestCompressedStorage:
+    """Test compressed, deferred Job.html_content storage"""
+
+    def test_large_html_is_compressed(self, db_engine, db_session):
+        """Test that large HTML round-trips and is stored compressed"""
+        html = "<div class='job'>" + "<p>Palantir Foundry and Spark</p>" * 500 + "</div>"
+        db_session.add(Job(id="job1", url="https://test.com", company="Corp", title="Role",
+                           location="City", source="linkedin", html_content=html))
+        db_session.commit()
+
+        with db_engine.connect() as connection:
+            stored = connection.execute(text("SELECT html_content FROM jobs")).scalar()
+        assert len(stored) < len(html) / 10
+        assert decompress(stored).decode() == html
+
+        db_session.expire_all()
+        assert db_session.get(Job, "job1").html_content == html
+
+    def test_small_values_stored_plain(self):
+        """Test that values under the threshold are not compressed"""
+        column_type = CompressedText(threshold=1024)
+        assert column_type.process_bind_param("short", None) == b"short"
+        assert column_type.process_result_value(b"short", None) == "short"
+        assert column_type.process_result_value("legacy text", None) == "legacy text"
+
+    def test_blob_columns_are_deferred(self, db_session):
+        """Test that loading jobs does not pull description or HTML"""
+        db_session.add(Job(id="job1", url="https://test.com", company="Corp", title="Role",
+                           location="City", source="linkedin", description="Long text", html_content="<p/>"))
+        db_session.commit()
+        db_session.expunge_all()
+
+        job = db_session.query(Job).one()
+        unloaded = inspect(job).unloaded
+        assert "description" in unloaded
+        assert "html_content" in unloaded
+        assert job.description == "Long text"
+
+    def test_recompress_legacy_rows(self, db_manager, db_engine):
+        """Test that compress-db rewrites plain TEXT rows and reports sizes"""
+        html = "<li>Build data pipelines</li>" * 200
+        with db_engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO jobs (id, url, company, title, location, source, html_content) "
+                "VALUES ('job1', 'https://test.com', 'Corp', 'Role', 'City', 'linkedin', :html)"
+            ), {"html": html})
+
+        result = db_manager.recompress_jobs(batch_size=10)
+
+        assert result["rows_scanned"] == 1
+        assert result["rows_rewritten"] == 1
+        assert result["size_before"] > 0
+        with db_engine.connect() as connection:
+            stored = connection.execute(text("SELECT html_content FROM jobs")).scalar()
+        assert isinstance(stored, bytes)
+        assert decompress(stored).decode() == html
+        assert db_manager.recompress_jobs()["rows_rewritten"] == 0
+
+
+class TestFullTextSearch:
+    """Test the FTS5-backed DatabaseManager.search_jobs"""
+
+    @pytest.fixture
+    def seeded(self, db_manager):
+        db_manager.bulk_upsert_jobs([
+            make_job_row(1, title="Data Engineer", description="Palantir Foundry pipelines in PySpark and Spark SQL"),
+            make_job_row(2, title="Foundry Consultant", company="Palantir",
+                         description="Deploy Foundry for clients; some Spark exposure"),
+            make_job_row(3, title="Frontend Engineer", description="React and TypeScript", source="indeed"),
+        ])
+        return db_manager
+
+    def test_search_ranks_matches(self, seeded):
+        """Test that all terms must match and results are ranked"""
+        results = seeded.search_jobs("Palantir Foundry and Spark")
+
+        assert {job["url"] for job in results} == {"https://example.com/job/1", "https://example.com/job/2"}
+        assert results[0]["score"] >= results[1]["score"]
+        assert results[0]["url"] == "https://example.com/job/2"  # Title and company hits weigh more
+
+    def test_search_stays_in_sync(self, seeded, db_session):
+        """Test that updates and deletes on jobs are reflected in the index"""
+        seeded.bulk_upsert_jobs([make_job_row(3, description="Now a Spark role", source="indeed")])
+        assert [job["url"] for job in seeded.search_jobs("react")] == []
+        assert len(seeded.search_jobs("spark")) == 3
+
+        db_session.query(Job).filter_by(url="https://example.com/job/1").delete()
+        db_session.commit()
+        assert len(seeded.search_jobs("spark")) == 2
+
+    def test_search_source_filter_and_vacuum(self, seeded):
+        """Test the source filter, and that the index survives VACUUM rowid renumbering"""
+        seeded.recompress_jobs()
+
+        results = seeded.search_jobs("spark OR react", source="indeed")
+        assert [job["url"] for job in results] == ["https://example.com/job/3"]
+
+    def test_fts5_query_escaping(self):
+        """Test that user input cannot break FTS5 syntax"""
+        assert to_fts5_query('C++ and "machine learning" OR node.js') == '"C++" "machine learning" OR "node.js"'
+        assert to_fts5_query("and") == ""
+
+
+class TestApplicationLogSink:
+    """Test the buffered ApplicationLog writer"""
+
+    @pytest.fixture
+    def db_engine(self, tmp_path):
+        """File database, so the flusher thread sees the same data as the test"""
+        engine = create_db_engine(f"sqlite:///{tmp_path}/logs.db", "production")
+        Base.metadata.create_all(bind=engine)
+        yield engine
+        engine.dispose()
+
+    @pytest.fixture
+    def application_id(self, db_session):
+        db_session.add(Job(id="job1", url="https://test.com", company="Corp", title="Role",
+                           location="City", source="linkedin"))
+        app = Application(job_id="job1", status="applying")
+        db_session.add(app)
+        db_session.commit()
+        return app.id
+
+    def _count(self, db_engine):
+        with db_engine.connect() as connection:
+            return connection.execute(text("SELECT COUNT(*) FROM application_logs")).scalar()
+
+    def test_flush_on_batch_size(self, db_engine, application_id):
+        """Test that reaching max_batch triggers a bulk insert"""
+        sink = ApplicationLogSink(db_engine, max_batch=10, flush_interval=60, install_signal_handlers=False)
+        for n in range(25):
+            sink.log_event(application_id, "field_filled", f"Field {n} filled", {"field": n})
+
+        deadline = time.monotonic() + 5
+        while self._count(db_engine) < 20 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert self._count(db_engine) >= 20
+        assert sink.queue_depth <= 5
+
+        sink.close()
+        assert self._count(db_engine) == 25
+        assert sink.stats()["events_flushed"] == 25
+
+    def test_flush_on_interval(self, db_engine, application_id):
+        """Test that a partial batch is written once flush_interval passes"""
+        with ApplicationLogSink(db_engine, max_batch=1000, flush_interval=0.05,
+                                install_signal_handlers=False) as sink:
+            sink.log_event(application_id, "started", "Application started")
+            deadline = time.monotonic() + 5
+            while sink.stats()["flushes"] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            stats = sink.stats()
+            assert stats["flushes"] == 1
+            assert stats["queue_depth"] == 0
+            assert stats["last_flush_ms"] > 0
+
+    def test_close_flushes_and_keeps_factory_shape(self, db_engine, db_session, application_id):
+        """Test that close() writes pending events, including prebuilt ApplicationLog objects"""
+        sink = ApplicationLogSink(db_engine, max_batch=1000, flush_interval=60, install_signal_handlers=False)
+        sink.add(ApplicationLog.log_event(application_id, "screenshot", "Captured", {"path": "a.png"}))
+        assert self._count(db_engine) == 0
+
+        sink.close()
+
+        log = db_session.query(ApplicationLog).one()
+        assert log.event_type == "screenshot"
+        assert log.event_metadata == {"path": "a.png"}
+        with pytest.raises(RuntimeError):
+            sink.log_event(application_id, "error", "After close")
+
+    def test_close_reports_events_it_cannot_write(self, db_engine, application_id):
+        """Test that close() retries a failed final flush once, then drops the events with an error"""
+        class FailingQueue:
+            calls = 0
+
+            def execute(self, func):
+                FailingQueue.calls += 1
+                raise OSError("disk full")
+
+        sink = ApplicationLogSink(db_engine, max_batch=1000, flush_interval=60, write_queue=FailingQueue(),
+                                  install_signal_handlers=False)
+        sink.log_event(application_id, "started", "Application started")
+        sink.log_event(application_id, "submitted", "Application submitted")
+        sink.close()
+
+        stats = sink.stats()
+        assert FailingQueue.calls == 2
+        assert stats["flush_failures"] == 2
+        assert stats["events_dropped"] == 2
+        assert stats["queue_depth"] == 0
+
+    def test_failed_flush_backs_off_and_caps_the_buffer(self, db_engine, application_id):
+        """Test that a full buffer does not retry in a tight loop and drops its oldest events past max_buffered"""
+        class FailingQueue:
+            calls = 0
+
+            def execute(self, func):
+                FailingQueue.calls += 1
+                raise OSError("database is locked")
+
+        sink = ApplicationLogSink(db_engine, max_batch=5, flush_interval=0.1, max_buffered=20,
+                                  write_queue=FailingQueue(), install_signal_handlers=False)
+        for n in range(30):
+            sink.log_event(application_id, "field_filled", f"Field {n} filled")
+        time.sleep(0.5)
+
+        assert FailingQueue.calls <= 4  # Retries after 0.1, 0.2 and 0.4 s, not continuously
+        assert sink.queue_depth == 20
+        assert sink.stats()["events_dropped"] == 10
+        with sink._condition:
+            assert sink._buffer[0]["message"] == "Field 10 filled"
+        sink.write_queue = None  # Database back: the next flush writes what is left
+        sink.close()
+        assert self._count(db_engine) == 20
+
+    def test_close_restores_signal_handlers(self, db_engine):
+        """Test that close() puts back the SIGTERM handler it replaced"""
+        previous = signal.getsignal(signal.SIGTERM)
+        sink = ApplicationLogSink(db_engine)
+        assert signal.getsignal(signal.SIGTERM) is not previous
+
+        sink.close()
+        assert signal.getsignal(signal.SIGTERM) is previous
+
+
+class TestStreamingIterators:
+    """Test keyset-paginated iter_jobs / iter_applications"""
+
+    @pytest.fixture
+    def many_jobs(self, db_session):
+        base = datetime(2025, 1, 1)
+        # Several jobs share a timestamp so the id tiebreak is exercised across batch boundaries
+        jobs = [Job(id=f"job{n:03d}", url=f"https://test.com/{n}", company=f"Corp {n}", title="Engineer",
+                    location="City", description=f"Posting {n}", source="linkedin" if n % 2 else "indeed",
+                    scraped_at=base + timedelta(hours=n // 3)) for n in range(25)]
+        db_session.add_all(jobs)
+        db_session.commit()
+        return jobs
+
+    def test_iter_jobs_visits_every_row_once_in_order(self, db_manager, many_jobs):
+        """Test that batches cover all rows in (scraped_at, id) order"""
+        jobs = list(db_manager.iter_jobs(batch_size=4))
+        assert [job.id for job in jobs] == [job.id for job in sorted(many_jobs, key=lambda j: (j.scraped_at, j.id))]
+
+    def test_iter_jobs_filters(self, db_manager, many_jobs):
+        """Test equality, IN and time range filters"""
+        linkedin = list(db_manager.iter_jobs({"source": "linkedin"}, batch_size=5))
+        assert len(linkedin) == 12 and all(job.source == "linkedin" for job in linkedin)
+        assert len(list(db_manager.iter_jobs({"id": ["job001", "job002"]}))) == 2
+
+        since = datetime(2025, 1, 1, 4)
+        assert all(job.scraped_at >= since for job in db_manager.iter_jobs(since=since, batch_size=3))
+        with pytest.raises(ValueError):
+            list(db_manager.iter_jobs({"salary": 1}))
+
+    def test_iter_jobs_description(self, db_manager, many_jobs):
+        """Test that the deferred description is only available when requested"""
+        job = next(iter(db_manager.iter_jobs(with_description=True)))
+        assert job.description == "Posting 0"
+
+    def test_iter_applications_by_status(self, db_manager, db_session, many_jobs):
+        """Test streaming applications by one or several statuses"""
+        statuses = ["queued", "completed", "queued", "failed", "queued"]
+        db_session.add_all([Application(job_id=f"job{n:03d}", status=status) for n, status in enumerate(statuses)])
+        db_session.commit()
+
+        assert len(list(db_manager.iter_applications(status="queued", batch_size=2))) == 3
+        assert len(list(db_manager.iter_applications(status=["completed", "failed"], batch_size=1))) == 2
+        assert len(list(db_manager.iter_applications())) == 5
+
+    def test_keyset_page_seeks_into_the_index(self, db_engine, many_jobs):
+        """Test that a later page is a range scan of (scraped_at, id), not a scan from the first row"""
+        table = Job.__table__
+        after = keyset_after(table.c.scraped_at, table.c.id, (datetime(2025, 1, 1, 4), "job012"))
+        page = (
+            select(table)
+            .where(table.c.scraped_at.isnot(None), after)
+            .order_by(table.c.scraped_at, table.c.id)
+            .limit(4)
+        )
+        with db_engine.connect() as connection:
+            compiled = page.compile(connection, compile_kwargs={"literal_binds": True})
+            plan = " ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}"))
+            ids = [row.id for row in connection.execute(page)]
+        assert "idx_job_scraped_id (scraped_at>?)" in plan
+        assert "TEMP B-TREE" not in plan
+        assert ids == ["job013", "job014", "job015", "job016"]
+
+
+class TestQueryProfiling:
+    """Test SQL statement timing and slow-query plan capture"""
+
+    def test_normalize_sql(self):
+        """Test that literals and parameter lists collapse into one shape"""
+        assert normalize_sql("SELECT * FROM jobs WHERE id IN (?, ?, ?) AND source = 'x'") == \
+            normalize_sql("SELECT *\n  FROM jobs WHERE id IN (?) AND source = 'linkedin'")
+        assert normalize_sql("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)") == "INSERT INTO t (a, b) VALUES (?)"
+        assert normalize_sql("SELECT * FROM jobs LIMIT 20 OFFSET 40") == "SELECT * FROM jobs LIMIT ? OFFSET ?"
+
+    def test_records_latency_per_shape(self, db_engine):
+        """Test that repeated statements with different parameters share a histogram"""
+        stats = instrument_engine(db_engine, slow_query_ms=1e9)
+        assert instrument_engine(db_engine) is stats
+        with db_engine.connect() as connection:
+            for n in range(3):
+                connection.execute(text("SELECT COUNT(*) FROM jobs WHERE company = :company"), {"company": f"c{n}"})
+
+        shape, shape_stats = stats.top(1, key="count")[0]
+        assert shape == "SELECT COUNT(*) FROM jobs WHERE company = ?"
+        assert shape_stats.count == 3
+        assert sum(shape_stats.buckets) == 3
+        assert shape_stats.percentile(0.95) > 0
+
+    def test_slow_query_captures_plan(self, db_engine):
+        """Test that statements over the threshold get their query plan captured"""
+        stats = instrument_engine(db_engine, slow_query_ms=0)
+        with db_engine.connect() as connection:
+            connection.execute(text("SELECT id FROM jobs WHERE url = :url"), {"url": "https://test.com"})
+
+        plan = stats.plans["SELECT id FROM jobs WHERE url = ?"]
+        assert "INDEX" in plan.upper()
+
+    def test_save_merges_runs(self, db_engine, tmp_path):
+        """Test that saved statistics accumulate across runs"""
+        path = str(tmp_path / "query_stats.json")
+        stats = instrument_engine(db_engine, slow_query_ms=1e9)
+        for _ in range(2):
+            with db_engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            stats.save(path)
+
+        assert load_stats(path).shapes["SELECT ?"].count == 2
+        assert stats.shapes == {}
+
+
+class TestWorkQueue:
+    """Test lease-based claim_next on the applications table"""
+
+    @pytest.fixture
+    def queued(self, db_session):
+        """Three queued applications; job 'fresh' was scraped most recently"""
+        now = datetime.utcnow()
+        for job_id, age in (("stale", 10), ("fresh", 0), ("middle", 5)):
+            db_session.add(Job(id=job_id, url=f"https://test.com/{job_id}", company=job_id, title="Engineer",
+                               location="City", source="linkedin", scraped_at=now - timedelta(days=age)))
+        apps = {job_id: Application(job_id=job_id, status="queued") for job_id in ("stale", "fresh", "middle")}
+        db_session.add_all(apps.values())
+        db_session.commit()
+        return {job_id: app.id for job_id, app in apps.items()}
+
+    def test_claims_by_priority_then_freshness(self, db_manager, db_session, queued):
+        """Test claim order and that claimed rows carry the lease"""
+        db_session.get(Application, queued["stale"]).priority = 5
+        db_session.commit()
+
+        order = [db_manager.claim_next("queued", "customizing", "w1").job_id for _ in range(3)]
+        assert order == ["stale", "fresh", "middle"]
+        assert db_manager.claim_next("queued", "customizing", "w1") is None
+
+        app = db_session.get(Application, queued["fresh"])
+        db_session.refresh(app)
+        assert app.status == "customizing"
+        assert app.lease_owner == "w1"
+        assert app.lease_expires_at > datetime.utcnow()
+
+    def test_expired_lease_is_reclaimed(self, db_manager, queued):
+        """Test that work abandoned by a dead worker becomes claimable again"""
+        for _ in range(3):
+            db_manager.claim_next("queued", "customizing", "dead-worker", lease_seconds=-1)
+
+        reclaimed = db_manager.claim_next("queued", "customizing", "w2")
+        assert reclaimed is not None
+        assert reclaimed.lease_owner == "w2"
+        assert not db_manager.release_application(reclaimed.id, "dead-worker", "ready")
+
+    def test_release_and_renew(self, db_manager, db_session, queued):
+        """Test that only the lease owner can renew or release"""
+        app = db_manager.claim_next("queued", "customizing", "w1")
+        assert db_manager.renew_lease(app.id, "w1", lease_seconds=60)
+        assert not db_manager.renew_lease(app.id, "w2")
+        assert db_manager.release_application(app.id, "w1", "failed", error_message="Timeout")
+
+        stored = db_session.get(Application, app.id)
+        assert (stored.status, stored.lease_owner, stored.error_message) == ("failed", None, "Timeout")
+        assert db_manager.get_stats()["failed_applications"] == 1
+
+    def test_set_resume_paths(self, db_manager, db_session, queued):
+        """Test pointing applications at rendered resumes"""
+        assert db_manager.set_resume_paths({queued["fresh"]: "out/fresh.pdf", queued["stale"]: "out/stale.pdf"}) == 2
+        assert db_manager.set_resume_paths({}) == 0
+
+        db_session.expire_all()
+        paths = {job_id: db_session.get(Application, app_id).tailored_resume_path for job_id, app_id in queued.items()}
+        assert paths == {"fresh": "out/fresh.pdf", "stale": "out/stale.pdf", "middle": None}
+
+    def test_parallel_workers_never_double_claim(self, tmp_path):
+        """Test that concurrent workers drain the queue with each application claimed once"""
+        manager = DatabaseManager(bind=create_db_engine(f"sqlite:///{tmp_path}/jobs.db", "production"))
+        manager.create_all_tables()
+        with manager.engine.begin() as connection:
+            connection.execute(insert(Job), [dict(make_job_row(n), id=f"job{n}") for n in range(60)])
+            connection.execute(insert(Application), [{"job_id": f"job{n}", "status": "queued"} for n in range(60)])
+
+        claimed = []
+
+        def worker(worker_id):
+            while True:
+                app = manager.claim_next("queued", "customizing", worker_id)
+                if app is None:
+                    return
+                claimed.append(app.id)
+
+        threads = [threading.Thread(target=worker, args=(f"w{n}",)) for n in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        manager.close()
+
+        assert sorted(claimed) == list(range(1, 61))
+
+    def test_upgrades_existing_table(self, tmp_path):
+        """Test that create_all adds the lease columns to an applications table created without them"""
+        engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                "CREATE TABLE applications (id INTEGER PRIMARY KEY, job_id VARCHAR(16) NOT NULL, "
+                "status VARCHAR(50) NOT NULL, created_at DATETIME, updated_at DATETIME)"
+            )
+        Base.metadata.create_all(bind=engine)
+
+        columns = {column["name"] for column in inspect(engine).get_columns("applications")}
+        assert {"priority", "lease_owner", "lease_expires_at"} <= columns
+        engine.dispose()
+
+
+DESCRIPTION = (
+    "We are looking for a data engineer to design and build scalable data pipelines on Palantir Foundry. "
+    "You will work with stakeholders to model data, write PySpark transforms, maintain ontology objects "
+    "and deploy production workflows for clients in the semiconductor industry. Experience with Python, "
+    "SQL and cloud platforms is required; consulting experience is a plus."
+)
+
+
+class TestNearDuplicates:
+    """Test MinHash/LSH near-duplicate detection and clustering"""
+
+    def test_signature_similarity(self):
+        """Test that near-identical text scores high and unrelated text low"""
+        a = minhash_signature(DESCRIPTION)
+        b = minhash_signature(DESCRIPTION.replace("a plus", "nice to have"))
+        c = minhash_signature("Senior nurse needed for night shifts at a busy city hospital emergency ward.")
+        assert estimate_similarity(a, a) == 1.0
+        assert estimate_similarity(a, b) > 0.8
+        assert estimate_similarity(a, c) < 0.2
+        assert minhash_signature("") is None
+
+    def test_reposts_share_a_cluster(self, db_manager):
+        """Test that cross-portal reposts are clustered at ingest"""
+        db_manager.bulk_upsert_jobs([
+            make_job_row(1, title="Data Engineer", description=DESCRIPTION, source="linkedin"),
+            make_job_row(2, title="Data Engineer (Foundry)", description=DESCRIPTION + " Apply now!",
+                         source="indeed", company="Company 1"),
+            make_job_row(3, title="Nurse", description="Night shift nurse for the emergency ward.",
+                         source="jobstreet"),
+        ])
+
+        jobs = {job.source: job for job in db_manager.iter_jobs()}
+        assert jobs["indeed"].cluster_id == jobs["linkedin"].cluster_id in (jobs["linkedin"].id, jobs["indeed"].id)
+        assert jobs["jobstreet"].cluster_id == jobs["jobstreet"].id
+        representatives = [job.id for job in db_manager.iter_jobs(representatives_only=True)]
+        assert sorted(representatives) == sorted([jobs["linkedin"].cluster_id, jobs["jobstreet"].id])
+
+        matches = db_manager.find_near_duplicates(jobs["linkedin"])
+        assert [match["id"] for match in matches] == [jobs["indeed"].id]
+        assert matches[0]["similarity"] >= 0.8
+        assert db_manager.count_clusters() == 2
+
+    def test_indexing_can_be_deferred(self, db_manager):
+        """Test that jobs upserted without indexing are no representatives until the index_near_duplicates pass"""
+        db_manager.bulk_upsert_jobs([
+            make_job_row(1, id="job1", description=DESCRIPTION),
+            make_job_row(2, id="job2", description=DESCRIPTION + " Apply now!", source="indeed"),
+        ], index_duplicates=False)
+        assert {job.cluster_id for job in db_manager.iter_jobs()} == {None}
+        assert list(db_manager.iter_jobs(representatives_only=True)) == []
+        assert db_manager.find_near_duplicates(make_job_row(9, description=DESCRIPTION)) == []
+
+        assert db_manager.index_near_duplicates() == 2
+        assert {job.id: job.cluster_id for job in db_manager.iter_jobs()} == {"job1": "job1", "job2": "job1"}
+
+        # A rewritten posting leaves the index until the next pass; its cluster is kept for the members
+        db_manager.bulk_upsert_jobs([make_job_row(1, id="job1", description=DESCRIPTION + " Hybrid.")],
+                                    index_duplicates=False)
+        assert {job.id: job.cluster_id for job in db_manager.iter_jobs()} == {"job1": None, "job2": "job1"}
+        assert db_manager.count_clusters() == 0
+        assert db_manager.index_near_duplicates() == 1
+        assert {job.id: job.cluster_id for job in db_manager.iter_jobs()} == {"job1": "job1", "job2": "job1"}
+
+    def test_rewritten_jobs_are_reindexed_at_ingest(self, db_manager):
+        """Test that a rewritten posting is back in its cluster when bulk_upsert_jobs returns"""
+        db_manager.bulk_upsert_jobs([
+            make_job_row(1, id="job1", description=DESCRIPTION),
+            make_job_row(2, id="job2", description=DESCRIPTION + " Apply now!", source="indeed"),
+        ])
+        db_manager.bulk_upsert_jobs([make_job_row(1, id="job1", description=DESCRIPTION + " Hybrid.")])
+        assert {job.id: job.cluster_id for job in db_manager.iter_jobs()} == {"job1": "job1", "job2": "job1"}
+        assert [job.id for job in db_manager.iter_jobs(representatives_only=True)] == ["job1"]
+        assert db_manager.index_near_duplicates() == 0
+
+    def test_deleting_a_representative_reelects_one(self, db_manager, db_session):
+        """Test that the rest of a cluster stays visible when its representative is deleted"""
+        db_manager.bulk_upsert_jobs([
+            make_job_row(n, id=f"job{n}", description=DESCRIPTION + " Apply now!" * (n - 1)) for n in (1, 2, 3)
+        ] + [make_job_row(4, id="job4", title="Nurse", description="Night shift nurse.")])
+        assert {job.id: job.cluster_id for job in db_manager.iter_jobs()}["job3"] == "job1"
+
+        db_session.delete(db_session.get(Job, "job1"))
+        db_session.commit()
+
+        assert {job.id: job.cluster_id for job in db_manager.iter_jobs()} == {
+            "job2": "job2", "job3": "job2", "job4": "job4",
+        }
+        assert [job.id for job in db_manager.iter_jobs(representatives_only=True)] == ["job2", "job4"]
+        assert db_manager.count_clusters() == 2
+
+    def test_find_for_unsaved_posting(self, db_manager):
+        """Test lookups for a candidate posting before it is stored"""
+        db_manager.bulk_upsert_jobs([make_job_row(1, description=DESCRIPTION)])
+        candidate = make_job_row(9, source="jobstreet", description=DESCRIPTION)
+        assert len(db_manager.find_near_duplicates(candidate)) == 1
+        assert db_manager.find_near_duplicates(make_job_row(10, description="Pastry chef wanted")) == []
+
+    def test_index_jobs_added_through_session(self, db_manager, db_session):
+        """Test that backfilling indexes ORM-created jobs oldest first"""
+        old = datetime.utcnow() - timedelta(days=1)
+        db_session.add_all([
+            Job(id="first", url="https://a.com/1", company="A", title="Engineer", location="X", source="linkedin",
+                description=DESCRIPTION, scraped_at=old),
+            Job(id="second", url="https://b.com/1", company="A", title="Engineer", location="Y", source="indeed",
+                description=DESCRIPTION),
+        ])
+        db_session.commit()
+
+        assert db_manager.index_near_duplicates(batch_size=1) == 2
+        assert db_manager.index_near_duplicates() == 0
+        db_session.expire_all()
+        assert db_session.get(Job, "second").cluster_id == "first"
+
+
+class TestCompactions:
+    """Test storage of compacted job descriptions"""
+
+    def row(self, job_id, text="Requirements:\n- Python", before=100, after=10, version=1):
+        return {"job_id": job_id, "description_hash": "a" * 64, "version": version, "text": text,
+                "tokens_before": before, "tokens_after": after}
+
+    def test_save_load_and_replace(self, db_manager):
+        """Test compactions are stored per job, replaced on save and totalled"""
+        db_manager.bulk_upsert_jobs([make_job_row(1, id="job1"), make_job_row(2, id="job2")])
+        assert db_manager.save_compactions([self.row("job1"), self.row("job2", before=300, after=90)]) == 2
+        assert db_manager.save_compactions([self.row("job1", text="- SQL", after=5, version=2)]) == 1
+        assert db_manager.save_compactions([]) == 0
+
+        stored = db_manager.get_compactions(["job1", "job2", "missing"])
+        assert set(stored) == {"job1", "job2"}
+        assert (stored["job1"]["text"], stored["job1"]["version"], stored["job1"]["tokens_after"]) == ("- SQL", 2, 5)
+        assert db_manager.compaction_stats() == {"jobs": 2, "tokens_before": 400, "tokens_after": 95}
+
+
+class TestRescrape:
+    """Test stale job selection and incremental re-scrape writes"""
+
+    @pytest.fixture
+    def stale(self, db_manager, db_session):
+        """Jobs 0-2 last checked 10, 9 and 8 days ago (job 2 on indeed); job 3 today"""
+        db_manager.bulk_upsert_jobs([make_job_row(n, id=f"job{n}", source="indeed" if n == 2 else "linkedin")
+                                     for n in range(4)])
+        for n in range(3):
+            db_session.get(Job, f"job{n}").checked_at = datetime.utcnow() - timedelta(days=10 - n)
+        db_session.commit()
+        return db_session
+
+    def test_selects_stale_jobs(self, db_manager, stale):
+        """Test stale jobs come back least recently checked first, filtered and paged"""
+        jobs = db_manager.stale_jobs(threshold_days=7)
+        assert [job["id"] for job in jobs] == ["job0", "job1", "job2"]
+        assert jobs[0]["content_hash"] and jobs[0]["url"] == "https://example.com/job/0"
+
+        assert [job["id"] for job in db_manager.stale_jobs(7, sources=["linkedin"])] == ["job0", "job1"]
+        first = db_manager.stale_jobs(7, limit=1)
+        after = (first[0]["checked_at"], first[0]["id"])
+        assert [job["id"] for job in db_manager.stale_jobs(7, after=after)] == ["job1", "job2"]
+        assert db_manager.stale_jobs(threshold_days=30) == []
+        assert stale.get(Job, "job0").is_stale(7) and not stale.get(Job, "job3").is_stale(7)
+
+    def test_stale_batches_seek_into_the_index(self, db_manager, stale):
+        """Test a later stale batch is a range scan of (checked_at, id), not a scan from the oldest job"""
+        statements = []
+
+        def record(connection, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        first = db_manager.stale_jobs(7, limit=1)
+        event.listen(db_manager.engine, "before_cursor_execute", record)
+        try:
+            jobs = db_manager.stale_jobs(7, after=(first[0]["checked_at"], first[0]["id"]))
+        finally:
+            event.remove(db_manager.engine, "before_cursor_execute", record)
+        statement, parameters = statements[-1]
+        with db_manager.engine.connect() as connection:
+            plan = " ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+        assert "idx_job_checked_id (checked_at>? AND checked_at<?)" in plan
+        assert "TEMP B-TREE" not in plan
+        assert [job["id"] for job in jobs] == ["job1", "job2"]
+
+    def test_only_changed_postings_are_rewritten(self, db_manager, stale):
+        """Test 304s and same-hash pages only refresh checked_at and validators"""
+        before = {n: stale.get(Job, f"job{n}").updated_at for n in range(3)}
+        counts = db_manager.apply_rescrape([
+            {"id": "job0", "etag": '"v2"', "job": None},
+            {"id": "job1", "etag": '"v1"', "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+             "job": make_job_row(1, html_content="<div>new tracking junk</div>")},
+            {"id": "job2", "job": make_job_row(2, source="indeed", description="Build streaming pipelines")},
+        ])
+
+        assert counts == {"changed": 1, "unchanged": 1, "not_modified": 1, "skipped": 0}
+        stale.expire_all()
+        jobs = {n: stale.get(Job, f"job{n}") for n in range(3)}
+        assert (jobs[0].etag, jobs[0].updated_at) == ('"v2"', before[0])
+        assert (jobs[1].etag, jobs[1].last_modified, jobs[1].updated_at) == \
+            ('"v1"', "Mon, 01 Jan 2024 00:00:00 GMT", before[1])
+        assert jobs[1].html_content is None
+        assert jobs[2].description == "Build streaming pipelines" and jobs[2].updated_at > before[2]
+        assert not any(job.is_stale(7) for job in jobs.values())
+        assert db_manager.stale_jobs(threshold_days=7) == []
+
+    def test_upgrade_adds_and_backfills_columns(self, tmp_path):
+        """Test databases created before the re-scrape columns are upgraded"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+        Base.metadata.create_all(bind=engine)
+        scraped_at = datetime(2024, 1, 1)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("DROP INDEX idx_job_checked_id")
+            for column in ("etag", "last_modified", "content_hash", "checked_at"):
+                connection.exec_driver_sql(f"ALTER TABLE jobs DROP COLUMN {column}")
+            connection.execute(text(
+                "INSERT INTO jobs (id, url, company, title, location, source, scraped_at) "
+                "VALUES ('old', 'https://example.com/old', 'Acme', 'Engineer', 'Remote', 'linkedin', :scraped_at)"
+            ), {"scraped_at": scraped_at})
+
+        Base.metadata.create_all(bind=engine)
+        jobs = DatabaseManager(bind=engine).stale_jobs(threshold_days=7)
+        assert [(job["id"], job["checked_at"]) for job in jobs] == [("old", scraped_at)]
+        assert "idx_job_checked_id" in {index["name"] for index in inspect(engine).get_indexes("jobs")}
+        engine.dispose()
+
+
+class TestAsyncDatabaseManager:
+    """Test the asyncio database manager on aiosqlite"""
+
+    @pytest.fixture
+    def async_manager(self, tmp_path):
+        pytest.importorskip("aiosqlite")
+        from src.database.async_engine import AsyncDatabaseManager, create_async_db_engine
+        manager = AsyncDatabaseManager(bind=create_async_db_engine(f"sqlite:///{tmp_path / 'jobs.db'}"))
+        asyncio.run(manager.create_all_tables())
+        yield manager
+        asyncio.run(manager.close())
+
+    def test_to_async_url(self):
+        """Test sync URLs are mapped to the asyncio drivers"""
+        from src.database.async_engine import to_async_url
+        assert to_async_url("sqlite:///database/jobs.db") == "sqlite+aiosqlite:///database/jobs.db"
+        assert to_async_url("postgresql://user:pw@host/jobs") == "postgresql+asyncpg://user:pw@host/jobs"
+        assert to_async_url("sqlite+aiosqlite:///jobs.db") == "sqlite+aiosqlite:///jobs.db"
+
+    def test_pool_follows_profile(self, tmp_path):
+        """Test only the WAL production profile opens several SQLite connections"""
+        pytest.importorskip("aiosqlite")
+        from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+        from src.database.async_engine import create_async_db_engine
+        url = f"sqlite:///{tmp_path / 'jobs.db'}"
+        engines = {
+            "default": create_async_db_engine(url, "default"),
+            "production": create_async_db_engine(url, "production"),
+            "memory": create_async_db_engine("sqlite://", "production"),
+        }
+        assert isinstance(engines["default"].pool, AsyncAdaptedQueuePool)
+        assert engines["default"].pool.size() == 1 and engines["default"].pool._max_overflow == 0
+        assert isinstance(engines["production"].pool, AsyncAdaptedQueuePool)
+        assert isinstance(engines["memory"].pool, StaticPool)
+        for engine in engines.values():
+            asyncio.run(engine.dispose())
+
+    def test_upsert_and_stats(self, async_manager):
+        """Test bulk upsert (sync and async iterables) and counter-backed stats"""
+        async def rows():
+            for n in range(5, 8):
+                yield make_job_row(n)
+
+        async def run():
+            assert await async_manager.health_check()
+            first = await async_manager.bulk_upsert_jobs([make_job_row(n) for n in range(5)], chunk_size=2)
+            second = await async_manager.bulk_upsert_jobs(rows())
+            again = await async_manager.bulk_upsert_jobs([make_job_row(0), make_job_row(1, title="Lead")])
+            return first, second, again, await async_manager.get_stats()
+
+        first, second, again, stats = asyncio.run(run())
+        assert first["inserted"] == 5
+        assert second["inserted"] == 3
+        assert again == {"inserted": 0, "updated": 1, "unchanged": 1, "skipped": 0}
+        assert stats["total_jobs"] == 8
+
+    def test_concurrent_claims_are_exclusive(self, async_manager):
+        """Test that concurrent claim_next calls never lease the same application"""
+        async def run():
+            await async_manager.bulk_upsert_jobs([make_job_row(n, id=f"job{n}") for n in range(4)])
+            async with async_manager.get_session() as session:
+                session.add_all(Application(job_id=f"job{n}", status="queued") for n in range(4))
+                await session.commit()
+
+            claims = await asyncio.gather(*(
+                async_manager.claim_next("queued", "customizing", f"w{n}") for n in range(6)
+            ))
+            claimed = [app for app in claims if app is not None]
+            renewed = await async_manager.renew_lease(claimed[0].id, claimed[0].lease_owner)
+            released = await async_manager.release_application(claimed[0].id, claimed[0].lease_owner, "ready")
+            stolen = await async_manager.release_application(claimed[1].id, "someone-else", "failed")
+            return claimed, renewed, released, stolen, await async_manager.get_stats()
+
+        claimed, renewed, released, stolen, stats = asyncio.run(run())
+        assert len(claimed) == 4
+        assert len({app.id for app in claimed}) == 4
+        assert all(app.status == "customizing" for app in claimed)
+        assert renewed and released and not stolen
+        assert stats["total_applications"] == 4
+
+
+class TestArchive:
+    """Test archiving old rows into monthly partition files"""
+
+    @pytest.fixture
+    def aged_data(self, db_session):
+        """Two old jobs (one with an application), one fresh job and old/new logs"""
+        old = datetime.utcnow() - timedelta(days=200)
+        db_session.add_all([
+            Job(id="old1", url="https://test.com/1", company="Old Corp", title="Engineer", location="City",
+                description="Old posting", source="linkedin", scraped_at=old, keywords_match=["python"]),
+            Job(id="old2", url="https://test.com/2", company="Applied Corp", title="Engineer", location="City",
+                source="indeed", scraped_at=old),
+            Job(id="new1", url="https://test.com/3", company="New Corp", title="Engineer", location="City",
+                source="linkedin"),
+        ])
+        app = Application(job_id="old2", status="completed")
+        db_session.add(app)
+        db_session.flush()
+        db_session.add_all([
+            ApplicationLog(application_id=app.id, event_type="started", message="Old event",
+                           event_metadata={"step": 1}, timestamp=old),
+            ApplicationLog(application_id=app.id, event_type="completed", message="New event"),
+        ])
+        db_session.commit()
+        return old
+
+    @pytest.mark.parametrize("fmt", ["parquet", "jsonl"])
+    def test_archive_and_read_back(self, db_manager, db_session, aged_data, tmp_path, fmt):
+        """Test that old rows move to partitions and read back with their original types"""
+        if fmt == "parquet":
+            pytest.importorskip("pyarrow")
+        result = db_manager.archive_old_rows(threshold_days=90, archive_dir=str(tmp_path), fmt=fmt, batch_size=1)
+
+        assert result["jobs_archived"] == 1  # old2 still has an application
+        assert result["logs_archived"] == 1
+        assert {job.id for job in db_session.query(Job)} == {"old2", "new1"}
+        assert db_session.query(ApplicationLog).count() == 1
+        assert all(f"month={aged_data:%Y-%m}" in path for path in result["files"])
+
+        jobs = list(db_manager.read_archive("jobs", archive_dir=str(tmp_path)))
+        assert [job["id"] for job in jobs] == ["old1"]
+        assert jobs[0]["scraped_at"] == aged_data
+        assert jobs[0]["keywords_match"] == ["python"]
+        assert jobs[0]["description"] == "Old posting"
+        logs = list(db_manager.read_archive("application_logs", archive_dir=str(tmp_path)))
+        assert logs[0]["event_metadata"] == {"step": 1}
+
+    def test_rows_added_during_archiving_are_kept(self, db_manager, db_session, aged_data, tmp_path, monkeypatch):
+        """Test that only rows written to the archive are deleted"""
+        from src.database import archive
+
+        stream = archive._stream_old_rows
+
+        def stream_then_insert(engine, table_name, cutoff, batch_size):
+            yield from stream(engine, table_name, cutoff, batch_size)
+            if table_name == "jobs":  # Old enough to archive and sorting before the last archived key
+                db_session.add(Job(id="late0", url="https://test.com/late", company="Late Corp", title="Engineer",
+                                   location="City", source="linkedin", scraped_at=aged_data))
+                db_session.commit()
+
+        monkeypatch.setattr(archive, "_stream_old_rows", stream_then_insert)
+        result = db_manager.archive_old_rows(threshold_days=90, archive_dir=str(tmp_path), fmt="jsonl")
+
+        assert result["jobs_archived"] == 1
+        assert db_session.query(Job).filter_by(id="late0").count() == 1
+        assert [job["id"] for job in db_manager.read_archive("jobs", archive_dir=str(tmp_path))] == ["old1"]
+
+    def test_failed_run_leaves_no_partitions(self, db_manager, db_session, aged_data, tmp_path, monkeypatch):
+        """Test that a write failure removes the run's files and deletes nothing"""
+        from src.database import archive
+
+        def failing_write(self, rows):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(archive._PartitionWriter, "write", failing_write)
+        with pytest.raises(OSError):
+            db_manager.archive_old_rows(threshold_days=90, archive_dir=str(tmp_path), fmt="jsonl")
+
+        assert [path for path in tmp_path.rglob("*") if path.is_file()] == []
+        assert db_session.query(Job).filter_by(id="old1").count() == 1
+        assert list(db_manager.read_archive("jobs", archive_dir=str(tmp_path))) == []
+
+    def test_read_archive_filters(self, db_manager, aged_data, tmp_path):
+        """Test time range and equality filters on archived rows"""
+        db_manager.archive_old_rows(threshold_days=90, archive_dir=str(tmp_path), fmt="jsonl")
+
+        assert len(list(db_manager.read_archive("jobs", where={"source": "linkedin"}, archive_dir=str(tmp_path)))) == 1
+        assert list(db_manager.read_archive("jobs", where={"source": "indeed"}, archive_dir=str(tmp_path))) == []
+        assert list(db_manager.read_archive("jobs", since=datetime.utcnow() - timedelta(days=10),
+                                            archive_dir=str(tmp_path))) == []
+        with pytest.raises(ValueError):
+            list(db_manager.read_archive("applications", archive_dir=str(tmp_path)))
+
+    def test_nothing_to_archive(self, db_manager, tmp_path):
+        """Test that an empty run writes no files"""
+        result = db_manager.archive_old_rows(threshold_days=90, archive_dir=str(tmp_path))
+        assert result["jobs_archived"] == 0 and result["logs_archived"] == 0
+        assert result["files"] == []
+
+    def test_threshold_from_config(self, tmp_path):
+        """Test that the threshold is read from config.yaml"""
+        pytest.importorskip("ruamel.yaml")
+        config = tmp_path / "config.yaml"
+        config.write_text("application:\n  archive_threshold_days: 30\n")
+        assert load_threshold_days(str(config)) == 30
+        assert load_threshold_days(str(tmp_path / "missing.yaml")) == 90
+
+
+class TestSQLiteProfiles:
+    """Test SQLite engine profiles and the single-writer queue"""
+
+    @pytest.fixture
+    def production_manager(self, tmp_path):
+        manager = DatabaseManager(bind=create_db_engine(f"sqlite:///{tmp_path}/jobs.db", "production"))
+        manager.create_all_tables()
+        yield manager
+        manager.close()
+
+    def test_production_pragmas(self, production_manager):
+        """Test that the production profile enables WAL and relaxed sync"""
+        with production_manager.engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert connection.execute(text("PRAGMA foreign_keys")).scalar() == 1
+
+    def test_unknown_profile(self, tmp_path):
+        """Test that an unknown profile name is rejected"""
+        with pytest.raises(ValueError):
+            create_db_engine(f"sqlite:///{tmp_path}/jobs.db", "turbo")
+
+    def test_write_queue_concurrent_producers(self, production_manager):
+        """Test that writes from many threads are all committed through one writer"""
+        def produce(worker):
+            for n in range(50):
+                production_manager.write_queue.execute(
+                    lambda connection, n=n: connection.execute(insert(Job).values(
+                        id=f"{worker}-{n}", url=f"https://example.com/{worker}/{n}",
+                        company=f"Company {worker}", title=f"Role {n}", location="Remote", source="linkedin",
+                    ))
+                )
+
+        threads = [threading.Thread(target=produce, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert production_manager.write_queue.writes_committed == 400
+        with production_manager.get_session() as session:
+            assert session.query(Job).count() == 400
+
+    def test_write_queue_isolates_failures(self, production_manager):
+        """Test that one failing write in a batch does not roll back the others"""
+        queue = WriteQueue(production_manager.engine, max_latency=0.2).start()
+
+        def add_job(job_id, url):
+            return lambda connection: connection.execute(insert(Job).values(
+                id=job_id, url=url, company="Corp", title=job_id, location="City", source="linkedin",
+            ))
+
+        ok = queue.submit(add_job("job1", "https://test.com/1"))
+        duplicate = queue.submit(add_job("job2", "https://test.com/1"))
+        also_ok = queue.submit(add_job("job3", "https://test.com/3"))
+        queue.stop()
+
+        assert ok.exception() is None
+        assert also_ok.exception() is None
+        assert duplicate.exception() is not None
+        with production_manager.engine.connect() as connection:
+            assert connection.execute(text("SELECT COUNT(*) FROM jobs")).scalar() == 2
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
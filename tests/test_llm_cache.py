@@ -0,0 +1,382 @@
+"""Unit tests for the LLM response cache, against a local OpenAI-compatible server"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("openai")
+
+from src.customizer import customization_runner, resume_customizer
+from src.customizer.customization_runner import CustomizationRunner, LLMLimits, load_llm_limits
+from src.customizer.llm_cache import LLMResponseCache, cache_key, normalize_job_description
+from src.customizer.llm_client import PROMPT_VERSION, LLMClient
+from src.customizer.rate_limit import TokenBucket
+from src.customizer.resume_customizer import ResumeCustomizer
+from src.customizer.template_manager import TemplateManager
+
+RESUME = "# Jane Doe\n\n## Summary\nData engineer.\n\n## Skills\nPython, Spark\n"
+DESCRIPTION = "We need a data engineer with Spark.\n\nBuild   pipelines. We are an equal opportunity employer."
+
+
+class FakeOpenAI(BaseHTTPRequestHandler):
+    """/v1/chat/completions that echoes the model and counts requests"""
+
+    requests = []
+    finish_reason = "stop"
+    failures = []  # Status codes returned (in order) before succeeding
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).requests.append(body)
+        if type(self).failures:
+            status = type(self).failures.pop(0)
+            error = json.dumps({"error": {"message": f"status {status}", "type": "test"}}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(error)))
+            self.end_headers()
+            self.wfile.write(error)
+            return
+        payload = json.dumps({
+            "id": f"chatcmpl-{len(self.requests)}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"# Tailored #{len(self.requests)}"},
+                "finish_reason": type(self).finish_reason,
+            }],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    FakeOpenAI.requests = []
+    FakeOpenAI.finish_reason = "stop"
+    FakeOpenAI.failures = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAI)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/v1"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with LLMResponseCache(str(tmp_path / "llm_cache.db")) as cache:
+        yield cache
+
+
+@pytest.fixture
+def manager(tmp_path):
+    (tmp_path / "resume_data_engineer.md").write_text(RESUME, encoding="utf-8")
+    return TemplateManager(input_dir=str(tmp_path))
+
+
+class TestCacheKey:
+    """Test what the cache key depends on"""
+
+    def test_key_inputs(self):
+        """Test each input changes the key and whitespace/compatibility forms don't"""
+        base = cache_key("a" * 64, DESCRIPTION, "gpt-4o", 0.2, "1")
+        assert base == cache_key("a" * 64, " We need a data engineer with Spark. Build pipelines.  We are an equal opportunity employer.\n",
+                                 "gpt-4o", 0.2, "1")
+        assert normalize_job_description("Ｓｐａｒｋ  jobs") == "Spark jobs"
+        assert base != cache_key("b" * 64, DESCRIPTION, "gpt-4o", 0.2, "1")
+        assert base != cache_key("a" * 64, DESCRIPTION + " Remote.", "gpt-4o", 0.2, "1")
+        assert base != cache_key("a" * 64, DESCRIPTION, "gpt-4o-mini", 0.2, "1")
+        assert base != cache_key("a" * 64, DESCRIPTION, "gpt-4o", 0.7, "1")
+        assert base != cache_key("a" * 64, DESCRIPTION, "gpt-4o", 0.2, "2")
+
+
+class TestLLMResponseCache:
+    """Test the SQLite response store"""
+
+    def test_lru_eviction(self, tmp_path):
+        """Test the least recently used responses are evicted once over the size limit"""
+        response = {"content": "x" * 1000}
+        with LLMResponseCache(str(tmp_path / "cache.db"), max_mb=3500 / 1024 / 1024) as cache:
+            cache.put("a", "m", response)
+            cache.put("b", "m", response)
+            cache.put("c", "m", response)
+            assert cache.get("a") == response  # "b" is now the least recently used
+            cache.put("d", "m", response)
+
+            assert cache.get("b") is None
+            assert all(cache.get(key) == response for key in ("a", "c", "d"))
+            stats = cache.stats()
+            assert stats["entries"] == 3 and stats["evictions"] == 1
+            assert stats["bytes"] <= stats["max_bytes"]
+
+    def test_metrics_persist(self, tmp_path):
+        """Test entries and hit/miss counts survive reopening the cache"""
+        path = str(tmp_path / "cache.db")
+        with LLMResponseCache(path) as cache:
+            cache.put("k", "m", {"content": "hello"})
+            cache.get("k")
+            cache.get("missing")
+        with LLMResponseCache(path) as cache:
+            assert cache.get("k") == {"content": "hello"}
+            stats = cache.stats()
+            assert (stats["entries"], stats["hits"], stats["misses"], stats["stores"]) == (1, 2, 1, 1)
+            assert stats["hit_rate"] == pytest.approx(2 / 3)
+            assert cache.clear() == 1
+            assert cache.stats()["hits"] == 0
+
+
+class TestLLMClient:
+    """Test cached resume tailoring against a fake OpenAI-compatible server"""
+
+    def test_second_call_is_cached(self, server, cache, manager):
+        """Test an identical request (up to whitespace) is served from the cache"""
+        llm = LLMClient(api_key="test", base_url=server, cache=cache)
+        template = manager.get_template("resume_data_engineer.md")
+
+        first = llm.tailor_resume(template, "Data Engineer", DESCRIPTION, "Acme")
+        second = llm.tailor_resume(template, "Data Engineer", DESCRIPTION.replace("   ", " "), "Acme")
+
+        assert len(FakeOpenAI.requests) == 1
+        assert not first["cached"] and second["cached"]
+        assert second["content"] == first["content"] == "# Tailored #1"
+        assert second["usage"]["total_tokens"] == 120
+        assert RESUME in FakeOpenAI.requests[0]["messages"][1]["content"]
+        assert cache.stats()["hits"] == 1
+
+    def test_misses_on_changed_inputs(self, server, cache, manager, tmp_path):
+        """Test a new model, temperature or template version calls the server again"""
+        template = manager.get_template("resume_data_engineer.md")
+        LLMClient(api_key="test", base_url=server, cache=cache).tailor_resume(template, "Data Engineer", DESCRIPTION)
+        LLMClient(api_key="test", base_url=server, cache=cache, model="gpt-4o-mini").tailor_resume(
+            template, "Data Engineer", DESCRIPTION)
+        LLMClient(api_key="test", base_url=server, cache=cache, temperature=0.9).tailor_resume(
+            template, "Data Engineer", DESCRIPTION)
+        (tmp_path / "resume_data_engineer.md").write_text(RESUME + "\nAWS\n", encoding="utf-8")
+        edited = manager.get_template("resume_data_engineer.md")
+        LLMClient(api_key="test", base_url=server, cache=cache).tailor_resume(edited, "Data Engineer", DESCRIPTION)
+
+        assert len(FakeOpenAI.requests) == 4
+        assert cache.stats()["entries"] == 4
+
+    def test_no_cache_bypasses_lookup(self, server, cache, manager):
+        """Test use_cache=False calls the server and refreshes the stored response"""
+        llm = LLMClient(api_key="test", base_url=server, cache=cache)
+        template = manager.get_template("resume_data_engineer.md")
+        llm.tailor_resume(template, "Data Engineer", DESCRIPTION)
+        fresh = llm.tailor_resume(template, "Data Engineer", DESCRIPTION, use_cache=False)
+        cached = llm.tailor_resume(template, "Data Engineer", DESCRIPTION)
+
+        assert len(FakeOpenAI.requests) == 2
+        assert not fresh["cached"] and cached["cached"]
+        assert cached["content"] == "# Tailored #2"
+        assert cached["cache_key"] == cache_key(template.sha256, "Data Engineer\n\n" + DESCRIPTION, llm.model,
+                                                llm.temperature, PROMPT_VERSION)
+
+    def test_truncated_responses_not_cached(self, server, cache, manager):
+        """Test responses cut off by max_tokens are not stored"""
+        FakeOpenAI.finish_reason = "length"
+        llm = LLMClient(api_key="test", base_url=server, cache=cache)
+        template = manager.get_template("resume_data_engineer.md")
+        llm.tailor_resume(template, "Data Engineer", DESCRIPTION)
+        llm.tailor_resume(template, "Data Engineer", DESCRIPTION)
+
+        assert len(FakeOpenAI.requests) == 2
+        assert cache.stats()["entries"] == 0
+
+    def test_customizer_writes_output(self, server, cache, manager, tmp_path, monkeypatch):
+        """Test ResumeCustomizer writes the tailored resume and reuses the cached one"""
+        monkeypatch.setattr(resume_customizer, "get_template_manager", lambda: manager)
+        customizer = ResumeCustomizer(output_dir=str(tmp_path / "out"),
+                                      llm=LLMClient(api_key="test", base_url=server, cache=cache))
+
+        result = customizer.customize_resume("resume_data_engineer.md", "Data Engineer", DESCRIPTION, "Acme")
+        again = customizer.customize_resume("resume_data_engineer.md", "Data Engineer", DESCRIPTION, "Acme")
+        dry = customizer.customize_resume("resume_data_engineer.md", "Data Engineer", DESCRIPTION, "Acme",
+                                          dry_run=True)
+
+        assert result["status"] == again["status"] == "customized"
+        assert not result["llm_cached"] and again["llm_cached"]
+        assert result["compacted_tokens"] < result["description_tokens"]
+        assert "Build pipelines." in FakeOpenAI.requests[0]["messages"][1]["content"]
+        assert dry["status"] == "ready_for_ai_processing"
+        assert open(result["output_path"], encoding="utf-8").read() == "# Tailored #1"
+        assert len(FakeOpenAI.requests) == 1
+
+
+class TestTokenBucket:
+    """Test the asyncio rate limiter"""
+
+    def test_waits_for_refill(self):
+        """Test a burst drains the bucket and later acquires wait for the refill rate"""
+        async def run():
+            bucket = TokenBucket(rate_per_minute=1200, capacity=2)  # 20 per second
+            start = time.perf_counter()
+            waits = [await bucket.acquire() for _ in range(6)]
+            return waits, time.perf_counter() - start
+
+        waits, elapsed = asyncio.run(run())
+        assert waits[:2] == [0.0, 0.0]
+        assert all(wait > 0 for wait in waits[2:])
+        assert 0.18 <= elapsed < 1.0  # 4 refills at 50 ms each
+
+    def test_oversized_amount_waits_for_full_bucket(self):
+        """Test an amount above the capacity is clamped instead of waiting forever"""
+        async def run():
+            bucket = TokenBucket(rate_per_minute=6000, capacity=10)
+            await bucket.acquire(10)
+            return await bucket.acquire(50)
+
+        assert 0.05 <= asyncio.run(run()) < 0.5
+
+    def test_oversized_amounts_are_charged_in_full(self):
+        """Test amounts above the capacity go into debt instead of overshooting the rate"""
+        async def run():
+            bucket = TokenBucket(rate_per_minute=6000, capacity=10)  # 100 per second
+            start = time.perf_counter()
+            waits = [await bucket.acquire(20) for _ in range(3)]
+            return waits, bucket.tokens, time.perf_counter() - start
+
+        waits, tokens, elapsed = asyncio.run(run())
+        assert waits[0] == 0.0
+        assert tokens < 0
+        assert 0.38 <= elapsed < 1.0  # Each later request repays 10 units of debt plus 10 for itself
+
+
+class TestCustomizationRunner:
+    """Test concurrent customization of queued applications"""
+
+    @pytest.fixture
+    def queue(self, tmp_path, manager, monkeypatch):
+        pytest.importorskip("aiosqlite")
+        pytest.importorskip("tenacity")
+        from src.database.async_engine import AsyncDatabaseManager, create_async_db_engine
+        from src.database.models import Application, Job
+
+        monkeypatch.setattr(resume_customizer, "get_template_manager", lambda: manager)
+        monkeypatch.setattr(customization_runner, "get_template_manager", lambda: manager)
+        db = AsyncDatabaseManager(bind=create_async_db_engine(f"sqlite:///{tmp_path / 'jobs.db'}"))
+
+        async def setup():
+            await db.create_all_tables()
+            async with db.get_session() as session:
+                session.add_all(
+                    Job(id=f"job{n}", url=f"https://example.com/{n}", company=f"Company {n}",
+                        title="Data Engineer", location="Remote", description=DESCRIPTION, source="linkedin")
+                    for n in range(6)
+                )
+                session.add_all(Application(job_id=f"job{n}", status="queued") for n in range(6))
+                await session.commit()
+
+        asyncio.run(setup())
+        yield db
+        asyncio.run(db.close())
+
+    def run(self, db, server, cache, tmp_path, limit=None, **limits):
+        llm = LLMClient(api_key="test", base_url=server, cache=cache, max_retries=0)
+        runner = CustomizationRunner(
+            db, llm, ResumeCustomizer(output_dir=str(tmp_path / "out")),
+            LLMLimits(**{"tokens_per_minute": 10 ** 7, "retry_initial_wait": 0.01, "retry_max_wait": 0.05, **limits}),
+            concurrency=3,
+        )
+
+        async def run_and_release():
+            # Pooled connections belong to this event loop; later asyncio.run calls need fresh ones
+            try:
+                return await runner.run(limit)
+            finally:
+                await db.close()
+
+        return runner, asyncio.run(run_and_release())
+
+    def statuses(self, db):
+        from sqlalchemy import select
+        from src.database.models import Application
+
+        async def load():
+            async with db.get_session() as session:
+                return (await session.scalars(select(Application).order_by(Application.id))).all()
+
+        return asyncio.run(load())
+
+    def test_customizes_queue_with_retries(self, queue, server, cache, tmp_path):
+        """Test every queued application is tailored, with 429/5xx responses retried"""
+        FakeOpenAI.failures = [429, 500, 503]
+        runner, summary = self.run(queue, server, cache, tmp_path)
+
+        assert summary["ready"] == 6 and summary["failed"] == 0
+        assert summary["requests"] == len(FakeOpenAI.requests) == 6 + 3
+        assert summary["retried"] >= 1
+        assert summary["prompt_tokens"] == 600 and summary["completion_tokens"] == 120
+        applications = self.statuses(queue)
+        assert all(app.status == "ready" and app.lease_owner is None for app in applications)
+        assert all(app.resume_template == "resume_data_engineer.md" for app in applications)
+        paths = {app.tailored_resume_path for app in applications}
+        assert len(paths) == 6
+        assert all(open(path, encoding="utf-8").read().startswith("# Tailored") for path in paths)
+        assert {m.application_id for m in runner.metrics} == {app.id for app in applications}
+        stored = asyncio.run(queue.get_compaction("job0"))
+        assert stored is not None and stored["tokens_after"] < stored["tokens_before"]
+        assert summary["compacted_tokens"] < summary["description_tokens"]
+
+    def test_gives_up_after_max_attempts(self, queue, server, cache, tmp_path):
+        """Test an application that keeps failing is marked failed and others continue"""
+        FakeOpenAI.failures = [429] * 3
+        _, summary = self.run(queue, server, cache, tmp_path, limit=1, max_attempts=3)
+
+        assert summary["processed"] == 1 and summary["failed"] == 1
+        failed = [app for app in self.statuses(queue) if app.status != "queued"]
+        assert len(failed) == 1
+        assert failed[0].status == "failed" and "429" in failed[0].error_message
+
+    def test_rate_limit_spaces_requests(self, queue, server, cache, tmp_path):
+        """Test the requests-per-minute bucket throttles the run and cache hits bypass it"""
+        _, summary = self.run(queue, server, cache, tmp_path, requests_per_minute=600, burst_seconds=0.1)
+        assert summary["ready"] == 6
+        assert summary["elapsed_seconds"] >= 0.45  # 1 request of burst, then 10 per second
+        assert summary["wait_ms"] > 0
+
+        async def requeue():
+            from sqlalchemy import update
+            from src.database.models import Application
+            async with queue.get_session() as session:
+                await session.execute(update(Application).values(status="queued"))
+                await session.commit()
+
+        asyncio.run(requeue())
+        _, again = self.run(queue, server, cache, tmp_path, requests_per_minute=600, burst_seconds=0.1)
+        assert again["ready"] == again["cached"] == 6
+        assert again["requests"] == 0 and again["wait_ms"] == 0
+        assert len(FakeOpenAI.requests) == 6
+
+    def test_token_limit_spaces_requests(self, queue, server, cache, tmp_path):
+        """Test each request reserves its estimated prompt tokens + max_tokens"""
+        llm = LLMClient(api_key="test", base_url=server, cache=None, max_retries=0, max_tokens=1000)
+        runner = CustomizationRunner(queue, llm, ResumeCustomizer(output_dir=str(tmp_path / "out")),
+                                     LLMLimits(tokens_per_minute=6 * 10 ** 5, burst_seconds=0.1), concurrency=3)
+        summary = asyncio.run(runner.run(limit=3))  # ~1100 tokens each, 1000 of burst, 10000 per second
+
+        assert summary["ready"] == 3
+        assert 0.2 <= summary["elapsed_seconds"] < 2.0
+        assert summary["wait_ms"] > 0
+
+    def test_load_llm_limits(self, tmp_path):
+        """Test limits are read from the llm section of config.yaml"""
+        config = tmp_path / "config.yaml"
+        config.write_text("llm:\n  requests_per_minute: 60\n  max_concurrency: 2\n", encoding="utf-8")
+        limits = load_llm_limits(str(config))
+        assert (limits.requests_per_minute, limits.max_concurrency, limits.tokens_per_minute) == (60, 2, 30000)
+        assert load_llm_limits(str(tmp_path / "missing.yaml")) == LLMLimits()
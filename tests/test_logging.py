@@ -0,0 +1,148 @@
+"""Unit tests for the routed log file sink"""
+
+import json
+import os
+import threading
+import time
+import zipfile
+
+import pytest
+from loguru import logger
+from src.utils.log_sink import LogRoute, RotatingFileWriter, RoutedLogSink
+
+
+@pytest.fixture
+def routes(tmp_path):
+    return [
+        LogRoute(str(tmp_path / "app.log"), level=20),
+        LogRoute(str(tmp_path / "scraper.log"), level=20, name_contains="scraper"),
+        LogRoute(str(tmp_path / "database.log"), level=20, name_contains="database"),
+        LogRoute(str(tmp_path / "errors.log"), level=40),
+    ]
+
+
+@pytest.fixture
+def attach():
+    """Add a sink to loguru for one test and remove it (stopping the sink) afterwards"""
+    handler_ids = []
+
+    def add(sink):
+        handler_ids.append(logger.add(sink, format="{message}", level=sink.min_level))
+        return sink
+
+    yield add
+    for handler_id in handler_ids:
+        logger.remove(handler_id)
+
+
+def as_module(name):
+    return logger.patch(lambda record: record.update(name=name))
+
+
+class TestRoutedLogSink:
+    """Test routing, output formats and queue policies"""
+
+    def test_routes_by_name_and_level(self, tmp_path, routes, attach):
+        sink = attach(RoutedLogSink(routes, asynchronous=False))
+        as_module("scraper.sites.linkedin").info("scraped")
+        as_module("database.engine").info("query")
+        as_module("applier").error("failed")
+        as_module("applier").debug("ignored")
+
+        app = (tmp_path / "app.log").read_text()
+        assert "scraped" in app and "query" in app and "failed" in app and "ignored" not in app
+        assert (tmp_path / "scraper.log").read_text().count("\n") == 1
+        assert "query" in (tmp_path / "database.log").read_text()
+        assert "failed" in (tmp_path / "errors.log").read_text()
+        assert "scraper.sites.linkedin:" in app
+        assert sink.destinations("scraper.sites.linkedin", 20) == (0, 1)
+
+    def test_async_writes_after_drain(self, tmp_path, routes, attach):
+        sink = attach(RoutedLogSink(routes, asynchronous=True, queue_size=100))
+        for n in range(500):
+            as_module("scraper").info("record {}", n)
+        assert sink.drain(timeout=5)
+        assert (tmp_path / "scraper.log").read_text().count("\n") == 500
+
+    def test_json_lines(self, tmp_path, routes, attach):
+        attach(RoutedLogSink(routes, fmt="json", asynchronous=False))
+        try:
+            raise ValueError("bad value")
+        except ValueError:
+            as_module("applier").bind(application_id=7).exception("apply failed")
+
+        entry = json.loads((tmp_path / "errors.log").read_text().splitlines()[0])
+        assert entry["level"] == "ERROR"
+        assert entry["message"] == "apply failed"
+        assert entry["name"] == "applier"
+        assert entry["extra"] == {"application_id": 7}
+        assert "ValueError: bad value" in entry["exception"]
+
+    def test_drop_policy_counts_and_keeps_errors(self, tmp_path, routes, attach):
+        sink = RoutedLogSink(routes, asynchronous=True, queue_size=5, policy="drop")
+        attach(sink)
+        with sink._write_lock:  # Stall the writer thread so the queue fills up
+            for n in range(50):
+                as_module("scraper").info("info {}", n)
+            dropped = sink.dropped
+            errors = threading.Thread(target=lambda: [as_module("applier").error("error {}", n) for n in range(3)])
+            errors.start()
+            time.sleep(0.1)
+        errors.join(timeout=5)
+        assert sink.drain(timeout=5)
+
+        assert dropped >= 40
+        assert (tmp_path / "errors.log").read_text().count("error") == 3
+        assert "log records dropped" in (tmp_path / "app.log").read_text()
+
+    def test_stop_flushes_queue(self, tmp_path, routes):
+        sink = RoutedLogSink(routes, asynchronous=True)
+        handler_id = logger.add(sink, format="{message}", level=sink.min_level)
+        for n in range(200):
+            as_module("database").info("row {}", n)
+        logger.remove(handler_id)
+        assert (tmp_path / "database.log").read_text().count("\n") == 200
+
+    def test_rejects_unknown_policy(self, routes):
+        with pytest.raises(ValueError):
+            RoutedLogSink(routes, policy="spill")
+
+
+class TestRotatingFileWriter:
+    """Test size rotation, compression and retention"""
+
+    def test_rotates_compresses_and_prunes(self, tmp_path):
+        old = tmp_path / "app.2020-01-01_00-00-00_000000.log.zip"
+        old.write_bytes(b"")
+        os.utime(old, (0, 0))
+        writer = RotatingFileWriter(LogRoute(str(tmp_path / "app.log"), max_bytes=100, retention_days=7))
+        for n in range(30):
+            writer.write(f"line {n}\n")
+        writer.close()
+
+        archives = sorted(tmp_path.glob("app.*.zip"))
+        assert not old.exists()
+        assert len(archives) >= 1
+        with zipfile.ZipFile(archives[0]) as archive:
+            assert archive.read(archive.namelist()[0]).startswith(b"line 0\n")
+        assert (tmp_path / "app.log").stat().st_size < 100
+
+    def test_prune_keeps_unrelated_files(self, tmp_path):
+        keep = [tmp_path / "app.json", tmp_path / "app.log.bak", tmp_path / "app.2020-01-01.notes"]
+        for path in keep + [tmp_path / "app.2020-01-01_00-00-00_000000.log"]:
+            path.write_bytes(b"")
+            os.utime(path, (0, 0))
+        writer = RotatingFileWriter(LogRoute(str(tmp_path / "app.log"), max_bytes=10, retention_days=7))
+        writer.write("x" * 10)
+        writer.close()
+
+        assert all(path.exists() for path in keep)
+        assert not (tmp_path / "app.2020-01-01_00-00-00_000000.log").exists()
+
+    def test_rotates_on_encoded_size(self, tmp_path):
+        writer = RotatingFileWriter(LogRoute(str(tmp_path / "app.log"), max_bytes=100, compress=False))
+        writer.write("é" * 60)  # 60 characters, 120 bytes
+        writer.close()
+
+        assert not (tmp_path / "app.log").exists()
+        assert [path.stat().st_size for path in tmp_path.glob("app.*.log")] == [120]
@@ -0,0 +1,440 @@
+"""Unit tests for scraper URL handling and the HTTP fetch engine"""
+
+import asyncio
+import re
+from datetime import datetime, timedelta
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.database.models import Base, Job
+from src.scraper.http_engine import HTTPEngine, HTTPLimits, origin
+from src.scraper.rescrape import Rescraper
+from src.scraper.seen_urls import SeenURLFilter, optimal_size
+from src.scraper.sites import ListingPage, SiteAdapter
+from src.scraper.urls import canonicalize_url
+
+
+class TestCanonicalizeURL:
+    """Test canonical job URLs"""
+
+    @pytest.mark.parametrize("url", [
+        "https://www.linkedin.com/jobs/view/3812345678/",
+        "https://www.linkedin.com/jobs/view/data-engineer-at-acme-3812345678?refId=abc&trackingId=xyz",
+        "https://sg.linkedin.com/jobs/view/3812345678",
+        "https://www.linkedin.com/jobs/search/?currentJobId=3812345678&keywords=data",
+    ])
+    def test_linkedin(self, url):
+        assert canonicalize_url(url) == "https://www.linkedin.com/jobs/view/3812345678"
+
+    @pytest.mark.parametrize("url", [
+        "https://www.indeed.com/viewjob?jk=0123456789abcdef&tk=1h2&from=serp",
+        "https://www.indeed.com/rc/clk?jk=0123456789ABCDEF&vjs=3",
+        "https://m.indeed.com/viewjob?jk=0123456789abcdef",
+        "https://www.indeed.com/jobs?q=data&vjk=0123456789abcdef",
+    ])
+    def test_indeed(self, url):
+        assert canonicalize_url(url) == "https://www.indeed.com/viewjob?jk=0123456789abcdef"
+
+    def test_indeed_keeps_country_host(self):
+        assert canonicalize_url("https://sg.indeed.com/viewjob?jk=0123456789abcdef") == \
+            "https://sg.indeed.com/viewjob?jk=0123456789abcdef"
+
+    @pytest.mark.parametrize("url", [
+        "https://www.jobstreet.com.sg/job/78123456?type=standout&ref=search",
+        "https://www.jobstreet.com.sg/en/job/data-engineer-78123456",
+        "https://www.jobstreet.com.sg/jobs?jobId=78123456",
+    ])
+    def test_jobstreet(self, url):
+        assert canonicalize_url(url) == "https://www.jobstreet.com.sg/job/78123456"
+
+    def test_generic_cleanup(self):
+        url = "HTTP://Careers.Example.COM:80/jobs/123/?utm_source=x&b=2&a=1&gclid=abc#apply"
+        assert canonicalize_url(url) == "https://careers.example.com/jobs/123?a=1&b=2"
+
+    def test_portal_url_without_job_id_is_cleaned_generically(self):
+        url = "https://www.linkedin.com/company/acme/?trk=public_profile"
+        assert canonicalize_url(url) == "https://www.linkedin.com/company/acme"
+
+    @pytest.mark.parametrize("url", [
+        "https://careers.example.com/apply?token=42&type=intern",
+        "https://jobs.example.com/posting?from=2024&pub=7&source=12",
+    ])
+    def test_generic_names_identify_postings_on_other_sites(self, url):
+        assert canonicalize_url(url) == url
+
+
+class TestSeenURLFilter:
+    """Test the persistent seen-URL Bloom filter"""
+
+    def test_optimal_size(self):
+        num_bits, num_hashes = optimal_size(1000, 0.01)
+        assert 9500 < num_bits < 9700
+        assert num_hashes == 7
+
+    def test_add_and_contains_canonical(self, tmp_path):
+        with SeenURLFilter(str(tmp_path / "seen.bloom"), capacity=1000) as seen:
+            assert seen.add("https://www.linkedin.com/jobs/view/3812345678?trk=abc")
+            assert not seen.add("https://sg.linkedin.com/jobs/view/3812345678")
+            assert "https://www.linkedin.com/jobs/view/data-engineer-3812345678" in seen
+            assert "https://www.linkedin.com/jobs/view/3812345679" not in seen
+            assert seen.count == 1
+
+    def test_filter_new_urls(self, tmp_path):
+        with SeenURLFilter(str(tmp_path / "seen.bloom"), capacity=1000) as seen:
+            seen.add("https://example.com/job/1")
+            new_urls = seen.filter_new_urls([
+                "https://example.com/job/1?utm_source=feed",
+                "https://example.com/job/2",
+                "https://example.com/job/2/",
+                "https://example.com/job/3",
+            ])
+            assert new_urls == ["https://example.com/job/2", "https://example.com/job/3"]
+
+    def test_persists_across_reopen(self, tmp_path):
+        path = str(tmp_path / "seen.bloom")
+        with SeenURLFilter(path, capacity=1000) as seen:
+            seen.add_many(f"https://example.com/job/{i}" for i in range(100))
+        with SeenURLFilter(path) as seen:
+            assert seen.count == 100
+            assert seen.capacity == 1000
+            assert all(f"https://example.com/job/{i}" in seen for i in range(100))
+
+    def test_count_is_shared_between_handles(self, tmp_path):
+        """Test that writers holding the same file do not overwrite each other's header count"""
+        path = str(tmp_path / "seen.bloom")
+        with SeenURLFilter(path, capacity=1000) as first, SeenURLFilter(path) as second:
+            first.add_many(f"https://example.com/job/{i}" for i in range(10))
+            second.add_many(f"https://example.com/job/{i}" for i in range(10, 15))
+            first.add("https://example.com/job/15")
+            assert first.count == 16
+            assert second.stats()["count"] == 16
+            assert "https://example.com/job/3" in second
+
+    def test_rejects_foreign_file(self, tmp_path):
+        path = tmp_path / "seen.bloom"
+        path.write_bytes(b"not a bloom filter" * 4)
+        with pytest.raises(ValueError):
+            SeenURLFilter(str(path))
+
+    def test_reported_false_positive_rate(self, tmp_path):
+        with SeenURLFilter(str(tmp_path / "seen.bloom"), capacity=2000, false_positive_rate=0.01) as seen:
+            seen.add_many(f"https://example.com/job/{i}" for i in range(2000))
+            stats = seen.stats()
+            measured = sum(f"https://example.com/other/{i}" in seen for i in range(20000)) / 20000
+
+        assert stats["false_positive_rate"] == pytest.approx(0.01, rel=0.3)
+        assert stats["expected_false_positive_rate"] == pytest.approx(0.01, rel=0.3)
+        assert measured < 0.02
+
+    def test_rebuild_from_database(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        for i in range(50):
+            url = f"https://www.linkedin.com/jobs/view/analyst-{1000 + i}?refId=x"
+            title = f"Analyst {i}"
+            session.add(Job(id=Job.generate_id(url, "Acme", title, "SG"), url=url, title=title,
+                            company="Acme", location="SG", source="linkedin"))
+        session.commit()
+        session.close()
+
+        path = str(tmp_path / "seen.bloom")
+        with SeenURLFilter(path, capacity=10) as seen:
+            seen.add("https://example.com/stale")
+            stats = seen.rebuild_from_database(engine)
+
+            assert stats["count"] == 50
+            assert stats["capacity"] >= 100
+            assert "https://www.linkedin.com/jobs/view/1000" in seen
+            assert "https://example.com/stale" not in seen
+        assert not (tmp_path / "seen.bloom.tmp").exists()
+        engine.dispose()
+
+
+class FixtureSite(BaseHTTPRequestHandler):
+    """Results pages (/search?page=N, two jobs each, LAST_PAGE is the last) and job pages"""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    LAST_PAGE = 2
+    delay = 0.0  # Seconds each job page takes
+    postings = {}  # /posting/<name> -> (ETag, body); If-None-Match with that ETag gets a 304
+    paths = []
+    conditional = []  # If-None-Match headers received
+    client_ports = set()
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.paths.append(self.path)
+            cls.client_ports.add(self.client_address[1])
+        url = urlsplit(self.path)
+        if url.path == "/search":
+            page = int(parse_qs(url.query)["page"][0])
+            if page > self.LAST_PAGE:
+                return self.reply(200, b"<html>No results</html>")
+            links = "".join(f'<a href="/job/{page}-{i}">Job</a>' for i in range(2))
+            more = '<a rel="next">Next</a>' if page < self.LAST_PAGE else ""
+            return self.reply(200, f"<html>{links}{more}</html>".encode())
+        if url.path.startswith("/job/"):
+            with cls.lock:
+                cls.active += 1
+                cls.max_active = max(cls.max_active, cls.active)
+            time.sleep(cls.delay)
+            with cls.lock:
+                cls.active -= 1
+            return self.reply(200, f"<html><h1>Engineer {url.path[5:]}</h1></html>".encode(),
+                              "text/html; charset=iso-8859-1")
+        if url.path.startswith("/posting/") and url.path[9:] in cls.postings:
+            etag, body = cls.postings[url.path[9:]]
+            if self.headers.get("If-None-Match"):
+                cls.conditional.append(self.headers["If-None-Match"])
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if url.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", parse_qs(url.query)["to"][0])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if url.path == "/big":
+            return self.reply(200, b"x" * 50000)
+        if url.path == "/stream":  # No Content-Length: the body ends when the connection closes
+            self.send_response(200)
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(b"y" * 50000)
+            self.close_connection = True
+            return
+        self.reply(404, b"Not found")
+
+    def reply(self, status, body, content_type="text/html"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FixtureAdapter(SiteAdapter):
+    name = "fixture"
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def search_url(self, query, location, page):
+        return f"{self.base_url}/search?q={query}&page={page}"
+
+    def parse_listing(self, result):
+        return ListingPage(
+            job_urls=[self.base_url + href for href in re.findall(r'href="(/job/[^"]+)"', result.text)],
+            has_next='rel="next"' in result.text,
+        )
+
+    def parse_job(self, result):
+        title = re.search(r"<h1>(.*?)</h1>", result.text).group(1)
+        return {"company": "Fixture", "title": title, "location": "Remote", "description": result.text}
+
+
+@pytest.fixture
+def site():
+    FixtureSite.paths = []
+    FixtureSite.postings = {}
+    FixtureSite.conditional = []
+    FixtureSite.client_ports = set()
+    FixtureSite.delay = 0.0
+    FixtureSite.active = FixtureSite.max_active = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FixtureSite)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fetch_all(limits, coroutine_factory):
+    async def run():
+        async with HTTPEngine(limits) as engine:
+            return await coroutine_factory(engine), engine.stats
+    return asyncio.run(run())
+
+
+class TestHTTPEngine:
+    """Test the async fetch engine against a local fixture site"""
+
+    def test_keep_alive_reuses_connection(self, site):
+        """Test sequential requests to one host share a pooled connection"""
+        async def fetch_sequentially(engine):
+            return [await engine.fetch(f"{site}/job/0-{i}") for i in range(5)]
+
+        results, stats = fetch_all(HTTPLimits(), fetch_sequentially)
+
+        assert all(result.ok for result in results)
+        assert results[0].text == "<html><h1>Engineer 0-0</h1></html>"
+        assert results[0].http_version == "HTTP/1.1"
+        assert stats["requests"] == 5
+        assert len(FixtureSite.client_ports) == 1
+
+    def test_per_host_concurrency_cap(self, site):
+        """Test no more than connections_per_host requests are in flight per host"""
+        FixtureSite.delay = 0.05
+        results, _ = fetch_all(HTTPLimits(connections_per_host=2),
+                               lambda engine: engine.fetch_many(f"{site}/job/0-{i}" for i in range(8)))
+
+        assert [result.url for result in results] == [f"{site}/job/0-{i}" for i in range(8)]
+        assert FixtureSite.max_active == 2
+        assert len(FixtureSite.client_ports) == 2
+
+    def test_response_size_cap(self, site):
+        """Test oversized bodies are cut off at the cap, with or without a Content-Length"""
+        limits = HTTPLimits(max_response_mb=0.01)
+        (big, streamed, small), stats = fetch_all(
+            limits, lambda engine: engine.fetch_many([f"{site}/big", f"{site}/stream", f"{site}/job/0-0"]))
+
+        assert big.truncated and big.content == b"x" * limits.max_response_bytes and not big.ok
+        assert streamed.truncated and len(streamed.content) == limits.max_response_bytes
+        assert "exceeds" in streamed.error
+        assert small.ok
+        assert stats["truncated"] == 2
+
+    def test_cross_host_redirect_uses_the_target_host_pool(self, site):
+        """Test a redirect to another host is fetched through that host's own client"""
+        other = site.replace("127.0.0.1", "localhost")
+
+        async def fetch(engine):
+            result = await engine.fetch(f"{site}/redirect?to={other}/job/0-0")
+            looped = await engine.fetch(f"{site}/redirect?to=/redirect?to=/job/0-1")
+            return result, looped, sorted(engine._clients)
+
+        (result, looped, clients), stats = fetch_all(HTTPLimits(connections_per_host=1), fetch)
+
+        assert result.ok and result.text == "<html><h1>Engineer 0-0</h1></html>"
+        assert result.url == f"{site}/redirect?to={other}/job/0-0"
+        assert result.final_url == f"{other}/job/0-0"
+        assert clients == sorted([origin(site), origin(other)])
+        assert looped.ok and looped.final_url == f"{site}/job/0-1"
+        assert stats["requests"] == 2
+
+    def test_errors_are_returned(self, site):
+        """Test HTTP error statuses and connection failures come back as results"""
+        (missing, unreachable), stats = fetch_all(
+            HTTPLimits(timeout_seconds=2),
+            lambda engine: engine.fetch_many([f"{site}/missing", "http://127.0.0.1:9/nothing"]))
+
+        assert (missing.status_code, missing.error, missing.ok) == (404, None, False)
+        assert unreachable.status_code == 0 and unreachable.error
+        assert stats["errors"] == 1
+
+    def test_crawl_prefetches_next_page(self, site, tmp_path):
+        """Test crawling every results page, skipping seen jobs, with speculative prefetch"""
+        adapter = FixtureAdapter(site)
+
+        async def crawl(engine):
+            with SeenURLFilter(str(tmp_path / "seen.bloom"), capacity=100) as seen:
+                seen.add(f"{site}/job/1-0")
+                jobs = [job async for job in engine.crawl(adapter, "data", max_pages=5, seen=seen)]
+                assert seen.count == 6
+                assert f"{site}/job/2-1" in seen
+                return jobs
+
+        jobs, stats = fetch_all(HTTPLimits(), crawl)
+
+        assert sorted(job["title"] for job in jobs) == ["Engineer 0-0", "Engineer 0-1", "Engineer 1-1",
+                                                        "Engineer 2-0", "Engineer 2-1"]
+        assert {job["source"] for job in jobs} == {"fixture"}
+        assert jobs[0]["url"].startswith(f"{site}/job/")
+        assert f"/job/1-0" not in FixtureSite.paths
+        assert (stats["prefetched"], stats["prefetch_used"]) == (3, 2)
+
+    def test_crawl_without_prefetch(self, site):
+        """Test the next page is only requested after the current one is processed"""
+        jobs, stats = fetch_all(
+            HTTPLimits(prefetch=False),
+            lambda engine: _collect(engine.crawl(FixtureAdapter(site), "data", max_pages=2)))
+
+        assert len(jobs) == 4
+        assert [path for path in FixtureSite.paths if path.startswith("/search")] == \
+            ["/search?q=data&page=0", "/search?q=data&page=1"]
+        assert FixtureSite.paths.index("/search?q=data&page=1") > FixtureSite.paths.index("/job/0-1")
+        assert stats["prefetched"] == 0
+
+
+async def _collect(jobs):
+    return [job async for job in jobs]
+
+
+class TestRescraper:
+    """Test conditional re-scraping of stale jobs against the fixture site"""
+
+    @pytest.fixture
+    def db(self, tmp_path):
+        pytest.importorskip("aiosqlite")
+        from src.database.async_engine import AsyncDatabaseManager, create_async_db_engine
+        manager = AsyncDatabaseManager(bind=create_async_db_engine(f"sqlite:///{tmp_path / 'jobs.db'}"))
+        asyncio.run(manager.create_all_tables())
+        yield manager
+        asyncio.run(manager.close())
+
+    def posting(self, site, name, body, source="fixture", etag=None):
+        return {"id": name, "url": f"{site}/posting/{name}", "company": "Fixture", "title": f"Engineer {name}",
+                "location": "Remote", "description": body, "source": source, "etag": etag,
+                "scraped_at": datetime.utcnow() - timedelta(days=30)}
+
+    def test_rescrape(self, site, db):
+        """Test 304s, unchanged pages, changed pages and removed postings"""
+        page = lambda name, text: f"<html><h1>Engineer {name}</h1>{text}</html>"
+        FixtureSite.postings = {
+            "same-etag": ('"a1"', page("same-etag", "Spark").encode()),
+            "same-text": ('"b2"', page("same-text", "SQL").encode()),
+            "edited": ('"c2"', page("edited", "Spark and Kafka").encode()),
+        }
+        rows = [
+            self.posting(site, "same-etag", page("same-etag", "Spark"), etag='"a1"'),
+            self.posting(site, "same-text", page("same-text", "SQL"), etag='"b1"'),
+            self.posting(site, "edited", page("edited", "Spark")),
+            self.posting(site, "removed", "<html><h1>Engineer removed</h1></html>"),
+            self.posting(site, "other-site", "<html></html>", source="elsewhere"),
+        ]
+
+        async def run():
+            await db.bulk_upsert_jobs(rows)
+            before = {row["id"]: (await db.get_job(row["id"])).updated_at for row in rows}
+            async with HTTPEngine(HTTPLimits()) as engine:
+                rescraper = Rescraper(db, engine, {"fixture": FixtureAdapter(site)}, batch_size=2)
+                first = await rescraper.run(threshold_days=7)
+                second = await rescraper.run(threshold_days=7)
+            jobs = {row["id"]: await db.get_job(row["id"]) for row in rows}
+            return before, first, second, jobs
+
+        before, first, second, jobs = asyncio.run(run())
+
+        assert {name: first[name] for name in ("checked", "not_modified", "unchanged", "changed", "gone", "failed")} \
+            == {"checked": 4, "not_modified": 1, "unchanged": 1, "changed": 1, "gone": 1, "failed": 0}
+        assert second["checked"] == 0
+        assert sorted(FixtureSite.conditional) == ['"a1"', '"b1"']
+        assert jobs["same-text"].etag == '"b2"'
+        assert "Kafka" in jobs["edited"].description and jobs["edited"].etag == '"c2"'
+        for name in ("same-etag", "same-text", "removed"):
+            assert jobs[name].updated_at == before[name]
+        assert jobs["edited"].updated_at > before["edited"]
+        assert jobs["other-site"].is_stale(7) and not jobs["removed"].is_stale(7)
@@ -0,0 +1,87 @@
+"""Import-time budget and side-effect tests for the CLI entry point"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).parent.parent / "src"
+
+# Cumulative import time allowed for src/main.py (click + our modules; loguru loads on first log call)
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "100"))
+
+# Modules that --help and the SQLite status fast path must not import
+HEAVY_MODULES = ("sqlalchemy", "cryptography", "database.models", "database.engine")
+
+
+def run_python(args, cwd):
+    return subprocess.run(
+        [sys.executable, *args], cwd=cwd, capture_output=True, text=True,
+        env={**os.environ, "DATABASE_URL": "sqlite:///database/jobs.db"},
+    )
+
+
+def imported_modules(importtime_stderr: str) -> dict:
+    """Module name -> cumulative import time (ms) from -X importtime output"""
+    modules = {}
+    for line in importtime_stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, cumulative_us, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+            modules[name] = int(cumulative_us) / 1000
+    return modules
+
+
+def heavy(modules) -> list:
+    return sorted(name for name in modules if name in HEAVY_MODULES or name.split(".")[0] in HEAVY_MODULES)
+
+
+class TestStartup:
+    """Test that CLI startup stays lazy and within its import budget"""
+
+    def test_import_has_no_side_effects(self, tmp_path):
+        """Test importing the CLI and packages creates no files and loads no heavy modules"""
+        code = (
+            f"import sys; sys.path.insert(0, {str(SRC)!r}); "
+            "import main, database, customizer; "
+            "print(','.join(sorted(sys.modules)))"
+        )
+        result = run_python(["-c", code], tmp_path)
+        assert result.returncode == 0, result.stderr
+        assert heavy(result.stdout.strip().split(",")) == []
+        assert list(tmp_path.iterdir()) == []  # No logs/, database/ or output/resumes
+
+    def test_import_time_budget(self, tmp_path):
+        """Test main.py imports within IMPORT_BUDGET_MS (best of three runs)"""
+        code = f"import sys; sys.path.insert(0, {str(SRC)!r}); import main"
+        timings = []
+        for _ in range(3):
+            result = run_python(["-X", "importtime", "-c", code], tmp_path)
+            assert result.returncode == 0, result.stderr
+            modules = imported_modules(result.stderr)
+            assert "loguru" not in modules
+            timings.append(modules["main"])
+        assert min(timings) < IMPORT_BUDGET_MS, f"main imports in {min(timings):.0f} ms"
+
+    def test_help_and_status_skip_sqlalchemy(self, tmp_path):
+        """Test --help and status on an initialized SQLite database never import SQLAlchemy"""
+        init = run_python([str(SRC / "main.py"), "init-db"], tmp_path)
+        assert init.returncode == 0, init.stderr
+
+        help_run = run_python(["-X", "importtime", str(SRC / "main.py"), "--help"], tmp_path)
+        assert help_run.returncode == 0
+        assert heavy(imported_modules(help_run.stderr)) == []
+        assert "loguru" not in imported_modules(help_run.stderr)
+
+        status = run_python(["-X", "importtime", str(SRC / "main.py"), "status"], tmp_path)
+        assert status.returncode == 0, status.stderr
+        assert "Total Jobs Scraped: 0" in status.stdout
+        assert heavy(imported_modules(status.stderr)) == []
+
+    @pytest.mark.parametrize("args", [["status", "--recount"], ["test-db"]])
+    def test_database_commands_still_work(self, tmp_path, args):
+        """Test commands that need the ORM import it on demand"""
+        assert run_python([str(SRC / "main.py"), "init-db"], tmp_path).returncode == 0
+        result = run_python([str(SRC / "main.py"), *args], tmp_path)
+        assert result.returncode == 0, result.stderr